@@ -0,0 +1,93 @@
+"""
+Скрипт для заполнения манифестов вариантов у фотографий, загруженных до их появления.
+Бакет MinIO листается один раз на квартиру.
+Запуск: python -m scripts.backfill_photo_manifests [--read-dimensions] [--force]
+"""
+
+import sys
+import os
+import argparse
+import logging
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.database import SessionLocal
+from src.models.apartment import ApartmentPhoto
+from src.services.minio_service import MinioService
+from src.services.photo_manifest_service import has_manifest, get_image_id
+# Регистрирует синхронизацию карточек каталога и его индекса при изменении фотографий
+import src.services.catalog_service  # noqa: F401
+import src.services.catalog_index  # noqa: F401
+
+# Настройка логгера
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_photo_manifests(read_dimensions: bool = False, force: bool = False):
+    """
+    Заполняет photo_metadata фотографий манифестом вариантов из MinIO.
+
+    Args:
+        read_dimensions: Читать заголовки файлов для определения размеров вариантов
+        force: Перезаписать уже существующие манифесты
+    """
+    db = SessionLocal()
+    minio_service = MinioService()
+    updated = 0
+    missing = 0
+
+    try:
+        apartment_ids = [
+            row[0] for row in db.query(ApartmentPhoto.apartment_id).distinct().order_by(ApartmentPhoto.apartment_id)
+        ]
+
+        for apartment_id in apartment_ids:
+            photos = db.query(ApartmentPhoto).filter(ApartmentPhoto.apartment_id == apartment_id).all()
+            photos = [photo for photo in photos if force or not has_manifest(photo.photo_metadata)]
+            if not photos:
+                continue
+
+            # Один листинг бакета на квартиру
+            images = minio_service.list_apartment_image_variants(apartment_id, read_dimensions=read_dimensions)
+
+            for photo in photos:
+                image_id = get_image_id(photo.photo_metadata, photo.url)
+                variants = images.get(image_id) if image_id else None
+
+                if not variants:
+                    logger.warning(f"Варианты не найдены для фото {photo.id} (квартира {apartment_id})")
+                    missing += 1
+                    continue
+
+                # Присваиваем новый словарь, чтобы изменение JSONB было отслежено
+                photo_metadata = dict(photo.photo_metadata or {})
+                photo_metadata.update({
+                    "image_id": image_id,
+                    "variants": variants,
+                    "processing_status": "completed"
+                })
+                photo.photo_metadata = photo_metadata
+                updated += 1
+
+            db.commit()
+            logger.info(f"Квартира {apartment_id}: обработано фотографий - {len(photos)}")
+
+        logger.info(f"Манифесты заполнены: {updated}, без вариантов в хранилище: {missing}")
+    except Exception as e:
+        logger.error(f"Ошибка при заполнении манифестов: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заполнение манифестов вариантов фотографий")
+    parser.add_argument("--read-dimensions", action="store_true",
+                        help="Определять размеры вариантов по заголовкам файлов")
+    parser.add_argument("--force", action="store_true",
+                        help="Перезаписать существующие манифесты")
+    args = parser.parse_args()
+
+    backfill_photo_manifests(read_dimensions=args.read_dimensions, force=args.force)
@@ -0,0 +1,125 @@
+"""
+Бенчмарк кодеков значений кеша: время кодирования/декодирования и размер
+значения для типичных семейств ключей (на синтетических данных, без Redis и БД).
+Для сравнения приводится pickle pydantic-моделей (прежний формат CacheService).
+Запуск: python -m scripts.benchmark_cache_codec [--compress-min-size N]
+"""
+
+import sys
+import os
+import argparse
+import pickle
+import timeit
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import settings
+from src.schemas.apartment import (
+    ApartmentDetail, ApartmentInList, CatalogFacets, PaginatedApartments, PriceHistogram
+)
+from src.utils.cache_codec import (
+    COMPRESSION_LZ4, COMPRESSION_NONE, COMPRESSION_ZSTD, SERIALIZER_MSGPACK, SERIALIZER_ORJSON, CacheCodec
+)
+
+
+def _photo_url(apartment_id: int, index: int) -> str:
+    return f"https://cdn.example.com/apartments/{apartment_id}/{index:08x}-8f1c2a/medium.webp"
+
+
+def build_families() -> Dict[str, Any]:
+    """
+    Типичные значения семейств ключей кеша.
+
+    Returns:
+        Dict[str, Any]: Семейство -> значение
+    """
+    created_at = datetime(2024, 3, 1, 12, 0, 0)
+    items = [
+        ApartmentInList(
+            id=apartment_id, title=f"Уютная квартира у парка №{apartment_id}", price_rub=2500 + apartment_id * 10,
+            rooms=1 + apartment_id % 4, floor=1 + apartment_id % 12, area_m2=30.5 + apartment_id % 50,
+            address=f"ул. Ленина, д. {apartment_id}", cover_url=_photo_url(apartment_id, 0)
+        )
+        for apartment_id in range(1, 13)
+    ]
+    return {
+        "apartments_search (ID)": list(range(1000, 1300)),
+        "apartment_detail": ApartmentDetail(
+            id=1, title="Уютная квартира у парка", price_rub=3200, rooms=2, floor=5, area_m2=54.2,
+            address="ул. Ленина, д. 1", description="Светлая квартира с ремонтом и видом на парк. " * 8,
+            active=True, booking_enabled=True, photos=[_photo_url(1, index) for index in range(15)],
+            created_at=created_at, updated_at=created_at + timedelta(days=3)
+        ),
+        "apartments_list": PaginatedApartments(page=1, page_size=12, total=240, items=items),
+        "catalog_facets": CatalogFacets(
+            total=240, rooms={1: 60, 2: 90, 3: 60, 4: 30}, booking_enabled={"true": 200, "false": 40},
+            price_histogram=PriceHistogram(edges=list(range(2000, 7500, 500)), counts=[22] * 10),
+            price_min=2000, price_max=7000, area_min=18.0, area_max=120.5
+        ),
+    }
+
+
+def build_codecs(compress_min_size: int) -> List[Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    """
+    Сравниваемые варианты кодирования.
+
+    Args:
+        compress_min_size: Минимальный размер значения для сжатия
+
+    Returns:
+        List[Tuple]: (название, кодирование, декодирование)
+    """
+    codecs = [("pickle", pickle.dumps, pickle.loads)]
+    for serializer in (SERIALIZER_ORJSON, SERIALIZER_MSGPACK):
+        for compression in (COMPRESSION_NONE, COMPRESSION_ZSTD, COMPRESSION_LZ4):
+            codec = CacheCodec(serializer, compression, compress_min_size=compress_min_size)
+            codecs.append((f"{serializer}+{compression}", codec.encode, codec.decode))
+    return codecs
+
+
+def measure(func: Callable[[], Any]) -> float:
+    """
+    Среднее время вызова в микросекундах.
+
+    Args:
+        func: Замеряемая функция
+
+    Returns:
+        float: Время одного вызова (мкс)
+    """
+    timer = timeit.Timer(func)
+    # Число вызовов подбирается так, чтобы замер занимал не меньше 0.2 с
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+
+def run_benchmark(compress_min_size: int):
+    """
+    Печатает таблицу результатов по семействам ключей.
+
+    Args:
+        compress_min_size: Минимальный размер значения для сжатия
+    """
+    codecs = build_codecs(compress_min_size)
+    print(f"Сжатие от {compress_min_size} байт\n")
+    print(f"{'семейство':<24} {'кодек':<16} {'байт':>7} {'encode, мкс':>12} {'decode, мкс':>12}")
+
+    for family, value in build_families().items():
+        for name, encode, decode in codecs:
+            encoded = encode(value)
+            encode_time = measure(lambda: encode(value))
+            decode_time = measure(lambda: decode(encoded))
+            print(f"{family:<24} {name:<16} {len(encoded):>7} {encode_time:>12.1f} {decode_time:>12.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк кодеков значений кеша")
+    parser.add_argument("--compress-min-size", type=int, default=settings.CACHE_CODEC_COMPRESS_MIN_SIZE,
+                        help="Минимальный размер значения для сжатия (по умолчанию из настроек)")
+    args = parser.parse_args()
+
+    run_benchmark(args.compress_min_size)
@@ -0,0 +1,170 @@
+"""
+Бенчмарк обработки загруженной фотографии: процессорное время и прирост пиковой
+памяти процесса на построение вариантов для MinioService (без хранилища).
+Прежний путь декодирует исходник для каждого варианта и уменьшает его с полного
+разрешения; новый декодирует один раз (JPEG - сразу в уменьшенном разрешении)
+и строит размеры каскадом.
+Запуск: python -m scripts.benchmark_image_pipeline [--width W --height H --repeat N]
+"""
+
+import sys
+import os
+import argparse
+import io
+import multiprocessing
+import resource
+import time
+from typing import Callable, Dict
+
+from PIL import Image
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import settings
+from src.services.image_service import ImageFormat, ImageService, ImageSize, _encode_workers
+
+# Варианты, которые строит MinioService.upload_image_with_manifest
+VARIANTS = [
+    (ImageSize.THUMBNAIL, ImageFormat.WEBP),
+    (ImageSize.SMALL, ImageFormat.WEBP),
+    (ImageSize.MEDIUM, ImageFormat.WEBP),
+    (ImageSize.SMALL, ImageFormat.JPEG),
+    (ImageSize.ORIGINAL, ImageFormat.JPEG)
+]
+
+
+def build_photo(width: int, height: int) -> bytes:
+    """
+    Синтетическая фотография: шум поверх градиента, JPEG с EXIF-ориентацией.
+
+    Args:
+        width: Ширина
+        height: Высота
+
+    Returns:
+        bytes: Содержимое JPEG
+    """
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90° по часовой
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=92, exif=exif.tobytes())
+    return output.getvalue()
+
+
+def legacy_pipeline(file_content: bytes) -> Dict[str, bytes]:
+    """Прежняя обработка: отдельное декодирование для сведений и каждого варианта."""
+    ImageService.get_image_info(file_content)
+    result = {}
+    for size, fmt in VARIANTS:
+        if size == ImageSize.ORIGINAL:
+            img = ImageService.optimize_original_image(file_content)
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=settings.JPEG_QUALITY, optimize=True)
+            result[f"{size.value}_{fmt.value}"] = output.getvalue()
+        else:
+            result[f"{size.value}_{fmt.value}"] = ImageService.create_image_variant(file_content, size, fmt)
+    return result
+
+
+def cascade_pipeline(file_content: bytes) -> Dict[str, bytes]:
+    """Новая обработка: одно декодирование, каскад уменьшений и параллельное кодирование."""
+    img, _ = ImageService.decode_image(file_content)
+    resized = ImageService.resize_cascade(img, {size for size, _ in VARIANTS})
+    return ImageService.encode_variants(resized, VARIANTS)
+
+
+def measure(func: Callable[[bytes], Dict[str, bytes]], file_content: bytes, repeat: int) -> Dict[str, float]:
+    """
+    Процессорное и реальное время одной обработки (лучшее из repeat).
+
+    Args:
+        func: Обработка
+        file_content: Исходная фотография
+        repeat: Число повторов
+
+    Returns:
+        Dict[str, float]: {"cpu_ms", "wall_ms", "bytes"}
+    """
+    best_cpu = best_wall = float("inf")
+    total_bytes = 0
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        result = func(file_content)
+        best_cpu = min(best_cpu, time.process_time() - cpu_start)
+        best_wall = min(best_wall, time.perf_counter() - wall_start)
+        total_bytes = sum(len(content) for content in result.values())
+    return {"cpu_ms": best_cpu * 1000, "wall_ms": best_wall * 1000, "bytes": total_bytes}
+
+
+def _peak_memory_worker(func: Callable[[bytes], Dict[str, bytes]], file_content: bytes, queue) -> None:
+    with open("/proc/self/statm") as statm:
+        rss_kb = int(statm.read().split()[1]) * resource.getpagesize() / 1024
+    func(file_content)
+    queue.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_kb)
+
+
+def measure_peak_memory(func: Callable[[bytes], Dict[str, bytes]], file_content: bytes) -> float:
+    """
+    Прирост пиковой памяти (RSS) процесса за одну обработку (Linux).
+
+    Обработка выполняется в отдельном процессе, чтобы пик не наследовался от
+    предыдущих замеров.
+
+    Args:
+        func: Обработка
+        file_content: Исходная фотография
+
+    Returns:
+        float: Прирост пикового RSS (МБ)
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_peak_memory_worker, args=(func, file_content, queue))
+    process.start()
+    peak_kb = queue.get()
+    process.join()
+    return max(peak_kb, 0) / 1024
+
+
+def run_benchmark(width: int, height: int, repeat: int):
+    """
+    Печатает время обработки одной загрузки прежним и новым способом.
+
+    Args:
+        width: Ширина исходника
+        height: Высота исходника
+        repeat: Число повторов
+    """
+    file_content = build_photo(width, height)
+    print(
+        f"Исходник {width}x{height}, {len(file_content) / 1024:.0f} КБ, {len(VARIANTS)} вариантов, "
+        f"потоков кодирования: {_encode_workers()}\n"
+    )
+    print(f"{'обработка':<12} {'CPU, мс':>10} {'время, мс':>10} {'пик RSS, МБ':>12} {'вариантов, КБ':>14}")
+
+    results = {}
+    for name, func in (("legacy", legacy_pipeline), ("cascade", cascade_pipeline)):
+        results[name] = measure(func, file_content, repeat)
+        stats = results[name]
+        peak_mb = measure_peak_memory(func, file_content)
+        print(
+            f"{name:<12} {stats['cpu_ms']:>10.0f} {stats['wall_ms']:>10.0f} {peak_mb:>12.0f} "
+            f"{stats['bytes'] / 1024:>14.0f}"
+        )
+
+    print(f"\nCPU на загрузку: x{results['legacy']['cpu_ms'] / results['cascade']['cpu_ms']:.1f} меньше")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк обработки загруженной фотографии")
+    parser.add_argument("--width", type=int, default=4032, help="Ширина исходника")
+    parser.add_argument("--height", type=int, default=3024, help="Высота исходника")
+    parser.add_argument("--repeat", type=int, default=3, help="Число повторов (берется лучшее время)")
+    args = parser.parse_args()
+
+    run_benchmark(args.width, args.height, args.repeat)
@@ -16,6 +16,8 @@ from src.schemas.admin import (
 from src.middleware.auth import get_current_active_user, check_permissions
 from src.middleware.acl import require_apartments_read, require_apartments_write
 from src.services.event_log_service import log_event, log_action
+from src.services.counter_service import counter_service
+from src.services.search_service import SearchService
 from src.models.auth.role import RolePermission
 
 router = APIRouter(prefix="/apartments", tags=["admin-apartments"])
@@ -36,7 +38,8 @@ async def get_apartments(
     """
     Получение списка квартир для админ-панели с возможностью поиска и фильтрации.
 
-    - **search**: Поисковый запрос (ищет в заголовке и адресе)
+    - **search**: Поисковый запрос (полнотекстовый поиск по заголовку, адресу и описанию,
+      нечеткий поиск и поиск подстроки в заголовке и адресе)
     - **page**: Номер страницы
     - **page_size**: Размер страницы
     - **sort**: Поле для сортировки (created_at, price_rub, title)
@@ -50,16 +53,16 @@ async def get_apartments(
     if active_only:
         query = query.filter(Apartment.active.is_(True))
 
-    # Поиск по заголовку и адресу
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Apartment.title.ilike(search_term)) |
-            (Apartment.address.ilike(search_term))
-        )
+    # Поиск по заголовку, адресу и описанию
+    # (подстрока ищется по исходному запросу: в адресах важна пунктуация)
+    normalized_search = SearchService.normalize_query(search) if search else None
+    if normalized_search:
+        query = query.filter(SearchService.build_condition(normalized_search, substring=search))
 
-    # Получаем общее количество квартир
-    total = query.count()
+    # Получаем общее количество квартир (без поиска - из счетчика)
+    total = None if normalized_search else counter_service.get_apartments_count(active_only=active_only)
+    if total is None:
+        total = query.count()
 
     # Определяем порядок сортировки
     sort_column = getattr(Apartment, sort)
@@ -77,13 +80,22 @@ async def get_apartments(
         page_size
     ).all()
 
+    # Получаем количество фотографий для всей страницы (из счетчиков или одним запросом)
+    apartment_ids = [apartment.id for apartment in apartments]
+    photo_counts = counter_service.get_photo_counts(apartment_ids)
+    if photo_counts is None:
+        photo_counts = dict(db.query(
+            ApartmentPhoto.apartment_id, func.count(ApartmentPhoto.id)
+        ).filter(
+            ApartmentPhoto.apartment_id.in_(apartment_ids)
+        ).group_by(
+            ApartmentPhoto.apartment_id
+        ).all())
+
     # Подготавливаем результат
     items = []
     for apartment in apartments:
-        # Получаем количество фотографий
-        photos_count = db.query(func.count(ApartmentPhoto.id)).filter(
-            ApartmentPhoto.apartment_id == apartment.id
-        ).scalar()
+        photos_count = photo_counts.get(apartment.id, 0)
 
         # Получаем URL обложки (если есть)
         cover_photo = db.query(ApartmentPhoto).filter(
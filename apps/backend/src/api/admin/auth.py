@@ -1,19 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 from datetime import datetime
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models.auth import User
 from src.models.event_log import EventType, EntityType
 from src.schemas.admin import LoginRequest, Token, RefreshTokenRequest, ChangePasswordRequest
 from src.services.auth import (
-    verify_password, create_tokens_for_user, verify_refresh_token,
-    add_token_to_blacklist
+    verify_password, create_tokens_for_user, averify_refresh_token,
+    aadd_token_to_blacklist
 )
 from src.middleware.auth import get_current_active_user
-from src.services.event_log_service import log_event
-from src.models.event_log import EntityType, EventType
+from src.services.event_log_service import alog_event
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger(__name__)
@@ -23,7 +23,7 @@ logger = logging.getLogger(__name__)
 async def login(
         request: Request,
         auth_data: LoginRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Вход в систему администратора.
@@ -34,13 +34,13 @@ async def login(
     Возвращает пару JWT-токенов (access и refresh).
     """
     # Ищем пользователя по email
-    user = db.query(User).filter(User.email == auth_data.email).first()
+    user = (await db.execute(select(User).where(User.email == auth_data.email))).scalars().first()
 
     # Проверяем, что пользователь существует и пароль верный
     if not user or not verify_password(auth_data.password, user.password_hash):
         logger.warning(f"Failed login attempt for email: {auth_data.email}")
         # Логируем событие неудачной авторизации
-        log_event(
+        await alog_event(
             db=db,
             event_type=EventType.USER_LOGIN,
             entity_type=EntityType.USER,
@@ -72,10 +72,10 @@ async def login(
 
     # Обновляем информацию о последнем входе
     user.last_login = datetime.now()
-    db.commit()
+    await db.commit()
 
     # Логируем событие успешной авторизации
-    log_event(
+    await alog_event(
         db=db,
         event_type=EventType.USER_LOGIN,
         user_id=user.id,
@@ -95,7 +95,7 @@ async def login(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
         refresh_data: RefreshTokenRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Обновление токена доступа с использованием refresh-токена.
@@ -106,14 +106,14 @@ async def refresh_token(
     """
     try:
         # Проверяем refresh-токен
-        token_data = verify_refresh_token(refresh_data.refresh_token)
+        token_data = await averify_refresh_token(refresh_data.refresh_token)
 
         # Ищем пользователя по данным из токена
-        user = db.query(User).filter(User.id == token_data.user_id).first()
+        user = await db.get(User, token_data.user_id)
 
         if not user or not user.is_active:
             # Добавляем токен в черный список
-            add_token_to_blacklist(refresh_data.refresh_token)
+            await aadd_token_to_blacklist(refresh_data.refresh_token)
 
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -129,7 +129,7 @@ async def refresh_token(
         )
 
         # Добавляем старый refresh-токен в черный список
-        add_token_to_blacklist(refresh_data.refresh_token)
+        await aadd_token_to_blacklist(refresh_data.refresh_token)
 
         return Token(
             access_token=access_token,
@@ -154,7 +154,7 @@ async def logout(
         request: Request,
         refresh_data: RefreshTokenRequest,
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Выход из системы администратора.
@@ -165,10 +165,10 @@ async def logout(
     """
     try:
         # Добавляем refresh-токен в черный список
-        add_token_to_blacklist(refresh_data.refresh_token)
+        await aadd_token_to_blacklist(refresh_data.refresh_token)
 
         # Логируем событие выхода
-        log_event(
+        await alog_event(
             db=db,
             event_type=EventType.USER_LOGOUT,
             user_id=current_user.id,
@@ -190,7 +190,7 @@ async def change_password(
         request: Request,
         password_data: ChangePasswordRequest,
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Изменение пароля пользователя.
@@ -210,10 +210,10 @@ async def change_password(
     current_user.password_hash = hash_password(password_data.new_password)
 
     # Сохраняем изменения в БД
-    db.commit()
+    await db.commit()
 
     # Логируем событие изменения пароля
-    log_event(
+    await alog_event(
         db=db,
         event_type="password_changed",
         user_id=current_user.id,
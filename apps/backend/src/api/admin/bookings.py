@@ -4,16 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import and_, or_, desc, func
-from sqlalchemy.orm import joinedload, Session
+from sqlalchemy.orm import joinedload
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models import Booking, BookingStatus, Apartment, SystemSettings
 from src.schemas import (
     BookingResponse, BookingListResponse, BookingUpdate, BookingStatusUpdate,
     SystemSettingsResponse, BookingGlobalToggle
 )
 from src.models.event_log import EventType, EntityType
-from src.services.event_log_service import log_action
+from src.services.event_log_service import alog_action
+from src.services.counter_service import counter_service
 from src.middleware.auth import get_current_active_user, check_permissions
 from src.models.auth.role import RolePermission
 from src.services.email_service import send_booking_confirmation, send_booking_cancellation
@@ -33,7 +34,7 @@ async def list_bookings(
         to_date: Optional[datetime] = None,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         _: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_BOOKINGS]))
 ):
     """
@@ -68,11 +69,17 @@ async def list_bookings(
     query = query.order_by(desc(Booking.created_at)).offset(skip).limit(limit)
 
     # Выполняем запросы
-    bookings = db.execute(query)
-    total_count = db.execute(count_query)
+    bookings = await db.execute(query)
+
+    # Без фильтров (кроме статуса) общее количество берем из счетчика
+    total = None
+    if not (apartment_id or client_name or from_date or to_date):
+        total = counter_service.get_bookings_count(status)
+    if total is None:
+        total = (await db.execute(count_query)).scalar()
 
     return {
-        "total": total_count.scalar(),
+        "total": total,
         "items": bookings.scalars().all()
     }
 
@@ -80,13 +87,13 @@ async def list_bookings(
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
         booking_id: int = Path(..., description="ID бронирования"),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         _: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_BOOKINGS]))
 ):
     """
     Получить информацию о конкретном бронировании по ID.
     """
-    booking = db.execute(
+    booking = await db.execute(
         select(Booking)
         .options(joinedload(Booking.apartment))
         .where(Booking.id == booking_id)
@@ -106,7 +113,7 @@ async def get_booking(
 async def update_booking(
         booking_data: BookingUpdate,
         booking_id: int = Path(..., description="ID бронирования"),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_BOOKINGS]))
 ):
     """
@@ -114,7 +121,7 @@ async def update_booking(
     """
     # Находим бронирование
     booking_query = select(Booking).where(Booking.id == booking_id)
-    result = db.execute(booking_query)
+    result = await db.execute(booking_query)
     booking = result.scalars().first()
 
     if not booking:
@@ -129,7 +136,7 @@ async def update_booking(
     if update_data:
         for key, value in update_data.items():
             setattr(booking, key, value)
-    log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.BOOKING,
         entity_id=booking.id,
@@ -137,8 +144,8 @@ async def update_booking(
         description=f"Обновлено бронирование #{booking_id} пользователем {current_user.get('username')}",
         user_id=current_user.get('id')
     )
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    await db.refresh(booking)
     return booking
 
 
@@ -146,7 +153,7 @@ async def update_booking(
 async def update_booking_status(
         status_data: BookingStatusUpdate,
         booking_id: int = Path(..., description="ID бронирования"),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_BOOKINGS]))
 ):
     """
@@ -154,7 +161,7 @@ async def update_booking_status(
     """
     # Находим бронирование с информацией о квартире
     booking_query = select(Booking).options(joinedload(Booking.apartment)).where(Booking.id == booking_id)
-    result = db.execute(booking_query)
+    result = await db.execute(booking_query)
     booking = result.scalars().first()
 
     if not booking:
@@ -169,6 +176,8 @@ async def update_booking_status(
 
     # Сохраняем предыдущий статус для логирования
     old_status = booking.status
+    # Квартира загружена вместе с бронированием; после refresh связь не дозагружается
+    apartment_title = booking.apartment.title
 
     # Обновляем статус и комментарий администратора
     booking.status = new_status
@@ -176,7 +185,7 @@ async def update_booking_status(
         booking.admin_comment = status_data.admin_comment
 
     # Логируем изменение статуса
-    log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.BOOKING,
         entity_id=booking.id,
@@ -189,8 +198,8 @@ async def update_booking_status(
         user_id=current_user.get('id')
     )
 
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    await db.refresh(booking)
 
     # Отправляем уведомление по email при изменении статуса
     if booking.client_email:
@@ -200,7 +209,7 @@ async def update_booking_status(
                 booking_id=booking.id,
                 client_name=booking.client_name,
                 client_email=booking.client_email,
-                apartment_title=booking.apartment.title,
+                apartment_title=apartment_title,
                 check_in_date=booking.check_in_date,
                 check_out_date=booking.check_out_date,
                 guests_count=booking.guests_count
@@ -212,7 +221,7 @@ async def update_booking_status(
                 booking_id=booking.id,
                 client_name=booking.client_name,
                 client_email=booking.client_email,
-                apartment_title=booking.apartment.title,
+                apartment_title=apartment_title,
                 check_in_date=booking.check_in_date,
                 check_out_date=booking.check_out_date
             )
@@ -223,14 +232,14 @@ async def update_booking_status(
 @router.delete("/{booking_id}", status_code=204)
 async def delete_booking(
         booking_id: int = Path(..., description="ID бронирования"),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_BOOKINGS]))
 ):
     """
     Удалить бронирование по ID.
     """
     booking_query = select(Booking).where(Booking.id == booking_id)
-    result = db.execute(booking_query)
+    result = await db.execute(booking_query)
     booking = result.scalars().first()
 
     if not booking:
@@ -240,7 +249,7 @@ async def delete_booking(
         )
 
     # Логируем удаление
-    log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.BOOKING,
         entity_id=booking.id,
@@ -249,7 +258,7 @@ async def delete_booking(
         user_id=current_user.get('id')
     )
 
-    db.delete(booking)
-    db.commit()
+    await db.delete(booking)
+    await db.commit()
 
     return None
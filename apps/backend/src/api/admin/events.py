@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from datetime import datetime
 import logging
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models.auth import User
 from src.models.event_log import EventLog
 from src.schemas.admin import EventLogDetail, EventLogListResponse, EventLogFilter
@@ -25,7 +25,7 @@ async def get_event_log(
         entity_type: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(require_events_read)
 ):
     """
@@ -60,7 +60,7 @@ async def get_event_log(
             # Получаем email пользователя (если есть)
             user_email = None
             if event.user_id:
-                user = db.query(User).filter(User.id == event.user_id).first()
+                user = await db.get(User, event.user_id)
                 if user:
                     user_email = user.email
 
@@ -97,7 +97,7 @@ async def get_event_log(
 @router.get("/{event_id}", response_model=EventLogDetail)
 async def get_event_details(
         event_id: str,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(require_events_read)
 ):
     """
@@ -118,7 +118,7 @@ async def get_event_details(
         # Получаем email пользователя (если есть)
         user_email = None
         if event.user_id:
-            user = db.query(User).filter(User.id == event.user_id).first()
+            user = await db.get(User, event.user_id)
             if user:
                 user_email = user.email
 
@@ -150,7 +150,7 @@ async def get_event_details(
 async def get_events_summary(
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(require_events_read)
 ):
     """
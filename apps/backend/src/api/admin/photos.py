@@ -1,14 +1,14 @@
-import asyncio
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, File, UploadFile, Form, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, asc, text
 from typing import Optional, List
 import logging
 
 from src.config import settings
-from src.db.database import get_db, SessionLocal
+from src.db.database import get_db
 from src.models.apartment import Apartment, ApartmentPhoto
 from src.models.auth import User
 from src.models.event_log import EventType, EntityType
@@ -20,6 +20,7 @@ from src.middleware.auth import get_current_active_user
 from src.middleware.acl import require_photos_read, require_photos_write
 from src.services.event_log_service import log_event
 from src.services.minio_service import MinioService
+from src.services.photo_manifest_service import get_variant_urls, get_image_id
 from src.services.image_format_service import ImageFormatService
 from src.celery_worker import process_image
 
@@ -63,10 +64,8 @@ async def get_apartment_photos(
         is_cover = photo.sort_order == 0
 
         # Получаем URL миниатюры (если есть метаданные)
-        thumbnail_url = photo.url
-        if photo.photo_metadata and 'variants' in photo.photo_metadata:
-            variants = photo.photo_metadata.get('variants', {})
-            thumbnail_url = variants.get('thumbnail_webp') or variants.get('thumbnail_jpeg') or photo.url
+        variants = get_variant_urls(photo.photo_metadata)
+        thumbnail_url = variants.get('thumbnail_webp') or variants.get('thumbnail_jpeg') or photo.url
 
         # Создаем объект ответа
         photo_items.append(PhotoAdminListItem(
@@ -177,6 +176,9 @@ async def upload_photo(
         # Получаем информацию об изображении
         image_info = ImageFormatService.get_image_info(file_content)
 
+        # Сохраняем исходник во временное хранилище: в брокер уходит только ключ
+        staging_key, checksum = await run_in_threadpool(minio_service.stage_upload, file_content, apartment_id)
+
         # Вместо блокирующего вызова Celery:
         # 1. Создаем запись в БД с временным URL
         temp_url = f"/processing/apartment_{apartment_id}_{uuid.uuid4()}.jpg"
@@ -204,49 +206,12 @@ async def upload_photo(
         db.commit()
         db.refresh(new_photo)
 
-        # 2. Запускаем обработку в Celery без ожидания результата
+        # 2. Запускаем обработку в Celery без ожидания результата.
+        # По завершении задача сама сохранит URL и манифест вариантов в запись фото.
         logger.info("Calling process_image.delay(...)")
-        task = process_image.delay(file_content, apartment_id)
+        task = process_image.delay(staging_key, checksum, apartment_id, new_photo.id)
         logger.info(f"Task ID: {task.id}")
 
-        # 3. Создаем фоновую задачу для обновления записи после обработки
-        async def update_photo_url():
-            try:
-                # Ждем завершения задачи Celery (с таймаутом)
-                cover_url = task.get(timeout=300)  # 5 минут таймаут
-
-                # Обновляем запись в БД
-                db_session = SessionLocal()
-                try:
-                    photo = db_session.query(ApartmentPhoto).filter(ApartmentPhoto.id == new_photo.id).first()
-                    if photo:
-                        photo.url = cover_url
-                        photo.photo_metadata.update({"processing_status": "completed"})
-                        db_session.commit()
-                finally:
-                    db_session.close()
-            except Exception as e:
-                # В случае ошибки обновляем статус в БД
-                logger.error(f"Error processing photo: {e}")
-                db_session = SessionLocal()
-                try:
-                    photo = db_session.query(ApartmentPhoto).filter(ApartmentPhoto.id == new_photo.id).first()
-                    if photo:
-                        photo.photo_metadata.update({
-                            "processing_status": "failed",
-                            "error": str(e)
-                        })
-                        db_session.commit()
-                finally:
-                    db_session.close()
-
-        # Запускаем фоновую задачу
-        if background_tasks:
-            background_tasks.add_task(update_photo_url)
-        else:
-            # Создаем новую задачу если BackgroundTasks не передан
-            asyncio.create_task(update_photo_url())
-
         # Логируем событие
         log_event(
             db=db,
@@ -496,13 +461,8 @@ async def delete_photo(
         "sort_order": photo.sort_order
     }
 
-    # Пытаемся извлечь image_id из URL для удаления из MinIO
-    image_id = None
-    if photo.url:
-        parts = photo.url.split('/')
-        if len(parts) >= 3:
-            filename = parts[-1]
-            image_id = filename.split('_')[0].split('.')[0]
+    # ID изображения в MinIO берем из манифеста (для старых записей - из URL)
+    image_id = get_image_id(photo.photo_metadata, photo.url)
 
     # Удаляем запись из БД
     db.delete(photo)
@@ -3,12 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models import SystemSettings, Apartment
 from src.schemas import SystemSettingsResponse, SystemSettingsUpdate, BookingGlobalToggle
 from src.middleware.auth import check_permissions
 from src.models.auth.role import RolePermission
-from src.services.event_log_service import log_action
+from src.services.event_log_service import alog_action
 from src.models.event_log import EventType, EntityType
 
 router = APIRouter(
@@ -19,7 +19,7 @@ router = APIRouter(
 
 @router.get("", response_model=SystemSettingsResponse)
 async def get_system_settings(
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         _: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_SETTINGS]))
 ):
     """
@@ -41,7 +41,7 @@ async def get_system_settings(
 @router.patch("", response_model=SystemSettingsResponse)
 async def update_system_settings(
         settings_data: SystemSettingsUpdate,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_SETTINGS]))
 ):
     """
@@ -67,7 +67,7 @@ async def update_system_settings(
         system_settings.updated_by = current_user.get('username')
 
     # Логируем изменения
-    await log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.SYSTEM,
         entity_id=1,  # Для системных настроек используем id=1
@@ -85,7 +85,7 @@ async def update_system_settings(
 @router.patch("/booking-toggle", response_model=SystemSettingsResponse)
 async def toggle_global_booking(
         data: BookingGlobalToggle,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_SETTINGS]))
 ):
     """
@@ -109,7 +109,7 @@ async def toggle_global_booking(
 
     # Логируем изменение
     action = "включена" if data.enabled else "отключена"
-    await log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.SYSTEM,
         entity_id=1,
@@ -128,7 +128,7 @@ async def toggle_global_booking(
 async def toggle_apartment_booking(
         apartment_id: int = Path(..., description="ID квартиры"),
         enable: bool = True,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(check_permissions(required_permissions=[RolePermission.MANAGE_APARTMENTS]))
 ):
     """
@@ -150,7 +150,7 @@ async def toggle_apartment_booking(
 
     # Логируем изменение
     action = "включена" if enable else "отключена"
-    await log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.APARTMENT,
         entity_id=apartment_id,
@@ -1,19 +1,35 @@
 from datetime import datetime
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, BackgroundTasks
+from typing import List, Optional, Dict, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, asc
 
-from src.db.database import get_db
+from src.db.database import get_async_db, get_db
 from src.models.apartment import Apartment, ApartmentPhoto
-from src.schemas.apartment import ApartmentInList, ApartmentDetail, PaginatedApartments
+from src.schemas.apartment import (
+    ApartmentInList, ApartmentDetail, PaginatedApartments, CursorPaginatedApartments, CatalogFacets
+)
 from src.config.settings import settings
+from src.config.redis_settings import CACHE_EXPIRATION, get_materialized_detail_key, get_materialized_list_key
 from src.services.minio_service import MinioService
 from src.services.apartment_service import ApartmentService
+from src.services.catalog_service import CatalogService
+from src.services.catalog_index import CatalogFilters, catalog_index
+from src.services.search_service import SearchService
+from src.services.materialization_service import materialization_service
+from src.services.cache_warmup_service import cache_warmup_service
 from src.services.image_service import ImageSize, ImageFormat
 from src.services.image_format_service import ImageFormatService
 from src.services.cache_service import CacheService
 from src.celery_worker import process_image
+from src.utils.pagination import InvalidCursorError
+from src.utils.cached_response import is_packed, json_response, pack_json, pack_model, unpack_json
+from src.utils.http_cache import (
+    cache_headers, is_not_modified, not_modified_response, version_etag, version_last_modified, versioned_response
+)
+from src.services.resource_version_service import resource_version_service
 
 router = APIRouter(tags=["apartments"])
 
@@ -22,179 +38,454 @@ minio_service = MinioService()
 cache_service = CacheService()
 
 
-# Функция для инвалидации кеша квартиры
-def invalidate_apartment_cache(apartment_id: int):
-    """Фоновая задача для инвалидации кеша квартиры."""
-    cache_service.invalidate_apartment_cache(apartment_id)
-    cache_service.invalidate_apartments_cache()
+async def get_catalog_filters(
+        rooms: Optional[List[int]] = Query(None),
+        price_min: Optional[int] = Query(None, ge=0),
+        price_max: Optional[int] = Query(None, ge=0),
+        area_min: Optional[float] = Query(None, ge=0),
+        area_max: Optional[float] = Query(None, ge=0),
+        floor_min: Optional[int] = Query(None),
+        floor_max: Optional[int] = Query(None),
+        booking_enabled: Optional[bool] = Query(None),
+        q: Optional[str] = Query(None, max_length=200),
+        db: Session = Depends(get_db)
+) -> CatalogFilters:
+    """
+    Фильтры каталога из параметров запроса.
+
+    Args:
+        rooms: Количество комнат (можно указать несколько)
+        price_min / price_max: Диапазон цены
+        area_min / area_max: Диапазон площади
+        floor_min / floor_max: Диапазон этажей
+        booking_enabled: Доступность онлайн-бронирования
+        q: Поисковый запрос (название, адрес, описание)
+        db: Сессия БД
+
+    Returns:
+        CatalogFilters: Фильтры
+    """
+    # Поиск сужает каталог до найденных квартир (в порядке релевантности);
+    # без поиска сессия БД не используется
+    apartment_ids = None
+    if q and SearchService.normalize_query(q):
+        apartment_ids = await run_in_threadpool(SearchService.search_ids, db, q, active_only=True)
+
+    return CatalogFilters(
+        rooms=rooms,
+        price_min=price_min,
+        price_max=price_max,
+        area_min=area_min,
+        area_max=area_max,
+        floor_min=floor_min,
+        floor_max=floor_max,
+        booking_enabled=booking_enabled,
+        apartment_ids=apartment_ids
+    )
 
 
 # Эндпоинт для получения списка квартир
-@router.get("/apartments", response_model=PaginatedApartments)
+@router.get("/apartments", response_model=Union[PaginatedApartments, CursorPaginatedApartments])
 async def get_apartments(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1),
         page_size: int = Query(12, ge=3, le=40),
-        sort: str = Query("created_at", regex="^(created_at|price_rub)$"),
+        sort: str = Query("created_at", regex="^(created_at|price_rub|relevance)$"),
         order: str = Query("desc", regex="^(asc|desc)$"),
+        pagination: str = Query("page", regex="^(page|cursor)$"),
+        cursor: Optional[str] = Query(None, max_length=512),
+        include_total: bool = Query(False),
+        filters: CatalogFilters = Depends(get_catalog_filters),
         db: Session = Depends(get_db)
 ):
     """
-    Получение списка квартир с пагинацией и сортировкой.
+    Получение списка квартир с пагинацией, сортировкой и фильтрами.
+
+    Поддерживаются два режима: постраничный (page/page_size) и курсорный
+    (pagination=cursor или передан cursor), в котором страница выбирается
+    по граничной записи, а общий счетчик возвращается только по запросу.
+    Запросы с фильтрами и поиском (q) обслуживаются индексом каталога
+    в памяти (только постраничный режим). Остальные ответы берутся из кеша
+    готовыми байтами, без построения моделей.
+
+    Ответы содержат ETag/Last-Modified по версии каталога, с которой они
+    построены, и при совпадении с If-None-Match/If-Modified-Since
+    возвращается 304.
 
     Args:
-        page: Номер страницы (от 1)
+        request: Запрос (заголовки Accept-Encoding и условного запроса)
+        response: Ответ (для заголовков кеширования)
+        page: Номер страницы (от 1), только для постраничного режима
         page_size: Количество элементов на странице (от 3 до 40)
-        sort: Поле для сортировки (created_at или price_rub)
+        sort: Поле для сортировки (created_at, price_rub или relevance - только с q)
         order: Порядок сортировки (asc или desc)
+        pagination: Режим пагинации (page или cursor)
+        cursor: Курсор из next_cursor/prev_cursor предыдущего ответа
+        include_total: Возвращать ли общее количество в курсорном режиме
+        filters: Фильтры каталога (rooms, price_*, area_*, floor_*, booking_enabled, q)
+        db: Сессия БД
+
+    Returns:
+        PaginatedApartments | CursorPaginatedApartments: Список квартир
+    """
+    if sort == "relevance" and filters.apartment_ids is None:
+        raise HTTPException(status_code=400, detail="Сортировка по релевантности доступна только при поиске")
+
+    if cursor or pagination == "cursor":
+        if not filters.is_empty():
+            raise HTTPException(status_code=400, detail="Фильтры поддерживаются только в постраничном режиме")
+        return await run_in_threadpool(
+            get_apartments_by_cursor, request, page_size, sort, order, cursor, include_total, db
+        )
+
+    if not filters.is_empty():
+        # Проверка актуальности снимка (Redis, при необходимости пересборка из БД)
+        # блокирующая - в пуле потоков; запрос к снимку в памяти выполняется здесь
+        snapshot = await run_in_threadpool(catalog_index.snapshot, db)
+        headers = get_catalog_index_cache_headers(snapshot.version)
+        if is_not_modified(request, headers.get("ETag")):
+            return not_modified_response(headers)
+
+        cards, total = catalog_index.query_snapshot(
+            snapshot, filters, sort, order, offset=(page - 1) * page_size, limit=page_size
+        )
+        response.headers.update(headers)
+        return PaginatedApartments(
+            page=page,
+            page_size=page_size,
+            total=total,
+            items=[
+                CatalogService.to_list_item(card, preferred_variant="small_webp")
+                for card in cards
+            ]
+        )
+
+    # Первые страницы отдаются готовыми байтами (обновляются задачей после изменений)
+    if materialization_service.is_materialized_page(page):
+        body = await materialization_service.get_catalog_page(page, page_size, sort, order)
+        # Значение в другом формате (например, оставшееся до обновления) - промах
+        if not is_packed(body):
+            async def fill_page() -> bytes:
+                version = await resource_version_service.aget_catalog_version()
+                cards, total = await run_in_threadpool(
+                    ApartmentService.get_apartments, db, page, page_size, sort, order
+                )
+                result = materialization_service.build_catalog_page(cards, page, page_size, total)
+                return await materialization_service.fill_catalog_page(result, sort, order, version)
+
+            # Самые посещаемые страницы: промах строит один запрос, остальные ждут его
+            body = await cache_service.acompute_once(
+                get_materialized_list_key(page, page_size, sort, order), fill_page, accept=is_packed
+            )
+        return versioned_response(request, body, "catalog")
+
+    def build_page(session: Session) -> bytes:
+        # Получаем карточки каталога из БД (версия - до чтения данных)
+        version = resource_version_service.get_catalog_version()
+        cards, total = ApartmentService.get_apartments(session, page, page_size, sort, order)
+
+        # Подготавливаем данные для ответа (обложка с предпочтением webp формата)
+        apartment_list = [
+            CatalogService.to_list_item(card, preferred_variant="small_webp")
+            for card in cards
+        ]
+
+        # Формируем готовый ответ
+        result = PaginatedApartments(
+            page=page,
+            page_size=page_size,
+            total=total,
+            items=apartment_list
+        )
+        return pack_model(result, version)
+
+    def get_page() -> bytes:
+        # Ключ зависит от поколения пространства имен (чтение из Redis) - тоже в пуле потоков
+        return cache_service.get_or_compute(
+            cache_service.get_apartments_cache_key(page, page_size, sort, order), build_page, db,
+            ttl=CACHE_EXPIRATION["apartments_list"], stale_ttl=CACHE_EXPIRATION["stale_while_revalidate"]
+        )
+
+    # Готовый ответ из кеша; при промахе его строит один запрос, остальные ждут
+    # (ожидание и построение блокирующие - в пуле потоков, а не в цикле событий)
+    body = await run_in_threadpool(get_page)
+    return versioned_response(request, body, "catalog")
+
+
+def get_catalog_index_cache_headers(index_version: Optional[int]) -> Dict[str, str]:
+    """
+    Заголовки кеширования ответов индекса каталога в памяти.
+
+    ETag строится по версии снимка индекса, из которого строится ответ
+    (снимок проверяется на актуальность до сравнения с If-None-Match),
+    поэтому никогда не оказывается новее отданных данных.
+
+    Args:
+        index_version: Версия снимка индекса (None - версия неизвестна)
+
+    Returns:
+        Dict[str, str]: Заголовки кеширования
+    """
+    if index_version is None:
+        return cache_headers()
+    return cache_headers(version_etag("catalog-index", index_version))
+
+
+def get_apartments_by_cursor(
+        request: Request,
+        page_size: int,
+        sort: str,
+        order: str,
+        cursor: Optional[str],
+        include_total: bool,
+        db: Session
+) -> Response:
+    """
+    Получение страницы списка квартир в курсорном режиме.
+
+    Args:
+        request: Запрос
+        page_size: Количество элементов на странице
+        sort: Поле для сортировки
+        order: Порядок сортировки
+        cursor: Курсор (None - первая страница)
+        include_total: Возвращать ли общее количество
         db: Сессия БД
 
     Returns:
-        PaginatedApartments: Пагинированный список квартир
+        Response: Страница списка квартир с курсорами (CursorPaginatedApartments)
     """
-    # Формируем ключ кеша
-    cache_key = cache_service.get_apartments_cache_key(page, page_size, sort, order)
-
-    # Пытаемся получить результат из кеша
-    cached_result = cache_service.get(cache_key)
-    if cached_result:
-        return cached_result
-
-    # Если в кеше нет, получаем данные из БД
-    apartments, total = ApartmentService.get_apartments(db, page, page_size, sort, order)
-
-    # Подготавливаем данные для ответа
-    apartment_list = []
-    for apartment in apartments:
-        # Получаем обложку с предпочтением webp формата для производительности
-        apartment_item = ApartmentService.create_apartment_list_item(
-            db, apartment, preferred_variant="small_webp"
+    def build_page(session: Session) -> bytes:
+        version = resource_version_service.get_catalog_version()
+        try:
+            cards, next_cursor, prev_cursor, total = ApartmentService.get_apartments_by_cursor(
+                session, page_size, sort, order, cursor, include_total
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        result = CursorPaginatedApartments(
+            page_size=page_size,
+            total=total,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            items=[
+                CatalogService.to_list_item(card, preferred_variant="small_webp")
+                for card in cards
+            ]
         )
-        apartment_list.append(apartment_item)
-
-    # Формируем ответ
-    result = PaginatedApartments(
-        page=page,
-        page_size=page_size,
-        total=total,
-        items=apartment_list
+        return pack_model(result, version)
+
+    # Кешируется только первая страница: курсоры задает клиент, и ключи по ним
+    # заполнили бы Redis; следующие страницы - дешевые keyset-запросы
+    if cursor:
+        return versioned_response(request, build_page(db), "catalog")
+
+    body = cache_service.get_or_compute(
+        cache_service.get_apartments_cursor_cache_key(page_size, sort, order, include_total), build_page, db,
+        ttl=CACHE_EXPIRATION["apartments_list"], stale_ttl=CACHE_EXPIRATION["stale_while_revalidate"]
     )
+    return versioned_response(request, body, "catalog")
+
+
+# Эндпоинт для получения фасетов каталога (объявлен до /apartments/{apartment_id})
+@router.get("/apartments/facets", response_model=CatalogFacets)
+async def get_apartments_facets(
+        request: Request,
+        response: Response,
+        price_bins: int = Query(10, ge=1, le=50),
+        filters: CatalogFilters = Depends(get_catalog_filters),
+        db: Session = Depends(get_db)
+):
+    """
+    Получение фасетов каталога: количество квартир по комнатам и доступности
+    бронирования, гистограмма цен и диапазоны для текущих фильтров.
+
+    Args:
+        request: Запрос
+        response: Ответ (для заголовков кеширования)
+        price_bins: Количество интервалов гистограммы цен
+        filters: Фильтры каталога
+        db: Сессия БД
+
+    Returns:
+        CatalogFacets: Фасеты каталога
+    """
+    snapshot = await run_in_threadpool(catalog_index.snapshot, db)
+    headers = get_catalog_index_cache_headers(snapshot.version)
+    if is_not_modified(request, headers.get("ETag")):
+        return not_modified_response(headers)
+
+    facets = CatalogFacets(**catalog_index.facets_snapshot(snapshot, filters, price_bins=price_bins))
+    response.headers.update(headers)
+    return facets
+
+
+def parse_apartment_ids(ids: str) -> List[int]:
+    """
+    Разбирает список ID квартир через запятую (без повторов, с сохранением порядка).
+
+    Args:
+        ids: Строка с ID через запятую
+
+    Returns:
+        List[int]: ID квартир
+
+    Raises:
+        HTTPException: Если список некорректен или слишком длинный
+    """
+    try:
+        apartment_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный список ID квартир")
+
+    if not apartment_ids:
+        raise HTTPException(status_code=400, detail="Не указаны ID квартир")
+    if len(apartment_ids) > settings.APARTMENT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Можно запросить не более {settings.APARTMENT_BATCH_MAX_IDS} квартир"
+        )
+    return apartment_ids
+
+
+# Эндпоинт для получения нескольких квартир (объявлен до /apartments/{apartment_id})
+@router.get("/apartments/batch", response_model=List[ApartmentDetail])
+async def get_apartments_batch(
+        request: Request,
+        ids: str = Query(..., max_length=1000, description="ID квартир через запятую"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Получение детальной информации о нескольких квартирах (избранное, сравнение).
+
+    Готовые ответы читаются одним MGET, промахи строятся одним запросом квартир
+    и одним запросом фотографий и сохраняются в кеш. Отсутствующие и неактивные
+    квартиры пропускаются, порядок соответствует порядку ID в запросе.
 
-    # Сохраняем результат в кеш
-    cache_service.set(cache_key, result, expire=300)  # Кешируем на 5 минут
+    Args:
+        request: Запрос (для выбора сжатого или несжатого тела)
+        ids: ID квартир через запятую
+        db: Сессия БД
 
-    return result
+    Returns:
+        List[ApartmentDetail]: Детальная информация о квартирах
+    """
+    apartment_ids = parse_apartment_ids(ids)
+    bodies = dict(zip(apartment_ids, await materialization_service.get_apartment_details(apartment_ids)))
+
+    missing_ids = [apartment_id for apartment_id, body in bodies.items() if not is_packed(body)]
+    if missing_ids:
+        # Версии читаются до данных (см. MaterializationService.fill_apartment_detail)
+        versions = await resource_version_service.aget_apartment_versions(missing_ids)
+        details = await materialization_service.abuild_apartment_details(db, missing_ids)
+        bodies.update(await materialization_service.fill_apartment_details(details, versions))
+
+    # Документы уже сериализованы: собираем JSON-массив из готовых байтов
+    items = [unpack_json(bodies[apartment_id]) for apartment_id in apartment_ids if is_packed(bodies[apartment_id])]
+    return json_response(
+        pack_json(b"[" + b",".join(items) + b"]"), request.headers.get("accept-encoding"), headers=cache_headers()
+    )
 
 
 # Эндпоинт для получения детальной информации о квартире
 @router.get("/apartments/{apartment_id}", response_model=ApartmentDetail)
 async def get_apartment(
         apartment_id: int,
-        db: Session = Depends(get_db)
+        request: Request,
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение детальной информации о квартире по ID.
 
     Args:
         apartment_id: ID квартиры
+        request: Запрос (заголовки Accept-Encoding и условного запроса)
         db: Сессия БД
 
     Returns:
         ApartmentDetail: Детальная информация о квартире
     """
-    # Формируем ключ кеша
-    cache_key = cache_service.get_apartment_cache_key(apartment_id)
-
-    # Пытаемся получить результат из кеша
-    cached_result = cache_service.get(cache_key)
-    if cached_result:
-        return cached_result
-
-    # Получаем квартиру по ID
-    apartment = ApartmentService.get_apartment_by_id(db, apartment_id)
-
-    if not apartment:
-        raise HTTPException(status_code=404, detail="Квартира не найдена")
-
-    # Получаем фотографии с вариантами
-    photos_with_variants = ApartmentService.get_apartment_photos_with_variants(db, apartment_id)
-
-    # Выбираем предпочтительные URL для детальной страницы (medium_webp или любые доступные)
-    photo_urls = []
-    for photo in photos_with_variants:
-        variants = photo.get("variants", {})
-        url = (
-            variants.get("medium_webp") or
-            variants.get("medium_jpeg") or
-            variants.get("original") or
-            next(iter(variants.values())) if variants else None
+    # Готовая детальная информация (обновляется задачей после изменений)
+    body = await materialization_service.get_apartment_detail(apartment_id)
+    if not is_packed(body):
+        async def fill_detail() -> Optional[bytes]:
+            version = await resource_version_service.aget_apartment_version(apartment_id)
+            detail = await materialization_service.abuild_apartment_detail(db, apartment_id)
+            if not detail:
+                return None
+            return await materialization_service.fill_apartment_detail(apartment_id, detail, version)
+
+        # Промах строит один запрос, остальные ждут его (в т.ч. в других процессах)
+        body = await cache_service.acompute_once(
+            get_materialized_detail_key(apartment_id), fill_detail, accept=is_packed
         )
-        if url:
-            photo_urls.append(url)
-
-    # Формируем ответ
-    result = ApartmentDetail(
-        id=apartment.id,
-        title=apartment.title,
-        price_rub=apartment.price_rub,
-        rooms=apartment.rooms,
-        floor=apartment.floor,
-        area_m2=apartment.area_m2,
-        address=apartment.address,
-        description=apartment.description,
-        active=apartment.active,
-        photos=photo_urls,
-        created_at=apartment.created_at,
-        booking_enabled=apartment.booking_enabled,
-        updated_at=apartment.updated_at
-    )
+        if body is None:
+            raise HTTPException(status_code=404, detail="Квартира не найдена")
 
-    # Сохраняем результат в кеш
-    cache_service.set(cache_key, result, expire=300)  # Кешируем на 5 минут
+    # Самые просматриваемые квартиры прогреваются после деплоя и изменений
+    await cache_warmup_service.record_view(apartment_id)
 
-    return result
+    return versioned_response(request, body, f"apartment-{apartment_id}")
 
 
 # Эндпоинт для получения вариантов фотографий квартиры
 @router.get("/apartments/{apartment_id}/photos", response_model=List[Dict])
 async def get_apartment_photos(
         apartment_id: int,
-        db: Session = Depends(get_db)
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение всех фотографий квартиры с вариантами разных размеров.
 
     Args:
         apartment_id: ID квартиры
+        request: Запрос
+        response: Ответ (для заголовков кеширования)
         db: Сессия БД
 
     Returns:
         List[Dict]: Список фотографий с вариантами
     """
+    # Версия читается до запросов: если у клиента она та же, БД не нужна
+    version = await resource_version_service.aget_apartment_version(apartment_id)
+    if version is not None:
+        etag, last_modified = version_etag(f"apartment-{apartment_id}-photos", version), version_last_modified(version)
+        headers = cache_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(headers)
+    else:
+        headers = cache_headers()
+
     # Проверяем существование квартиры
-    apartment = ApartmentService.get_apartment_by_id(db, apartment_id)
+    apartment = await ApartmentService.aget_apartment_by_id(db, apartment_id)
 
     if not apartment:
         raise HTTPException(status_code=404, detail="Квартира не найдена")
 
     # Получаем фотографии с вариантами
-    photos = ApartmentService.get_apartment_photos_with_variants(db, apartment_id)
+    photos = await ApartmentService.aget_apartment_photos_with_variants(db, apartment_id)
 
+    response.headers.update(headers)
     return photos
 
 
 # Временный эндпоинт для загрузки фотографий (будет заменен в v1)
 @router.post("/admin/upload", status_code=201)
 async def upload_photo(
-        background_tasks: BackgroundTasks,
         apartment_id: int = Form(...),
         file: UploadFile = File(...),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Временный эндпоинт для загрузки фотографий.
 
+    Кеш публичного каталога инвалидируется по доменным событиям после commit.
+
     Args:
-        background_tasks: Фоновые задачи FastAPI
         apartment_id: ID квартиры
         file: Загружаемый файл
         db: Сессия БД
@@ -203,7 +494,7 @@ async def upload_photo(
         dict: Информация о загруженном файле
     """
     # Проверяем существование квартиры
-    apartment = ApartmentService.get_apartment_by_id(db, apartment_id)
+    apartment = await ApartmentService.aget_apartment_by_id(db, apartment_id)
     if not apartment:
         raise HTTPException(status_code=404, detail="Квартира не найдена")
 
@@ -245,14 +536,16 @@ async def upload_photo(
                 file_content, actual_format
             )
 
-        # Запускаем задачу Celery для обработки изображения
-        cover_url = process_image.delay(file_content, apartment_id).get()
+        # Сохраняем исходник во временное хранилище и запускаем задачу Celery
+        # для обработки изображения (в брокер уходит только ключ)
+        staging_key, checksum = await run_in_threadpool(minio_service.stage_upload, file_content, apartment_id)
+        cover_url = process_image.delay(staging_key, checksum, apartment_id).get()
 
         # Получаем информацию об изображении
         image_info = ImageFormatService.get_image_info(file_content)
 
         # Добавляем фотографию к квартире
-        new_photo = ApartmentService.add_apartment_photo(
+        new_photo = await ApartmentService.aadd_apartment_photo(
             db,
             apartment_id,
             cover_url,
@@ -268,11 +561,8 @@ async def upload_photo(
             }
         )
 
-        # Инвалидируем кеш для этой квартиры в фоновом режиме
-        background_tasks.add_task(invalidate_apartment_cache, apartment_id)
-
         # Получаем информацию о загруженном изображении
-        photo_info = ApartmentService.get_apartment_photos_with_variants(db, apartment_id)
+        photo_info = await ApartmentService.aget_apartment_photos_with_variants(db, apartment_id)
         uploaded_photo = next((p for p in photo_info if p["id"] == new_photo.id), None)
 
         return {
@@ -292,8 +582,7 @@ async def upload_photo(
 async def update_photo_order(
         photo_id: int,
         sort_order: int = Form(...),
-        background_tasks: BackgroundTasks = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Изменение порядка отображения фотографии.
@@ -301,7 +590,6 @@ async def update_photo_order(
     Args:
         photo_id: ID фотографии
         sort_order: Новый порядок сортировки
-        background_tasks: Фоновые задачи FastAPI
         db: Сессия БД
 
     Returns:
@@ -309,15 +597,11 @@ async def update_photo_order(
     """
     try:
         # Обновляем порядок сортировки
-        updated_photo = ApartmentService.update_photo_sort_order(db, photo_id, sort_order)
+        updated_photo = await ApartmentService.aupdate_photo_sort_order(db, photo_id, sort_order)
 
         if not updated_photo:
             raise HTTPException(status_code=404, detail="Фотография не найдена")
 
-        # Инвалидируем кеш для квартиры в фоновом режиме
-        if background_tasks:
-            background_tasks.add_task(invalidate_apartment_cache, updated_photo.apartment_id)
-
         return {
             "id": updated_photo.id,
             "apartment_id": updated_photo.apartment_id,
@@ -335,36 +619,28 @@ async def update_photo_order(
 @router.delete("/admin/photos/{photo_id}", status_code=204)
 async def delete_photo(
         photo_id: int,
-        background_tasks: BackgroundTasks = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Удаление фотографии.
 
     Args:
         photo_id: ID фотографии
-        background_tasks: Фоновые задачи FastAPI
         db: Сессия БД
     """
     try:
-        # Получаем фотографию для определения apartment_id перед удалением
-        photo = db.query(ApartmentPhoto).filter(ApartmentPhoto.id == photo_id).first()
+        # Проверяем существование фотографии
+        photo = await db.get(ApartmentPhoto, photo_id)
 
         if not photo:
             raise HTTPException(status_code=404, detail="Фотография не найдена")
 
-        apartment_id = photo.apartment_id
-
         # Удаляем фотографию
-        success = ApartmentService.delete_photo(db, photo_id)
+        success = await ApartmentService.adelete_photo(db, photo_id)
 
         if not success:
             raise HTTPException(status_code=404, detail="Ошибка удаления фотографии")
 
-        # Инвалидируем кеш для квартиры в фоновом режиме
-        if background_tasks:
-            background_tasks.add_task(invalidate_apartment_cache, apartment_id)
-
         return None  # 204 No Content
 
     except Exception as e:
@@ -1,16 +1,14 @@
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from requests import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models import Booking, Apartment, SystemSettings
 from src.schemas import BookingCreate, BookingResponse, BookingListResponse
-from src.services.event_log_service import log_action
+from src.services.event_log_service import alog_action
 from src.models.event_log import EventType, EntityType
 from src.services.email_service import send_booking_created_notification
 
@@ -23,13 +21,13 @@ router = APIRouter(
 @router.post("", response_model=BookingResponse, status_code=201)
 async def create_booking(
         booking: BookingCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Создать новое бронирование квартиры.
     """
     # Проверяем, что бронирование глобально включено
-    settings = db.execute(select(SystemSettings).limit(1))
+    settings = await db.execute(select(SystemSettings).limit(1))
     system_settings = settings.scalars().first()
 
     if not system_settings or not system_settings.booking_globally_enabled:
@@ -46,7 +44,7 @@ async def create_booking(
             Apartment.booking_enabled == True
         )
     )
-    result = db.execute(apartment_query)
+    result = await db.execute(apartment_query)
     apartment = result.scalars().first()
 
     if not apartment:
@@ -67,7 +65,7 @@ async def create_booking(
             )
         )
     )
-    result = db.execute(overlap_query)
+    result = await db.execute(overlap_query)
     booking_count = result.scalar()
 
     if booking_count > 0:
@@ -89,12 +87,12 @@ async def create_booking(
     )
 
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
+    await db.commit()
+    await db.refresh(db_booking)
 
 
     # Логируем событие
-    log_action(
+    await alog_action(
         db=db,
         entity_type=EntityType.BOOKING,
         entity_id=db_booking.id,
@@ -122,13 +120,13 @@ async def check_availability(
         apartment_id: int,
         check_in: datetime,
         check_out: datetime,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Проверить доступность квартиры для бронирования на указанные даты.
     """
     # Проверяем, что бронирование глобально включено
-    settings = db.execute(select(SystemSettings).limit(1))
+    settings = await db.execute(select(SystemSettings).limit(1))
     system_settings = settings.scalars().first()
 
     if not system_settings or not system_settings.booking_globally_enabled:
@@ -142,7 +140,7 @@ async def check_availability(
             Apartment.booking_enabled == True
         )
     )
-    result = db.execute(apartment_query)
+    result = await db.execute(apartment_query)
     apartment = result.scalars().first()
 
     if not apartment:
@@ -160,7 +158,7 @@ async def check_availability(
             )
         )
     )
-    result = db.execute(overlap_query)
+    result = await db.execute(overlap_query)
     booking_count = result.scalar()
 
     # Возвращаем доступность (если нет пересечений с другими бронированиями)
@@ -1,34 +1,78 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+import json
+
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
+from src.config.redis_settings import CACHE_EXPIRATION, CACHE_KEYS, CACHE_NAMESPACES
 from src.db.database import get_db
 from src.models import SystemSettings
 from src.schemas import SystemSettingsBase as SystemSettingsPublic
+from src.services.cache_service import CacheService
+from src.utils.cached_response import json_response, pack_json, packed_version
+from src.utils.http_cache import cache_headers, is_not_modified, not_modified_response, versioned_response
 
 router = APIRouter(
     prefix="/api/v1/settings",
     tags=["settings"]
 )
 
+cache_service = CacheService()
+
+# Значения по умолчанию, пока настройки не сохранены
+DEFAULT_PUBLIC_SETTINGS = {
+    "booking_globally_enabled": True,
+    "support_phone": "+7 (928) 123-45-67",
+    "support_email": "support@avitorentpro.ru"
+}
+DEFAULT_SETTINGS_ETAG = 'W/"settings-default"'
+
+
+def build_public_settings(db: Session) -> bytes:
+    """
+    Собирает ответ с публичными настройками для кеша.
+
+    Args:
+        db: Сессия базы данных
+
+    Returns:
+        bytes: Упакованный JSON с версией по времени обновления настроек
+    """
+    settings = db.execute(select(SystemSettings).limit(1)).scalars().first()
+    if not settings:
+        return pack_json(json.dumps(DEFAULT_PUBLIC_SETTINGS).encode("utf-8"))
+
+    settings_data = settings.settings_data or {}
+    body = SystemSettingsPublic(
+        booking_globally_enabled=settings.booking_globally_enabled,
+        support_phone=settings_data.get("support_phone", DEFAULT_PUBLIC_SETTINGS["support_phone"]),
+        support_email=settings_data.get("support_email", DEFAULT_PUBLIC_SETTINGS["support_email"])
+    )
+    version = int(settings.updated_at.timestamp() * 1000) if settings.updated_at else None
+    return pack_json(body.model_dump_json().encode("utf-8"), version)
+
 
 @router.get("/public", response_model=SystemSettingsPublic)
 def get_public_settings(
+        request: Request,
         db: Session = Depends(get_db)
 ):
     """
     Получить публичные настройки системы.
-    """
-    result = db.execute(select(SystemSettings).limit(1))
-    settings = result.scalars().first()
 
-    # Если настройки не найдены, возвращаем значения по умолчанию
-    if not settings:
-        return {
-            "booking_globally_enabled": True,
-            "support_phone": "+7 (928) 123-45-67",
-            "support_email": "support@avitorentpro.ru"
-        }
+    Ответ кешируется в Redis и сбрасывается при изменении настроек (по доменным
+    событиям). Он содержит ETag/Last-Modified по времени обновления настроек
+    и при совпадении с условным запросом возвращается 304.
+    """
+    packed = cache_service.get_or_compute(
+        CACHE_KEYS["public_settings"], build_public_settings, db, ttl=CACHE_EXPIRATION["public_settings"],
+        namespace=CACHE_NAMESPACES["public_settings"]
+    )
+    if packed_version(packed) is not None:
+        return versioned_response(request, packed, "settings")
 
-    return settings
+    # Настройки не сохранены - отдаем значения по умолчанию
+    headers = cache_headers(DEFAULT_SETTINGS_ETAG)
+    if is_not_modified(request, DEFAULT_SETTINGS_ETAG):
+        return not_modified_response(headers)
+    return json_response(packed, request.headers.get("accept-encoding"), headers=headers)
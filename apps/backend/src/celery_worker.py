@@ -3,16 +3,32 @@ from kombu import Queue
 import os
 from celery import Celery
 from io import BytesIO
-from typing import Dict, List, Optional, Tuple
-from celery.signals import task_failure
+from typing import Dict, Iterable, List, Optional, Tuple
+from celery.signals import task_failure, worker_process_shutdown
 
 from src.services.minio_service import MinioService
 from src.services.image_service import ImageService
+from src.services.photo_manifest_service import get_variant_urls, pick_cover_url
 from src.config.settings import settings
+from src.db.database import SessionLocal
+from src.models.apartment import ApartmentPhoto
+# Регистрирует синхронизацию карточек каталога, его индекса, счетчиков и версий
+# ресурсов (для ETag) при изменении фотографий
+import src.services.catalog_service  # noqa: F401
+import src.services.catalog_index  # noqa: F401
+import src.services.resource_version_service  # noqa: F401
+from src.config.redis_settings import CACHE_KEYS, CACHE_NAMESPACES
+from src.services import domain_events
+from src.services.cache_service import CacheService, flush_pending_invalidations
+from src.services.cache_warmup_service import cache_warmup_service
+from src.services.counter_service import counter_service
+from src.services.materialization_service import materialization_service
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
 
+cache_service = CacheService()
+
 ALL_QUEUES: dict[str, Queue] = {
     # тяжёлые CPU-bound задачи обработки картинок
     "images": Queue("images", routing_key="images"),
@@ -37,6 +53,22 @@ celery_app.conf.task_routes = {
     'process_image': {'queue': 'images'},
     'reprocess_image': {'queue': 'images'},
     'bulk_reprocess_images': {'queue': 'images'},
+    'reconcile_counters': {'queue': 'reports'},
+    'materialize_apartments': {'queue': 'reports'},
+    'warm_cache': {'queue': 'reports'},
+    'trim_apartment_views': {'queue': 'reports'},
+}
+
+# Периодические задачи
+celery_app.conf.beat_schedule = {
+    'reconcile-counters': {
+        'task': 'reconcile_counters',
+        'schedule': settings.COUNTERS_RECONCILE_INTERVAL,
+    },
+    'trim-apartment-views': {
+        'task': 'trim_apartment_views',
+        'schedule': settings.CACHE_WARMUP_VIEWS_TRIM_INTERVAL,
+    },
 }
 
 # Увеличиваем таймауты для обработки больших изображений
@@ -50,7 +82,8 @@ celery_app.conf.broker_connection_retry = True  # Повторять подкл
 celery_app.conf.broker_connection_max_retries = 10  # Максимальное число попыток
 
 # Настройка пула воркеров
-celery_app.conf.worker_concurrency = 2  # Уменьшаем число параллельных обработчиков для избежания перегрузки
+# Число процессов из настроек; от него же зависит размер пула кодирования изображений (IMAGE_ENCODE_WORKERS)
+celery_app.conf.worker_concurrency = settings.CELERY_WORKER_CONCURRENCY
 celery_app.conf.worker_prefetch_multiplier = 1  # Предзагрузка только 1 задачи за раз
 celery_app.conf.worker_max_tasks_per_child = 100  # Перезапуск воркера после 100 задач
 
@@ -61,6 +94,161 @@ def handle_task_failure(task_id, exception, args, kwargs, traceback, einfo, **kw
     logger.error(f"Task {task_id} failed: {exception}\nArgs: {args}\nKwargs: {kwargs}\n{traceback}")
 
 
+# Процесс воркера (в т.ч. после worker_max_tasks_per_child) завершается без atexit:
+# отложенные инвалидации кеша выполняются до выхода
+@worker_process_shutdown.connect
+def flush_cache_invalidations(**kwargs):
+    flush_pending_invalidations()
+
+
+def enqueue_materialization(apartment_ids: Iterable[int]) -> None:
+    """
+    Ставит в очередь пересборку материализованных ответов каталога.
+
+    Ошибка брокера не должна ломать уже закоммиченное изменение: в этом
+    случае готовые ответы удаляются и заполняются при следующем чтении.
+
+    Args:
+        apartment_ids: ID измененных квартир
+    """
+    ids = sorted({apartment_id for apartment_id in apartment_ids if apartment_id is not None})
+    if not ids:
+        return
+
+    try:
+        materialize_apartments.delay(ids)
+    except Exception as e:
+        logger.error(f"Error enqueueing materialization for apartments {ids}: {e}")
+        materialization_service.discard(ids)
+
+
+def enqueue_cache_warmup(reason: str, delay: int = 0, catalog: bool = True) -> None:
+    """
+    Ставит в очередь прогрев кеша, если он еще не стоит в очереди.
+
+    Args:
+        reason: Причина прогрева (для логов)
+        delay: Задержка запуска в секундах (чтобы серия изменений дала один прогрев)
+        catalog: Прогревать ли страницы каталога
+    """
+    if not settings.CACHE_WARMUP_ENABLED or not cache_warmup_service.try_schedule(delay):
+        return
+
+    try:
+        # Без повторных попыток публикации: прогрев не должен задерживать вызывающий код
+        warm_cache.apply_async(args=[reason, catalog], countdown=delay, retry=False)
+    except Exception as e:
+        logger.error(f"Error enqueueing cache warmup ({reason}): {e}")
+        cache_warmup_service.clear_schedule()
+
+
+@domain_events.subscribe_blocking
+def _invalidate_public_cache(events: List[domain_events.DomainEvent]) -> None:
+    """
+    Инвалидирует кеш публичного API после commit изменений и ставит в очередь
+    пересборку готовых ответов каталога и прогрев кеша.
+
+    Args:
+        events: События транзакции
+    """
+    apartment_ids = domain_events.affected_apartment_ids(events)
+    if apartment_ids:
+        cache_service.invalidate_apartment_caches(apartment_ids)
+        cache_service.invalidate_apartments_cache()
+        cache_warmup_service.forget(domain_events.deleted_ids(events, domain_events.ENTITY_APARTMENT))
+        # Страницы каталога пересобирает materialize_apartments, прогрев - только квартиры
+        enqueue_materialization(apartment_ids)
+        enqueue_cache_warmup("catalog changed", delay=settings.CACHE_WARMUP_DELAY, catalog=False)
+
+    if domain_events.has_entity(events, domain_events.ENTITY_SETTINGS):
+        cache_service.invalidate_keys(CACHE_NAMESPACES["public_settings"], [CACHE_KEYS["public_settings"]])
+
+
+def _save_photo_manifest(manifest: Optional[Dict], photo_id: Optional[int] = None,
+                         previous_image_id: Optional[str] = None,
+                         processing_status: str = "completed") -> None:
+    """
+    Сохраняет манифест вариантов изображения в photo_metadata фотографии.
+
+    Args:
+        manifest: Манифест {"image_id", "variants", "timings"} (None - только статус)
+        photo_id: ID фотографии
+        previous_image_id: ID изображения, которое было заменено (поиск по нему, если нет photo_id)
+        processing_status: Статус обработки
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ApartmentPhoto)
+        if photo_id is not None:
+            photo = query.filter(ApartmentPhoto.id == photo_id).first()
+        elif previous_image_id:
+            photo = query.filter(
+                ApartmentPhoto.photo_metadata["image_id"].astext == previous_image_id
+            ).first()
+        else:
+            return
+
+        if not photo:
+            logger.warning(f"Photo not found for manifest (photo_id={photo_id}, image_id={previous_image_id})")
+            return
+
+        # Присваиваем новый словарь, чтобы изменение JSONB было отслежено
+        photo_metadata = dict(photo.photo_metadata or {})
+        photo_metadata["processing_status"] = processing_status
+
+        if manifest:
+            photo_metadata["image_id"] = manifest["image_id"]
+            photo_metadata["variants"] = manifest["variants"]
+            if manifest.get("timings"):
+                photo_metadata["timings"] = manifest["timings"]
+            photo.url = pick_cover_url(get_variant_urls(photo_metadata)) or photo.url
+
+        photo.photo_metadata = photo_metadata
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error saving photo manifest: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def _discard_staged_upload(staging_key: str, minio_service: Optional[MinioService] = None) -> None:
+    """
+    Удаляет исходник загрузки из бакета временного хранения, когда задача
+    завершилась окончательно (успешно или без повторных попыток).
+
+    Args:
+        staging_key: Ключ исходника (MinioService.stage_upload)
+        minio_service: Сервис MinIO задачи (если уже создан)
+    """
+    try:
+        (minio_service or MinioService()).delete_staged_upload(staging_key)
+    except Exception as e:
+        logger.warning(f"Error discarding staged upload {staging_key}: {e}")
+
+
+def _legacy_image_args(staging_key, checksum, apartment_id, extra_id) -> Tuple:
+    """
+    Разбирает аргументы задачи обработки изображения с учетом прежнего формата
+    сообщений (содержимое файла, apartment_id, photo_id/image_id), поставленных
+    в очередь до перехода на временное хранение. Удалить в следующем релизе.
+
+    Args:
+        staging_key: Ключ исходника (в прежнем формате - содержимое файла)
+        checksum: SHA-256 исходника (в прежнем формате - ID квартиры)
+        apartment_id: ID квартиры (в прежнем формате - photo_id/image_id)
+        extra_id: photo_id/image_id (в прежнем формате не передается)
+
+    Returns:
+        Tuple: (содержимое файла или None, ключ исходника или None, apartment_id, photo_id/image_id)
+    """
+    if isinstance(staging_key, (bytes, bytearray)):
+        logger.warning("Processing image task enqueued with raw file content (legacy message format)")
+        return bytes(staging_key), None, checksum, apartment_id
+    return None, staging_key, apartment_id, extra_id
+
+
 @celery_app.task(name="process_image",
                  bind=True,
                  max_retries=3,
@@ -68,39 +256,51 @@ def handle_task_failure(task_id, exception, args, kwargs, traceback, einfo, **kw
                  retry_backoff=True,  # Экспоненциальная задержка между попытками
                  soft_time_limit=600,  # 10 минут soft timeout
                  time_limit=1200)  # 20 минут hard timeout
-def process_image(self, file_content_bytes, apartment_id):
+def process_image(self, staging_key, checksum, apartment_id=None, photo_id=None):
     """
     Задача Celery для обработки и загрузки изображения.
 
+    Исходник читается из бакета временного хранения (сообщение в брокере содержит
+    только ключ) и удаляется после окончательного завершения задачи; при повторной
+    попытке он остается на месте.
+    Если передан photo_id, манифест вариантов сохраняется в photo_metadata фотографии.
+
+    Сообщения прежнего формата (file_content_bytes, apartment_id, photo_id),
+    поставленные до обновления, обрабатываются по-старому (см. _legacy_image_args).
+
     Args:
-        file_content_bytes: Бинарное содержимое файла
+        staging_key: Ключ исходника (MinioService.stage_upload)
+        checksum: SHA-256 исходника
         apartment_id: ID квартиры
+        photo_id: ID фотографии (ApartmentPhoto)
 
     Returns:
-        Dict[str, str]: Словарь с URLs изображений разных размеров
+        str: URL обложки (small_webp)
     """
+    file_content_bytes, staging_key, apartment_id, photo_id = _legacy_image_args(
+        staging_key, checksum, apartment_id, photo_id
+    )
+    minio_service = None
+    retrying = False
     try:
-        logger.info(f"Processing image for apartment_id={apartment_id}, task_id={self.request.id}")
-
-        # Проверка размера файла
-        file_size_mb = len(file_content_bytes) / (1024 * 1024)
-        logger.info(f"Image size: {file_size_mb:.2f} MB")
-
-        if file_size_mb > settings.MAX_IMAGE_SIZE_MB:
-            raise ValueError(f"Image too large: {file_size_mb:.2f} MB, max allowed: {settings.MAX_IMAGE_SIZE_MB} MB")
+        logger.info(f"Processing image {staging_key} for apartment_id={apartment_id}, task_id={self.request.id}")
 
         # Создаем экземпляр сервиса MinIO
         minio_service = MinioService()
 
-        # Загружаем изображение и получаем URLs разных размеров
-        result_urls = minio_service.upload_image(file_content_bytes, apartment_id)
+        # Читаем исходник (размер и контрольная сумма проверяются при чтении)
+        if file_content_bytes is None:
+            file_content_bytes = minio_service.read_staged_upload(staging_key, checksum)
+        logger.info(f"Image size: {len(file_content_bytes) / (1024 * 1024):.2f} MB")
+
+        # Загружаем изображение и получаем манифест вариантов
+        manifest = minio_service.upload_image_with_manifest(file_content_bytes, apartment_id)
+
+        if photo_id is not None:
+            _save_photo_manifest(manifest, photo_id=photo_id)
 
         # Возвращаем URL для размера small_webp для отображения в качестве обложки
-        cover_url = (
-                result_urls.get("small_webp") or
-                result_urls.get("small_jpeg") or
-                next(iter(result_urls.values()))
-        )
+        cover_url = pick_cover_url(get_variant_urls(manifest))
 
         logger.info(f"Image processing completed successfully: {cover_url}")
         return cover_url
@@ -108,9 +308,19 @@ def process_image(self, file_content_bytes, apartment_id):
     except Exception as e:
         logger.error(f"Error processing image: {e}")
         # Повторная попытка при ошибках, но не при ошибках валидации
-        if not isinstance(e, ValueError):
+        if not isinstance(e, ValueError) and self.request.retries < self.max_retries:
+            retrying = True
             self.retry(exc=e)
+
+        if photo_id is not None:
+            try:
+                _save_photo_manifest(None, photo_id=photo_id, processing_status="failed")
+            except Exception:
+                pass
         raise
+    finally:
+        if not retrying and staging_key is not None:
+            _discard_staged_upload(staging_key, minio_service)
 
 
 @celery_app.task(name="reprocess_image",
@@ -120,31 +330,38 @@ def process_image(self, file_content_bytes, apartment_id):
                  retry_backoff=True,
                  soft_time_limit=600,
                  time_limit=1200)
-def reprocess_image(self, file_content_bytes, apartment_id, image_id):
+def reprocess_image(self, staging_key, checksum, apartment_id=None, image_id=None):
     """
     Задача Celery для повторной обработки существующего изображения.
 
+    Исходник читается из бакета временного хранения, как в process_image
+    (включая сообщения прежнего формата).
+
     Args:
-        file_content_bytes: Бинарное содержимое файла
+        staging_key: Ключ исходника (MinioService.stage_upload)
+        checksum: SHA-256 исходника
         apartment_id: ID квартиры
         image_id: ID изображения
 
     Returns:
         Dict[str, str]: Словарь с URLs изображений разных размеров
     """
+    file_content_bytes, staging_key, apartment_id, image_id = _legacy_image_args(
+        staging_key, checksum, apartment_id, image_id
+    )
+    minio_service = None
+    retrying = False
     try:
         logger.info(f"Reprocessing image {image_id} for apartment_id={apartment_id}, task_id={self.request.id}")
 
-        # Проверка размера файла
-        file_size_mb = len(file_content_bytes) / (1024 * 1024)
-        logger.info(f"Image size: {file_size_mb:.2f} MB")
-
-        if file_size_mb > settings.MAX_IMAGE_SIZE_MB:
-            raise ValueError(f"Image too large: {file_size_mb:.2f} MB, max allowed: {settings.MAX_IMAGE_SIZE_MB} MB")
-
         # Создаем экземпляр сервиса MinIO
         minio_service = MinioService()
 
+        # Читаем исходник до удаления прежних вариантов
+        if file_content_bytes is None:
+            file_content_bytes = minio_service.read_staged_upload(staging_key, checksum)
+        logger.info(f"Image size: {len(file_content_bytes) / (1024 * 1024):.2f} MB")
+
         # Удаляем существующие варианты изображения с обработкой ошибок
         try:
             minio_service.delete_image(apartment_id, image_id)
@@ -152,7 +369,11 @@ def reprocess_image(self, file_content_bytes, apartment_id, image_id):
             logger.warning(f"Error deleting existing image variants: {delete_error}, continuing with new upload")
 
         # Загружаем заново обработанное изображение
-        result_urls = minio_service.upload_image(file_content_bytes, apartment_id)
+        manifest = minio_service.upload_image_with_manifest(file_content_bytes, apartment_id)
+        result_urls = get_variant_urls(manifest)
+
+        # Обновляем манифест фотографии, ссылавшейся на прежнее изображение
+        _save_photo_manifest(manifest, previous_image_id=image_id)
 
         logger.info(f"Image reprocessing completed successfully")
         return result_urls
@@ -160,9 +381,13 @@ def reprocess_image(self, file_content_bytes, apartment_id, image_id):
     except Exception as e:
         logger.error(f"Error reprocessing image: {e}")
         # Повторная попытка при ошибках, но не при ошибках валидации
-        if not isinstance(e, ValueError):
+        if not isinstance(e, ValueError) and self.request.retries < self.max_retries:
+            retrying = True
             self.retry(exc=e)
         raise
+    finally:
+        if not retrying and staging_key is not None:
+            _discard_staged_upload(staging_key, minio_service)
 
 
 @celery_app.task(name="bulk_reprocess_images",
@@ -243,9 +468,12 @@ def bulk_reprocess_images(self, apartment_id, max_images=None):
                             })
                             continue
 
+                        # Сохраняем исходник во временное хранилище: задача получает только ключ
+                        staging_key, checksum = minio_service.stage_upload(file_content, apartment_id)
+
                         # Запускаем задачу reprocess_image для обработки изображения
                         logger.info(f"Starting reprocess_image task for image_id={image_id}")
-                        task_result = reprocess_image.delay(file_content, apartment_id, image_id)
+                        task_result = reprocess_image.delay(staging_key, checksum, apartment_id, image_id)
 
                         # Ждем результат с таймаутом
                         result_urls = task_result.get(timeout=600)  # 10 минут таймаут
@@ -285,3 +513,95 @@ def bulk_reprocess_images(self, apartment_id, max_images=None):
     except Exception as e:
         logger.error(f"Error bulk reprocessing images: {e}")
         raise
+
+
+@celery_app.task(name="reconcile_counters",
+                 soft_time_limit=300,
+                 time_limit=600)
+def reconcile_counters():
+    """
+    Задача Celery для сверки счетчиков Redis с БД.
+
+    Returns:
+        Dict[str, int]: Итоговые значения простых счетчиков
+    """
+    db = SessionLocal()
+    try:
+        return counter_service.reconcile(db)
+    except Exception as e:
+        logger.error(f"Error reconciling counters: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="materialize_apartments",
+                 bind=True,
+                 max_retries=3,
+                 default_retry_delay=5,
+                 soft_time_limit=300,
+                 time_limit=600)
+def materialize_apartments(self, apartment_ids: List[int]):
+    """
+    Задача Celery для пересборки материализованных ответов каталога
+    (детальная информация об измененных квартирах и первые страницы каталога).
+
+    Args:
+        apartment_ids: ID измененных квартир
+
+    Returns:
+        int: Количество записанных страниц каталога
+    """
+    db = SessionLocal()
+    try:
+        return materialization_service.materialize(db, apartment_ids)
+    except Exception as e:
+        logger.error(f"Error materializing apartments {apartment_ids}: {e}")
+        if self.request.retries >= self.max_retries:
+            # Устаревшие готовые ответы не должны жить до истечения TTL
+            materialization_service.discard(apartment_ids)
+            raise
+        raise self.retry(exc=e)
+    finally:
+        db.close()
+
+
+@celery_app.task(name="warm_cache",
+                 soft_time_limit=300,
+                 time_limit=600)
+def warm_cache(reason: str = "", catalog: bool = True):
+    """
+    Задача Celery для прогрева кеша публичного каталога (первые страницы
+    каталога и детальная информация о самых просматриваемых квартирах).
+
+    Args:
+        reason: Причина прогрева
+        catalog: Прогревать ли страницы каталога
+
+    Returns:
+        Tuple[int, int]: Количество записанных страниц каталога и ответов по квартирам
+    """
+    # Изменения после этого момента должны запланировать новый прогрев
+    cache_warmup_service.clear_schedule()
+
+    db = SessionLocal()
+    try:
+        logger.info(f"Warming cache ({reason})")
+        return cache_warmup_service.warm(db, catalog=catalog)
+    except Exception as e:
+        logger.error(f"Error warming cache ({reason}): {e}")
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="trim_apartment_views")
+def trim_apartment_views():
+    """
+    Периодическая задача Celery: обрезает счетчик просмотров квартир до самых
+    просматриваемых (см. CACHE_WARMUP_TRACKED_APARTMENTS).
+
+    Returns:
+        int: Количество удаленных записей
+    """
+    return cache_warmup_service.trim_views(settings.CACHE_WARMUP_TRACKED_APARTMENTS)
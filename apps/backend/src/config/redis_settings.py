@@ -7,26 +7,87 @@ from src.config.settings import settings
 REDIS_URL = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0"
 
 # Настройки для кеширования
+# Кеш публичного API инвалидируется по доменным событиям (см. domain_events),
+# поэтому TTL - страховка, а не основной механизм свежести
 CACHE_EXPIRATION = {
-    "apartments_list": 300,  # 5 минут для списка квартир
-    "apartment_detail": 300,  # 5 минут для детальной информации о квартире
-    "apartment_photos": 600,  # 10 минут для фотографий
+    "apartments_list": 3600,  # 1 час для списка квартир
+    "apartment_detail": 3600,  # 1 час для детальной информации о квартире
+    "apartment_photos": 3600,  # 1 час для фотографий
+    "apartments_search": 3600,  # 1 час для результатов поиска
+    "public_settings": 3600,  # 1 час для публичных настроек
+    # Сколько после истечения значение еще отдается, пока оно обновляется в фоне
+    "stale_while_revalidate": 60,
+    # Готовые ответы обновляются при изменениях, TTL - только страховка от забытых ключей
+    "materialized": 86400,  # 24 часа для материализованных ответов
 }
 
 # Префиксы для ключей кеша
 CACHE_KEYS = {
-    "apartments_list": "apartments:list:{page}:{page_size}:{sort}:{order}",
+    # Ключи списков содержат поколение пространства имен "apartments_list":
+    # инвалидация - это INCR поколения, старые ключи истекают по TTL
+    "apartments_list": "apartments:list:g{generation}:{page}:{page_size}:{sort}:{order}",
+    # В курсорном режиме кешируется только первая страница: курсоры задает клиент
+    "apartments_list_cursor": "apartments:list:g{generation}:cursor:{page_size}:{sort}:{order}:{total}:first",
+    "cache_generation": "cache:generation:{namespace}",
     "apartment_detail": "apartments:detail:{id}",
     "apartment_photos": "apartments:photos:{id}",
+    "catalog_index_version": "catalog:index:version",
+    # Версии для ETag/Last-Modified (время последнего изменения в мс)
+    "catalog_version": "catalog:version",
+    "apartment_versions": "catalog:apartment-versions",  # hash {apartment_id: version}
+    "apartments_search": "apartments:search:{version}:{active_only}:{query_hash}",
+    "public_settings": "settings:public",
+    # Материализованные ответы (готовые JSON-байты, обновляются задачей Celery)
+    "materialized_detail": "apartments:materialized:detail:{id}",
+    "materialized_list": "apartments:materialized:list:{page_size}:{sort}:{order}:{page}",
+    "materialized_list_variants": "apartments:materialized:list-variants",  # set "page_size:sort:order"
+    "materialized_lock": "apartments:materialized:lock",
+    # Канал pub/sub для инвалидации кеша в памяти процессов (L1)
+    "l1_invalidation_channel": "cache:l1:invalidate",
+    # Вычисление значений кеша в одном процессе (get_or_compute)
+    "cache_compute_lock": "cache:lock:{key}",
+    "cache_computed_channel": "cache:computed",  # pub/sub, сообщение - вычисленный ключ
+    # Прогрев кеша
+    "apartment_views": "stats:apartment-views",  # sorted set {apartment_id: просмотры}
+    "cache_warmup_scheduled": "cache:warmup:scheduled",  # прогрев уже стоит в очереди
+    # Статистика загрузки изображений воркерами Celery (hash)
+    "image_upload_stats": "stats:image-uploads",
+}
+
+# Ключи счетчиков (хранятся без TTL, сверяются с БД периодической задачей)
+COUNTER_KEYS = {
+    "ready": "counters:ready",
+    "apartments_total": "counters:apartments:total",
+    "apartments_active": "counters:apartments:active",
+    "apartment_photos": "counters:apartments:photos",  # hash {apartment_id: count}
+    "bookings_by_status": "counters:bookings:status",  # hash {status: count}
+    "events_by_type": "counters:events:type",  # hash {event_type: count}
+}
+
+
+# Пространства имен кеша (см. CacheService.invalidate_namespace и invalidate_keys):
+# поколение входит в ключи списков, а запись публичных настроек проверяет его,
+# чтобы не сохранить значение, построенное до инвалидации
+CACHE_NAMESPACES = {
+    "apartments_list": "apartments_list",
+    "public_settings": "public_settings",
 }
 
 
 # Функции для генерации ключей кеша
-def get_apartments_list_cache_key(page: int, page_size: int, sort: str, order: str) -> str:
+def get_cache_generation_key(namespace: str) -> str:
+    """
+    Генерирует ключ поколения пространства имен кеша.
+    """
+    return CACHE_KEYS["cache_generation"].format(namespace=namespace)
+
+
+def get_apartments_list_cache_key(page: int, page_size: int, sort: str, order: str, generation: int = 0) -> str:
     """
     Генерирует ключ кеша для списка квартир.
     """
     return CACHE_KEYS["apartments_list"].format(
+        generation=generation,
         page=page,
         page_size=page_size,
         sort=sort,
@@ -34,6 +95,20 @@ def get_apartments_list_cache_key(page: int, page_size: int, sort: str, order: s
     )
 
 
+def get_apartments_cursor_cache_key(page_size: int, sort: str, order: str,
+                                    include_total: bool = False, generation: int = 0) -> str:
+    """
+    Генерирует ключ кеша для первой страницы списка квартир в режиме курсора.
+    """
+    return CACHE_KEYS["apartments_list_cursor"].format(
+        generation=generation,
+        page_size=page_size,
+        sort=sort,
+        order=order,
+        total=int(include_total)
+    )
+
+
 def get_apartment_detail_cache_key(apartment_id: int) -> str:
     """
     Генерирует ключ кеша для детальной информации о квартире.
@@ -41,6 +116,25 @@ def get_apartment_detail_cache_key(apartment_id: int) -> str:
     return CACHE_KEYS["apartment_detail"].format(id=apartment_id)
 
 
+def get_materialized_detail_key(apartment_id: int) -> str:
+    """
+    Генерирует ключ материализованной детальной информации о квартире.
+    """
+    return CACHE_KEYS["materialized_detail"].format(id=apartment_id)
+
+
+def get_materialized_list_key(page: int, page_size: int, sort: str, order: str) -> str:
+    """
+    Генерирует ключ материализованной страницы каталога.
+    """
+    return CACHE_KEYS["materialized_list"].format(
+        page_size=page_size,
+        sort=sort,
+        order=order,
+        page=page
+    )
+
+
 def get_apartment_photos_cache_key(apartment_id: int) -> str:
     """
     Генерирует ключ кеша для фотографий квартиры.
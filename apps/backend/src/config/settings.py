@@ -1,5 +1,5 @@
 import os
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -17,6 +17,31 @@ class Settings(BaseSettings):
         """Получить строку подключения к базе данных."""
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """Получить строку подключения к базе данных для асинхронного движка (asyncpg)."""
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Пулы соединений с Postgres (на процесс и движок: синхронный и асинхронный).
+    # Всего соединений до (DB_POOL_SIZE + DB_MAX_OVERFLOW) * движки * процессы -
+    # сумма должна укладываться в max_connections Postgres (см. /health/db)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10  # Соединения сверх DB_POOL_SIZE при пиковой нагрузке
+    DB_POOL_TIMEOUT: float = 30.0  # Сколько ждать свободное соединение (в секундах)
+    DB_POOL_RECYCLE: int = 1800  # Переоткрывать соединения старше (в секундах, -1 - никогда)
+    DB_POOL_PRE_PING: bool = True  # Проверять соединение перед выдачей из пула
+
+    # Таймаут SQL-запросов по умолчанию (в миллисекундах, 0 - без ограничения)
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Таймауты SQL-запросов для маршрутов: префикс пути (без root_path) -> миллисекунды
+    # (выбирается самый длинный совпавший префикс)
+    DB_STATEMENT_TIMEOUTS: Dict[str, int] = {
+        "/apartments": 5000,
+        "/api/v1/bookings": 5000,
+        "/api/v1/settings": 2000,
+        "/admin/api/v1": 15000,
+    }
+
     # MinIO / S3
     MINIO_ROOT_USER: str = "minio"
     MINIO_ROOT_PASSWORD: str = "minio123"
@@ -24,6 +49,10 @@ class Settings(BaseSettings):
     MINIO_PORT: int = 9000
     MINIO_BUCKET: str = "apartments"
     MINIO_USE_SSL: bool = False
+    MINIO_UPLOAD_WORKERS: int = 5  # Параллельные загрузки вариантов изображения (на процесс)
+    # Закрытый бакет для исходников загрузок до обработки воркером (задача получает только ключ)
+    MINIO_STAGING_BUCKET: str = "apartments-staging"
+    MINIO_STAGING_EXPIRATION_DAYS: int = 1  # Необработанные исходники удаляются правилом жизненного цикла
 
     # URL для публичного доступа к фотографиям
     PHOTOS_BASE_URL: str = "http://localhost:9000/apartments"
@@ -37,6 +66,12 @@ class Settings(BaseSettings):
     MAX_IMAGE_SIZE_MB: int = 10
     MAX_IMAGE_DIMENSION: int = 1920
 
+    # Бюджет декодирования исходника в задаче обработки: изображения больше
+    # отклоняются (JPEG декодируется сразу в уменьшенном разрешении и почти
+    # всегда укладывается, PNG/WebP/HEIC - в полном)
+    IMAGE_MAX_SOURCE_PIXELS: int = 100_000_000  # Пикселей в исходнике (10000x10000)
+    IMAGE_DECODE_MEMORY_MB: int = 200  # Растр после декодирования (4 байта на пиксель)
+
     # Параметры для вариантов изображений
     IMAGE_FORMATS: List[str] = ["jpeg", "webp"]
     THUMBNAIL_SIZE: Tuple[int, int] = (150, 150)
@@ -48,10 +83,70 @@ class Settings(BaseSettings):
     JPEG_QUALITY: int = 85  # 0-100
     WEBP_QUALITY: int = 80  # 0-100
 
+    # Процессы-обработчики воркера Celery (worker_concurrency)
+    CELERY_WORKER_CONCURRENCY: int = 2
+    # Потоки кодирования вариантов изображения в одной задаче (Pillow отпускает GIL
+    # при кодировании); 0 - ядра процессора поровну на CELERY_WORKER_CONCURRENCY
+    IMAGE_ENCODE_WORKERS: int = 0
+
     # Параметры для кэширования
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
 
+    # Общие пулы соединений с Redis (см. src.db.redis_pool), на процесс и базу Redis
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0  # Сколько ждать свободное соединение (в секундах)
+    REDIS_SOCKET_TIMEOUT: float = 5.0  # Таймаут ответа Redis (в секундах)
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0  # Таймаут подключения (в секундах)
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # Проверка простаивающих соединений (в секундах)
+
+    # Периодичность сверки счетчиков Redis с БД (в секундах)
+    COUNTERS_RECONCILE_INTERVAL: int = 600
+
+    # Как часто индекс каталога в памяти сверяет свою версию с Redis (в секундах)
+    CATALOG_INDEX_VERSION_CHECK_INTERVAL: float = 1.0
+
+    # Сколько первых страниц каждой используемой комбинации сортировки и размера
+    # страницы каталога поддерживаются готовыми в Redis
+    MATERIALIZED_CATALOG_PAGES: int = 10
+
+    # Кеш в памяти процесса (L1) перед Redis
+    L1_CACHE_ENABLED: bool = True
+    L1_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    L1_CACHE_TTL: float = 5.0  # Страховка на случай потерянного сообщения об инвалидации
+    # Проверка соединения подписки на инвалидации (в секундах): без ответа
+    # дольше трех интервалов подписка переподключается, а L1 не используется
+    L1_INVALIDATION_HEALTH_CHECK_INTERVAL: float = 1.0
+
+    # Вычисление значений кеша при промахе (см. CacheService.get_or_compute)
+    CACHE_COMPUTE_LOCK_TIMEOUT: int = 30  # Сколько живет блокировка вычисления (в секундах)
+    CACHE_COMPUTE_WAIT_TIMEOUT: float = 10.0  # Сколько ждать чужого вычисления (в секундах)
+    CACHE_REFRESH_WORKERS: int = 2  # Потоки фонового обновления устаревших значений
+    # Окно объединения повторных инвалидаций пространства имен кеша (в секундах)
+    CACHE_INVALIDATION_WINDOW: float = 0.2
+
+    # Кодек значений кеша (см. src.utils.cache_codec)
+    CACHE_CODEC_COMPRESSION: str = "zstd"  # none, zstd или lz4
+    CACHE_CODEC_COMPRESS_MIN_SIZE: int = 1024  # Меньшие значения не сжимаются (в байтах)
+    # Повышается при изменении кешируемых структур: старые записи читаются как промах
+    CACHE_SCHEMA_VERSION: int = 1
+
+    # Прогрев кеша при старте и после изменений каталога (задача warm_cache)
+    CACHE_WARMUP_ENABLED: bool = True
+    CACHE_WARMUP_PAGE_SIZES: List[int] = [12]  # Размеры страниц, прогреваемые для всех сортировок
+    CACHE_WARMUP_TOP_APARTMENTS: int = 100  # Сколько самых просматриваемых квартир прогревать
+    CACHE_WARMUP_BATCH_SIZE: int = 50  # Квартир в одной пачке запросов к БД
+    CACHE_WARMUP_DELAY: int = 10  # Задержка прогрева после изменений (в секундах)
+    CACHE_WARMUP_TRACKED_APARTMENTS: int = 1000  # Сколько квартир хранить в счетчике просмотров
+    CACHE_WARMUP_VIEWS_TRIM_INTERVAL: int = 3600  # Период обрезки счетчика просмотров (в секундах)
+
+    # Максимальное количество квартир в одном запросе /apartments/batch
+    APARTMENT_BATCH_MAX_IDS: int = 50
+
+    # HTTP-кеширование публичных ответов (Cache-Control, в секундах)
+    HTTP_CACHE_MAX_AGE: int = 10
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 60
+
     # Настройки JWT
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     JWT_ALGORITHM: str = "HS256"
@@ -1,3 +1,3 @@
-from src.db.database import Base, get_db, SessionLocal, engine
+from src.db.database import Base, get_db, SessionLocal, engine, get_async_db, AsyncSessionLocal, async_engine
 
-__all__ = ["Base", "get_db", "SessionLocal", "engine"]
\ No newline at end of file
+__all__ = ["Base", "get_db", "SessionLocal", "engine", "get_async_db", "AsyncSessionLocal", "async_engine"]
\ No newline at end of file
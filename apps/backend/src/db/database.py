@@ -1,25 +1,199 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.config.settings import settings
+from src.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+# Параметры пулов соединений (общие для обоих движков)
+_pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# Таймаут SQL-запросов по умолчанию задается при подключении; маршруты
+# переопределяют его внутри транзакции (см. _set_route_statement_timeout)
+_connect_args = {}
+_async_connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS:
+    _connect_args = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    _async_connect_args = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
 
-# Создание движка SQLAlchemy
-engine = create_engine(settings.DATABASE_URL)
+# Создание движка SQLAlchemy (Celery, скрипты и синхронные пути API в пуле потоков)
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    connect_args=_connect_args,
+    **_pool_options
+)
 
 # Создание фабрики сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок (asyncpg) для эндпоинтов: запросы не блокируют цикл событий
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=_async_connect_args,
+    **_pool_options
+)
+
+# Фабрика асинхронных сессий (после commit атрибуты не истекают: неявная
+# дозагрузка при обращении к атрибуту в асинхронной сессии невозможна)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Базовый класс для моделей ORM
 Base = declarative_base()
 
+# Статистика пула соединений процесса
+_pool_stats = {"requests": 0, "sessions": 0, "checkouts": 0}
+
+# Таймаут SQL-запросов текущего запроса (в миллисекундах), задается middleware
+_statement_timeout: ContextVar[Optional[int]] = ContextVar("statement_timeout", default=None)
+
+
+@event.listens_for(engine, "checkout")
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    """Учитывает выдачу соединения из пула."""
+    _pool_stats["checkouts"] += 1
+
+
+def statement_timeout_for_path(path: str) -> Optional[int]:
+    """
+    Таймаут SQL-запросов для маршрута.
+
+    Args:
+        path: Путь запроса (без root_path)
+
+    Returns:
+        Optional[int]: Таймаут в миллисекундах по самому длинному совпавшему
+        префиксу из DB_STATEMENT_TIMEOUTS или None (действует таймаут по умолчанию)
+    """
+    matched = None
+    for prefix, timeout_ms in settings.DB_STATEMENT_TIMEOUTS.items():
+        if path.startswith(prefix) and (matched is None or len(prefix) > len(matched[0])):
+            matched = (prefix, timeout_ms)
+    return matched[1] if matched else None
+
+
+def set_statement_timeout(timeout_ms: Optional[int]) -> None:
+    """
+    Задает таймаут SQL-запросов для сессий текущего запроса.
+
+    Args:
+        timeout_ms: Таймаут в миллисекундах (None - таймаут по умолчанию)
+    """
+    _statement_timeout.set(timeout_ms)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_route_statement_timeout(session, transaction, connection) -> None:
+    """
+    Применяет таймаут маршрута к начатой транзакции (SET LOCAL действует до ее конца).
+
+    Таймаут, совпадающий с заданным при подключении, не устанавливается (лишний запрос).
+    """
+    timeout_ms = _statement_timeout.get()
+    if timeout_ms is None or timeout_ms == settings.DB_STATEMENT_TIMEOUT_MS:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def _engine_pool_stats(pool) -> Dict:
+    """Метрики пула движка (для пулов без метрик, например в тестах, - только статус)."""
+    stats = pool.stats() if hasattr(pool, "stats") else {}
+    return {"status": pool.status(), **stats}
+
+
+def pool_stats() -> Dict:
+    """
+    Статистика пула соединений процесса.
+
+    Returns:
+        Dict: Запросы с зависимостями get_db/get_async_db, созданные ими сессии,
+        выдачи соединений из пулов (в т.ч. вне запросов) и их число на запрос,
+        метрики пулов (ожидание соединений, занятые, overflow, таймауты)
+    """
+    requests = _pool_stats["requests"]
+    return {
+        **_pool_stats,
+        "checkouts_per_request": round(_pool_stats["checkouts"] / requests, 4) if requests else None,
+        "pool": _engine_pool_stats(engine.pool),
+        "async_pool": _engine_pool_stats(async_engine.pool)
+    }
+
+
+class LazySession:
+    """
+    Сессия БД, которая создается при первом обращении к ней.
+
+    Запросы, обслуженные из кеша, не создают сессию и не закрывают ее.
+    Атрибуты и методы передаются настоящей сессии (Session).
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: sessionmaker = None):
+        """
+        Args:
+            factory: Фабрика сессий (по умолчанию SessionLocal)
+        """
+        self._factory = factory or SessionLocal
+        self._session: Optional[Session] = None
+
+    @property
+    def created(self) -> bool:
+        """Была ли создана сессия."""
+        return self._session is not None
+
+    def get_session(self) -> Session:
+        """
+        Настоящая сессия (создается при первом вызове).
+
+        Returns:
+            Session: Сессия БД
+        """
+        if self._session is None:
+            self._session = self._factory()
+            _pool_stats["sessions"] += 1
+        return self._session
+
+    def close(self) -> None:
+        """Закрывает сессию, если она была создана."""
+        if self._session is not None:
+            self._session.close()
+
+    def __getattr__(self, name):
+        return getattr(self.get_session(), name)
+
 
 # Функция для получения сессии БД
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    # Асинхронная зависимость не занимает пул потоков на входе и выходе;
+    # сессия создается при первом использовании
+    _pool_stats["requests"] += 1
+    db = LazySession()
     try:
         yield db
     finally:
-        db.close()
+        if db.created:
+            # Закрытие возвращает соединение в пул (rollback) - в пуле потоков
+            await run_in_threadpool(db.close)
 
 
+# Функция для получения асинхронной сессии БД
+async def get_async_db():
+    _pool_stats["requests"] += 1
+    async with AsyncSessionLocal() as db:
+        _pool_stats["sessions"] += 1
+        yield db
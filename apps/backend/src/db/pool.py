@@ -0,0 +1,213 @@
+"""
+Пулы соединений с Postgres с метриками выдачи соединений.
+
+Стандартные события пула (checkout/checkin) не видят ожидания свободного
+соединения, поэтому пулы замеряют время получения соединения вокруг
+QueuePool._do_get (не повторяя его устройство) и считают таймауты. Открытые
+соединения, в том числе сверх pool_size (overflow), считаются по событиям
+connect/close/detach.
+По метрикам подбирается размер пула на процесс: суммарно процессы открывают
+до (pool_size + max_overflow) * число процессов соединений с Postgres.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Ожидание соединения дольше этого считается ожиданием (в миллисекундах)
+WAIT_THRESHOLD_MS = 1.0
+
+# Ключ метрик пула в ConnectionPoolEntry.info (сохраняется при переподключении)
+_METRICS_KEY = "pool_metrics"
+
+
+class PoolMetrics:
+    """
+    Метрики выдачи соединений пула.
+    """
+
+    def __init__(self, pool_size: int):
+        """
+        Args:
+            pool_size: Размер пула (соединения сверх него - overflow)
+        """
+        self._lock = threading.Lock()
+        self.pool_size = pool_size
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_ms = 0.0
+        self.max_wait_time_ms = 0.0
+        self.timeouts = 0
+        self.open_connections = 0
+        self.overflow_connections = 0
+
+    def record_checkout(self, wait_ms: float) -> None:
+        """
+        Учитывает выдачу соединения.
+
+        Args:
+            wait_ms: Время ожидания соединения (в миллисекундах)
+        """
+        with self._lock:
+            self.checkouts += 1
+            if wait_ms >= WAIT_THRESHOLD_MS:
+                self.waits += 1
+                self.wait_time_ms += wait_ms
+                self.max_wait_time_ms = max(self.max_wait_time_ms, wait_ms)
+
+    def record_timeout(self, wait_ms: float) -> None:
+        """
+        Учитывает таймаут ожидания соединения.
+
+        Args:
+            wait_ms: Время ожидания (в миллисекундах)
+        """
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_time_ms = max(self.max_wait_time_ms, wait_ms)
+
+    def record_connect(self) -> None:
+        """Учитывает открытое соединение (сверх pool_size - как overflow)."""
+        with self._lock:
+            self.open_connections += 1
+            if self.open_connections > self.pool_size:
+                self.overflow_connections += 1
+
+    def record_close(self) -> None:
+        """Учитывает закрытое (или отсоединенное от пула) соединение."""
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def snapshot(self) -> Dict:
+        """
+        Текущие значения метрик.
+
+        Returns:
+            Dict: Выдачи, ожидания (количество, среднее и максимум в мс), таймауты,
+            открытые соединения и открытые сверх pool_size
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "avg_wait_ms": round(self.wait_time_ms / self.waits, 2) if self.waits else 0.0,
+                "max_wait_ms": round(self.max_wait_time_ms, 2),
+                "timeouts": self.timeouts,
+                "open_connections": self.open_connections,
+                "overflow_connections": self.overflow_connections,
+            }
+
+
+# Метрики пула, выдача из которого сейчас замеряется (None - вне выдачи). Новое
+# соединение открывается внутри выдачи; QueuePool._do_get вызывает себя
+# повторно - замеряется только внешний вызов. У каждого потока и гринлета
+# асинхронного движка свое значение
+_checkout: ContextVar[Optional[Dict]] = ContextVar("pool_checkout", default=None)
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    """Учитывает новое соединение (и переподключение записи пула)."""
+    checkout = _checkout.get()
+    if checkout is not None:
+        checkout["new_connection"] = True
+        connection_record.info[_METRICS_KEY] = checkout["metrics"]
+
+    metrics = connection_record.info.get(_METRICS_KEY)
+    if metrics is not None:
+        metrics.record_connect()
+
+
+def _on_close(dbapi_connection, connection_record) -> None:
+    """Учитывает закрытие соединения или его отсоединение от пула."""
+    metrics = connection_record.info.get(_METRICS_KEY)
+    if metrics is not None:
+        metrics.record_close()
+
+
+class _InstrumentedPoolMixin:
+    """
+    Получение соединения из пула с метриками.
+
+    Время замеряется вокруг QueuePool._do_get один раз на выдачу. Новое
+    соединение открывается без ожидания пула: время подключения ожиданием
+    не считается.
+    """
+
+    metrics: PoolMetrics
+
+    def _init_metrics(self, pool_size: int, max_overflow: int) -> None:
+        self.max_overflow = max_overflow
+        self.metrics = PoolMetrics(pool_size)
+        # recreate() копирует слушатели событий в новый пул - не дублируем
+        for identifier, listener in (("connect", _on_connect), ("close", _on_close), ("detach", _on_close)):
+            if listener not in getattr(self.dispatch, identifier):
+                event.listen(self, identifier, listener)
+
+    def _do_get(self):
+        if _checkout.get() is not None:
+            return super()._do_get()
+
+        checkout = {"metrics": self.metrics, "new_connection": False}
+        token = _checkout.set(checkout)
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            wait_ms = (time.perf_counter() - start) * 1000
+            self.metrics.record_timeout(wait_ms)
+            logger.warning(f"Database pool checkout timed out after {wait_ms:.0f} ms ({self.status()})")
+            raise
+        finally:
+            _checkout.reset(token)
+
+        self.metrics.record_checkout(0.0 if checkout["new_connection"] else (time.perf_counter() - start) * 1000)
+        return record
+
+    def stats(self) -> Dict:
+        """
+        Метрики пула и его текущее состояние.
+
+        Returns:
+            Dict: Метрики выдачи, занятые соединения и лимиты пула
+        """
+        return {
+            **self.metrics.snapshot(),
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "pool_size": self.size(),
+            "max_connections": self.size() + self.max_overflow,
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool с метриками (синхронный движок)."""
+
+    def __init__(self, *args, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self._init_metrics(pool_size, max_overflow)
+
+    def recreate(self):
+        # dispose() пересоздает пул - метрики процесса сохраняются
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool с метриками (асинхронный движок)."""
+
+    def __init__(self, *args, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self._init_metrics(pool_size, max_overflow)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
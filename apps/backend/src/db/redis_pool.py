@@ -0,0 +1,125 @@
+"""
+Общие пулы соединений с Redis.
+
+Синхронные клиенты (Celery, фоновые потоки, синхронные обработчики) и
+асинхронные (обработчики async def) берут соединения из пулов процесса,
+по одному на базу Redis и режим decode_responses. Размер пулов и таймауты
+задаются в настройках; при исчерпании пула запрос ждет свободное соединение
+не дольше REDIS_POOL_TIMEOUT.
+
+Соединения asyncio привязаны к циклу событий, поэтому асинхронные пулы
+создаются для каждого цикла отдельно.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_sync_pools: Dict[Tuple[int, bool], redis.BlockingConnectionPool] = {}
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[int, bool], aioredis.BlockingConnectionPool]]" = (
+    weakref.WeakKeyDictionary()
+)
+_pools_lock = threading.Lock()
+
+
+def _pool_options(db: int, decode_responses: bool) -> Dict:
+    """Параметры пула соединений."""
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": db,
+        "decode_responses": decode_responses,
+        "max_connections": settings.REDIS_POOL_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+def get_redis(db: int = 0, decode_responses: bool = False) -> redis.Redis:
+    """
+    Синхронный клиент Redis на общем пуле процесса.
+
+    Args:
+        db: Номер базы Redis
+        decode_responses: Декодировать ли ответы в строки
+
+    Returns:
+        redis.Redis: Клиент
+    """
+    key = (db, decode_responses)
+    with _pools_lock:
+        pool = _sync_pools.get(key)
+        if pool is None:
+            pool = _sync_pools[key] = redis.BlockingConnectionPool(**_pool_options(db, decode_responses))
+    return redis.Redis(connection_pool=pool)
+
+
+def create_pubsub_redis(db: int = 0) -> redis.Redis:
+    """
+    Синхронный клиент Redis для подписки pub/sub.
+
+    Подписка держит соединение постоянно, поэтому у нее свое соединение вне
+    общих пулов - с теми же таймаутами, проверкой простаивающих соединений
+    и TCP keepalive.
+
+    Args:
+        db: Номер базы Redis
+
+    Returns:
+        redis.Redis: Клиент
+    """
+    options = _pool_options(db, decode_responses=False)
+    # Параметры ожидания свободного соединения относятся только к общим пулам
+    options.pop("max_connections")
+    options.pop("timeout")
+    return redis.Redis(**options, socket_keepalive=True)
+
+
+def get_async_redis(db: int = 0, decode_responses: bool = False) -> aioredis.Redis:
+    """
+    Асинхронный клиент Redis на общем пуле текущего цикла событий.
+
+    Вызывается из корутин (нужен запущенный цикл событий).
+
+    Args:
+        db: Номер базы Redis
+        decode_responses: Декодировать ли ответы в строки
+
+    Returns:
+        redis.asyncio.Redis: Клиент
+    """
+    loop = asyncio.get_running_loop()
+    key = (db, decode_responses)
+    with _pools_lock:
+        pools = _async_pools.get(loop)
+        if pools is None:
+            # Пулы закрытых циклов событий больше не нужны
+            for closed_loop in [other for other in _async_pools if other.is_closed()]:
+                del _async_pools[closed_loop]
+            pools = _async_pools[loop] = {}
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = aioredis.BlockingConnectionPool(**_pool_options(db, decode_responses))
+    return aioredis.Redis(connection_pool=pool)
+
+
+async def close_async_redis() -> None:
+    """Закрывает соединения асинхронных пулов текущего цикла событий (при остановке приложения)."""
+    with _pools_lock:
+        pools = _async_pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        try:
+            await pool.disconnect()
+        except Exception as e:
+            logger.warning(f"Error closing Redis connection pool: {e}")
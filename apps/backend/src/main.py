@@ -4,6 +4,8 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import logging
 import time
 import uvicorn
@@ -18,7 +20,17 @@ sys.path.append(path.dirname(path.abspath(__file__)))
 from src.config.settings import settings
 from src.db.database import engine, Base
 from src.models.auth import initialize_permissions
-from src.db.database import SessionLocal
+from src.db.database import (
+    SessionLocal, async_engine, pool_stats, set_statement_timeout, statement_timeout_for_path
+)
+from src.db.redis_pool import close_async_redis
+from src.services.catalog_service import CatalogService
+from src.services.counter_service import counter_service
+from src.services.catalog_index import catalog_index
+from src.services.search_service import SearchService
+from src.services.cache_service import cache_stats
+from src.services.minio_service import image_upload_stats
+from src.celery_worker import enqueue_cache_warmup
 from src.api import (
     auth_router, apartment_router, image_router,
     bookings_router, admin_router, settings_router
@@ -102,6 +114,19 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+# Middleware таймаута SQL-запросов маршрута (DB_STATEMENT_TIMEOUTS)
+@app.middleware("http")
+async def route_statement_timeout(request: Request, call_next):
+    # Путь без root_path - как в префиксах роутеров
+    route_path = request.url.path
+    root_path = request.scope.get("root_path", "")
+    if root_path and route_path.startswith(root_path):
+        route_path = route_path[len(root_path):]
+
+    set_statement_timeout(statement_timeout_for_path(route_path))
+    return await call_next(request)
+
+
 # Обработчик для 404 ошибки
 @app.exception_handler(404)
 async def not_found_exception_handler(request: Request, exc):
@@ -117,6 +142,13 @@ async def startup_event():
     # Создаем таблицы в базе данных (если их еще нет)
     Base.metadata.create_all(bind=engine)
 
+    # Поисковая колонка и индексы (полнотекстовый и триграммный поиск)
+    try:
+        SearchService.ensure_search_schema(engine)
+        logger.info(f"Search schema ensured (trigram search: {SearchService.trigram_enabled})")
+    except Exception as e:
+        logger.error(f"Error ensuring search schema: {e}")
+
     # Инициализируем разрешения для ролей
     db = SessionLocal()
     try:
@@ -127,12 +159,69 @@ async def startup_event():
     finally:
         db.close()
 
+    # Пересобираем карточки каталога (денормализованная модель чтения)
+    db = SessionLocal()
+    try:
+        cards_count = CatalogService.rebuild_all(db)
+        logger.info(f"Catalog cards rebuilt: {cards_count}")
+    except Exception as e:
+        logger.error(f"Error rebuilding catalog cards: {e}")
+    finally:
+        db.close()
+
+    # Строим индекс каталога в памяти
+    db = SessionLocal()
+    try:
+        catalog_index.rebuild(db)
+    except Exception as e:
+        logger.error(f"Error building catalog index: {e}")
+    finally:
+        db.close()
+
+    # Сверяем счетчики Redis с БД
+    db = SessionLocal()
+    try:
+        counter_service.reconcile(db)
+    except Exception as e:
+        logger.error(f"Error reconciling counters: {e}")
+    finally:
+        db.close()
+
+    # Прогрев кеша выполняет задача Celery; постановка в очередь - в пуле потоков,
+    # чтобы недоступный брокер не задерживал готовность приложения
+    asyncio.get_running_loop().run_in_executor(None, enqueue_cache_warmup, "startup")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Закрываем соединения асинхронных пулов Redis и БД
+    await close_async_redis()
+    await async_engine.dispose()
+
 
 @app.get(f"/health")
 async def health_check():
     return {"status": "ok"}
 
 
+@app.get(f"/health/cache")
+async def cache_health_check():
+    # Статистика кеша этого воркера (у каждого процесса свой L1)
+    return {"pid": os.getpid(), **cache_stats()}
+
+
+@app.get(f"/health/images")
+async def images_health_check():
+    # Загрузка изображений воркерами Celery (общая статистика в Redis)
+    return await run_in_threadpool(image_upload_stats)
+
+
+@app.get(f"/health/db")
+async def db_health_check():
+    # Статистика пула соединений этого воркера: выдачи соединений на запрос
+    return {"pid": os.getpid(), **pool_stats()}
+
+
 # Точка входа для запуска через uvicorn
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
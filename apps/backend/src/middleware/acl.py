@@ -1,13 +1,13 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Callable
 import logging
 from functools import wraps
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.middleware.auth import get_current_active_user
 from src.models.auth import User
-from src.services.auth import has_permission, check_permissions, check_any_permission
+from src.services.auth import ahas_permission, acheck_permissions, acheck_any_permission
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +28,9 @@ def require_permission(permission: str):
 
     def decorator(func):
         @wraps(func)
-        async def wrapper(*args, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db),
-                          **kwargs):
-            if not has_permission(db, current_user.role, permission):
+        async def wrapper(*args, current_user: User = Depends(get_current_active_user),
+                          db: AsyncSession = Depends(get_async_db), **kwargs):
+            if not await ahas_permission(db, current_user.role, permission):
                 logger.warning(f"User {current_user.id} ({current_user.email}) does not have permission: {permission}")
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -59,9 +59,9 @@ def require_permissions(permissions: List[str]):
 
     def decorator(func):
         @wraps(func)
-        async def wrapper(*args, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db),
-                          **kwargs):
-            if not check_permissions(db, current_user.role, permissions):
+        async def wrapper(*args, current_user: User = Depends(get_current_active_user),
+                          db: AsyncSession = Depends(get_async_db), **kwargs):
+            if not await acheck_permissions(db, current_user.role, permissions):
                 logger.warning(
                     f"User {current_user.id} ({current_user.email}) does not have all required permissions: {permissions}")
                 raise HTTPException(
@@ -91,9 +91,9 @@ def require_any_permission(permissions: List[str]):
 
     def decorator(func):
         @wraps(func)
-        async def wrapper(*args, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db),
-                          **kwargs):
-            if not check_any_permission(db, current_user.role, permissions):
+        async def wrapper(*args, current_user: User = Depends(get_current_active_user),
+                          db: AsyncSession = Depends(get_async_db), **kwargs):
+            if not await acheck_any_permission(db, current_user.role, permissions):
                 logger.warning(
                     f"User {current_user.id} ({current_user.email}) does not have any of the required permissions: {permissions}")
                 raise HTTPException(
@@ -109,52 +109,57 @@ def require_any_permission(permissions: List[str]):
 
 # Предопределенные зависимости для часто используемых разрешений
 
-def require_apartments_read(current_user: User = Depends(get_current_active_user),
-                            db: Session = Depends(get_db)) -> User:
+async def require_apartments_read(current_user: User = Depends(get_current_active_user),
+                                  db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на чтение квартир."""
-    if not has_permission(db, current_user.role, "apartments:read"):
+    if not await ahas_permission(db, current_user.role, "apartments:read"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: apartments:read")
     return current_user
 
 
-def require_apartments_write(current_user: User = Depends(get_current_active_user),
-                             db: Session = Depends(get_db)) -> User:
+async def require_apartments_write(current_user: User = Depends(get_current_active_user),
+                                   db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на запись квартир."""
-    if not has_permission(db, current_user.role, "apartments:write"):
+    if not await ahas_permission(db, current_user.role, "apartments:write"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: apartments:write")
     return current_user
 
 
-def require_photos_read(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)) -> User:
+async def require_photos_read(current_user: User = Depends(get_current_active_user),
+                              db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на чтение фотографий."""
-    if not has_permission(db, current_user.role, "photos:read"):
+    if not await ahas_permission(db, current_user.role, "photos:read"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: photos:read")
     return current_user
 
 
-def require_photos_write(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)) -> User:
+async def require_photos_write(current_user: User = Depends(get_current_active_user),
+                               db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на запись фотографий."""
-    if not has_permission(db, current_user.role, "photos:write"):
+    if not await ahas_permission(db, current_user.role, "photos:write"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: photos:write")
     return current_user
 
 
-def require_events_read(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)) -> User:
+async def require_events_read(current_user: User = Depends(get_current_active_user),
+                              db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на чтение журнала событий."""
-    if not has_permission(db, current_user.role, "events:read"):
+    if not await ahas_permission(db, current_user.role, "events:read"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: events:read")
     return current_user
 
 
-def require_users_read(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)) -> User:
+async def require_users_read(current_user: User = Depends(get_current_active_user),
+                             db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на чтение пользователей."""
-    if not has_permission(db, current_user.role, "users:read"):
+    if not await ahas_permission(db, current_user.role, "users:read"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: users:read")
     return current_user
 
 
-def require_users_write(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)) -> User:
+async def require_users_write(current_user: User = Depends(get_current_active_user),
+                              db: AsyncSession = Depends(get_async_db)) -> User:
     """Проверяет наличие разрешения на запись пользователей."""
-    if not has_permission(db, current_user.role, "users:write"):
+    if not await ahas_permission(db, current_user.role, "users:write"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуется разрешение: users:write")
     return current_user
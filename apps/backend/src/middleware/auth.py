@@ -1,11 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from src.db.database import get_db
+from src.db.database import get_async_db
 from src.models import RolePermission
-from src.services.auth import verify_access_token
+from src.services.auth import averify_access_token
 from src.schemas.admin import TokenData
 from src.models.auth import User
 
@@ -25,14 +25,14 @@ MANAGE_SETTINGS = ["settings:write"]
 
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Получает текущего пользователя на основе JWT-токена.
 
     Args:
         token: JWT-токен из заголовка Authorization
-        db: Сессия базы данных
+        db: Асинхронная сессия базы данных
 
     Returns:
         User: Объект текущего пользователя
@@ -41,10 +41,10 @@ async def get_current_user(
         HTTPException: Если токен недействителен или пользователь не найден
     """
     # Проверяем токен и получаем данные пользователя
-    token_data = verify_access_token(token)
+    token_data = await averify_access_token(token)
 
     # Получаем пользователя из базы данных
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = await db.get(User, token_data.user_id)
     if user is None:
         logger.warning(f"User with ID {token_data.user_id} not found")
         raise HTTPException(
@@ -1,4 +1,5 @@
 from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.catalog import ApartmentCatalogCard
 from src.models.auth import User, RolePermission
 from src.models.event_log import EventLog, EventType, EntityType
 from src.models.booking import Booking, BookingStatus
@@ -8,6 +9,7 @@ __all__ = [
     # Основные модели
     'Apartment',
     'ApartmentPhoto',
+    'ApartmentCatalogCard',
 
     # Модели аутентификации и авторизации
     'User',
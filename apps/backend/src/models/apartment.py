@@ -1,9 +1,17 @@
 from src.db.database import Base
 from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, Float, UniqueConstraint, Index, \
-    JSON
-from sqlalchemy.dialects.postgresql import JSONB
+    JSON, Computed
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+
+# Поисковый вектор: заголовок важнее адреса, адрес важнее описания (ё приводится к е,
+# как и в нормализованном запросе)
+APARTMENT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', translate(coalesce(title, ''), 'ёЁ', 'еЕ')), 'A') || "
+    "setweight(to_tsvector('russian', translate(coalesce(address, ''), 'ёЁ', 'еЕ')), 'B') || "
+    "setweight(to_tsvector('russian', translate(coalesce(description, ''), 'ёЁ', 'еЕ')), 'C')"
+)
 
 
 class Apartment(Base):
@@ -23,6 +31,9 @@ class Apartment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Полнотекстовый поиск (генерируемая колонка, индексы создает SearchService)
+    search_vector = deferred(Column(TSVECTOR, Computed(APARTMENT_SEARCH_VECTOR_SQL, persisted=True)))
+
     # Отношение один-ко-многим с фотографиями
     photos = relationship("ApartmentPhoto", back_populates="apartment", cascade="all, delete-orphan")
     
@@ -0,0 +1,36 @@
+from src.db.database import Base
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Float, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class ApartmentCatalogCard(Base):
+    """
+    Денормализованная карточка квартиры для публичного каталога.
+
+    Содержит всё, что нужно для отрисовки карточки в списке, поэтому страница
+    каталога отдаётся одним индексированным запросом без обращений к MinIO.
+    Поддерживается в актуальном состоянии сервисом CatalogService.
+    """
+    __tablename__ = "apartment_catalog_card"
+
+    apartment_id = Column(Integer, ForeignKey("apartment.id", ondelete="CASCADE"), primary_key=True)
+    title = Column(String(100), nullable=False)
+    price_rub = Column(Integer, nullable=False)
+    rooms = Column(Integer, nullable=False)
+    floor = Column(Integer, nullable=False)
+    area_m2 = Column(Float, nullable=False)
+    active = Column(Boolean, nullable=False)
+    booking_enabled = Column(Boolean, nullable=False)
+
+    # Варианты обложки {size_format: url} и количество фотографий
+    cover_variants = Column(JSONB, nullable=True)
+    photos_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Индексы под сортировки каталога (id - для стабильного порядка при равных значениях)
+    __table_args__ = (
+        Index('idx_catalog_card_created', created_at, apartment_id, postgresql_where=active.is_(True)),
+        Index('idx_catalog_card_price', price_rub, apartment_id, postgresql_where=active.is_(True)),
+    )
@@ -1,7 +1,7 @@
 from src.schemas.apartment import (
     ApartmentBase, ApartmentCreate, ApartmentUpdate, ApartmentInList,
     ApartmentDetail, PaginatedApartments, ApartmentPhoto, ApartmentPhotoBase,
-    ApartmentPhotoCreate
+    ApartmentPhotoCreate, CursorPaginatedApartments, CatalogFacets, PriceHistogram
 )
 from src.schemas.booking import (
     BookingBase, BookingCreate, BookingUpdate, BookingStatusUpdate,
@@ -16,7 +16,7 @@ __all__ = [
     # Квартиры
     "ApartmentBase", "ApartmentCreate", "ApartmentUpdate", "ApartmentInList",
     "ApartmentDetail", "PaginatedApartments", "ApartmentPhoto", "ApartmentPhotoBase",
-    "ApartmentPhotoCreate",
+    "ApartmentPhotoCreate", "CursorPaginatedApartments", "CatalogFacets", "PriceHistogram",
     
     # Бронирования
     "BookingBase", "BookingCreate", "BookingUpdate", "BookingStatusUpdate",
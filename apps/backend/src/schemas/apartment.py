@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -79,4 +79,28 @@ class PaginatedApartments(BaseModel):
     page: int
     page_size: int
     total: int
+    items: List[ApartmentInList]
+
+
+class PriceHistogram(BaseModel):
+    edges: List[int]
+    counts: List[int]
+
+
+class CatalogFacets(BaseModel):
+    total: int
+    rooms: Dict[int, int]
+    booking_enabled: Dict[str, int]
+    price_histogram: PriceHistogram
+    price_min: Optional[int] = None
+    price_max: Optional[int] = None
+    area_min: Optional[float] = None
+    area_max: Optional[float] = None
+
+
+class CursorPaginatedApartments(BaseModel):
+    page_size: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
     items: List[ApartmentInList]
\ No newline at end of file
@@ -1,5 +1,10 @@
 from src.services.minio_service import MinioService
 from src.services.apartment_service import ApartmentService
 from src.services.cache_service import CacheService
+from src.services.catalog_service import CatalogService
+from src.services.counter_service import CounterService
+from src.services.catalog_index import CatalogIndex
+from src.services.search_service import SearchService
 
-__all__ = ["MinioService", "ApartmentService", "CacheService"]
+__all__ = ["MinioService", "ApartmentService", "CacheService", "CatalogService", "CounterService", "CatalogIndex",
+           "SearchService"]
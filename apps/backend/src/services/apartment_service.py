@@ -1,13 +1,18 @@
 from typing import List, Optional, Tuple, Dict
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc
+from sqlalchemy import Select, func, desc, asc, literal, select, tuple_
 import logging
-import json
 from datetime import datetime
 
 from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.catalog import ApartmentCatalogCard
 from src.schemas.apartment import ApartmentCreate, ApartmentUpdate, ApartmentInList
 from src.services.minio_service import MinioService
+from src.services.photo_manifest_service import get_image_id, get_variant_urls
+from src.services.counter_service import counter_service
+from src.utils.pagination import CURSOR_NEXT, CURSOR_PREV, InvalidCursorError, decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +22,116 @@ class ApartmentService:
     Сервис для работы с квартирами.
     """
 
+    # Запросы строятся один раз и выполняются синхронной (Celery, скрипты,
+    # пул потоков) или асинхронной (эндпоинты) сессией: методы с префиксом a
+    # принимают AsyncSession и не блокируют цикл событий
+
+    @staticmethod
+    def _catalog_page_statement(page: int, page_size: int, sort_field: str, sort_order: str) -> Select:
+        """Запрос страницы активных карточек каталога (id - для стабильного порядка)."""
+        direction = desc if sort_order == "desc" else asc
+        return select(ApartmentCatalogCard).where(
+            ApartmentCatalogCard.active.is_(True)
+        ).order_by(
+            direction(getattr(ApartmentCatalogCard, sort_field)),
+            direction(ApartmentCatalogCard.apartment_id)
+        ).offset(
+            (page - 1) * page_size
+        ).limit(
+            page_size
+        )
+
+    @staticmethod
+    def _active_count_statement() -> Select:
+        """Запрос количества активных квартир."""
+        return select(func.count(ApartmentCatalogCard.apartment_id)).where(ApartmentCatalogCard.active.is_(True))
+
+    @staticmethod
+    def _cursor_page_statement(page_size: int, sort_field: str, sort_order: str,
+                               position: Optional[Dict]) -> Select:
+        """
+        Запрос страницы каталога после/до граничной записи курсора
+        (на одну запись больше, чтобы понять, есть ли еще страница).
+        """
+        backward = position is not None and position["direction"] == CURSOR_PREV
+
+        sort_column = getattr(ApartmentCatalogCard, sort_field)
+        key = tuple_(sort_column, ApartmentCatalogCard.apartment_id)
+
+        # При движении назад сортировка и сравнение инвертируются
+        ascending = (sort_order == "asc") != backward
+        direction = asc if ascending else desc
+
+        statement = select(ApartmentCatalogCard).where(ApartmentCatalogCard.active.is_(True))
+
+        if position is not None:
+            bound = tuple_(literal(position["value"], sort_column.type), literal(position["id"]))
+            statement = statement.where(key > bound if ascending else key < bound)
+
+        return statement.order_by(
+            direction(sort_column),
+            direction(ApartmentCatalogCard.apartment_id)
+        ).limit(page_size + 1)
+
+    @staticmethod
+    def _cursor_page(
+            cards: List[ApartmentCatalogCard],
+            page_size: int,
+            sort_field: str,
+            sort_order: str,
+            position: Optional[Dict]
+    ) -> Tuple[List[ApartmentCatalogCard], Optional[str], Optional[str]]:
+        """Страница и курсоры соседних страниц по результату _cursor_page_statement."""
+        backward = position is not None and position["direction"] == CURSOR_PREV
+
+        has_more = len(cards) > page_size
+        cards = cards[:page_size]
+        if backward:
+            cards.reverse()
+
+        def make_cursor(card: ApartmentCatalogCard, cursor_direction: str) -> str:
+            return encode_cursor(
+                sort_field, sort_order, getattr(card, sort_field), card.apartment_id, cursor_direction
+            )
+
+        # При движении назад следующая страница заведомо есть (с нее и пришли)
+        if backward:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, position is not None
+
+        next_cursor = make_cursor(cards[-1], CURSOR_NEXT) if cards and has_next else None
+        prev_cursor = make_cursor(cards[0], CURSOR_PREV) if cards and has_prev else None
+        return cards, next_cursor, prev_cursor
+
+    @staticmethod
+    def _apartment_by_id_statement(apartment_id: int) -> Select:
+        """Запрос активной квартиры по ID."""
+        return select(Apartment).where(Apartment.id == apartment_id, Apartment.active.is_(True)).limit(1)
+
+    @staticmethod
+    def _apartments_by_ids_statement(apartment_ids: List[int]) -> Select:
+        """Запрос активных квартир по списку ID."""
+        return select(Apartment).where(Apartment.id.in_(apartment_ids), Apartment.active.is_(True))
+
+    @staticmethod
+    def _photos_statement(apartment_ids: List[int]) -> Select:
+        """Запрос фотографий квартир (по квартире и порядку сортировки)."""
+        return select(ApartmentPhoto).where(
+            ApartmentPhoto.apartment_id.in_(apartment_ids)
+        ).order_by(
+            ApartmentPhoto.apartment_id,
+            ApartmentPhoto.sort_order
+        )
+
+    @staticmethod
+    def _group_photos_with_variants(photos: List[ApartmentPhoto], apartment_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Фотографии с вариантами по ID квартиры."""
+        photos_by_apartment: Dict[int, List[Dict]] = {apartment_id: [] for apartment_id in apartment_ids}
+        for photo in photos:
+            photos_by_apartment[photo.apartment_id].append(ApartmentService.photo_with_variants(photo))
+        return photos_by_apartment
+
     @staticmethod
     def get_apartments(
             db: Session,
@@ -24,9 +139,12 @@ class ApartmentService:
             page_size: int = 12,
             sort_field: str = "created_at",
             sort_order: str = "desc"
-    ) -> Tuple[List[Apartment], int]:
+    ) -> Tuple[List[ApartmentCatalogCard], int]:
         """
-        Получение списка квартир с пагинацией и сортировкой.
+        Получение страницы каталога с пагинацией и сортировкой.
+
+        Читает денормализованные карточки каталога, поэтому страница отдается
+        одним индексированным запросом без обращений к фотографиям и MinIO.
 
         Args:
             db: Сессия базы данных
@@ -36,38 +154,138 @@ class ApartmentService:
             sort_order: Порядок сортировки (asc/desc)
 
         Returns:
-            Tuple[List[Apartment], int]: Список квартир и общее количество
+            Tuple[List[ApartmentCatalogCard], int]: Карточки квартир и общее количество
         """
         try:
-            # Определяем поле и порядок сортировки
-            sort_column = getattr(Apartment, sort_field)
-            if sort_order == "desc":
-                sort_column = desc(sort_column)
-            else:
-                sort_column = asc(sort_column)
-
             # Получаем общее количество активных квартир
-            total = db.query(func.count(Apartment.id)).filter(
-                Apartment.active.is_(True)
-            ).scalar()
+            total = ApartmentService.count_active_apartments(db)
 
-            # Получаем квартиры с пагинацией и сортировкой
-            apartments = db.query(Apartment).filter(
-                Apartment.active.is_(True)
-            ).order_by(
-                sort_column
-            ).offset(
-                (page - 1) * page_size
-            ).limit(
-                page_size
-            ).all()
+            # Получаем карточки с пагинацией и сортировкой
+            cards = db.execute(
+                ApartmentService._catalog_page_statement(page, page_size, sort_field, sort_order)
+            ).scalars().all()
+
+            return cards, total
+
+        except Exception as e:
+            logger.error(f"Error getting apartments: {e}")
+            raise
+
+    @staticmethod
+    async def aget_apartments(
+            db: AsyncSession,
+            page: int = 1,
+            page_size: int = 12,
+            sort_field: str = "created_at",
+            sort_order: str = "desc"
+    ) -> Tuple[List[ApartmentCatalogCard], int]:
+        """
+        Получение страницы каталога с пагинацией и сортировкой (асинхронно, см. get_apartments).
 
-            return apartments, total
+        Args:
+            db: Асинхронная сессия базы данных
+            page: Номер страницы
+            page_size: Размер страницы
+            sort_field: Поле для сортировки
+            sort_order: Порядок сортировки (asc/desc)
+
+        Returns:
+            Tuple[List[ApartmentCatalogCard], int]: Карточки квартир и общее количество
+        """
+        try:
+            total = await ApartmentService.acount_active_apartments(db)
+            cards = (await db.execute(
+                ApartmentService._catalog_page_statement(page, page_size, sort_field, sort_order)
+            )).scalars().all()
+
+            return cards, total
 
         except Exception as e:
             logger.error(f"Error getting apartments: {e}")
             raise
 
+    @staticmethod
+    def count_active_apartments(db: Session) -> int:
+        """
+        Количество активных квартир (из счетчика, при его недоступности - запросом к БД).
+
+        Args:
+            db: Сессия базы данных
+
+        Returns:
+            int: Количество активных квартир
+        """
+        total = counter_service.get_apartments_count(active_only=True)
+        if total is None:
+            total = db.execute(ApartmentService._active_count_statement()).scalar()
+        return total
+
+    @staticmethod
+    async def acount_active_apartments(db: AsyncSession) -> int:
+        """
+        Количество активных квартир (асинхронно, см. count_active_apartments).
+
+        Args:
+            db: Асинхронная сессия базы данных
+
+        Returns:
+            int: Количество активных квартир
+        """
+        total = counter_service.get_apartments_count(active_only=True)
+        if total is None:
+            total = (await db.execute(ApartmentService._active_count_statement())).scalar()
+        return total
+
+    @staticmethod
+    def get_apartments_by_cursor(
+            db: Session,
+            page_size: int = 12,
+            sort_field: str = "created_at",
+            sort_order: str = "desc",
+            cursor: Optional[str] = None,
+            include_total: bool = False
+    ) -> Tuple[List[ApartmentCatalogCard], Optional[str], Optional[str], Optional[int]]:
+        """
+        Получение страницы каталога с keyset-пагинацией.
+
+        Страница выбирается условием (sort_field, id) > / < (значение, id) граничной
+        записи, поэтому стоимость запроса не зависит от глубины страницы.
+
+        Args:
+            db: Сессия базы данных
+            page_size: Размер страницы
+            sort_field: Поле для сортировки
+            sort_order: Порядок сортировки (asc/desc)
+            cursor: Курсор (None - первая страница)
+            include_total: Считать ли общее количество квартир
+
+        Returns:
+            Tuple: Карточки квартир, курсор следующей страницы, курсор предыдущей страницы,
+                общее количество (None, если не запрошено)
+
+        Raises:
+            InvalidCursorError: Если курсор некорректен
+        """
+        try:
+            position = decode_cursor(cursor, sort_field, sort_order) if cursor else None
+
+            cards = db.execute(
+                ApartmentService._cursor_page_statement(page_size, sort_field, sort_order, position)
+            ).scalars().all()
+            cards, next_cursor, prev_cursor = ApartmentService._cursor_page(
+                list(cards), page_size, sort_field, sort_order, position
+            )
+
+            total = ApartmentService.count_active_apartments(db) if include_total else None
+
+            return cards, next_cursor, prev_cursor, total
+
+        except InvalidCursorError:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting apartments by cursor: {e}")
+            raise
+
     @staticmethod
     def get_apartment_by_id(db: Session, apartment_id: int) -> Optional[Apartment]:
         """
@@ -81,14 +299,69 @@ class ApartmentService:
             Optional[Apartment]: Квартира или None
         """
         try:
-            return db.query(Apartment).filter(
-                Apartment.id == apartment_id,
-                Apartment.active.is_(True)
-            ).first()
+            return db.execute(ApartmentService._apartment_by_id_statement(apartment_id)).scalars().first()
         except Exception as e:
             logger.error(f"Error getting apartment by ID: {e}")
             raise
 
+    @staticmethod
+    async def aget_apartment_by_id(db: AsyncSession, apartment_id: int) -> Optional[Apartment]:
+        """
+        Получение квартиры по ID (асинхронно).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[Apartment]: Квартира или None
+        """
+        try:
+            return (await db.execute(ApartmentService._apartment_by_id_statement(apartment_id))).scalars().first()
+        except Exception as e:
+            logger.error(f"Error getting apartment by ID: {e}")
+            raise
+
+    @staticmethod
+    def get_apartments_by_ids(db: Session, apartment_ids: List[int]) -> List[Apartment]:
+        """
+        Получение активных квартир по списку ID одним запросом.
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир
+
+        Returns:
+            List[Apartment]: Найденные квартиры (порядок не гарантируется)
+        """
+        if not apartment_ids:
+            return []
+        try:
+            return db.execute(ApartmentService._apartments_by_ids_statement(apartment_ids)).scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting apartments by IDs: {e}")
+            raise
+
+    @staticmethod
+    async def aget_apartments_by_ids(db: AsyncSession, apartment_ids: List[int]) -> List[Apartment]:
+        """
+        Получение активных квартир по списку ID одним запросом (асинхронно).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_ids: ID квартир
+
+        Returns:
+            List[Apartment]: Найденные квартиры (порядок не гарантируется)
+        """
+        if not apartment_ids:
+            return []
+        try:
+            return (await db.execute(ApartmentService._apartments_by_ids_statement(apartment_ids))).scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting apartments by IDs: {e}")
+            raise
+
     @staticmethod
     def get_apartment_photos(db: Session, apartment_id: int) -> List[ApartmentPhoto]:
         """
@@ -102,15 +375,49 @@ class ApartmentService:
             List[ApartmentPhoto]: Список фотографий
         """
         try:
-            return db.query(ApartmentPhoto).filter(
-                ApartmentPhoto.apartment_id == apartment_id
-            ).order_by(
-                ApartmentPhoto.sort_order
-            ).all()
+            return db.execute(ApartmentService._photos_statement([apartment_id])).scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting apartment photos: {e}")
+            raise
+
+    @staticmethod
+    async def aget_apartment_photos(db: AsyncSession, apartment_id: int) -> List[ApartmentPhoto]:
+        """
+        Получение списка фотографий квартиры (асинхронно).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_id: ID квартиры
+
+        Returns:
+            List[ApartmentPhoto]: Список фотографий
+        """
+        try:
+            return (await db.execute(ApartmentService._photos_statement([apartment_id]))).scalars().all()
         except Exception as e:
             logger.error(f"Error getting apartment photos: {e}")
             raise
 
+    @staticmethod
+    def photo_with_variants(photo: ApartmentPhoto) -> Dict:
+        """
+        Описание фотографии со всеми вариантами изображений.
+
+        Args:
+            photo: Фотография
+
+        Returns:
+            Dict: Фотография с вариантами
+        """
+        # Варианты берутся из манифеста фотографии, без листинга MinIO
+        return {
+            "id": photo.id,
+            "apartment_id": photo.apartment_id,
+            "sort_order": photo.sort_order,
+            "image_id": get_image_id(photo.photo_metadata, photo.url),
+            "variants": get_variant_urls(photo.photo_metadata, fallback_url=photo.url)
+        }
+
     @staticmethod
     def get_apartment_photos_with_variants(db: Session, apartment_id: int) -> List[Dict]:
         """
@@ -123,62 +430,70 @@ class ApartmentService:
         Returns:
             List[Dict]: Список фотографий с вариантами
         """
+        photos = ApartmentService.get_apartment_photos(db, apartment_id)
+        return [ApartmentService.photo_with_variants(photo) for photo in photos]
+
+    @staticmethod
+    async def aget_apartment_photos_with_variants(db: AsyncSession, apartment_id: int) -> List[Dict]:
+        """
+        Получение списка фотографий квартиры со всеми вариантами изображений (асинхронно).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_id: ID квартиры
+
+        Returns:
+            List[Dict]: Список фотографий с вариантами
+        """
+        photos = await ApartmentService.aget_apartment_photos(db, apartment_id)
+        return [ApartmentService.photo_with_variants(photo) for photo in photos]
+
+    @staticmethod
+    def get_photos_with_variants_by_apartment_ids(db: Session, apartment_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Получение фотографий нескольких квартир с вариантами одним запросом.
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир
+
+        Returns:
+            Dict[int, List[Dict]]: Фотографии с вариантами по ID квартиры
+        """
+        if not apartment_ids:
+            return {}
+
         try:
-            # Получаем фотографии из БД
-            photos = ApartmentService.get_apartment_photos(db, apartment_id)
-
-            # Создаем экземпляр сервиса MinIO
-            minio_service = MinioService()
-
-            # Получаем все изображения с вариантами
-            images = minio_service.get_apartment_images(apartment_id)
-
-            # Сопоставляем фотографии из БД с изображениями в MinIO
-            result = []
-
-            for photo in photos:
-                # Пытаемся извлечь image_id из URL
-                image_id = None
-                if photo.url:
-                    # Предполагаем, что URL имеет формат /apartments/{apartment_id}/{image_id}* или подобный
-                    parts = photo.url.split('/')
-                    if len(parts) >= 3:
-                        filename = parts[-1]
-                        image_id = filename.split('_')[0].split('.')[0]
-
-                # Если нашли image_id и есть соответствующие варианты
-                if image_id and image_id in images:
-                    variants = images[image_id]
-                    result.append({
-                        "id": photo.id,
-                        "apartment_id": photo.apartment_id,
-                        "sort_order": photo.sort_order,
-                        "image_id": image_id,
-                        "variants": variants
-                    })
-                else:
-                    # Если не нашли варианты, используем URL из БД
-                    result.append({
-                        "id": photo.id,
-                        "apartment_id": photo.apartment_id,
-                        "sort_order": photo.sort_order,
-                        "image_id": None,
-                        "variants": {"original": photo.url}
-                    })
-
-            return result
+            photos = db.execute(ApartmentService._photos_statement(apartment_ids)).scalars().all()
+        except Exception as e:
+            logger.error(f"Error getting photos by apartment IDs: {e}")
+            raise
+
+        return ApartmentService._group_photos_with_variants(photos, apartment_ids)
+
+    @staticmethod
+    async def aget_photos_with_variants_by_apartment_ids(db: AsyncSession,
+                                                         apartment_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Получение фотографий нескольких квартир с вариантами одним запросом (асинхронно).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_ids: ID квартир
 
+        Returns:
+            Dict[int, List[Dict]]: Фотографии с вариантами по ID квартиры
+        """
+        if not apartment_ids:
+            return {}
+
+        try:
+            photos = (await db.execute(ApartmentService._photos_statement(apartment_ids))).scalars().all()
         except Exception as e:
-            logger.error(f"Error getting apartment photos with variants: {e}")
-            # В случае ошибки возвращаем фотографии только из БД
-            photos = ApartmentService.get_apartment_photos(db, apartment_id)
-            return [{
-                "id": photo.id,
-                "apartment_id": photo.apartment_id,
-                "sort_order": photo.sort_order,
-                "image_id": None,
-                "variants": {"original": photo.url}
-            } for photo in photos]
+            logger.error(f"Error getting photos by apartment IDs: {e}")
+            raise
+
+        return ApartmentService._group_photos_with_variants(photos, apartment_ids)
 
     @staticmethod
     def get_apartment_cover(db: Session, apartment_id: int) -> Optional[str]:
@@ -227,22 +542,8 @@ class ApartmentService:
             if not photo:
                 return {}
 
-            # Пытаемся извлечь image_id из URL
-            image_id = None
-            if photo.url:
-                parts = photo.url.split('/')
-                if len(parts) >= 3:
-                    filename = parts[-1]
-                    image_id = filename.split('_')[0].split('.')[0]
-
-            # Если нашли image_id, получаем варианты
-            if image_id:
-                minio_service = MinioService()
-                variants = minio_service.get_image_variants(apartment_id, image_id)
-                return variants
-
-            # Если не нашли варианты, возвращаем только оригинальный URL
-            return {"original": photo.url} if photo.url else {}
+            # Варианты из манифеста (или только основной URL, если манифеста нет)
+            return get_variant_urls(photo.photo_metadata, fallback_url=photo.url)
 
         except Exception as e:
             logger.error(f"Error getting apartment cover with variants: {e}")
@@ -250,8 +551,8 @@ class ApartmentService:
             return {"original": ApartmentService.get_apartment_cover(db, apartment_id) or ""}
 
     @staticmethod
-    def add_apartment_photo(
-            db: Session,
+    async def aadd_apartment_photo(
+            db: AsyncSession,
             apartment_id: int,
             url: str,
             metadata: Optional[Dict] = None
@@ -260,7 +561,7 @@ class ApartmentService:
         Добавление фотографии к квартире.
 
         Args:
-            db: Сессия базы данных
+            db: Асинхронная сессия базы данных
             apartment_id: ID квартиры
             url: URL фотографии
             metadata: Метаданные (вариант, размеры и т.д.)
@@ -270,31 +571,33 @@ class ApartmentService:
         """
         try:
             # Определяем порядок сортировки для нового фото
-            max_sort_order = db.query(func.max(ApartmentPhoto.sort_order)).filter(
-                ApartmentPhoto.apartment_id == apartment_id
-            ).scalar() or -1
+            max_sort_order = (await db.execute(
+                select(func.max(ApartmentPhoto.sort_order)).where(ApartmentPhoto.apartment_id == apartment_id)
+            )).scalar()
+            if max_sort_order is None:
+                max_sort_order = -1
 
             # Создаем запись о фотографии
             new_photo = ApartmentPhoto(
                 apartment_id=apartment_id,
                 url=url,
                 sort_order=max_sort_order + 1,
-                metadata=json.dumps(metadata) if metadata else None
+                photo_metadata=metadata
             )
 
             db.add(new_photo)
-            db.commit()
-            db.refresh(new_photo)
+            await db.commit()
+            await db.refresh(new_photo)
 
             return new_photo
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error adding apartment photo: {e}")
             raise
 
     @staticmethod
-    def update_photo_sort_order(
-            db: Session,
+    async def aupdate_photo_sort_order(
+            db: AsyncSession,
             photo_id: int,
             new_sort_order: int
     ) -> Optional[ApartmentPhoto]:
@@ -302,7 +605,7 @@ class ApartmentService:
         Обновление порядка сортировки фотографии.
 
         Args:
-            db: Сессия базы данных
+            db: Асинхронная сессия базы данных
             photo_id: ID фотографии
             new_sort_order: Новый порядок сортировки
 
@@ -311,34 +614,32 @@ class ApartmentService:
         """
         try:
             # Получаем фотографию
-            photo = db.query(ApartmentPhoto).filter(
-                ApartmentPhoto.id == photo_id
-            ).first()
+            photo = await db.get(ApartmentPhoto, photo_id)
 
             if not photo:
                 return None
 
             # Обновляем порядок сортировки
             photo.sort_order = new_sort_order
-            db.commit()
-            db.refresh(photo)
+            await db.commit()
+            await db.refresh(photo)
 
             return photo
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error updating photo sort order: {e}")
             raise
 
     @staticmethod
-    def delete_photo(
-            db: Session,
+    async def adelete_photo(
+            db: AsyncSession,
             photo_id: int
     ) -> bool:
         """
         Удаление фотографии.
 
         Args:
-            db: Сессия базы данных
+            db: Асинхронная сессия базы данных
             photo_id: ID фотографии
 
         Returns:
@@ -346,33 +647,26 @@ class ApartmentService:
         """
         try:
             # Получаем фотографию
-            photo = db.query(ApartmentPhoto).filter(
-                ApartmentPhoto.id == photo_id
-            ).first()
+            photo = await db.get(ApartmentPhoto, photo_id)
 
             if not photo:
                 return False
 
             # Удаляем фотографию из БД
-            db.delete(photo)
-            db.commit()
-
-            # Пытаемся извлечь image_id из URL для удаления из MinIO
-            image_id = None
-            if photo.url:
-                parts = photo.url.split('/')
-                if len(parts) >= 3:
-                    filename = parts[-1]
-                    image_id = filename.split('_')[0].split('.')[0]
-
-            # Если нашли image_id, удаляем все варианты из MinIO
+            await db.delete(photo)
+            await db.commit()
+
+            # ID изображения в MinIO берем из манифеста (для старых записей - из URL)
+            image_id = get_image_id(photo.photo_metadata, photo.url)
+
+            # Если нашли image_id, удаляем все варианты из MinIO (блокирующий клиент - в пуле потоков)
             if image_id:
                 minio_service = MinioService()
-                minio_service.delete_image(photo.apartment_id, image_id)
+                await run_in_threadpool(minio_service.delete_image, photo.apartment_id, image_id)
 
             return True
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error deleting photo: {e}")
             raise
 
@@ -1,25 +1,29 @@
 from src.services.auth.jwt import (
     create_access_token, create_refresh_token, verify_access_token, verify_refresh_token,
-    add_token_to_blacklist, is_token_blacklisted, create_tokens_for_user
+    add_token_to_blacklist, is_token_blacklisted, create_tokens_for_user,
+    averify_access_token, averify_refresh_token, aadd_token_to_blacklist, ais_token_blacklisted
 )
 from src.services.auth.password import (
     hash_password, verify_password, validate_password
 )
 from src.services.auth.acl import (
     get_user_permissions, has_permission, check_permissions, check_any_permission,
-    load_permissions_to_cache
+    load_permissions_to_cache, aget_user_permissions, ahas_permission, acheck_permissions,
+    acheck_any_permission
 )
 
 __all__ = [
     # JWT functions
     'create_access_token', 'create_refresh_token', 'verify_access_token',
     'verify_refresh_token', 'add_token_to_blacklist', 'is_token_blacklisted',
-    'create_tokens_for_user',
+    'create_tokens_for_user', 'averify_access_token', 'averify_refresh_token',
+    'aadd_token_to_blacklist', 'ais_token_blacklisted',
 
     # Password functions
     'hash_password', 'verify_password', 'validate_password',
 
     # ACL functions
     'get_user_permissions', 'has_permission', 'check_permissions',
-    'check_any_permission', 'load_permissions_to_cache'
+    'check_any_permission', 'load_permissions_to_cache', 'aget_user_permissions',
+    'ahas_permission', 'acheck_permissions', 'acheck_any_permission'
 ]
\ No newline at end of file
@@ -1,4 +1,6 @@
 from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
 
@@ -8,6 +10,15 @@ from src.models.auth.role import RolePermissionModel
 logger = logging.getLogger(__name__)
 
 
+def _default_permissions(role: str) -> List[str]:
+    """Предопределенные разрешения роли из памяти (при ошибке чтения из БД)."""
+    if role == 'owner':
+        return OWNER_PERMISSIONS
+    elif role == 'manager':
+        return MANAGER_PERMISSIONS
+    return []
+
+
 def get_user_permissions(db: Session, role: str) -> List[str]:
     """
     Получает список разрешений для роли из базы данных.
@@ -28,11 +39,30 @@ def get_user_permissions(db: Session, role: str) -> List[str]:
     except Exception as e:
         logger.error(f"Error getting permissions for role {role}: {e}")
         # В случае ошибки возвращаем предопределенные разрешения из памяти
-        if role == 'owner':
-            return OWNER_PERMISSIONS
-        elif role == 'manager':
-            return MANAGER_PERMISSIONS
-        return []
+        return _default_permissions(role)
+
+
+async def aget_user_permissions(db: AsyncSession, role: str) -> List[str]:
+    """
+    Получает список разрешений для роли из базы данных (асинхронно).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        role: Роль пользователя (owner, manager)
+
+    Returns:
+        List[str]: Список разрешений для роли
+    """
+    try:
+        if role not in ['owner', 'manager']:
+            return []
+
+        result = await db.execute(select(RolePermissionModel.perm).where(RolePermissionModel.role == role))
+        return list(result.scalars().all())
+    except Exception as e:
+        logger.error(f"Error getting permissions for role {role}: {e}")
+        # В случае ошибки возвращаем предопределенные разрешения из памяти
+        return _default_permissions(role)
 
 
 def has_permission(db: Session, role: str, required_permission: str) -> bool:
@@ -92,6 +122,53 @@ def check_any_permission(db: Session, role: str, required_permissions: List[str]
     return any(perm in permissions for perm in required_permissions)
 
 
+async def ahas_permission(db: AsyncSession, role: str, required_permission: str) -> bool:
+    """
+    Проверяет, имеет ли роль указанное разрешение (асинхронно, см. has_permission).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        role: Роль пользователя (owner, manager)
+        required_permission: Требуемое разрешение
+
+    Returns:
+        bool: True, если роль имеет разрешение, иначе False
+    """
+    return required_permission in await aget_user_permissions(db, role)
+
+
+async def acheck_permissions(db: AsyncSession, role: str, required_permissions: List[str]) -> bool:
+    """
+    Проверяет, имеет ли роль все указанные разрешения (асинхронно, см. check_permissions).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        role: Роль пользователя (owner, manager)
+        required_permissions: Список требуемых разрешений
+
+    Returns:
+        bool: True, если роль имеет все разрешения, иначе False
+    """
+    permissions = await aget_user_permissions(db, role)
+    return all(perm in permissions for perm in required_permissions)
+
+
+async def acheck_any_permission(db: AsyncSession, role: str, required_permissions: List[str]) -> bool:
+    """
+    Проверяет, имеет ли роль хотя бы одно из указанных разрешений (асинхронно, см. check_any_permission).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        role: Роль пользователя (owner, manager)
+        required_permissions: Список требуемых разрешений
+
+    Returns:
+        bool: True, если роль имеет хотя бы одно разрешение, иначе False
+    """
+    permissions = await aget_user_permissions(db, role)
+    return any(perm in permissions for perm in required_permissions)
+
+
 def load_permissions_to_cache(db: Session) -> dict:
     """
     Загружает все разрешения из БД в кеш.
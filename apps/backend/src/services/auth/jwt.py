@@ -3,12 +3,11 @@ from typing import Optional, Dict, Any
 import jwt
 from jwt.exceptions import InvalidTokenError as PyJWTError
 import logging
-import redis
 import os
 from fastapi import HTTPException, status
 
 from src.schemas.admin import TokenData
-from src.config.settings import settings
+from src.db.redis_pool import get_async_redis, get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +20,12 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 30 минут
 REFRESH_TOKEN_EXPIRE_DAYS = 7  # 7 дней
 
-# Подключение к Redis для хранения blacklist токенов
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=1,  # Используем отдельную DB для токенов
-    decode_responses=True
-)
+# База Redis для хранения blacklist токенов (отдельная DB для токенов)
+BLACKLIST_REDIS_DB = 1
+
+# Синхронный клиент на общем пуле; обработчики async def используют асинхронные
+# функции (averify_access_token, aadd_token_to_blacklist и т.д.)
+redis_client = get_redis(db=BLACKLIST_REDIS_DB, decode_responses=True)
 
 
 def create_access_token(data: Dict[str, Any]) -> str:
@@ -104,29 +102,28 @@ def verify_access_token(token: str) -> TokenData:
     """
     # Проверяем, находится ли токен в blacklist
     if is_token_blacklisted(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Токен отозван",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _revoked_token_error()
 
-    # Декодируем токен
-    payload = decode_token(token)
+    return _get_token_data(token)
 
-    # Проверяем наличие необходимых полей
-    email: str = payload.get("sub")
-    role: str = payload.get("role")
-    user_id: int = payload.get("user_id")
 
-    if email is None or role is None or user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Недостаточно данных в токене",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+async def averify_access_token(token: str) -> TokenData:
+    """
+    Проверяет JWT access token (асинхронная проверка blacklist).
+
+    Args:
+        token: JWT токен для проверки
+
+    Returns:
+        TokenData: Данные пользователя из токена
 
-    token_data = TokenData(sub=email, role=role, user_id=user_id)
-    return token_data
+    Raises:
+        HTTPException: Если токен невалидный, истек срок его действия или токен в blacklist
+    """
+    if await ais_token_blacklisted(token):
+        raise _revoked_token_error()
+
+    return _get_token_data(token)
 
 
 def verify_refresh_token(token: str) -> TokenData:
@@ -144,12 +141,53 @@ def verify_refresh_token(token: str) -> TokenData:
     """
     # Проверяем, находится ли токен в blacklist
     if is_token_blacklisted(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Токен отозван",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _revoked_token_error()
+
+    return _get_token_data(token, token_type="refresh")
+
+
+async def averify_refresh_token(token: str) -> TokenData:
+    """
+    Проверяет JWT refresh token (асинхронная проверка blacklist).
+
+    Args:
+        token: JWT токен для проверки
+
+    Returns:
+        TokenData: Данные пользователя из токена
+
+    Raises:
+        HTTPException: Если токен невалидный, истек срок его действия или токен в blacklist
+    """
+    if await ais_token_blacklisted(token):
+        raise _revoked_token_error()
+
+    return _get_token_data(token, token_type="refresh")
+
 
+def _revoked_token_error() -> HTTPException:
+    """Ошибка для токена из blacklist."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Токен отозван",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _get_token_data(token: str, token_type: Optional[str] = None) -> TokenData:
+    """
+    Декодирует токен и проверяет наличие данных пользователя.
+
+    Args:
+        token: JWT токен
+        token_type: Требуемый тип токена (None - не проверять)
+
+    Returns:
+        TokenData: Данные пользователя из токена
+
+    Raises:
+        HTTPException: Если токен невалидный или не содержит нужных данных
+    """
     # Декодируем токен
     payload = decode_token(token)
 
@@ -165,17 +203,15 @@ def verify_refresh_token(token: str) -> TokenData:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Проверяем, что это действительно refresh token
-    token_type = payload.get("token_type")
-    if token_type != "refresh":
+    # Проверяем тип токена
+    if token_type is not None and payload.get("token_type") != token_type:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Недействительный тип токена",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_data = TokenData(sub=email, role=role, user_id=user_id)
-    return token_data
+    return TokenData(sub=email, role=role, user_id=user_id)
 
 
 def add_token_to_blacklist(token: str, expires_delta: Optional[timedelta] = None) -> None:
@@ -187,23 +223,57 @@ def add_token_to_blacklist(token: str, expires_delta: Optional[timedelta] = None
         expires_delta: Время жизни записи в Redis (по умолчанию = время жизни токена)
     """
     try:
-        # Декодируем токен для получения времени истечения
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_signature": True})
-        exp = payload.get("exp")
+        # Добавляем токен в blacklist
+        redis_client.set(_blacklist_key(token), "1", ex=_blacklist_ttl(token, expires_delta))
+    except Exception as e:
+        logger.error(f"Error adding token to blacklist: {e}")
 
-        # Если не передано время жизни записи, используем время истечения токена
-        if expires_delta is None and exp:
-            expires_delta = datetime.fromtimestamp(exp) - datetime.utcnow()
-        elif expires_delta is None:
-            # Если не удалось получить время истечения, используем максимальное время жизни токена
-            expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS + 1)
 
-        # Добавляем токен в blacklist
-        redis_client.set(f"blacklist:{token}", "1", ex=int(expires_delta.total_seconds()))
+async def aadd_token_to_blacklist(token: str, expires_delta: Optional[timedelta] = None) -> None:
+    """
+    Добавляет токен в blacklist (асинхронно).
+
+    Args:
+        token: JWT токен для добавления в blacklist
+        expires_delta: Время жизни записи в Redis (по умолчанию = время жизни токена)
+    """
+    try:
+        client = get_async_redis(db=BLACKLIST_REDIS_DB, decode_responses=True)
+        await client.set(_blacklist_key(token), "1", ex=_blacklist_ttl(token, expires_delta))
     except Exception as e:
         logger.error(f"Error adding token to blacklist: {e}")
 
 
+def _blacklist_key(token: str) -> str:
+    """Ключ Redis для токена в blacklist."""
+    return f"blacklist:{token}"
+
+
+def _blacklist_ttl(token: str, expires_delta: Optional[timedelta] = None) -> int:
+    """
+    Время жизни записи blacklist в секундах.
+
+    Args:
+        token: JWT токен
+        expires_delta: Время жизни записи (по умолчанию = время жизни токена)
+
+    Returns:
+        int: Время жизни в секундах
+    """
+    # Декодируем токен для получения времени истечения
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_signature": True})
+    exp = payload.get("exp")
+
+    # Если не передано время жизни записи, используем время истечения токена
+    if expires_delta is None and exp:
+        expires_delta = datetime.fromtimestamp(exp) - datetime.utcnow()
+    elif expires_delta is None:
+        # Если не удалось получить время истечения, используем максимальное время жизни токена
+        expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS + 1)
+
+    return int(expires_delta.total_seconds())
+
+
 def is_token_blacklisted(token: str) -> bool:
     """
     Проверяет, находится ли токен в blacklist.
@@ -215,7 +285,25 @@ def is_token_blacklisted(token: str) -> bool:
         bool: True, если токен в blacklist, иначе False
     """
     try:
-        return bool(redis_client.get(f"blacklist:{token}"))
+        return bool(redis_client.get(_blacklist_key(token)))
+    except Exception as e:
+        logger.error(f"Error checking token in blacklist: {e}")
+        return False
+
+
+async def ais_token_blacklisted(token: str) -> bool:
+    """
+    Проверяет, находится ли токен в blacklist (асинхронно).
+
+    Args:
+        token: JWT токен для проверки
+
+    Returns:
+        bool: True, если токен в blacklist, иначе False
+    """
+    try:
+        client = get_async_redis(db=BLACKLIST_REDIS_DB, decode_responses=True)
+        return bool(await client.get(_blacklist_key(token)))
     except Exception as e:
         logger.error(f"Error checking token in blacklist: {e}")
         return False
@@ -1,71 +1,378 @@
+import asyncio
+import atexit
 import json
 import logging
-import redis
-from typing import Any, Optional
-import pickle
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
 
 from src.config.settings import settings
 from src.config.redis_settings import (
     CACHE_EXPIRATION,
+    CACHE_KEYS,
+    CACHE_NAMESPACES,
+    get_cache_generation_key,
     get_apartments_list_cache_key,
+    get_apartments_cursor_cache_key,
     get_apartment_detail_cache_key,
     get_apartment_photos_cache_key
 )
+from src.db.database import SessionLocal
+from src.db.redis_pool import get_async_redis, get_redis
+from src.services.local_cache import encode_invalidation, invalidation_listener, local_cache
+from src.utils.cache_codec import CacheCodec, CacheCodecError, default_codec
 
 logger = logging.getLogger(__name__)
 
+# Значения get_or_compute: маркер + время окончания свежести (мс) + значение
+_FRESH_MARKER = b"~"
+_FRESH_UNTIL = struct.Struct(">Q")
+
+# Интервал опроса Redis, если процесс не получает уведомления (в секундах)
+WAIT_POLL_INTERVAL = 0.05
+
+# KEYS: ключ значения, ключ поколения; ARGV: значение, TTL (с), поколение до вычисления.
+# Значение не записывается, если пространство имен инвалидировано во время вычисления
+_SET_IF_GENERATION_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+# Вычисления в этом процессе по ключам (остальные потоки ждут результат)
+_flights: Dict[str, "_Flight"] = {}
+_flights_lock = threading.Lock()
+
+# Фоновое обновление устаревших значений
+_refresh_executor = ThreadPoolExecutor(max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+
+
+class _Flight:
+    """Вычисление значения ключа в этом процессе."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[bytes] = None
+
+
+class _AsyncFlight:
+    """Вычисление значения ключа в цикле событий этого процесса (см. CacheService.acompute_once)."""
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.computed = False
+        self.value: Optional[bytes] = None
+
+
+# Асинхронные вычисления в этом процессе по циклу событий и ключу
+_async_flights: Dict[Tuple[asyncio.AbstractEventLoop, str], _AsyncFlight] = {}
+
+
+class _CoalescingInvalidator:
+    """
+    Объединяет серии инвалидаций одного пространства имен.
+
+    Первая инвалидация выполняется сразу и открывает окно; повторные
+    в пределах окна выполняются один раз при его закрытии. Так последнее
+    изменение всегда инвалидирует кеш, но не чаще двух раз за окно.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: Dict[str, Optional[Callable[[], None]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, namespace: str, invalidate: Callable[[], None]) -> None:
+        """
+        Выполняет или откладывает инвалидацию пространства имен.
+
+        Args:
+            namespace: Пространство имен
+            invalidate: Инвалидация
+        """
+        with self._lock:
+            if namespace in self._pending:
+                self._pending[namespace] = invalidate
+                return
+            self._pending[namespace] = None
+
+        timer = threading.Timer(self.window, self._close_window, args=(namespace,))
+        timer.daemon = True
+        timer.start()
+        invalidate()
+
+    def _close_window(self, namespace: str) -> None:
+        """Закрывает окно и выполняет отложенную инвалидацию."""
+        with self._lock:
+            invalidate = self._pending.pop(namespace, None)
+        if invalidate is not None:
+            invalidate()
+
+    def flush(self) -> None:
+        """
+        Закрывает все окна и сразу выполняет отложенные инвалидации.
+
+        Таймеры окон - фоновые потоки и не переживают завершение процесса,
+        поэтому перед выходом отложенные инвалидации выполняются явно.
+        """
+        with self._lock:
+            pending = [invalidate for invalidate in self._pending.values() if invalidate is not None]
+            self._pending.clear()
+        for invalidate in pending:
+            try:
+                invalidate()
+            except Exception as e:
+                logger.error(f"Error flushing deferred cache invalidation: {e}")
+
+
+_invalidator = _CoalescingInvalidator(settings.CACHE_INVALIDATION_WINDOW)
+
+
+def flush_pending_invalidations() -> None:
+    """
+    Выполняет отложенные инвалидации кеша процесса (перед его завершением).
+
+    Вызывается при выходе интерпретатора (atexit) и при завершении процесса
+    воркера Celery, который выходит без обработчиков atexit.
+    """
+    _invalidator.flush()
+
+
+atexit.register(flush_pending_invalidations)
+
+
+def _now_ms() -> int:
+    """Текущее время в миллисекундах."""
+    return int(time.time() * 1000)
+
+
+def _wrap_fresh(value: bytes, fresh_until: int) -> bytes:
+    """Добавляет к значению время окончания свежести."""
+    return _FRESH_MARKER + _FRESH_UNTIL.pack(fresh_until) + value
+
+
+def _unwrap_fresh(raw: Optional[bytes]) -> Optional[Tuple[bytes, int]]:
+    """Значение и время окончания свежести (None - промах или значение в другом формате)."""
+    header_size = len(_FRESH_MARKER) + _FRESH_UNTIL.size
+    if not raw or len(raw) < header_size or raw[:1] != _FRESH_MARKER:
+        return None
+    fresh_until, = _FRESH_UNTIL.unpack_from(raw, 1)
+    return raw[header_size:], fresh_until
+
+# Попадания и промахи обращений к Redis (в пределах процесса)
+_redis_stats = {"hits": 0, "misses": 0}
+
+
+def cache_stats() -> Dict:
+    """
+    Статистика кеша процесса по уровням (L1 в памяти и Redis).
+
+    Returns:
+        Dict: Попадания, промахи и доля попаданий каждого уровня
+    """
+    lookups = _redis_stats["hits"] + _redis_stats["misses"]
+    return {
+        "l1": {
+            **local_cache.stats(),
+            "enabled": settings.L1_CACHE_ENABLED,
+            "connected": invalidation_listener.connected
+        },
+        "redis": {
+            **_redis_stats,
+            "hit_ratio": round(_redis_stats["hits"] / lookups, 4) if lookups else None
+        }
+    }
+
+
+def _count_redis_lookup(value: Optional[bytes]) -> None:
+    """Учитывает обращение к Redis в статистике."""
+    _redis_stats["hits" if value is not None else "misses"] += 1
+
 
 class CacheService:
     """
     Сервис для работы с кешем Redis.
+
+    Клиенты Redis берутся из общих пулов процесса (src.db.redis_pool): методы
+    с префиксом "a" - асинхронные варианты для обработчиков async def.
+
+    Чтения проходят через кеш в памяти процесса (L1, см. src.services.local_cache).
+    Удаления рассылаются всем процессам через pub/sub. Запись после промаха
+    не рассылается: у других процессов копии удаленного или истекшего ключа
+    нет (или она живет не дольше TTL L1). Код, который перезаписывает
+    существующие значения в обход CacheService, вызывает broadcast_invalidation.
     """
 
     def __init__(self):
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=0,
-            decode_responses=False
-        )
+        self.redis_client = get_redis()
 
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: str, codec: Optional[CacheCodec] = None) -> Optional[Any]:
         """
         Получение значения из кеша.
 
         Args:
             key: Ключ
+            codec: Кодек значения (по умолчанию default_codec)
 
         Returns:
             Any: Значение или None
         """
+        return self._decode(self.get_raw(key), codec)
+
+    def set(self, key: str, value: Any, expire: int = 300, codec: Optional[CacheCodec] = None) -> bool:
+        """
+        Установка значения в кеш.
+
+        Args:
+            key: Ключ
+            value: Значение
+            expire: Время жизни в секундах (по умолчанию 5 минут)
+            codec: Кодек значения (по умолчанию default_codec)
+
+        Returns:
+            bool: Успешно или нет
+        """
+        encoded_value = self._encode(value, codec)
+        if encoded_value is None:
+            return False
+        return self.set_raw(key, encoded_value, expire=expire)
+
+    @staticmethod
+    def _encode(value: Any, codec: Optional[CacheCodec] = None) -> Optional[bytes]:
+        """Кодирует значение (None при ошибке)."""
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return pickle.loads(value)
+            return (codec or default_codec).encode(value)
+        except Exception as e:
+            logger.error(f"Error setting value to cache: {e}")
+            return None
+
+    @staticmethod
+    def _decode(value: Optional[bytes], codec: Optional[CacheCodec] = None) -> Optional[Any]:
+        """Декодирует значение; значения в другом формате или версии схемы - промах."""
+        if not value:
+            return None
+        try:
+            return (codec or default_codec).decode(value)
+        except CacheCodecError as e:
+            logger.debug(f"Ignoring cached value: {e}")
             return None
         except Exception as e:
             logger.error(f"Error getting value from cache: {e}")
             return None
 
-    def set(self, key: str, value: Any, expire: int = 300) -> bool:
+    @staticmethod
+    def _l1_available() -> bool:
+        """Можно ли пользоваться L1 (процесс подписан на инвалидации)."""
+        if not settings.L1_CACHE_ENABLED:
+            return False
+        invalidation_listener.ensure_started()
+        return invalidation_listener.connected
+
+    def get_raw(self, key: str) -> Optional[bytes]:
         """
-        Установка значения в кеш.
+        Получение сырых байтов из кеша (без десериализации).
+
+        Args:
+            key: Ключ
+
+        Returns:
+            bytes: Значение или None
+        """
+        use_l1 = self._l1_available()
+        if use_l1:
+            value = local_cache.get(key)
+            if value is not None:
+                return value
+            generation = local_cache.generation
+
+        try:
+            value = self.redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Error getting raw value from cache: {e}")
+            return None
+
+        _count_redis_lookup(value)
+        if use_l1 and value is not None:
+            local_cache.put(key, value, generation)
+        return value
+
+    def get_many_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Получение сырых байтов нескольких ключей одним запросом (MGET).
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            List[Optional[bytes]]: Значения в порядке ключей (None при промахе)
+        """
+        if not keys:
+            return []
+
+        use_l1, values, missing, generation = self._l1_lookup(keys)
+        if not missing:
+            return values
+
+        try:
+            fetched = self.redis_client.mget([keys[i] for i in missing])
+        except Exception as e:
+            logger.error(f"Error getting raw values from cache: {e}")
+            return values
+
+        return self._l1_fill(keys, values, missing, fetched, use_l1, generation)
+
+    def _l1_lookup(self, keys: List[str]) -> Tuple[bool, List[Optional[bytes]], List[int], int]:
+        """
+        Значения ключей из L1 перед обращением к Redis.
+
+        Returns:
+            Tuple: Используется ли L1, значения, индексы промахов, поколение L1
+        """
+        use_l1 = self._l1_available()
+        values = [local_cache.get(key) if use_l1 else None for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        return use_l1, values, missing, local_cache.generation
+
+    @staticmethod
+    def _l1_fill(keys: List[str], values: List[Optional[bytes]], missing: List[int],
+                 fetched: List[Optional[bytes]], use_l1: bool, generation: int) -> List[Optional[bytes]]:
+        """Дополняет значения прочитанными из Redis и сохраняет их в L1."""
+        for i, value in zip(missing, fetched):
+            _count_redis_lookup(value)
+            values[i] = value
+            if use_l1 and value is not None:
+                local_cache.put(keys[i], value, generation)
+        return values
+
+    def set_raw(self, key: str, value: bytes, expire: int = 300, only_if_missing: bool = False) -> bool:
+        """
+        Установка сырых байтов в кеш (без сериализации).
 
         Args:
             key: Ключ
             value: Значение
             expire: Время жизни в секундах (по умолчанию 5 минут)
+            only_if_missing: Не перезаписывать существующее значение
 
         Returns:
             bool: Успешно или нет
         """
         try:
-            serialized_value = pickle.dumps(value)
-            return self.redis_client.set(key, serialized_value, ex=expire)
+            stored = bool(self.redis_client.set(key, value, ex=expire, nx=only_if_missing))
         except Exception as e:
-            logger.error(f"Error setting value to cache: {e}")
+            logger.error(f"Error setting raw value to cache: {e}")
             return False
 
+        if stored:
+            local_cache.invalidate(keys=[key])
+        return stored
+
     def delete(self, key: str) -> bool:
         """
         Удаление значения из кеша.
@@ -77,15 +384,502 @@ class CacheService:
             bool: Успешно или нет
         """
         try:
-            return bool(self.redis_client.delete(key))
+            deleted = bool(self.redis_client.delete(key))
         except Exception as e:
             logger.error(f"Error deleting value from cache: {e}")
             return False
 
+        self.broadcast_invalidation(keys=[key])
+        return deleted
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Удаление нескольких значений одним pipeline (и одной рассылкой инвалидации).
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            int: Количество удаленных ключей
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.delete(key)
+            deleted = sum(pipeline.execute())
+        except Exception as e:
+            logger.error(f"Error deleting values from cache: {e}")
+            return 0
+
+        self.broadcast_invalidation(keys=keys)
+        return deleted
+
+    # Асинхронный API (общий пул redis.asyncio текущего цикла событий)
+
+    async def aget(self, key: str, codec: Optional[CacheCodec] = None) -> Optional[Any]:
+        """
+        Получение значения из кеша (асинхронно).
+
+        Args:
+            key: Ключ
+            codec: Кодек значения (по умолчанию default_codec)
+
+        Returns:
+            Any: Значение или None
+        """
+        return self._decode(await self.aget_raw(key), codec)
+
+    async def aset(self, key: str, value: Any, expire: int = 300, codec: Optional[CacheCodec] = None) -> bool:
+        """
+        Установка значения в кеш (асинхронно).
+
+        Args:
+            key: Ключ
+            value: Значение
+            expire: Время жизни в секундах (по умолчанию 5 минут)
+            codec: Кодек значения (по умолчанию default_codec)
+
+        Returns:
+            bool: Успешно или нет
+        """
+        encoded_value = self._encode(value, codec)
+        if encoded_value is None:
+            return False
+        return await self.aset_raw(key, encoded_value, expire=expire)
+
+    async def aget_raw(self, key: str) -> Optional[bytes]:
+        """
+        Получение сырых байтов из кеша (асинхронно).
+
+        Args:
+            key: Ключ
+
+        Returns:
+            bytes: Значение или None
+        """
+        return (await self.amget_raw([key]))[0]
+
+    async def amget_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Получение сырых байтов нескольких ключей одним MGET (асинхронно).
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            List[Optional[bytes]]: Значения в порядке ключей (None при промахе)
+        """
+        if not keys:
+            return []
+
+        use_l1, values, missing, generation = self._l1_lookup(keys)
+        if not missing:
+            return values
+
+        try:
+            fetched = await get_async_redis().mget([keys[i] for i in missing])
+        except Exception as e:
+            logger.error(f"Error getting raw values from cache: {e}")
+            return values
+
+        return self._l1_fill(keys, values, missing, fetched, use_l1, generation)
+
+    async def aset_raw(self, key: str, value: bytes, expire: int = 300, only_if_missing: bool = False) -> bool:
+        """
+        Установка сырых байтов в кеш (асинхронно).
+
+        Args:
+            key: Ключ
+            value: Значение
+            expire: Время жизни в секундах (по умолчанию 5 минут)
+            only_if_missing: Не перезаписывать существующее значение
+
+        Returns:
+            bool: Успешно или нет
+        """
+        try:
+            stored = bool(await get_async_redis().set(key, value, ex=expire, nx=only_if_missing))
+        except Exception as e:
+            logger.error(f"Error setting raw value to cache: {e}")
+            return False
+
+        if stored:
+            local_cache.invalidate(keys=[key])
+        return stored
+
+    async def adelete_many(self, keys: Iterable[str]) -> int:
+        """
+        Удаление нескольких значений одним pipeline (асинхронно).
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            int: Количество удаленных ключей
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+
+        try:
+            async with self.apipeline() as pipeline:
+                for key in keys:
+                    pipeline.delete(key)
+                deleted = sum(await pipeline.execute())
+        except Exception as e:
+            logger.error(f"Error deleting values from cache: {e}")
+            return 0
+
+        await self.abroadcast_invalidation(keys=keys)
+        return deleted
+
+    def apipeline(self, transaction: bool = False):
+        """
+        Асинхронный pipeline на общем пуле (используется как async with).
+
+        Args:
+            transaction: Выполнять ли команды в MULTI/EXEC
+
+        Returns:
+            redis.asyncio.client.Pipeline: Pipeline
+        """
+        return get_async_redis().pipeline(transaction=transaction)
+
+    async def abroadcast_invalidation(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """
+        Удаляет ключи из L1 этого процесса и рассылает инвалидацию остальным (асинхронно).
+
+        Args:
+            keys: Ключи
+            patterns: Шаблоны ключей (в синтаксисе Redis KEYS)
+        """
+        keys, patterns = list(keys), list(patterns)
+        if not keys and not patterns:
+            return
+
+        local_cache.invalidate(keys, patterns)
+        try:
+            await get_async_redis().publish(
+                CACHE_KEYS["l1_invalidation_channel"], encode_invalidation(keys, patterns)
+            )
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[Session], bytes], db: Session,
+                       ttl: int, stale_ttl: int = 0, namespace: Optional[str] = None) -> bytes:
+        """
+        Значение из кеша или результат compute с защитой от лавины промахов.
+
+        При промахе значение вычисляет один поток процесса и один процесс
+        (по блокировке в Redis), остальные ждут уведомления и читают готовое
+        значение. В течение stale_ttl после истечения ttl значение отдается
+        устаревшим, а обновляется одним фоновым вычислением (со своей сессией БД).
+
+        Ключ, который инвалидируется удалением (invalidate_keys), передается
+        с пространством имен: вычисление, прочитавшее данные до commit, не
+        запишет свой результат после инвалидации. Ключам с поколением внутри
+        (списки) это не нужно.
+
+        Args:
+            key: Ключ
+            compute: Вычисление значения (получает сессию БД)
+            db: Сессия БД запроса (для вычисления при промахе)
+            ttl: Сколько секунд значение свежее
+            stale_ttl: Сколько секунд после этого значение можно отдавать устаревшим
+            namespace: Пространство имен, поколение которого проверяется при записи
+
+        Returns:
+            bytes: Значение
+        """
+        entry = _unwrap_fresh(self.get_raw(key))
+        if entry is not None:
+            value, fresh_until = entry
+            if fresh_until <= _now_ms():
+                self._refresh_in_background(key, compute, ttl, stale_ttl, namespace)
+            return value
+
+        with _flights_lock:
+            flight = _flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _flights[key] = _Flight()
+
+        if not is_leader:
+            if flight.done.wait(settings.CACHE_COMPUTE_WAIT_TIMEOUT) and flight.value is not None:
+                return flight.value
+            # Вычисление в этом процессе не удалось или затянулось
+            return compute(db)
+
+        try:
+            flight.value = self._compute_once(key, compute, db, ttl, stale_ttl, namespace)
+            return flight.value
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.done.set()
+
+    def _compute_lock(self, key: str):
+        """Блокировка вычисления значения ключа (освобождается и из потока фонового обновления)."""
+        return self.redis_client.lock(
+            CACHE_KEYS["cache_compute_lock"].format(key=key), timeout=settings.CACHE_COMPUTE_LOCK_TIMEOUT,
+            thread_local=False
+        )
+
+    def _compute_once(self, key: str, compute: Callable[[Session], bytes], db: Session,
+                      ttl: int, stale_ttl: int, namespace: Optional[str]) -> bytes:
+        """Вычисляет значение в одном процессе, остальные процессы ждут его."""
+        invalidation_listener.ensure_started()
+        # Ожидание регистрируется до проверок, чтобы не пропустить уведомление
+        waiter = invalidation_listener.register_waiter(key)
+        try:
+            lock = self._compute_lock(key)
+            try:
+                acquired = lock.acquire(blocking=False)
+            except Exception as e:
+                logger.error(f"Error acquiring cache compute lock: {e}")
+                return compute(db)
+
+            if acquired:
+                try:
+                    generation = self._guard_generation(namespace)
+                    value = compute(db)
+                    self._store_fresh(key, value, ttl, stale_ttl, generation=generation)
+                    return value
+                finally:
+                    self._finish_compute(key, lock)
+
+            deadline = time.monotonic() + settings.CACHE_COMPUTE_WAIT_TIMEOUT
+            while True:
+                entry = _unwrap_fresh(self.get_raw(key))
+                if entry is not None:
+                    return entry[0]
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Timed out waiting for cache value: {key}")
+                    break
+                if not invalidation_listener.connected:
+                    waiter.wait(min(remaining, WAIT_POLL_INTERVAL))
+                elif waiter.wait(remaining):
+                    # Уведомление пришло, а значения нет - вычисление не удалось
+                    entry = _unwrap_fresh(self.get_raw(key))
+                    if entry is not None:
+                        return entry[0]
+                    break
+        finally:
+            invalidation_listener.unregister_waiter(key, waiter)
+
+        generation = self._guard_generation(namespace)
+        value = compute(db)
+        self._store_fresh(key, value, ttl, stale_ttl, generation=generation)
+        return value
+
+    def _refresh_in_background(self, key: str, compute: Callable[[Session], bytes], ttl: int, stale_ttl: int,
+                               namespace: Optional[str] = None) -> None:
+        """Запускает фоновое обновление устаревшего значения (если его не обновляет другой процесс)."""
+        lock = self._compute_lock(key)
+        try:
+            if not lock.acquire(blocking=False):
+                return
+        except Exception as e:
+            logger.error(f"Error acquiring cache compute lock: {e}")
+            return
+        _refresh_executor.submit(self._refresh, key, compute, ttl, stale_ttl, lock, namespace)
+
+    def _refresh(self, key: str, compute: Callable[[Session], bytes], ttl: int, stale_ttl: int, lock,
+                 namespace: Optional[str] = None) -> None:
+        """Фоновое обновление значения."""
+        db = SessionLocal()
+        try:
+            generation = self._guard_generation(namespace)
+            self._store_fresh(key, compute(db), ttl, stale_ttl, overwrite=True, generation=generation)
+        except Exception as e:
+            logger.error(f"Error refreshing cache value {key}: {e}")
+        finally:
+            db.close()
+            self._finish_compute(key, lock)
+
+    def _guard_generation(self, namespace: Optional[str]) -> Optional[Tuple[str, int]]:
+        """Поколение пространства имен до вычисления (для проверки при записи)."""
+        if namespace is None:
+            return None
+        return namespace, self.get_generation(namespace)
+
+    def _store_fresh(self, key: str, value: bytes, ttl: int, stale_ttl: int, overwrite: bool = False,
+                     generation: Optional[Tuple[str, int]] = None) -> None:
+        """Сохраняет значение со временем окончания свежести (если поколение не изменилось)."""
+        value = _wrap_fresh(value, _now_ms() + ttl * 1000)
+        if generation is None:
+            stored = self.set_raw(key, value, expire=ttl + stale_ttl)
+        else:
+            stored = self._set_if_generation(key, value, ttl + stale_ttl, *generation)
+        if stored and overwrite:
+            # Устаревшие копии в L1 других процессов запускали бы новые обновления
+            self.broadcast_invalidation(keys=[key])
+
+    def _set_if_generation(self, key: str, value: bytes, expire: int, namespace: str, generation: int) -> bool:
+        """Записывает значение, только если поколение пространства имен не изменилось."""
+        try:
+            script = self.redis_client.register_script(_SET_IF_GENERATION_SCRIPT)
+            stored = bool(script(keys=[key, get_cache_generation_key(namespace)], args=[value, expire, generation]))
+        except Exception as e:
+            logger.error(f"Error setting raw value to cache: {e}")
+            return False
+
+        if stored:
+            local_cache.invalidate(keys=[key])
+        else:
+            logger.debug(f"Cache value {key} computed before invalidation of {namespace}, not stored")
+        return stored
+
+    def _finish_compute(self, key: str, lock) -> None:
+        """Освобождает блокировку вычисления и будит ожидающих."""
+        try:
+            lock.release()
+        except Exception as e:
+            logger.warning(f"Error releasing cache compute lock: {e}")
+        try:
+            self.redis_client.publish(CACHE_KEYS["cache_computed_channel"], key)
+        except Exception as e:
+            logger.error(f"Error publishing computed cache value: {e}")
+
+    async def acompute_once(self, key: str, compute: Callable[[], Awaitable[Optional[bytes]]],
+                            accept: Callable[[Optional[bytes]], bool] = lambda value: value is not None
+                            ) -> Optional[bytes]:
+        """
+        Заполнение промаха ключа одним вычислением (асинхронно).
+
+        Для значений без метки свежести get_or_compute (материализованные
+        ответы, которые перезаписывает задача): compute сам строит и сохраняет
+        значение. Одновременные промахи в этом процессе ждут его вычисления,
+        в других процессах - уведомления по той же блокировке в Redis, что
+        и get_or_compute, и читают значение из кеша.
+
+        Args:
+            key: Ключ
+            compute: Построение и сохранение значения (None - значения нет)
+            accept: Подходит ли значение, прочитанное из кеша
+
+        Returns:
+            Optional[bytes]: Значение или None, если compute его не построил
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        flight = _async_flights.get(flight_key)
+        if flight is not None:
+            try:
+                await asyncio.wait_for(flight.done.wait(), settings.CACHE_COMPUTE_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            if flight.computed:
+                return flight.value
+            # Вычисление в этом процессе не удалось или затянулось
+            return await compute()
+
+        flight = _async_flights[flight_key] = _AsyncFlight()
+        try:
+            flight.value = await self._acompute_across_processes(key, compute, accept)
+            flight.computed = True
+            return flight.value
+        finally:
+            _async_flights.pop(flight_key, None)
+            flight.done.set()
+
+    async def _acompute_across_processes(self, key: str, compute: Callable[[], Awaitable[Optional[bytes]]],
+                                         accept: Callable[[Optional[bytes]], bool]) -> Optional[bytes]:
+        """Вычисляет значение в одном процессе, остальные процессы ждут его (асинхронно)."""
+        invalidation_listener.ensure_started()
+        # Ожидание регистрируется до проверок, чтобы не пропустить уведомление
+        waiter = invalidation_listener.register_waiter(key)
+        try:
+            lock = get_async_redis().lock(
+                CACHE_KEYS["cache_compute_lock"].format(key=key), timeout=settings.CACHE_COMPUTE_LOCK_TIMEOUT
+            )
+            try:
+                acquired = await lock.acquire(blocking=False)
+            except Exception as e:
+                logger.error(f"Error acquiring cache compute lock: {e}")
+                return await compute()
+
+            if acquired:
+                try:
+                    return await compute()
+                finally:
+                    await self._afinish_compute(key, lock)
+
+            deadline = time.monotonic() + settings.CACHE_COMPUTE_WAIT_TIMEOUT
+            while True:
+                value = await self.aget_raw(key)
+                if accept(value):
+                    return value
+                if waiter.is_set():
+                    # Уведомление пришло, а значения нет - вычисление не удалось
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Timed out waiting for cache value: {key}")
+                    break
+                await self._await_notification(waiter, remaining)
+        finally:
+            invalidation_listener.unregister_waiter(key, waiter)
+
+        return await compute()
+
+    @staticmethod
+    async def _await_notification(waiter: threading.Event, timeout: float) -> None:
+        """
+        Ждет уведомления о вычисленном значении, не блокируя цикл событий.
+
+        Уведомление приходит в поток подписки и проверяется без обращений
+        к Redis; без подписки ожидание ограничено интервалом опроса.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            await asyncio.sleep(min(timeout, WAIT_POLL_INTERVAL))
+            timeout = deadline - time.monotonic()
+            if waiter.is_set() or not invalidation_listener.connected or timeout <= 0:
+                return
+
+    async def _afinish_compute(self, key: str, lock) -> None:
+        """Освобождает блокировку вычисления и будит ожидающих (асинхронно)."""
+        try:
+            await lock.release()
+        except Exception as e:
+            logger.warning(f"Error releasing cache compute lock: {e}")
+        try:
+            await get_async_redis().publish(CACHE_KEYS["cache_computed_channel"], key)
+        except Exception as e:
+            logger.error(f"Error publishing computed cache value: {e}")
+
+    def broadcast_invalidation(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """
+        Удаляет ключи из L1 этого процесса и рассылает инвалидацию остальным.
+
+        Args:
+            keys: Ключи
+            patterns: Шаблоны ключей (в синтаксисе Redis KEYS)
+        """
+        keys, patterns = list(keys), list(patterns)
+        if not keys and not patterns:
+            return
+
+        local_cache.invalidate(keys, patterns)
+        try:
+            self.redis_client.publish(CACHE_KEYS["l1_invalidation_channel"], encode_invalidation(keys, patterns))
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {e}")
+
     def clear_pattern(self, pattern: str) -> int:
         """
         Удаление всех ключей, соответствующих шаблону.
 
+        Обходит всю базу Redis (SCAN, без блокировки на время обхода) - только
+        для обслуживания; на горячих путях используется invalidate_namespace.
+
         Args:
             pattern: Шаблон ключей
 
@@ -93,17 +887,93 @@ class CacheService:
             int: Количество удаленных ключей
         """
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
         except Exception as e:
             logger.error(f"Error clearing keys by pattern: {e}")
             return 0
 
+        self.broadcast_invalidation(patterns=[pattern])
+        return deleted
+
+    def get_generation(self, namespace: str) -> int:
+        """
+        Текущее поколение пространства имен кеша (читается через L1).
+
+        Args:
+            namespace: Пространство имен
+
+        Returns:
+            int: Поколение
+        """
+        key = get_cache_generation_key(namespace)
+        value = self.get_raw(key)
+        if value is None:
+            # Создаем ключ, чтобы следующие чтения попадали в L1
+            try:
+                self.redis_client.set(key, 0, nx=True)
+            except Exception as e:
+                logger.error(f"Error initializing cache generation: {e}")
+            return 0
+        return int(value)
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """
+        Инвалидация всех ключей пространства имен за O(1): повышение поколения.
+
+        Серии инвалидаций в пределах CACHE_INVALIDATION_WINDOW объединяются.
+
+        Args:
+            namespace: Пространство имен
+        """
+        _invalidator.submit(namespace, lambda: self._bump_generation(namespace))
+
+    def invalidate_keys(self, namespace: str, keys: Iterable[str]) -> None:
+        """
+        Удаляет ключи и повышает поколение их пространства имен (одной транзакцией).
+
+        Вычисления get_or_compute с этим пространством имен, начатые до
+        инвалидации (и, возможно, прочитавшие данные до commit), после нее
+        свое значение не запишут.
+
+        Args:
+            namespace: Пространство имен
+            keys: Ключи
+        """
+        keys = list(keys)
+        generation_key = get_cache_generation_key(namespace)
+        try:
+            pipeline = self.redis_client.pipeline(transaction=True)
+            pipeline.incr(generation_key)
+            for key in keys:
+                pipeline.delete(key)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error invalidating cache keys: {e}")
+            return
+
+        self.broadcast_invalidation(keys=[generation_key, *keys])
+
+    def _bump_generation(self, namespace: str) -> None:
+        """Повышает поколение пространства имен."""
+        key = get_cache_generation_key(namespace)
+        try:
+            self.redis_client.incr(key)
+        except Exception as e:
+            logger.error(f"Error bumping cache generation: {e}")
+            return
+        self.broadcast_invalidation(keys=[key])
+
     def get_apartments_cache_key(self, page: int, page_size: int, sort: str, order: str) -> str:
         """
-        Генерация ключа кеша для списка квартир.
+        Генерация ключа кеша для списка квартир (с текущим поколением списков).
 
         Args:
             page: Номер страницы
@@ -114,7 +984,30 @@ class CacheService:
         Returns:
             str: Ключ кеша
         """
-        return get_apartments_list_cache_key(page, page_size, sort, order)
+        return get_apartments_list_cache_key(
+            page, page_size, sort, order, generation=self.get_generation(CACHE_NAMESPACES["apartments_list"])
+        )
+
+    def get_apartments_cursor_cache_key(self, page_size: int, sort: str, order: str,
+                                        include_total: bool = False) -> str:
+        """
+        Генерация ключа кеша для первой страницы списка квартир в режиме курсора
+        (с текущим поколением списков). Страницы по курсору клиента не кешируются:
+        число их ключей не ограничено.
+
+        Args:
+            page_size: Размер страницы
+            sort: Поле сортировки
+            order: Порядок сортировки
+            include_total: Включен ли в ответ общий счетчик
+
+        Returns:
+            str: Ключ кеша
+        """
+        return get_apartments_cursor_cache_key(
+            page_size, sort, order, include_total,
+            generation=self.get_generation(CACHE_NAMESPACES["apartments_list"])
+        )
 
     def get_apartment_cache_key(self, apartment_id: int) -> str:
         """
@@ -144,7 +1037,7 @@ class CacheService:
         """
         Инвалидация кеша списка квартир.
         """
-        self.clear_pattern("apartments:list:*")
+        self.invalidate_namespace(CACHE_NAMESPACES["apartments_list"])
 
     def invalidate_apartment_cache(self, apartment_id: int) -> None:
         """
@@ -153,5 +1046,17 @@ class CacheService:
         Args:
             apartment_id: ID квартиры
         """
-        self.delete(self.get_apartment_cache_key(apartment_id))
-        self.delete(self.get_apartment_photos_cache_key(apartment_id))
\ No newline at end of file
+        self.invalidate_apartment_caches([apartment_id])
+
+    def invalidate_apartment_caches(self, apartment_ids: Iterable[int]) -> None:
+        """
+        Инвалидация кеша нескольких квартир одним pipeline.
+
+        Args:
+            apartment_ids: ID квартир
+        """
+        self.delete_many(
+            key
+            for apartment_id in apartment_ids
+            for key in (self.get_apartment_cache_key(apartment_id), self.get_apartment_photos_cache_key(apartment_id))
+        )
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Прогрев кеша публичного каталога.
+
+После деплоя, рестарта Redis и изменений каталога первые пользователи
+не должны попадать в холодный кеш. Прогрев выполняет задача Celery
+(очередь reports, см. warm_cache): она строит первые страницы каталога
+для всех сортировок и детальную информацию о самых просматриваемых
+квартирах. Просмотры считаются в Redis (sorted set) при чтении квартиры;
+счетчик периодически обрезается до самых просматриваемых квартир
+(задача trim_apartment_views), удаленные квартиры из него убираются.
+"""
+
+import logging
+from typing import Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.config.redis_settings import CACHE_KEYS
+from src.db.redis_pool import get_async_redis, get_redis
+from src.services.materialization_service import materialization_service
+
+logger = logging.getLogger(__name__)
+
+# Сортировки публичного каталога (relevance доступна только при поиске)
+CATALOG_SORTS = ("created_at", "price_rub")
+CATALOG_ORDERS = ("asc", "desc")
+
+# Сколько живет отметка о запланированном прогреве сверх его задержки (в секундах)
+SCHEDULE_MARK_TTL = 60
+
+
+class CacheWarmupService:
+    """
+    Сервис прогрева кеша.
+    """
+
+    def __init__(self):
+        self.redis_client = get_redis()
+
+    @staticmethod
+    async def record_view(apartment_id: int) -> None:
+        """
+        Учитывает просмотр квартиры (для выбора прогреваемых квартир).
+
+        Args:
+            apartment_id: ID квартиры
+        """
+        try:
+            await get_async_redis().zincrby(CACHE_KEYS["apartment_views"], 1, apartment_id)
+        except Exception as e:
+            logger.error(f"Error recording apartment view: {e}")
+
+    def get_top_viewed(self, limit: int) -> List[int]:
+        """
+        Самые просматриваемые квартиры.
+
+        Args:
+            limit: Количество квартир
+
+        Returns:
+            List[int]: ID квартир по убыванию просмотров
+        """
+        if limit <= 0:
+            return []
+        try:
+            members = self.redis_client.zrevrange(CACHE_KEYS["apartment_views"], 0, limit - 1)
+        except Exception as e:
+            logger.error(f"Error reading top viewed apartments: {e}")
+            return []
+        return [int(member) for member in members]
+
+    def forget(self, apartment_ids: Iterable[int]) -> None:
+        """
+        Убирает удаленные квартиры из счетчика просмотров.
+
+        Args:
+            apartment_ids: ID удаленных квартир
+        """
+        apartment_ids = list(apartment_ids)
+        if not apartment_ids:
+            return
+        try:
+            self.redis_client.zrem(CACHE_KEYS["apartment_views"], *apartment_ids)
+        except Exception as e:
+            logger.error(f"Error removing apartments from view counter: {e}")
+
+    def trim_views(self, keep: int) -> int:
+        """
+        Оставляет в счетчике просмотров только самые просматриваемые квартиры.
+
+        Args:
+            keep: Сколько квартир оставить
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        try:
+            removed = self.redis_client.zremrangebyrank(CACHE_KEYS["apartment_views"], 0, -(max(keep, 0) + 1))
+        except Exception as e:
+            logger.error(f"Error trimming apartment view counter: {e}")
+            return 0
+        if removed:
+            logger.info(f"Trimmed {removed} entries from apartment view counter")
+        return removed
+
+    def try_schedule(self, delay: int = 0) -> bool:
+        """
+        Отмечает, что прогрев поставлен в очередь (если он еще не стоит в ней).
+
+        Args:
+            delay: Задержка запуска прогрева в секундах
+
+        Returns:
+            bool: Нужно ли ставить прогрев в очередь
+        """
+        try:
+            return bool(self.redis_client.set(
+                CACHE_KEYS["cache_warmup_scheduled"], 1, nx=True, ex=delay + SCHEDULE_MARK_TTL
+            ))
+        except Exception as e:
+            logger.error(f"Error scheduling cache warmup: {e}")
+            return False
+
+    def clear_schedule(self) -> None:
+        """Снимает отметку о запланированном прогреве (изменения после старта прогрева запланируют новый)."""
+        try:
+            self.redis_client.delete(CACHE_KEYS["cache_warmup_scheduled"])
+        except Exception as e:
+            logger.error(f"Error clearing cache warmup schedule: {e}")
+
+    def warm(self, db: Session, catalog: bool = True) -> Tuple[int, int]:
+        """
+        Прогревает первые страницы каталога для всех сортировок и стандартных
+        размеров страницы и детальную информацию о самых просматриваемых квартирах.
+
+        Args:
+            db: Сессия базы данных
+            catalog: Строить ли страницы каталога (после изменений каталога их
+                пересобирает задача materialize_apartments)
+
+        Returns:
+            Tuple[int, int]: Количество записанных страниц каталога и ответов по квартирам
+        """
+        materialization_service.register_catalog_variants(
+            (page_size, sort, order)
+            for page_size in settings.CACHE_WARMUP_PAGE_SIZES
+            for sort in CATALOG_SORTS
+            for order in CATALOG_ORDERS
+        )
+        pages, details = materialization_service.warm(
+            db, self.get_top_viewed(settings.CACHE_WARMUP_TOP_APARTMENTS),
+            batch_size=settings.CACHE_WARMUP_BATCH_SIZE, catalog=catalog
+        )
+        logger.info(f"Cache warmed: {pages} catalog pages, {details} apartment details")
+        return pages, details
+
+
+cache_warmup_service = CacheWarmupService()
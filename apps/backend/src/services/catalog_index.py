@@ -0,0 +1,477 @@
+"""
+Индекс каталога в памяти процесса.
+
+Снимок всех активных карточек каталога хранится в массивах NumPy, поэтому
+фильтрация, сортировка, фасеты и гистограмма цен считаются векторными масками
+без запросов к БД и без отдельного ключа кеша на каждую комбинацию фильтров.
+
+Актуальность снимка:
+- изменения, закоммиченные в этом процессе, точечно патчат снимок;
+- изменения из других процессов (воркеры, другие реплики API) видны по версии
+  в Redis и приводят к полной пересборке снимка.
+Снимок хранит версию каталога, с которой построен, - по ней строится ETag.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.config.redis_settings import CACHE_KEYS
+from src.db.redis_pool import get_redis
+from src.models.catalog import ApartmentCatalogCard
+from src.services import domain_events
+
+logger = logging.getLogger(__name__)
+
+card_table = ApartmentCatalogCard.__table__
+
+_INDEX_COLUMNS = (
+    card_table.c.apartment_id,
+    card_table.c.title,
+    card_table.c.price_rub,
+    card_table.c.rooms,
+    card_table.c.floor,
+    card_table.c.area_m2,
+    card_table.c.booking_enabled,
+    card_table.c.cover_variants,
+    card_table.c.created_at,
+)
+
+
+class CatalogFilters:
+    """
+    Фильтры каталога.
+
+    Args:
+        rooms: Допустимое количество комнат
+        price_min / price_max: Диапазон цены
+        area_min / area_max: Диапазон площади
+        floor_min / floor_max: Диапазон этажей
+        booking_enabled: Доступность онлайн-бронирования
+        apartment_ids: ID квартир в порядке убывания релевантности (результат поиска)
+    """
+
+    __slots__ = ("rooms", "price_min", "price_max", "area_min", "area_max",
+                 "floor_min", "floor_max", "booking_enabled", "apartment_ids")
+
+    def __init__(
+            self,
+            rooms: Optional[Sequence[int]] = None,
+            price_min: Optional[int] = None,
+            price_max: Optional[int] = None,
+            area_min: Optional[float] = None,
+            area_max: Optional[float] = None,
+            floor_min: Optional[int] = None,
+            floor_max: Optional[int] = None,
+            booking_enabled: Optional[bool] = None,
+            apartment_ids: Optional[Sequence[int]] = None
+    ):
+        self.rooms = sorted(set(rooms)) if rooms else None
+        self.price_min = price_min
+        self.price_max = price_max
+        self.area_min = area_min
+        self.area_max = area_max
+        self.floor_min = floor_min
+        self.floor_max = floor_max
+        self.booking_enabled = booking_enabled
+        self.apartment_ids = (
+            np.asarray(apartment_ids, dtype=np.int64) if apartment_ids is not None else None
+        )
+
+    def is_empty(self) -> bool:
+        """Не задан ни один фильтр."""
+        return all(getattr(self, name) is None for name in self.__slots__)
+
+
+class _Snapshot:
+    """
+    Неизменяемый снимок каталога (массивы одинаковой длины, выровненные по позиции).
+    """
+
+    def __init__(self, rows: Sequence, version: Optional[int] = None):
+        # Версия каталога, изменения до которой включительно есть в снимке
+        self.version = version
+        self.rows = list(rows)
+        count = len(self.rows)
+
+        self.ids = np.fromiter((row.apartment_id for row in self.rows), dtype=np.int64, count=count)
+        self.price = np.fromiter((row.price_rub for row in self.rows), dtype=np.int64, count=count)
+        self.rooms = np.fromiter((row.rooms for row in self.rows), dtype=np.int16, count=count)
+        self.floor = np.fromiter((row.floor for row in self.rows), dtype=np.int16, count=count)
+        self.area = np.fromiter((row.area_m2 for row in self.rows), dtype=np.float32, count=count)
+        self.booking_enabled = np.fromiter(
+            (bool(row.booking_enabled) for row in self.rows), dtype=bool, count=count
+        )
+        self.created_at = np.fromiter(
+            (int(row.created_at.timestamp() * 1_000_000) for row in self.rows), dtype=np.int64, count=count
+        )
+
+        # Перестановки для сортировок по (поле, id) по возрастанию;
+        # убывающий порядок - это та же перестановка в обратном направлении
+        self.orders = {
+            "created_at": np.lexsort((self.ids, self.created_at)),
+            "price_rub": np.lexsort((self.ids, self.price)),
+        }
+        # Позиции записей в порядке возрастания id (для поиска позиции по id)
+        self.id_order = np.argsort(self.ids, kind="stable")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def positions(self, apartment_ids: np.ndarray) -> np.ndarray:
+        """
+        Позиции записей с указанными ID (с сохранением порядка, отсутствующие пропускаются).
+
+        Args:
+            apartment_ids: ID квартир
+
+        Returns:
+            np.ndarray: Позиции в снимке
+        """
+        if not len(self.rows) or not apartment_ids.size:
+            return np.zeros(0, dtype=np.int64)
+
+        found = np.minimum(np.searchsorted(self.ids, apartment_ids, sorter=self.id_order), len(self.rows) - 1)
+        positions = self.id_order[found]
+        return positions[self.ids[positions] == apartment_ids]
+
+    def mask(self, filters: CatalogFilters, exclude: Optional[str] = None) -> np.ndarray:
+        """
+        Строит маску записей, подходящих под фильтры.
+
+        Args:
+            filters: Фильтры
+            exclude: Фильтр, который не учитывается (для фасета по этому же полю)
+
+        Returns:
+            np.ndarray: Булева маска
+        """
+        mask = np.ones(len(self.rows), dtype=bool)
+
+        if filters.rooms is not None and exclude != "rooms":
+            # Несколько сравнений на равенство заметно быстрее np.isin для малых наборов
+            rooms_mask = np.zeros(len(self.rows), dtype=bool)
+            for rooms in filters.rooms:
+                rooms_mask |= self.rooms == rooms
+            mask &= rooms_mask
+        if exclude != "price":
+            if filters.price_min is not None:
+                mask &= self.price >= filters.price_min
+            if filters.price_max is not None:
+                mask &= self.price <= filters.price_max
+        if filters.area_min is not None:
+            mask &= self.area >= filters.area_min
+        if filters.area_max is not None:
+            mask &= self.area <= filters.area_max
+        if filters.floor_min is not None:
+            mask &= self.floor >= filters.floor_min
+        if filters.floor_max is not None:
+            mask &= self.floor <= filters.floor_max
+        if filters.booking_enabled is not None and exclude != "booking_enabled":
+            mask &= self.booking_enabled == filters.booking_enabled
+        if filters.apartment_ids is not None:
+            ids_mask = np.zeros(len(self.rows), dtype=bool)
+            ids_mask[self.positions(filters.apartment_ids)] = True
+            mask &= ids_mask
+
+        return mask
+
+
+class CatalogIndex:
+    """
+    Векторизованный индекс активных квартир каталога.
+    """
+
+    def __init__(self, version_check_interval: float = 1.0):
+        self.redis_client = get_redis(decode_responses=True)
+        self.version_check_interval = version_check_interval
+
+        self._snapshot: Optional[_Snapshot] = None
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._stale = True
+        self._dirty_ids: Set[int] = set()
+        self._lock = threading.Lock()
+        # Пересборки и патчи выполняются по одной: иначе патч, начатый позже,
+        # мог бы заменить снимок без изменений более раннего
+        self._refresh_lock = threading.Lock()
+
+    # Актуальность снимка
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        Последняя известная этому процессу версия каталога (изменения
+        этого процесса могут еще не попасть в снимок - ETag строится по
+        версии снимка, см. snapshot).
+        """
+        return self._version
+
+    def remote_version(self) -> Optional[int]:
+        """Текущая версия каталога в Redis (None, если Redis недоступен)."""
+        try:
+            value = self.redis_client.get(CACHE_KEYS["catalog_index_version"])
+            return int(value or 0)
+        except Exception as e:
+            logger.error(f"Error reading catalog index version: {e}")
+            return None
+
+    def notify_changed(self, apartment_ids: Iterable[int]) -> None:
+        """
+        Сообщает об изменении квартир (после commit).
+
+        Повышает версию каталога в Redis; если за это время других изменений
+        не было, снимок этого процесса будет точечно пропатчен, иначе - пересобран.
+
+        Args:
+            apartment_ids: ID измененных квартир
+        """
+        ids = {apartment_id for apartment_id in apartment_ids if apartment_id is not None}
+        if not ids:
+            return
+
+        try:
+            new_version = int(self.redis_client.incr(CACHE_KEYS["catalog_index_version"]))
+        except Exception as e:
+            logger.error(f"Error bumping catalog index version: {e}")
+            new_version = None
+
+        with self._lock:
+            if new_version is not None and self._version is not None and new_version == self._version + 1:
+                self._version = new_version
+                self._dirty_ids |= ids
+            else:
+                self._stale = True
+
+    def invalidate(self) -> None:
+        """Помечает снимок для полной пересборки."""
+        with self._lock:
+            self._stale = True
+
+    def load(self, rows: Sequence, version: Optional[int] = None) -> None:
+        """
+        Загружает снимок из строк карточек каталога.
+
+        Args:
+            rows: Строки с полями карточки (apartment_id, title, price_rub, ...)
+            version: Версия каталога, которой соответствует снимок
+        """
+        snapshot = _Snapshot(rows, version)
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+            self._stale = False
+            self._dirty_ids = set()
+            self._version_checked_at = time.monotonic()
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Полностью пересобирает снимок из таблицы карточек каталога.
+
+        Args:
+            db: Сессия базы данных
+
+        Returns:
+            int: Количество квартир в снимке
+        """
+        # Версия читается до данных: изменения после чтения приведут к повторной сборке
+        version = self.remote_version()
+        rows = db.execute(
+            select(*_INDEX_COLUMNS).where(card_table.c.active.is_(True))
+        ).all()
+        self.load(rows, version)
+
+        logger.info(f"Catalog index rebuilt: {len(rows)} apartments, version={version}")
+        return len(rows)
+
+    def _patch(self, db: Session, apartment_ids: Set[int], version: Optional[int]) -> None:
+        """Заменяет в снимке записи указанных квартир актуальными карточками."""
+        rows = db.execute(
+            select(*_INDEX_COLUMNS).where(
+                card_table.c.apartment_id.in_(apartment_ids),
+                card_table.c.active.is_(True)
+            )
+        ).all()
+
+        snapshot = self._snapshot
+        kept = [row for row in snapshot.rows if row.apartment_id not in apartment_ids]
+        patched = _Snapshot(kept + list(rows), version)
+
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = patched
+
+    def snapshot(self, db: Session) -> _Snapshot:
+        """
+        Возвращает актуальный снимок, при необходимости пересобирая или патча его.
+
+        Версия снимка (snapshot.version) не новее его данных, поэтому подходит
+        для ETag; проверять условный запрос нужно после получения снимка, иначе
+        процесс, получающий только условные запросы, не заметит изменений.
+
+        Args:
+            db: Сессия базы данных (для пересборки снимка)
+
+        Returns:
+            _Snapshot: Снимок каталога
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+
+            if not self._stale and self._snapshot is not None and now - self._version_checked_at >= self.version_check_interval:
+                remote_version = self.remote_version()
+                self._version_checked_at = now
+                if remote_version is not None and remote_version != self._version:
+                    self._stale = True
+
+            if self._stale or self._snapshot is None:
+                self.rebuild(db)
+            elif self._dirty_ids:
+                with self._lock:
+                    dirty_ids, self._dirty_ids = self._dirty_ids, set()
+                    version = self._version
+                self._patch(db, dirty_ids, version)
+
+            return self._snapshot
+
+    # Запросы
+
+    def query(
+            self,
+            db: Session,
+            filters: CatalogFilters,
+            sort: str = "created_at",
+            order: str = "desc",
+            offset: int = 0,
+            limit: int = 12
+    ) -> Tuple[List, int]:
+        """
+        Возвращает страницу карточек, подходящих под фильтры.
+
+        Args:
+            db: Сессия базы данных (для пересборки снимка)
+            filters: Фильтры
+            sort: Поле сортировки (created_at, price_rub или relevance -
+                порядок filters.apartment_ids, desc - сначала самые релевантные)
+            order: Порядок сортировки (asc/desc)
+            offset: Смещение
+            limit: Размер страницы
+
+        Returns:
+            Tuple[List, int]: Строки карточек страницы и общее количество подходящих
+        """
+        snapshot = self.snapshot(db)
+        return self.query_snapshot(snapshot, filters, sort, order, offset, limit)
+
+    @staticmethod
+    def query_snapshot(
+            snapshot: _Snapshot,
+            filters: CatalogFilters,
+            sort: str = "created_at",
+            order: str = "desc",
+            offset: int = 0,
+            limit: int = 12
+    ) -> Tuple[List, int]:
+        """Выполняет запрос к конкретному снимку (см. query)."""
+        if sort == "relevance":
+            # Релевантность убывает по apartment_ids, перестановка строится по возрастанию
+            permutation = snapshot.positions(filters.apartment_ids)[::-1]
+        else:
+            permutation = snapshot.orders[sort]
+        # Позиции подходящих записей в порядке сортировки
+        matched = np.flatnonzero(snapshot.mask(filters)[permutation])
+        total = int(matched.size)
+
+        if order == "desc":
+            matched = matched[::-1]
+
+        page = permutation[matched[offset:offset + limit]]
+        return [snapshot.rows[position] for position in page], total
+
+    def facets(self, db: Session, filters: CatalogFilters, price_bins: int = 10) -> Dict:
+        """
+        Считает фасеты каталога для текущих фильтров.
+
+        Счетчики по каждому полю считаются без учета фильтра по этому же полю,
+        чтобы в интерфейсе были видны альтернативы.
+
+        Args:
+            db: Сессия базы данных (для пересборки снимка)
+            filters: Фильтры
+            price_bins: Количество интервалов гистограммы цен
+
+        Returns:
+            Dict: Фасеты (total, rooms, booking_enabled, price_histogram, диапазоны)
+        """
+        snapshot = self.snapshot(db)
+        return self.facets_snapshot(snapshot, filters, price_bins)
+
+    @staticmethod
+    def facets_snapshot(snapshot: _Snapshot, filters: CatalogFilters, price_bins: int = 10) -> Dict:
+        """Считает фасеты для конкретного снимка (см. facets)."""
+        # np.compress заметно быстрее булевой индексации
+        mask = snapshot.mask(filters)
+
+        rooms = np.compress(snapshot.mask(filters, exclude="rooms"), snapshot.rooms)
+        rooms_counts = np.bincount(rooms) if rooms.size else np.zeros(0, dtype=np.int64)
+
+        booking_mask = snapshot.mask(filters, exclude="booking_enabled")
+        booking_enabled_count = int(np.count_nonzero(snapshot.booking_enabled & booking_mask))
+
+        prices = np.compress(snapshot.mask(filters, exclude="price"), snapshot.price)
+        edges, counts = CatalogIndex._histogram(prices, price_bins)
+
+        matched_area = np.compress(mask, snapshot.area)
+        return {
+            "total": int(np.count_nonzero(mask)),
+            "rooms": {value: int(count) for value, count in enumerate(rooms_counts) if count},
+            "booking_enabled": {
+                "true": booking_enabled_count,
+                "false": int(np.count_nonzero(booking_mask)) - booking_enabled_count,
+            },
+            "price_histogram": {"edges": edges, "counts": counts},
+            "price_min": int(prices.min()) if prices.size else None,
+            "price_max": int(prices.max()) if prices.size else None,
+            "area_min": float(matched_area.min()) if matched_area.size else None,
+            "area_max": float(matched_area.max()) if matched_area.size else None,
+        }
+
+    @staticmethod
+    def _histogram(prices: np.ndarray, bins: int) -> Tuple[List[int], List[int]]:
+        """
+        Гистограмма цен с равными интервалами (последний интервал включает максимум).
+
+        Args:
+            prices: Цены
+            bins: Количество интервалов
+
+        Returns:
+            Tuple[List[int], List[int]]: Границы интервалов (bins + 1) и количества
+        """
+        if not prices.size:
+            return [], []
+
+        low, high = int(prices.min()), int(prices.max())
+        width = max(high - low, 1)
+        positions = np.minimum((prices - low) * bins // width, bins - 1)
+        counts = np.bincount(positions, minlength=bins)
+        edges = np.linspace(low, low + width, bins + 1)
+
+        return [int(round(edge)) for edge in edges], [int(count) for count in counts]
+
+
+catalog_index = CatalogIndex(version_check_interval=settings.CATALOG_INDEX_VERSION_CHECK_INTERVAL)
+
+
+@domain_events.subscribe_blocking
+def _notify_catalog_index(events: List[domain_events.DomainEvent]) -> None:
+    """Сообщает индексу каталога об изменениях квартир после commit."""
+    apartment_ids = domain_events.affected_apartment_ids(events)
+    if apartment_ids:
+        catalog_index.notify_changed(apartment_ids)
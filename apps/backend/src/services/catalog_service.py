@@ -0,0 +1,194 @@
+"""
+Сервис денормализованной модели чтения каталога (карточки квартир).
+
+Карточки пересчитываются в той же транзакции, в которой меняются Apartment
+или ApartmentPhoto, поэтому публичный список квартир никогда не обращается
+к таблице фотографий и к MinIO.
+"""
+
+import logging
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.catalog import ApartmentCatalogCard
+from src.schemas.apartment import ApartmentInList
+from src.services.photo_manifest_service import get_variant_urls
+
+logger = logging.getLogger(__name__)
+
+apartment_table = Apartment.__table__
+photo_table = ApartmentPhoto.__table__
+card_table = ApartmentCatalogCard.__table__
+
+
+class CatalogService:
+    """
+    Сервис для поддержки карточек каталога в актуальном состоянии.
+    """
+
+    @staticmethod
+    def get_photo_variants(url: Optional[str], photo_metadata: Optional[Dict]) -> Dict[str, str]:
+        """
+        Возвращает варианты фотографии {size_format: url} без обращения к хранилищу.
+
+        Args:
+            url: Основной URL фотографии
+            photo_metadata: Метаданные фотографии
+
+        Returns:
+            Dict[str, str]: Варианты фотографии
+        """
+        return get_variant_urls(photo_metadata, fallback_url=url)
+
+    @staticmethod
+    def refresh_cards(connection, apartment_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает карточки каталога для указанных квартир.
+
+        Работает на уровне Core, чтобы его можно было вызывать из событий сессии.
+
+        Args:
+            connection: Соединение с БД (в рамках текущей транзакции)
+            apartment_ids: ID квартир
+        """
+        ids = sorted({apartment_id for apartment_id in apartment_ids if apartment_id is not None})
+        if not ids:
+            return
+
+        apartments = connection.execute(
+            select(apartment_table).where(apartment_table.c.id.in_(ids))
+        ).mappings().all()
+
+        photos = connection.execute(
+            select(
+                photo_table.c.apartment_id,
+                photo_table.c.url,
+                photo_table.c.photo_metadata
+            ).where(
+                photo_table.c.apartment_id.in_(ids)
+            ).order_by(
+                photo_table.c.apartment_id,
+                photo_table.c.sort_order
+            )
+        ).all()
+
+        # Группируем фотографии по квартирам (первая по sort_order - обложка)
+        photos_by_apartment: Dict[int, List] = {}
+        for photo in photos:
+            photos_by_apartment.setdefault(photo.apartment_id, []).append(photo)
+
+        values = []
+        for apartment in apartments:
+            apartment_photos = photos_by_apartment.get(apartment["id"], [])
+            cover = apartment_photos[0] if apartment_photos else None
+
+            values.append({
+                "apartment_id": apartment["id"],
+                "title": apartment["title"],
+                "price_rub": apartment["price_rub"],
+                "rooms": apartment["rooms"],
+                "floor": apartment["floor"],
+                "area_m2": apartment["area_m2"],
+                "active": apartment["active"],
+                "booking_enabled": apartment["booking_enabled"],
+                "cover_variants": CatalogService.get_photo_variants(
+                    cover.url, cover.photo_metadata
+                ) if cover else {},
+                "photos_count": len(apartment_photos),
+                "created_at": apartment["created_at"],
+                "updated_at": apartment["updated_at"],
+            })
+
+        # Удаленные квартиры просто теряют карточку
+        connection.execute(delete(card_table).where(card_table.c.apartment_id.in_(ids)))
+        if values:
+            connection.execute(insert(card_table), values)
+
+    @staticmethod
+    def rebuild_all(db: Session, batch_size: int = 500) -> int:
+        """
+        Полностью пересобирает карточки каталога (при старте приложения).
+
+        Args:
+            db: Сессия базы данных
+            batch_size: Размер пачки квартир
+
+        Returns:
+            int: Количество обработанных квартир
+        """
+        try:
+            apartment_ids = db.execute(select(apartment_table.c.id)).scalars().all()
+            connection = db.connection()
+
+            for start in range(0, len(apartment_ids), batch_size):
+                CatalogService.refresh_cards(connection, apartment_ids[start:start + batch_size])
+
+            # Карточки квартир, которых больше нет
+            connection.execute(
+                delete(card_table).where(card_table.c.apartment_id.not_in(apartment_ids))
+            )
+            db.commit()
+
+            return len(apartment_ids)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding catalog cards: {e}")
+            raise
+
+    @staticmethod
+    def to_list_item(card: ApartmentCatalogCard, preferred_variant: str = "small_webp") -> ApartmentInList:
+        """
+        Создание элемента списка квартир из карточки каталога.
+
+        Args:
+            card: Карточка каталога
+            preferred_variant: Предпочтительный вариант обложки
+
+        Returns:
+            ApartmentInList: Элемент списка
+        """
+        cover_variants = card.cover_variants or {}
+        cover_url = (
+            cover_variants.get(preferred_variant) or
+            cover_variants.get("small_jpeg") or
+            cover_variants.get("original") or
+            next(iter(cover_variants.values()), None)
+        )
+
+        return ApartmentInList(
+            id=card.apartment_id,
+            title=card.title,
+            price_rub=card.price_rub,
+            rooms=card.rooms,
+            floor=card.floor,
+            area_m2=card.area_m2,
+            cover_url=cover_url
+        )
+
+
+def collect_apartment_ids(session: Session) -> Set[int]:
+    """Собирает ID квартир, затронутых текущим flush."""
+    apartment_ids = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Apartment):
+            apartment_ids.add(obj.id)
+        elif isinstance(obj, ApartmentPhoto):
+            apartment_ids.add(obj.apartment_id)
+            # Фотография перенесена в другую квартиру: карточка прежней тоже меняется
+            apartment_ids.update(inspect(obj).attrs.apartment_id.history.deleted)
+
+    apartment_ids.discard(None)
+    return apartment_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_catalog_cards(session: Session, flush_context) -> None:
+    """Пересчитывает карточки каталога в той же транзакции, что и изменения."""
+    apartment_ids = collect_apartment_ids(session)
+    if apartment_ids:
+        CatalogService.refresh_cards(session.connection(), apartment_ids)
@@ -0,0 +1,328 @@
+"""
+Счетчики в Redis вместо COUNT(*) на горячих путях.
+
+Счетчики обновляются транзакционно: изменения собираются при flush сессии
+и применяются к Redis только после успешного commit (при rollback отбрасываются).
+Периодическая задача сверяет счетчики с БД и исправляет возможный дрейф.
+Если счетчики еще не инициализированы или Redis недоступен, методы чтения
+возвращают None, и вызывающий код считает значение запросом к БД.
+"""
+
+import logging
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from src.config.redis_settings import COUNTER_KEYS
+from src.db.redis_pool import get_redis
+from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.booking import Booking
+from src.models.event_log import EventLog
+from src.services import domain_events
+
+logger = logging.getLogger(__name__)
+
+# Ключ в session.info для накопления изменений счетчиков до commit
+_SESSION_DELTAS_KEY = "counter_deltas"
+_SESSION_REMOVED_KEY = "counter_removed_fields"
+
+
+def _value(value) -> str:
+    """Приводит значение (в т.ч. Enum) к строковому полю hash."""
+    return str(getattr(value, "value", value))
+
+
+class CounterService:
+    """
+    Сервис счетчиков в Redis.
+    """
+
+    def __init__(self):
+        self.redis_client = get_redis(decode_responses=True)
+
+    def _read(self, command, *args):
+        """
+        Выполняет команду чтения вместе с проверкой инициализации счетчиков.
+
+        Returns:
+            tuple: (инициализированы ли счетчики, результат команды)
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.exists(COUNTER_KEYS["ready"])
+            getattr(pipe, command)(*args)
+            ready, result = pipe.execute()
+            return bool(ready), result
+        except Exception as e:
+            logger.error(f"Error reading counters: {e}")
+            return False, None
+
+    def get_apartments_count(self, active_only: bool = False) -> Optional[int]:
+        """
+        Количество квартир.
+
+        Args:
+            active_only: Только активные квартиры
+
+        Returns:
+            Optional[int]: Количество или None, если счетчик недоступен
+        """
+        key = COUNTER_KEYS["apartments_active" if active_only else "apartments_total"]
+        ready, value = self._read("get", key)
+        if not ready or value is None:
+            return None
+        return max(int(value), 0)
+
+    def get_photo_counts(self, apartment_ids: Iterable[int]) -> Optional[Dict[int, int]]:
+        """
+        Количество фотографий для набора квартир (одним HMGET).
+
+        Args:
+            apartment_ids: ID квартир
+
+        Returns:
+            Optional[Dict[int, int]]: {apartment_id: count} или None, если счетчик недоступен
+        """
+        ids = list(apartment_ids)
+        if not ids:
+            return {}
+
+        ready, values = self._read("hmget", COUNTER_KEYS["apartment_photos"], ids)
+        if not ready:
+            return None
+
+        return {apartment_id: max(int(value or 0), 0) for apartment_id, value in zip(ids, values)}
+
+    def get_bookings_count(self, status: Optional[str] = None) -> Optional[int]:
+        """
+        Количество бронирований (всего или в статусе).
+
+        Args:
+            status: Статус бронирования
+
+        Returns:
+            Optional[int]: Количество или None, если счетчик недоступен
+        """
+        return self._get_hash_count(COUNTER_KEYS["bookings_by_status"], status)
+
+    def get_events_count(self, event_type: Optional[str] = None) -> Optional[int]:
+        """
+        Количество событий журнала (всего или по типу).
+
+        Args:
+            event_type: Тип события
+
+        Returns:
+            Optional[int]: Количество или None, если счетчик недоступен
+        """
+        return self._get_hash_count(COUNTER_KEYS["events_by_type"], event_type)
+
+    def _get_hash_count(self, key: str, field: Optional[str]) -> Optional[int]:
+        """Значение поля hash-счетчика или сумма всех полей."""
+        if field is not None:
+            ready, value = self._read("hget", key, _value(field))
+            if not ready:
+                return None
+            return max(int(value or 0), 0)
+
+        ready, values = self._read("hvals", key)
+        if not ready:
+            return None
+        return max(sum(int(value) for value in values), 0)
+
+    def apply(self, deltas: Dict, removed_fields: Iterable = ()) -> None:
+        """
+        Применяет изменения счетчиков.
+
+        Args:
+            deltas: {(key, field): delta}, field=None для простых счетчиков
+            removed_fields: [(key, field)] - поля hash, которые нужно удалить
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            for (key, field), delta in deltas.items():
+                if not delta:
+                    continue
+                if field is None:
+                    pipe.incrby(key, delta)
+                else:
+                    pipe.hincrby(key, field, delta)
+            for key, field in removed_fields:
+                pipe.hdel(key, field)
+            pipe.execute()
+        except Exception as e:
+            # Дрейф будет исправлен при следующей сверке
+            logger.error(f"Error applying counter deltas: {e}")
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """
+        Пересчитывает все счетчики по БД и атомарно заменяет их в Redis.
+
+        Args:
+            db: Сессия базы данных
+
+        Returns:
+            Dict[str, int]: Итоговые значения простых счетчиков
+        """
+        apartments_total = db.execute(select(func.count(Apartment.id))).scalar() or 0
+        apartments_active = db.execute(
+            select(func.count(Apartment.id)).where(Apartment.active.is_(True))
+        ).scalar() or 0
+        photos = db.execute(
+            select(ApartmentPhoto.apartment_id, func.count(ApartmentPhoto.id)).group_by(ApartmentPhoto.apartment_id)
+        ).all()
+        bookings = db.execute(
+            select(Booking.status, func.count(Booking.id)).group_by(Booking.status)
+        ).all()
+        events = db.execute(
+            select(EventLog.event_type, func.count(EventLog.id)).group_by(EventLog.event_type)
+        ).all()
+
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.delete(
+            COUNTER_KEYS["apartment_photos"],
+            COUNTER_KEYS["bookings_by_status"],
+            COUNTER_KEYS["events_by_type"]
+        )
+        pipe.set(COUNTER_KEYS["apartments_total"], apartments_total)
+        pipe.set(COUNTER_KEYS["apartments_active"], apartments_active)
+        for key, rows in (
+                (COUNTER_KEYS["apartment_photos"], photos),
+                (COUNTER_KEYS["bookings_by_status"], bookings),
+                (COUNTER_KEYS["events_by_type"], events),
+        ):
+            mapping = {_value(field): count for field, count in rows if field is not None}
+            if mapping:
+                pipe.hset(key, mapping=mapping)
+        pipe.set(COUNTER_KEYS["ready"], 1)
+        pipe.execute()
+
+        logger.info(
+            f"Counters reconciled: apartments={apartments_total}, active={apartments_active}, "
+            f"photos={len(photos)} apartments, bookings={len(bookings)} statuses, events={len(events)} types"
+        )
+
+        return {
+            "apartments_total": apartments_total,
+            "apartments_active": apartments_active,
+        }
+
+
+counter_service = CounterService()
+
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    """Пустой обработчик: нужен только для active_history."""
+    return value
+
+
+# Загружать прежнее значение при изменении отслеживаемых атрибутов,
+# иначе у атрибута, истекшего после commit, история не содержит старого значения
+for _attribute in (Apartment.active, ApartmentPhoto.apartment_id, Booking.status, EventLog.event_type):
+    event.listen(_attribute, "set", _track_previous_value, active_history=True, retval=True)
+
+
+def _history_change(obj, attribute: str):
+    """
+    Возвращает (старое, новое) значение атрибута, если он изменился при flush.
+    """
+    history = inspect(obj).attrs[attribute].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _collect_deltas(session: Session, deltas: Dict, removed_fields: set) -> None:
+    """Собирает изменения счетчиков из объектов текущего flush."""
+
+    def add(key_name: str, field, delta: int):
+        deltas[(COUNTER_KEYS[key_name], _value(field))] += delta
+
+    def add_total(key_name: str, delta: int):
+        deltas[(COUNTER_KEYS[key_name], None)] += delta
+
+    def move(key_name: str, change):
+        old, new = change
+        if old is not None:
+            add(key_name, old, -1)
+        if new is not None:
+            add(key_name, new, 1)
+
+    for obj in session.new:
+        if isinstance(obj, Apartment):
+            add_total("apartments_total", 1)
+            if obj.active:
+                add_total("apartments_active", 1)
+        elif isinstance(obj, ApartmentPhoto):
+            add("apartment_photos", obj.apartment_id, 1)
+        elif isinstance(obj, Booking):
+            add("bookings_by_status", obj.status, 1)
+        elif isinstance(obj, EventLog):
+            add("events_by_type", obj.event_type, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Apartment):
+            add_total("apartments_total", -1)
+            if obj.active:
+                add_total("apartments_active", -1)
+            removed_fields.add((COUNTER_KEYS["apartment_photos"], _value(obj.id)))
+        elif isinstance(obj, ApartmentPhoto):
+            add("apartment_photos", obj.apartment_id, -1)
+        elif isinstance(obj, Booking):
+            add("bookings_by_status", obj.status, -1)
+        elif isinstance(obj, EventLog):
+            add("events_by_type", obj.event_type, -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Apartment):
+            change = _history_change(obj, "active")
+            if change:
+                add_total("apartments_active", int(bool(change[1])) - int(bool(change[0])))
+        elif isinstance(obj, ApartmentPhoto):
+            change = _history_change(obj, "apartment_id")
+            if change:
+                move("apartment_photos", change)
+        elif isinstance(obj, Booking):
+            change = _history_change(obj, "status")
+            if change:
+                move("bookings_by_status", change)
+        elif isinstance(obj, EventLog):
+            change = _history_change(obj, "event_type")
+            if change:
+                move("events_by_type", change)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_counter_deltas(session: Session, flush_context) -> None:
+    """Накапливает изменения счетчиков до завершения транзакции."""
+    if not any(
+            isinstance(obj, (Apartment, ApartmentPhoto, Booking, EventLog))
+            for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        return
+
+    deltas = session.info.setdefault(_SESSION_DELTAS_KEY, defaultdict(int))
+    removed_fields = session.info.setdefault(_SESSION_REMOVED_KEY, set())
+    _collect_deltas(session, deltas, removed_fields)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_counter_deltas(session: Session) -> None:
+    """Применяет накопленные изменения счетчиков после commit."""
+    deltas = session.info.pop(_SESSION_DELTAS_KEY, None)
+    removed_fields = session.info.pop(_SESSION_REMOVED_KEY, None)
+    if deltas or removed_fields:
+        # При commit асинхронной сессии pipeline выполняется в пуле потоков
+        domain_events.call_blocking(counter_service.apply, deltas or {}, removed_fields or ())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counter_deltas(session: Session) -> None:
+    """Отбрасывает изменения счетчиков при откате транзакции."""
+    session.info.pop(_SESSION_DELTAS_KEY, None)
+    session.info.pop(_SESSION_REMOVED_KEY, None)
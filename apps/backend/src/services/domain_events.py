@@ -0,0 +1,218 @@
+"""
+Шина доменных событий: изменения квартир, фотографий и системных настроек.
+
+События собираются при flush сессии и рассылаются подписчикам только после
+успешного commit (при rollback отбрасываются), поэтому подписчики видят
+уже закоммиченные данные. Код, который меняет данные в обход сессии,
+публикует события явно через publish.
+
+Подписчики (индекс каталога, версии ресурсов, инвалидация кеша и пересборка
+готовых ответов) регистрируются в своих модулях. Они обращаются к Redis
+и ставят задачи Celery, поэтому регистрируются декоратором subscribe_blocking:
+при commit асинхронной сессии они выполняются в пуле потоков, а не в цикле
+событий (другие обработчики commit используют для этого call_blocking).
+"""
+
+import asyncio
+import functools
+import logging
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.settings import SystemSettings
+
+logger = logging.getLogger(__name__)
+
+# Ключ в session.info для накопления событий до commit
+_SESSION_EVENTS_KEY = "domain_events"
+
+# Сущности
+ENTITY_APARTMENT = "apartment"
+ENTITY_PHOTO = "photo"
+ENTITY_SETTINGS = "settings"
+
+# Действия
+ACTION_CREATED = "created"
+ACTION_UPDATED = "updated"
+ACTION_DELETED = "deleted"
+
+
+class DomainEvent(NamedTuple):
+    """Изменение сущности."""
+    entity: str
+    entity_id: Optional[int]
+    action: str
+    apartment_id: Optional[int] = None  # Квартира, к которой относится изменение
+
+
+Handler = Callable[[List[DomainEvent]], None]
+
+_handlers: List[Handler] = []
+
+
+def subscribe(handler: Handler) -> Handler:
+    """
+    Подписывает обработчик на события (можно использовать как декоратор).
+
+    Обработчик получает все события одной транзакции.
+
+    Args:
+        handler: Обработчик
+
+    Returns:
+        Handler: Тот же обработчик
+    """
+    _handlers.append(handler)
+    return handler
+
+
+def subscribe_blocking(handler: Handler) -> Handler:
+    """
+    Подписывает обработчик с блокирующими вызовами (можно использовать как декоратор).
+
+    Если события публикуются внутри работающего цикла событий (commit
+    асинхронной сессии), обработчик выполняется в пуле потоков цикла,
+    иначе - синхронно, как при subscribe.
+
+    Args:
+        handler: Обработчик
+
+    Returns:
+        Handler: Тот же обработчик
+    """
+    @functools.wraps(handler)
+    def dispatch(events: List[DomainEvent]) -> None:
+        call_blocking(handler, events)
+
+    _handlers.append(dispatch)
+    return handler
+
+
+def call_blocking(func: Callable[..., None], *args) -> None:
+    """
+    Вызывает функцию с блокирующими вызовами после commit.
+
+    Внутри работающего цикла событий (commit асинхронной сессии) функция
+    выполняется в пуле потоков цикла, иначе - синхронно.
+
+    Args:
+        func: Функция
+        *args: Ее аргументы
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        func(*args)
+        return
+
+    future = loop.run_in_executor(None, func, *args)
+    future.add_done_callback(functools.partial(_log_blocking_error, func))
+
+
+def _log_blocking_error(func: Callable, future: "asyncio.Future") -> None:
+    """Логирует ошибку функции, выполненной в пуле потоков."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error running {getattr(func, '__name__', func)} after commit: {future.exception()}")
+
+
+def publish(events: Iterable[DomainEvent]) -> None:
+    """
+    Рассылает события подписчикам.
+
+    Ошибка одного подписчика не мешает остальным (изменение уже закоммичено).
+
+    Args:
+        events: События
+    """
+    events = list(dict.fromkeys(events))
+    if not events:
+        return
+
+    for handler in list(_handlers):
+        try:
+            handler(events)
+        except Exception as e:
+            logger.error(f"Error handling domain events in {getattr(handler, '__name__', handler)}: {e}")
+
+
+def affected_apartment_ids(events: Iterable[DomainEvent]) -> Set[int]:
+    """
+    ID квартир, затронутых событиями (в т.ч. через их фотографии).
+
+    Args:
+        events: События
+
+    Returns:
+        Set[int]: ID квартир
+    """
+    return {e.apartment_id for e in events if e.apartment_id is not None}
+
+
+def deleted_ids(events: Iterable[DomainEvent], entity: str) -> Set[int]:
+    """
+    ID удаленных сущностей указанного типа.
+
+    Args:
+        events: События
+        entity: Сущность
+
+    Returns:
+        Set[int]: ID удаленных сущностей
+    """
+    return {e.entity_id for e in events
+            if e.entity == entity and e.action == ACTION_DELETED and e.entity_id is not None}
+
+
+def has_entity(events: Iterable[DomainEvent], entity: str) -> bool:
+    """Есть ли среди событий изменения указанной сущности."""
+    return any(e.entity == entity for e in events)
+
+
+def collect_events(session: Session) -> List[DomainEvent]:
+    """
+    Собирает события текущего flush.
+
+    Args:
+        session: Сессия
+
+    Returns:
+        List[DomainEvent]: События
+    """
+    events = []
+    for objects, action in ((session.new, ACTION_CREATED), (session.dirty, ACTION_UPDATED),
+                            (session.deleted, ACTION_DELETED)):
+        for obj in objects:
+            if action == ACTION_UPDATED and not session.is_modified(obj):
+                continue
+            if isinstance(obj, Apartment):
+                events.append(DomainEvent(ENTITY_APARTMENT, obj.id, action, obj.id))
+            elif isinstance(obj, ApartmentPhoto):
+                events.append(DomainEvent(ENTITY_PHOTO, obj.id, action, obj.apartment_id))
+            elif isinstance(obj, SystemSettings):
+                events.append(DomainEvent(ENTITY_SETTINGS, obj.id, action))
+    return events
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_domain_events(session: Session, flush_context) -> None:
+    """Накапливает события до завершения транзакции."""
+    events = collect_events(session)
+    if events:
+        session.info.setdefault(_SESSION_EVENTS_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_domain_events(session: Session) -> None:
+    """Рассылает события после commit."""
+    events = session.info.pop(_SESSION_EVENTS_KEY, None)
+    if events:
+        publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_domain_events(session: Session) -> None:
+    """Отбрасывает накопленные события при откате транзакции."""
+    session.info.pop(_SESSION_EVENTS_KEY, None)
@@ -1,12 +1,37 @@
 from datetime import datetime
 from typing import Optional, Union, Dict, Any, List
 from sqlalchemy import select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from sqlalchemy.orm import selectinload
 from src.db.database import get_db
 from fastapi import Request
 from src.models.event_log import EventLog, EventType, EntityType
+from src.services.counter_service import counter_service
+
+
+def _build_event(
+        entity_type: EntityType,
+        entity_id: Union[int, str],
+        event_type: EventType,
+        description: str,
+        user_id: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None
+) -> EventLog:
+    """Создает запись журнала (общая часть log_action и alog_action)."""
+    # Создаем payload с описанием и дополнительными данными
+    payload_data = {"description": description}
+    if metadata:
+        payload_data.update(metadata)
+
+    return EventLog(
+        entity_type=entity_type,
+        entity_id=str(entity_id),
+        event_type=event_type,
+        user_id=user_id,
+        payload=payload_data
+    )
 
 
 def log_action(
@@ -31,18 +56,7 @@ def log_action(
         metadata: Дополнительные данные, связанные с событием (опционально)
     """
     try:
-        # Создаем payload с описанием и дополнительными данными
-        payload_data = {"description": description}
-        if metadata:
-            payload_data.update(metadata)
-
-        event = EventLog(
-            entity_type=entity_type,
-            entity_id=str(entity_id),
-            event_type=event_type,
-            user_id=user_id,
-            payload=payload_data
-        )
+        event = _build_event(entity_type, entity_id, event_type, description, user_id, metadata)
 
         db.add(event)
         db.commit()
@@ -53,8 +67,41 @@ def log_action(
         raise e
 
 
-def get_events(
-        db: Session,
+async def alog_action(
+        db: AsyncSession,
+        entity_type: EntityType,
+        entity_id: Union[int, str],
+        event_type: EventType,
+        description: str,
+        user_id: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None
+):
+    """
+    Записывает событие в журнал действий (асинхронно, см. log_action).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        entity_type: Тип сущности (APARTMENT, USER, BOOKING и т.д.)
+        entity_id: ID сущности
+        event_type: Тип события (CREATE, UPDATE, DELETE и т.д.)
+        description: Описание события
+        user_id: ID пользователя, выполнившего действие (опционально)
+        metadata: Дополнительные данные, связанные с событием (опционально)
+    """
+    try:
+        event = _build_event(entity_type, entity_id, event_type, description, user_id, metadata)
+
+        db.add(event)
+        await db.commit()
+        await db.refresh(event)
+        return event
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+
+async def get_events(
+        db: AsyncSession,
         entity_type: Optional[EntityType] = None,
         entity_id: Optional[str] = None,
         event_type: Optional[EventType] = None,
@@ -66,7 +113,7 @@ def get_events(
     Получает записи журнала событий с возможностью фильтрации.
 
     Args:
-        db: Сессия базы данных
+        db: Асинхронная сессия базы данных
         entity_type: Фильтр по типу сущности
         entity_id: Фильтр по ID сущности
         event_type: Фильтр по типу события
@@ -101,53 +148,42 @@ def get_events(
     query = query.offset(offset).limit(limit)
 
     # Выполняем запросы
-    result = db.execute(query)
-    count_result = db.execute(count_query)
-
-    # Получаем результаты
+    result = await db.execute(query)
     events = result.scalars().all()
-    total_count = count_result.scalar_one()
+
+    # Без фильтров (кроме типа события) общее количество берем из счетчика
+    total_count = None
+    if not (entity_type or entity_id or user_id):
+        total_count = counter_service.get_events_count(event_type)
+    if total_count is None:
+        total_count = (await db.execute(count_query)).scalar_one()
 
     return events, total_count
 
 
-def get_event_by_id(db: Session, event_id: int) -> Optional[EventLog]:
+async def get_event_by_id(db: AsyncSession, event_id: int) -> Optional[EventLog]:
     """
     Получает событие по его ID.
 
     Args:
-        db: Сессия базы данных
+        db: Асинхронная сессия базы данных
         event_id: ID события
 
     Returns:
         Объект события или None, если событие не найдено
     """
     query = select(EventLog).where(EventLog.id == event_id)
-    result = db.execute(query)
+    result = await db.execute(query)
     return result.scalar_one_or_none()
 
 
-def log_event(
-        db: Session,
+def _event_details(
         event_type: EventType,
         entity_type: EntityType,
-        entity_id: str = None,
-        user_id: int = None,
         payload: dict = None,
         request: Request = None
-):
-    """
-    Логирует событие в журнал действий.
-
-    Args:
-        db: Сессия базы данных
-        event_type: Тип события
-        entity_type: Тип сущности
-        entity_id: ID сущности (опционально)
-        user_id: ID пользователя (опционально)
-        payload: Дополнительные данные события (опционально)
-        request: Объект запроса (опционально)
-    """
+) -> tuple[str, dict]:
+    """Описание и метаданные события (общая часть log_event и alog_event)."""
     # Формируем описание события
     description = (
         f"{event_type.value if hasattr(event_type, 'value') else event_type} "
@@ -159,7 +195,7 @@ def log_event(
     
     # Получаем IP и User-Agent из запроса, если он предоставлен
     if request:
-        client_host = request.client.host if hasattr(request, 'client') else None
+        client_host = request.client.host if getattr(request, 'client', None) else None
         metadata.update({
             "ip_address": client_host,
             "user_agent": request.headers.get("user-agent")
@@ -169,6 +205,32 @@ def log_event(
     if payload:
         metadata.update(payload)
 
+    return description, metadata
+
+
+def log_event(
+        db: Session,
+        event_type: EventType,
+        entity_type: EntityType,
+        entity_id: str = None,
+        user_id: int = None,
+        payload: dict = None,
+        request: Request = None
+):
+    """
+    Логирует событие в журнал действий.
+
+    Args:
+        db: Сессия базы данных
+        event_type: Тип события
+        entity_type: Тип сущности
+        entity_id: ID сущности (опционально)
+        user_id: ID пользователя (опционально)
+        payload: Дополнительные данные события (опционально)
+        request: Объект запроса (опционально)
+    """
+    description, metadata = _event_details(event_type, entity_type, payload, request)
+
     # Вызываем функцию log_action для фактического сохранения
     return log_action(
         db=db,
@@ -181,8 +243,42 @@ def log_event(
     )
 
 
-def get_event_stats(
-        db: Session,
+async def alog_event(
+        db: AsyncSession,
+        event_type: EventType,
+        entity_type: EntityType,
+        entity_id: str = None,
+        user_id: int = None,
+        payload: dict = None,
+        request: Request = None
+):
+    """
+    Логирует событие в журнал действий (асинхронно, см. log_event).
+
+    Args:
+        db: Асинхронная сессия базы данных
+        event_type: Тип события
+        entity_type: Тип сущности
+        entity_id: ID сущности (опционально)
+        user_id: ID пользователя (опционально)
+        payload: Дополнительные данные события (опционально)
+        request: Объект запроса (опционально)
+    """
+    description, metadata = _event_details(event_type, entity_type, payload, request)
+
+    return await alog_action(
+        db=db,
+        entity_type=entity_type,
+        entity_id=entity_id or "system",
+        event_type=event_type,
+        description=description,
+        user_id=user_id,
+        metadata=metadata
+    )
+
+
+async def get_event_stats(
+        db: AsyncSession,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
 ) -> dict:
@@ -190,7 +286,7 @@ def get_event_stats(
     Получает статистику по типам событий с возможностью фильтрации по датам.
 
     Args:
-        db: Сессия базы данных
+        db: Асинхронная сессия базы данных
         start_date: Начальная дата для фильтрации
         end_date: Конечная дата для фильтрации
 
@@ -234,20 +330,20 @@ def get_event_stats(
         total_query = total_query.where(EventLog.timestamp <= end_date)
 
     # Выполняем запросы
-    event_type_result = db.execute(event_type_query)
-    entity_type_result = db.execute(entity_type_query)
-    user_result = db.execute(user_query)
-    total_result = db.execute(total_query)
+    event_type_result = await db.execute(event_type_query)
+    entity_type_result = await db.execute(entity_type_query)
+    user_result = await db.execute(user_query)
+    total_result = await db.execute(total_query)
 
     # Обрабатываем результат для типов событий
     event_type_stats = {}
     for event_type, count in event_type_result:
-        event_type_stats[event_type.value] = count
+        event_type_stats[getattr(event_type, 'value', event_type)] = count
 
     # Обрабатываем результат для типов сущностей
     entity_type_stats = {}
     for entity_type, count in entity_type_result:
-        entity_type_stats[entity_type.value] = count
+        entity_type_stats[getattr(entity_type, 'value', entity_type)] = count
 
     # Обрабатываем результат для пользователей
     user_stats = []
@@ -6,10 +6,13 @@
 import io
 import logging
 from typing import Tuple, Optional, Dict, Any
-from PIL import Image, ImageOps
+from PIL import Image
 import pillow_heif
 from enum import Enum
 
+from src.config.settings import settings
+from src.services.image_service import ImageService, ImageSize
+
 logger = logging.getLogger(__name__)
 
 # Регистрируем плагин для поддержки HEIC/HEIF
@@ -145,43 +148,29 @@ class ImageFormatService:
             if original_mime_type in ImageFormatService.UNSUPPORTED_FORMATS:
                 raise ValueError(f"Формат {original_mime_type} не поддерживается для конвертации")
             
-            # Открываем изображение
-            with Image.open(io.BytesIO(file_content)) as img:
-                logger.info(f"Конвертируем {original_mime_type} ({img.format}) в JPEG")
-                
-                # Применяем автоповорот по EXIF
-                img = ImageOps.exif_transpose(img)
-                
-                # Конвертируем в RGB если нужно (для JPEG)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    # Создаем белый фон для прозрачных изображений
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        # Для палитровых изображений
-                        img = img.convert('RGBA')
-                    if img.mode in ('RGBA', 'LA'):
-                        # Используем альфа-канал для наложения
-                        background.paste(img, mask=img.split()[-1])
-                    else:
-                        background.paste(img)
-                    img = background
-                
-                # Сохраняем в JPEG
-                output = io.BytesIO()
-                img.save(
-                    output,
-                    format="JPEG",
-                    quality=85,
-                    optimize=True,
-                    progressive=True
-                )
-                output.seek(0)
-                
-                converted_content = output.getvalue()
-                logger.info(f"Успешно конвертировано {original_mime_type} в JPEG")
-                
-                return converted_content, "image/jpeg"
-                
+            # Декодируем сразу близко к MAX_IMAGE_DIMENSION (с бюджетом памяти),
+            # с автоповоротом по EXIF и белым фоном для прозрачных изображений:
+            # варианты больше MAX_IMAGE_DIMENSION не строятся
+            img, source_info = ImageService.decode_image(file_content)
+            logger.info(f"Конвертируем {original_mime_type} ({source_info['format']}) в JPEG")
+            img = ImageService.resize_cascade(img, {ImageSize.ORIGINAL})[ImageSize.ORIGINAL]
+
+            # Сохраняем в JPEG
+            output = io.BytesIO()
+            img.save(
+                output,
+                format="JPEG",
+                quality=85,
+                optimize=True,
+                progressive=True
+            )
+            output.seek(0)
+
+            converted_content = output.getvalue()
+            logger.info(f"Успешно конвертировано {original_mime_type} в JPEG")
+
+            return converted_content, "image/jpeg"
+
         except Exception as e:
             logger.error(f"Ошибка конвертации {original_mime_type}: {e}")
             raise ValueError(f"Не удалось конвертировать изображение: {str(e)}")
@@ -247,7 +236,15 @@ class ImageFormatService:
                 if width > 10000 or height > 10000:
                     logger.warning(f"Изображение слишком большое: {width}x{height}")
                     return False
-                    
+
+                # Тот же бюджет декодирования, что у воркера: иначе загрузка пройдет,
+                # а обработка в фоне завершится ошибкой
+                try:
+                    ImageService.check_decode_budget(img)
+                except ValueError as e:
+                    logger.warning(f"Изображение превышает бюджет декодирования: {e}")
+                    return False
+
                 # Проверяем, что изображение не повреждено
                 img.verify()
                 
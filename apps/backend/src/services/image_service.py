@@ -3,8 +3,10 @@
 """
 
 import io
+import os
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 from PIL import Image, ImageOps, ExifTags, ImageFile
@@ -19,6 +21,30 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
 logger = logging.getLogger(__name__)
 
 
+def _encode_workers() -> int:
+    """Потоки кодирования вариантов: из настроек или ядра поровну на процессы воркера."""
+    if settings.IMAGE_ENCODE_WORKERS > 0:
+        return settings.IMAGE_ENCODE_WORKERS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.CELERY_WORKER_CONCURRENCY))
+
+
+def _create_encode_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=_encode_workers(), thread_name_prefix="image-encode")
+
+
+# Кодирование вариантов изображения (потоки создаются при первой обработке)
+_encode_executor = _create_encode_executor()
+
+
+def _reset_encode_executor() -> None:
+    # Потоки не переживают fork (процессы prefork Celery): пул дочернего процесса создается заново
+    global _encode_executor
+    _encode_executor = _create_encode_executor()
+
+
+os.register_at_fork(after_in_child=_reset_encode_executor)
+
+
 class ImageSize(str, Enum):
     """Перечисление размеров изображений."""
     THUMBNAIL = "thumbnail"  # 150x150, для превью в сетке
@@ -38,11 +64,17 @@ class ImageFormat(str, Enum):
 class ImageService:
     """Сервис для обработки изображений."""
 
+    # Порядок каскада уменьшения: каждый размер получается из ближайшего большего
+    CASCADE_ORDER = (ImageSize.ORIGINAL, ImageSize.LARGE, ImageSize.MEDIUM, ImageSize.SMALL, ImageSize.THUMBNAIL)
+
     @staticmethod
     def process_image(file_content: bytes) -> Dict[str, bytes]:
         """
         Обрабатывает изображение, создает различные размеры и форматы.
 
+        Изображение декодируется один раз, размеры получаются каскадом уменьшений,
+        варианты кодируются параллельно (см. encode_variants).
+
         Args:
             file_content: Бинарное содержимое файла
 
@@ -51,57 +83,22 @@ class ImageService:
         """
         start_time = time.time()
         try:
-            # Открываем изображение
-            img = Image.open(io.BytesIO(file_content))
-
-            # Проверяем размер изображения
-            width, height = img.size
-            if width > settings.MAX_IMAGE_DIMENSION or height > settings.MAX_IMAGE_DIMENSION:
-                logger.info(f"Image size {width}x{height} exceeds maximum dimension, resizing")
-                img = ImageService._resize_to_max_dimension(img, settings.MAX_IMAGE_DIMENSION)
-                width, height = img.size
-                logger.info(f"Resized to {width}x{height}")
-
-            # Сохраняем EXIF данные
-            exif_data = None
-            if "exif" in img.info:
-                exif_data = img.info["exif"]
-
-            # Автоматически поворачиваем изображение по EXIF
-            img = ImageOps.exif_transpose(img)
-
-            # Словарь для хранения результатов
-            result = {}
+            # Декодируем и поворачиваем по EXIF один раз
+            img, source_info = ImageService.decode_image(file_content)
 
-            # Приоритетные варианты (нужны всегда)
-            priority_variants = [
+            variants = [
                 (ImageSize.THUMBNAIL, ImageFormat.WEBP),
                 (ImageSize.SMALL, ImageFormat.WEBP),
-                (ImageSize.ORIGINAL, ImageFormat.JPEG)
-            ]
-
-            # Обрабатываем приоритетные варианты
-            for size, fmt in priority_variants:
-                variant_key = f"{size.value}_{fmt.value}"
-                result[variant_key] = ImageService._create_variant(img, size, fmt, exif_data)
-
-            # Дополнительные варианты (для производительности создаем только если нужно)
-            optional_variants = [
+                (ImageSize.ORIGINAL, ImageFormat.JPEG),
                 (ImageSize.MEDIUM, ImageFormat.WEBP),
                 (ImageSize.LARGE, ImageFormat.WEBP),
                 (ImageSize.SMALL, ImageFormat.JPEG),
                 (ImageSize.MEDIUM, ImageFormat.JPEG)
             ]
 
-            # Создаем дополнительные варианты с контролем времени
-            for size, fmt in optional_variants:
-                # Если времени прошло больше 30 секунд, прекращаем создание доп. вариантов
-                if time.time() - start_time > 30:
-                    logger.warning("Image processing time exceeded 30s limit, skipping remaining variants")
-                    break
-
-                variant_key = f"{size.value}_{fmt.value}"
-                result[variant_key] = ImageService._create_variant(img, size, fmt, exif_data)
+            # Все размеры получаем каскадом от исходника
+            resized = ImageService.resize_cascade(img, {size for size, _ in variants})
+            result = ImageService.encode_variants(resized, variants, source_info["exif"])
 
             logger.info(f"Created {len(result)} image variants in {time.time() - start_time:.2f}s")
             return result
@@ -113,13 +110,13 @@ class ImageService:
     @staticmethod
     def _create_variant(img: Image.Image, size: ImageSize, fmt: ImageFormat, exif_data: Optional[bytes]) -> bytes:
         """
-        Создает один вариант изображения определенного размера и формата.
+        Кодирует один вариант изображения уже нужного размера.
 
         Args:
-            img: Исходное изображение
+            img: Изображение варианта (см. resize_cascade)
             size: Размер варианта
             fmt: Формат варианта
-            exif_data: EXIF данные (только для JPEG)
+            exif_data: EXIF данные (только для JPEG оригинального размера)
 
         Returns:
             bytes: Бинарные данные обработанного изображения
@@ -127,41 +124,7 @@ class ImageService:
         start_time = time.time()
 
         try:
-            # Изменяем размер изображения
-            resized_img = ImageService._resize_image(img, size)
-
-            # Сохраняем в нужном формате
-            output = io.BytesIO()
-
-            if fmt == ImageFormat.WEBP:
-                # Параметры для WebP
-                save_params = {
-                    "quality": settings.WEBP_QUALITY,
-                    "method": 4,  # Баланс между скоростью и качеством (0-6)
-                    "lossless": False
-                }
-                resized_img.save(output, format="WEBP", **save_params)
-
-            elif fmt == ImageFormat.JPEG:
-                # Параметры для JPEG
-                save_params = {
-                    "quality": settings.JPEG_QUALITY,
-                    "optimize": True,
-                    "progressive": True
-                }
-
-                # Добавляем EXIF для оригинального размера, если они есть
-                if size == ImageSize.ORIGINAL and exif_data:
-                    save_params["exif"] = exif_data
-
-                resized_img.save(output, format="JPEG", **save_params)
-
-            else:
-                # По умолчанию сохраняем как JPEG
-                resized_img.save(output, format="JPEG", quality=settings.JPEG_QUALITY, optimize=True)
-
-            output.seek(0)
-            result = output.getvalue()
+            result = ImageService.encode_image(img, fmt, exif_data if size == ImageSize.ORIGINAL else None)
 
             # Логируем размер и время
             size_kb = len(result) / 1024
@@ -171,9 +134,275 @@ class ImageService:
 
         except Exception as e:
             logger.error(f"Error creating {size.value}_{fmt.value} variant: {e}")
-            # В случае ошибки возвращаем пустой результат
             raise
 
+    @staticmethod
+    def decode_image(file_content: bytes, max_dimension: Optional[int] = None) -> Tuple[Image.Image, Dict]:
+        """
+        Декодирует изображение для построения вариантов: один раз, сразу близко
+        к нужному разрешению, с поворотом по EXIF и приведением к RGB
+        (прозрачность - на белом фоне).
+
+        JPEG декодируется в 1/2, 1/4 или 1/8 разрешения (draft), остальные
+        форматы после декодирования уменьшаются кратно (reduce) - но не меньше
+        max_dimension по большей стороне. Исходники сверх бюджета пикселей
+        или памяти (IMAGE_MAX_SOURCE_PIXELS, IMAGE_DECODE_MEMORY_MB) отклоняются.
+
+        Args:
+            file_content: Бинарное содержимое файла
+            max_dimension: Наибольшая нужная сторона (по умолчанию MAX_IMAGE_DIMENSION)
+
+        Returns:
+            Tuple[Image.Image, Dict]: Изображение и сведения об исходнике
+            {"width", "height", "format", "exif"} (размеры - из заголовка файла)
+
+        Raises:
+            ValueError: Изображение превышает бюджет декодирования
+        """
+        max_dimension = max_dimension or settings.MAX_IMAGE_DIMENSION
+
+        with Image.open(io.BytesIO(file_content)) as source:
+            source_info = {"width": source.width, "height": source.height, "format": source.format}
+            ImageService.check_decode_budget(source, max_dimension)
+            source.load()
+            img = ImageService._reduce_to_fit(source, max_dimension)
+
+            # exif_transpose убирает тег ориентации из EXIF
+            img = ImageOps.exif_transpose(img)
+
+        source_info["exif"] = img.info.get("exif")
+        return ImageService._to_rgb(img), source_info
+
+    @staticmethod
+    def check_decode_budget(source: Image.Image, max_dimension: Optional[int] = None) -> None:
+        """
+        Проверяет, что исходник укладывается в бюджет декодирования
+        (IMAGE_MAX_SOURCE_PIXELS, IMAGE_DECODE_MEMORY_MB), по заголовку файла.
+
+        Для JPEG задает уменьшенное декодирование (draft): бюджет памяти
+        считается по размеру, в котором изображение будет декодировано.
+
+        Args:
+            source: Открытое, но не загруженное изображение
+            max_dimension: Наибольшая нужная сторона (по умолчанию MAX_IMAGE_DIMENSION)
+
+        Raises:
+            ValueError: Изображение превышает бюджет декодирования
+        """
+        if source.width * source.height > settings.IMAGE_MAX_SOURCE_PIXELS:
+            raise ValueError(
+                f"Image too large: {source.width}x{source.height}, "
+                f"max allowed: {settings.IMAGE_MAX_SOURCE_PIXELS} pixels"
+            )
+
+        target_size = ImageService._fit_size(source.size, max_dimension or settings.MAX_IMAGE_DIMENSION)
+        if target_size and source.format == "JPEG":
+            # Масштабирование при декодировании DCT: результат не меньше target_size
+            source.draft(None, target_size)
+
+        # Pillow хранит пиксели RGB/RGBA в 4 байтах
+        decode_mb = source.width * source.height * 4 / (1024 * 1024)
+        if decode_mb > settings.IMAGE_DECODE_MEMORY_MB:
+            raise ValueError(
+                f"Image too large to decode: {source.width}x{source.height} ({decode_mb:.0f} MB), "
+                f"max allowed: {settings.IMAGE_DECODE_MEMORY_MB} MB"
+            )
+
+    @staticmethod
+    def _fit_size(size: Tuple[int, int], max_dimension: int) -> Optional[Tuple[int, int]]:
+        """
+        Размер, вписанный в max_dimension по большей стороне.
+
+        Args:
+            size: Исходный размер (ширина, высота)
+            max_dimension: Максимальный размер стороны
+
+        Returns:
+            Optional[Tuple[int, int]]: Вписанный размер или None, если изображение уже вписывается
+        """
+        width, height = size
+        if width <= max_dimension and height <= max_dimension:
+            return None
+        ratio = max_dimension / max(width, height)
+        return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+    @staticmethod
+    def _reduce_to_fit(img: Image.Image, max_dimension: int) -> Image.Image:
+        """
+        Кратно уменьшает декодированное изображение (усреднение блоков), оставляя
+        его не меньше вписанного в max_dimension размера. Точное уменьшение
+        (LANCZOS) затем идет от меньшего растра.
+
+        Args:
+            img: Декодированное изображение
+            max_dimension: Максимальный размер стороны
+
+        Returns:
+            Image.Image: Уменьшенное или исходное изображение
+        """
+        target_size = ImageService._fit_size(img.size, max_dimension)
+        if not target_size:
+            return img
+
+        factor = min(img.width // target_size[0], img.height // target_size[1])
+        if factor < 2:
+            return img
+        return img.reduce(factor)
+
+    @staticmethod
+    def _to_rgb(img: Image.Image) -> Image.Image:
+        """
+        Приводит изображение к RGB, накладывая прозрачные области на белый фон.
+
+        Args:
+            img: Исходное изображение
+
+        Returns:
+            Image.Image: Изображение в режиме RGB
+        """
+        if img.mode == "RGB":
+            return img
+
+        if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+
+        return img.convert("RGB")
+
+    @staticmethod
+    def resize_cascade(img: Image.Image, sizes) -> Dict[ImageSize, Image.Image]:
+        """
+        Строит изображения нужных размеров каскадом уменьшений
+        (original -> large -> medium -> small -> thumbnail).
+
+        Каждый размер получается из ближайшего большего уже построенного, а не
+        из исходника, поэтому полное разрешение ресэмплируется один раз.
+
+        Args:
+            img: Декодированное изображение (см. decode_image)
+            sizes: Нужные размеры
+
+        Returns:
+            Dict[ImageSize, Image.Image]: Изображения по размерам
+        """
+        resized = {}
+        # Построенные уровни каскада от большего к меньшему
+        levels = [img]
+
+        for size in ImageService.CASCADE_ORDER:
+            if size not in sizes:
+                continue
+
+            if size == ImageSize.THUMBNAIL:
+                # Кроп по центру требует покрытия целевого размера по обеим сторонам:
+                # берем наименьший уровень, который его покрывает
+                target_width, target_height = settings.THUMBNAIL_SIZE
+                source = next(
+                    (level for level in reversed(levels)
+                     if level.width >= target_width and level.height >= target_height),
+                    img
+                )
+                resized[size] = ImageService._resize_image(source, size)
+                continue
+
+            resized[size] = ImageService._resize_image(levels[-1], size)
+            levels.append(resized[size])
+
+        return resized
+
+    @staticmethod
+    def encode_variants(
+            resized: Dict[ImageSize, Image.Image],
+            variants: List[Tuple[ImageSize, ImageFormat]],
+            exif_data: Optional[bytes] = None,
+            skip_errors: bool = False
+    ) -> Dict[str, bytes]:
+        """
+        Кодирует варианты параллельно в пуле потоков (IMAGE_ENCODE_WORKERS).
+
+        Pillow отпускает GIL при кодировании, поэтому варианты кодируются
+        одновременно. Варианты одного изображения (например, small в WebP и JPEG)
+        кодируются в одном потоке: Image.save хранит параметры кодирования в объекте.
+
+        Args:
+            resized: Изображения по размерам (см. resize_cascade)
+            variants: Варианты (размер, формат)
+            exif_data: EXIF данные для JPEG оригинального размера (опционально)
+            skip_errors: Пропускать варианты, которые не удалось закодировать
+
+        Returns:
+            Dict[str, bytes]: Варианты {size_format: content} в порядке variants
+        """
+        # Группируем варианты по объекту изображения (размеры могут совпадать)
+        groups: Dict[int, List[Tuple[ImageSize, ImageFormat]]] = {}
+        for size, fmt in variants:
+            groups.setdefault(id(resized[size]), []).append((size, fmt))
+
+        def encode_group(group: List[Tuple[ImageSize, ImageFormat]]) -> Dict[str, bytes]:
+            encoded = {}
+            for size, fmt in group:
+                try:
+                    encoded[f"{size.value}_{fmt.value}"] = ImageService._create_variant(
+                        resized[size], size, fmt, exif_data
+                    )
+                except Exception:
+                    # Ошибку уже залогировал _create_variant
+                    if not skip_errors:
+                        raise
+            return encoded
+
+        futures = [_encode_executor.submit(encode_group, group) for group in groups.values()]
+        encoded = {}
+        try:
+            for future in futures:
+                encoded.update(future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+        return {
+            f"{size.value}_{fmt.value}": encoded[f"{size.value}_{fmt.value}"]
+            for size, fmt in variants
+            if f"{size.value}_{fmt.value}" in encoded
+        }
+
+    @staticmethod
+    def encode_image(img: Image.Image, fmt: ImageFormat, exif_data: Optional[bytes] = None) -> bytes:
+        """
+        Кодирует изображение в формат варианта.
+
+        Args:
+            img: Изображение
+            fmt: Формат (WebP или JPEG)
+            exif_data: EXIF данные для JPEG (опционально)
+
+        Returns:
+            bytes: Закодированное изображение
+        """
+        output = io.BytesIO()
+
+        if fmt == ImageFormat.WEBP:
+            img.save(
+                output,
+                format="WEBP",
+                quality=settings.WEBP_QUALITY,
+                method=4,  # Баланс между скоростью и качеством (0-6)
+                lossless=False
+            )
+        else:
+            save_params = {
+                "quality": settings.JPEG_QUALITY,
+                "optimize": True,
+                "progressive": True
+            }
+            if exif_data:
+                save_params["exif"] = exif_data
+            img.save(output, format="JPEG", **save_params)
+
+        return output.getvalue()
+
     @staticmethod
     def _resize_image(img: Image.Image, size: ImageSize) -> Image.Image:
         """
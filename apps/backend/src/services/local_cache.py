@@ -0,0 +1,311 @@
+"""
+Кеш в памяти процесса (L1) перед Redis.
+
+Хранит сырые байты значений Redis для самых горячих ключей: LRU с ограничением
+по суммарному размеру в байтах и коротким TTL. Инвалидации рассылаются через
+Redis pub/sub, поэтому каждый воркер удаляет свои копии за миллисекунды.
+Пока процесс не подписан на канал (при старте или после разрыва соединения),
+L1 не используется: пропущенное сообщение могло бы оставить устаревшую копию.
+Разрыв без ошибки сокета обнаруживается по ответам на регулярный PING.
+
+Тот же поток принимает уведомления о вычисленных значениях и будит процессы,
+ожидающие результата чужого вычисления (см. CacheService.get_or_compute).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from src.config.settings import settings
+from src.config.redis_settings import CACHE_KEYS
+from src.db.redis_pool import create_pubsub_redis
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повторной подпиской после ошибки (в секундах)
+RECONNECT_DELAY = 1.0
+
+
+class LocalCache:
+    """
+    Ограниченный по размеру LRU-кеш байтов с TTL.
+
+    Каждая инвалидация увеличивает поколение кеша. Значение, прочитанное
+    из Redis до инвалидации, не сохраняется после нее (см. put).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def generation(self) -> int:
+        """Текущее поколение кеша (читается до обращения к Redis)."""
+        return self._generation
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Значение из кеша.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            Optional[bytes]: Значение или None при промахе
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: bytes, generation: int) -> bool:
+        """
+        Сохраняет значение, прочитанное из Redis.
+
+        Args:
+            key: Ключ
+            value: Значение
+            generation: Поколение кеша, прочитанное до обращения к Redis
+
+        Returns:
+            bool: Сохранено ли значение
+        """
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            # За время чтения из Redis пришла инвалидация - значение могло устареть
+            if generation != self._generation:
+                return False
+
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """
+        Удаляет ключи и ключи, соответствующие шаблонам (в синтаксисе Redis KEYS).
+
+        Args:
+            keys: Ключи
+            patterns: Шаблоны ключей
+        """
+        patterns = list(patterns)
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._remove(key)
+            if patterns:
+                for key in [key for key in self._entries if any(fnmatchcase(key, p) for p in patterns)]:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        """Удаляет все значения."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        """Удаляет ключ (вызывается под блокировкой)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(key) + len(entry[0])
+
+    def stats(self) -> Dict:
+        """Статистика кеша."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions
+            }
+
+
+class InvalidationListener:
+    """
+    Подписка процесса на каналы инвалидаций L1 и вычисленных значений (в фоновом потоке).
+    """
+
+    def __init__(self, cache: LocalCache, channel: str, computed_channel: str):
+        self.cache = cache
+        self.channel = channel
+        self.computed_channel = computed_channel
+        self.connected = False
+
+        self._thread: Optional[threading.Thread] = None
+        self._error_logged = False
+        self._start_lock = threading.Lock()
+        self._waiters: Dict[str, Set[threading.Event]] = {}
+        self._waiters_lock = threading.Lock()
+
+    def register_waiter(self, key: str) -> threading.Event:
+        """
+        Регистрирует ожидание значения ключа (до проверки его наличия в Redis,
+        чтобы не пропустить уведомление).
+
+        Args:
+            key: Ключ
+
+        Returns:
+            threading.Event: Событие, которое будет установлено при уведомлении
+        """
+        waiter = threading.Event()
+        with self._waiters_lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+        return waiter
+
+    def unregister_waiter(self, key: str, waiter: threading.Event) -> None:
+        """Снимает ожидание значения ключа."""
+        with self._waiters_lock:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def notify(self, key: str) -> None:
+        """Будит ожидающих значение ключа в этом процессе."""
+        with self._waiters_lock:
+            waiters = list(self._waiters.get(key, ()))
+        for waiter in waiters:
+            waiter.set()
+
+    def ensure_started(self) -> None:
+        """Запускает поток подписки, если он еще не запущен."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="l1-cache-invalidation", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Цикл подписки с переподключением."""
+        while True:
+            pubsub = create_pubsub_redis().pubsub()
+            try:
+                pubsub.subscribe(self.channel, self.computed_channel)
+                self._listen(pubsub)
+            except Exception as e:
+                if not self._error_logged:
+                    logger.warning(f"L1 cache invalidation listener disconnected: {e}")
+                    self._error_logged = True
+            finally:
+                self.connected = False
+                self.cache.clear()
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(RECONNECT_DELAY)
+
+    def _listen(self, pubsub) -> None:
+        """
+        Обрабатывает сообщения подписки, пока соединение живо.
+
+        Разрыв соединения без ошибки сокета (например, при потере сети) не
+        виден при чтении, поэтому подписка регулярно отправляет PING и считает
+        соединение потерянным, если от Redis долго нет ни сообщений, ни ответа.
+
+        Raises:
+            ConnectionError: Если Redis не отвечает
+        """
+        interval = settings.L1_INVALIDATION_HEALTH_CHECK_INTERVAL
+        subscribed = 0
+        last_seen = last_ping = time.monotonic()
+        while True:
+            message = pubsub.get_message(timeout=interval)
+            now = time.monotonic()
+            if message is not None:
+                last_seen = now
+                self._handle(message)
+                if message["type"] == "subscribe":
+                    subscribed += 1
+                    if subscribed == 2:
+                        # Сообщения, пропущенные до подписки, не восстановить
+                        self.cache.clear()
+                        self.connected = True
+                        self._error_logged = False
+                        logger.info("L1 cache invalidation listener subscribed")
+            elif now - last_seen > 3 * interval:
+                raise ConnectionError(f"no response from Redis for {now - last_seen:.1f} s")
+
+            if now - last_ping >= interval:
+                pubsub.ping()
+                last_ping = now
+
+    def _handle(self, message: Dict) -> None:
+        """Обрабатывает сообщение канала инвалидаций или вычисленных значений."""
+        if message["type"] != "message":
+            return
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        if channel == self.computed_channel:
+            self.notify(message["data"].decode())
+        else:
+            self._apply(message["data"])
+
+    def _apply(self, data: bytes) -> None:
+        """Применяет сообщение об инвалидации."""
+        try:
+            message = json.loads(data)
+        except ValueError:
+            self.cache.clear()
+            return
+        self.cache.invalidate(message.get("keys", ()), message.get("patterns", ()))
+
+
+def encode_invalidation(keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> str:
+    """
+    Сообщение об инвалидации для канала L1.
+
+    Args:
+        keys: Ключи
+        patterns: Шаблоны ключей
+
+    Returns:
+        str: Сообщение
+    """
+    return json.dumps({"keys": list(keys), "patterns": list(patterns)})
+
+
+local_cache = LocalCache(max_bytes=settings.L1_CACHE_MAX_BYTES, ttl=settings.L1_CACHE_TTL)
+invalidation_listener = InvalidationListener(
+    local_cache, CACHE_KEYS["l1_invalidation_channel"], CACHE_KEYS["cache_computed_channel"]
+)
@@ -0,0 +1,568 @@
+"""
+Материализованные ответы публичного каталога.
+
+Детальная информация о квартирах и первые страницы каталога хранятся в Redis
+готовыми (сериализованными и сжатыми, см. src.utils.cached_response) ответами и перезаписываются задачей Celery после изменений
+в админке (write-through), поэтому публичное чтение в установившемся режиме
+не обращается ни к Postgres, ни к MinIO. Промах (например, после рестарта
+Redis) заполняет ключ при чтении.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.config.redis_settings import (
+    CACHE_EXPIRATION,
+    CACHE_KEYS,
+    get_materialized_detail_key,
+    get_materialized_list_key
+)
+from src.models.apartment import Apartment
+from src.schemas.apartment import ApartmentDetail, PaginatedApartments
+from src.services.apartment_service import ApartmentService
+from src.services.cache_service import CacheService
+from src.services.catalog_service import CatalogService
+from src.services.resource_version_service import resource_version_service
+from src.utils.cached_response import pack_model
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать завершения параллельной материализации (в секундах)
+LOCK_TIMEOUT = 120
+LOCK_BLOCKING_TIMEOUT = 60
+
+
+class MaterializationService:
+    """
+    Сервис материализованных ответов каталога.
+    """
+
+    def __init__(self, pages: int = 10):
+        self.cache_service = CacheService()
+        self.pages = pages
+
+    # Построение ответов
+
+    @staticmethod
+    def build_apartment_detail(db: Session, apartment_id: int) -> Optional[ApartmentDetail]:
+        """
+        Строит детальную информацию об активной квартире.
+
+        Args:
+            db: Сессия базы данных
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[ApartmentDetail]: Детальная информация или None, если квартиры нет
+        """
+        apartment = ApartmentService.get_apartment_by_id(db, apartment_id)
+        if not apartment:
+            return None
+
+        return MaterializationService.to_apartment_detail(
+            apartment, ApartmentService.get_apartment_photos_with_variants(db, apartment_id)
+        )
+
+    @staticmethod
+    def build_apartment_details(db: Session, apartment_ids: List[int]) -> Dict[int, ApartmentDetail]:
+        """
+        Строит детальную информацию о нескольких активных квартирах
+        (один запрос квартир и один запрос фотографий).
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир
+
+        Returns:
+            Dict[int, ApartmentDetail]: Детальная информация по ID (без отсутствующих квартир)
+        """
+        apartments = ApartmentService.get_apartments_by_ids(db, apartment_ids)
+        photos = ApartmentService.get_photos_with_variants_by_apartment_ids(
+            db, [apartment.id for apartment in apartments]
+        )
+        return {
+            apartment.id: MaterializationService.to_apartment_detail(apartment, photos[apartment.id])
+            for apartment in apartments
+        }
+
+    @staticmethod
+    async def abuild_apartment_detail(db: AsyncSession, apartment_id: int) -> Optional[ApartmentDetail]:
+        """
+        Строит детальную информацию об активной квартире (асинхронно, для эндпоинтов).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[ApartmentDetail]: Детальная информация или None, если квартиры нет
+        """
+        apartment = await ApartmentService.aget_apartment_by_id(db, apartment_id)
+        if not apartment:
+            return None
+
+        return MaterializationService.to_apartment_detail(
+            apartment, await ApartmentService.aget_apartment_photos_with_variants(db, apartment_id)
+        )
+
+    @staticmethod
+    async def abuild_apartment_details(db: AsyncSession, apartment_ids: List[int]) -> Dict[int, ApartmentDetail]:
+        """
+        Строит детальную информацию о нескольких активных квартирах (асинхронно,
+        один запрос квартир и один запрос фотографий).
+
+        Args:
+            db: Асинхронная сессия базы данных
+            apartment_ids: ID квартир
+
+        Returns:
+            Dict[int, ApartmentDetail]: Детальная информация по ID (без отсутствующих квартир)
+        """
+        apartments = await ApartmentService.aget_apartments_by_ids(db, apartment_ids)
+        photos = await ApartmentService.aget_photos_with_variants_by_apartment_ids(
+            db, [apartment.id for apartment in apartments]
+        )
+        return {
+            apartment.id: MaterializationService.to_apartment_detail(apartment, photos[apartment.id])
+            for apartment in apartments
+        }
+
+    @staticmethod
+    def to_apartment_detail(apartment: Apartment, photos: List[Dict]) -> ApartmentDetail:
+        """
+        Детальная информация о квартире из модели и ее фотографий с вариантами.
+
+        Args:
+            apartment: Квартира
+            photos: Фотографии квартиры с вариантами
+
+        Returns:
+            ApartmentDetail: Детальная информация
+        """
+        # Выбираем предпочтительные URL для детальной страницы (medium_webp или любые доступные)
+        photo_urls = []
+        for photo in photos:
+            variants = photo.get("variants", {})
+            url = (
+                variants.get("medium_webp") or
+                variants.get("medium_jpeg") or
+                variants.get("original") or
+                next(iter(variants.values()), None)
+            )
+            if url:
+                photo_urls.append(url)
+
+        return ApartmentDetail(
+            id=apartment.id,
+            title=apartment.title,
+            price_rub=apartment.price_rub,
+            rooms=apartment.rooms,
+            floor=apartment.floor,
+            area_m2=apartment.area_m2,
+            address=apartment.address,
+            description=apartment.description,
+            active=apartment.active,
+            photos=photo_urls,
+            created_at=apartment.created_at,
+            booking_enabled=apartment.booking_enabled,
+            updated_at=apartment.updated_at
+        )
+
+    @staticmethod
+    def build_catalog_page(cards: Sequence, page: int, page_size: int, total: int) -> PaginatedApartments:
+        """
+        Строит страницу каталога из карточек.
+
+        Args:
+            cards: Карточки каталога страницы
+            page: Номер страницы
+            page_size: Размер страницы
+            total: Общее количество активных квартир
+
+        Returns:
+            PaginatedApartments: Страница каталога
+        """
+        return PaginatedApartments(
+            page=page,
+            page_size=page_size,
+            total=total,
+            items=[
+                CatalogService.to_list_item(card, preferred_variant="small_webp")
+                for card in cards
+            ]
+        )
+
+    # Чтение (готовые ответы читаются асинхронно: из обработчиков async def)
+
+    def is_materialized_page(self, page: int) -> bool:
+        """Поддерживается ли страница каталога готовой."""
+        return page <= self.pages
+
+    async def get_apartment_detail(self, apartment_id: int) -> Optional[bytes]:
+        """
+        Готовая детальная информация о квартире.
+
+        Args:
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[bytes]: Упакованный ответ или None при промахе
+        """
+        return await self.cache_service.aget_raw(get_materialized_detail_key(apartment_id))
+
+    async def get_apartment_details(self, apartment_ids: List[int]) -> List[Optional[bytes]]:
+        """
+        Готовая детальная информация о нескольких квартирах (одним MGET).
+
+        Args:
+            apartment_ids: ID квартир
+
+        Returns:
+            List[Optional[bytes]]: Упакованные ответы в порядке ID (None при промахе)
+        """
+        return await self.cache_service.amget_raw(
+            [get_materialized_detail_key(apartment_id) for apartment_id in apartment_ids]
+        )
+
+    async def get_catalog_page(self, page: int, page_size: int, sort: str, order: str) -> Optional[bytes]:
+        """
+        Готовая страница каталога.
+
+        Args:
+            page: Номер страницы
+            page_size: Размер страницы
+            sort: Поле сортировки
+            order: Порядок сортировки
+
+        Returns:
+            Optional[bytes]: Упакованный ответ или None при промахе
+        """
+        return await self.cache_service.aget_raw(get_materialized_list_key(page, page_size, sort, order))
+
+    # Запись
+
+    # Заполнение при промахе не перезаписывает ключ (его могла уже обновить задача
+    # с более свежими данными) и живет недолго, чтобы ограничить устаревание.
+    # Версия ресурса (для ETag) читается до чтения данных: ответ может оказаться
+    # новее своей версии, но никогда не старее. Промахи заполняются из
+    # обработчиков async def - асинхронно
+
+    async def fill_apartment_detail(self, apartment_id: int, detail: ApartmentDetail,
+                                    version: Optional[int] = None) -> bytes:
+        """
+        Заполняет промах детальной информации о квартире и возвращает упакованный ответ.
+
+        Args:
+            apartment_id: ID квартиры
+            detail: Детальная информация
+            version: Версия квартиры, прочитанная до построения ответа
+
+        Returns:
+            bytes: Упакованный ответ
+        """
+        body = pack_model(detail, version)
+        await self.cache_service.aset_raw(
+            get_materialized_detail_key(apartment_id), body,
+            expire=CACHE_EXPIRATION["apartment_detail"], only_if_missing=True
+        )
+        return body
+
+    async def fill_apartment_details(self, details: Dict[int, ApartmentDetail],
+                                     versions: Dict[int, Optional[int]]) -> Dict[int, bytes]:
+        """
+        Заполняет промахи детальной информации о нескольких квартирах
+        (одним pipeline) и возвращает упакованные ответы.
+
+        Args:
+            details: Детальная информация по ID квартиры
+            versions: Версии квартир, прочитанные до построения ответов
+
+        Returns:
+            Dict[int, bytes]: Упакованные ответы по ID квартиры
+        """
+        bodies = {
+            apartment_id: pack_model(detail, versions.get(apartment_id))
+            for apartment_id, detail in details.items()
+        }
+        if not bodies:
+            return bodies
+
+        try:
+            async with self.cache_service.apipeline() as pipeline:
+                for apartment_id, body in bodies.items():
+                    pipeline.set(
+                        get_materialized_detail_key(apartment_id), body,
+                        ex=CACHE_EXPIRATION["apartment_detail"], nx=True
+                    )
+                await pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error storing materialized apartment details: {e}")
+
+        return bodies
+
+    async def fill_catalog_page(self, result: PaginatedApartments, sort: str, order: str,
+                                version: Optional[int] = None) -> bytes:
+        """
+        Заполняет промах страницы каталога и регистрирует ее комбинацию параметров,
+        чтобы следующие изменения поддерживали ее в актуальном состоянии.
+
+        Args:
+            result: Страница каталога
+            sort: Поле сортировки
+            order: Порядок сортировки
+            version: Версия каталога, прочитанная до построения ответа
+
+        Returns:
+            bytes: Упакованный ответ
+        """
+        body = pack_model(result, version)
+        key = get_materialized_list_key(result.page, result.page_size, sort, order)
+
+        try:
+            async with self.cache_service.apipeline() as pipeline:
+                pipeline.set(key, body, ex=CACHE_EXPIRATION["apartments_list"], nx=True)
+                pipeline.sadd(CACHE_KEYS["materialized_list_variants"], f"{result.page_size}:{sort}:{order}")
+                await pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error storing materialized catalog page: {e}")
+
+        return body
+
+    def register_catalog_variants(self, variants: Iterable[Tuple[int, str, str]]) -> None:
+        """
+        Регистрирует комбинации (page_size, sort, order), которые поддерживаются
+        готовыми еще до первого запроса (например, стандартные для прогрева).
+
+        Args:
+            variants: Комбинации параметров
+        """
+        members = [f"{page_size}:{sort}:{order}" for page_size, sort, order in variants]
+        if not members:
+            return
+        try:
+            self.cache_service.redis_client.sadd(CACHE_KEYS["materialized_list_variants"], *members)
+        except Exception as e:
+            logger.error(f"Error registering materialized catalog variants: {e}")
+
+    def get_catalog_variants(self) -> Set[Tuple[int, str, str]]:
+        """Используемые комбинации (page_size, sort, order) страниц каталога."""
+        try:
+            members = self.cache_service.redis_client.smembers(CACHE_KEYS["materialized_list_variants"])
+        except Exception as e:
+            logger.error(f"Error reading materialized catalog variants: {e}")
+            return set()
+
+        variants = set()
+        for member in members:
+            page_size, sort, order = (member.decode() if isinstance(member, bytes) else member).split(":")
+            variants.add((int(page_size), sort, order))
+        return variants
+
+    def materialize_apartments(self, db: Session, apartment_ids: Iterable[int]) -> None:
+        """
+        Пересобирает детальную информацию о квартирах (удаленные и скрытые - удаляет).
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир
+        """
+        keys = []
+        for apartment_id in sorted(set(apartment_ids)):
+            version = resource_version_service.get_apartment_version(apartment_id)
+            detail = self.build_apartment_detail(db, apartment_id)
+            key = get_materialized_detail_key(apartment_id)
+            if detail:
+                self.cache_service.set_raw(key, pack_model(detail, version), expire=CACHE_EXPIRATION["materialized"])
+            else:
+                self.cache_service.redis_client.delete(key)
+            keys.append(key)
+
+        # Перезапись существующих значений: копии в памяти процессов устарели
+        self.cache_service.broadcast_invalidation(keys=keys)
+
+    def materialize_catalog(self, db: Session) -> int:
+        """
+        Пересобирает первые страницы каталога для всех используемых комбинаций.
+
+        Для каждой пары (sort, order) карточки читаются одним запросом
+        и нарезаются на страницы всех используемых размеров.
+
+        Args:
+            db: Сессия базы данных
+
+        Returns:
+            int: Количество записанных страниц
+        """
+        variants_by_sort: Dict[Tuple[str, str], List[int]] = {}
+        for page_size, sort, order in self.get_catalog_variants():
+            variants_by_sort.setdefault((sort, order), []).append(page_size)
+
+        version = resource_version_service.get_catalog_version()
+        written = 0
+        keys = []
+        pipeline = self.cache_service.redis_client.pipeline(transaction=False)
+
+        for (sort, order), page_sizes in variants_by_sort.items():
+            cards, total = ApartmentService.get_apartments(
+                db, page=1, page_size=max(page_sizes) * self.pages, sort_field=sort, sort_order=order
+            )
+
+            for page_size in page_sizes:
+                for page in range(1, self.pages + 1):
+                    key = get_materialized_list_key(page, page_size, sort, order)
+                    keys.append(key)
+                    page_cards = cards[(page - 1) * page_size:page * page_size]
+
+                    # Пустые страницы за концом каталога не храним (кроме первой)
+                    if page > 1 and not page_cards:
+                        pipeline.delete(key)
+                        continue
+
+                    result = self.build_catalog_page(page_cards, page, page_size, total)
+                    pipeline.set(key, pack_model(result, version), ex=CACHE_EXPIRATION["materialized"])
+                    written += 1
+
+        pipeline.execute()
+        self.cache_service.broadcast_invalidation(keys=keys)
+        return written
+
+    def materialize_missing_apartments(self, db: Session, apartment_ids: Sequence[int], batch_size: int = 50) -> int:
+        """
+        Строит детальную информацию о квартирах, которой нет в кеше (пачками:
+        два запроса к БД на пачку). Существующие ответы не перезаписываются.
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир
+            batch_size: Размер пачки
+
+        Returns:
+            int: Количество записанных ответов
+        """
+        apartment_ids = list(dict.fromkeys(apartment_ids))
+        if not apartment_ids:
+            return 0
+
+        keys = [get_materialized_detail_key(apartment_id) for apartment_id in apartment_ids]
+        try:
+            existing = self.cache_service.redis_client.mget(keys)
+        except Exception as e:
+            logger.error(f"Error reading materialized apartment details: {e}")
+            return 0
+        missing_ids = [apartment_id for apartment_id, value in zip(apartment_ids, existing) if value is None]
+
+        written = 0
+        for start in range(0, len(missing_ids), batch_size):
+            batch = missing_ids[start:start + batch_size]
+            versions = resource_version_service.get_apartment_versions(batch)
+            details = self.build_apartment_details(db, batch)
+
+            pipeline = self.cache_service.redis_client.pipeline(transaction=False)
+            for apartment_id, detail in details.items():
+                pipeline.set(
+                    get_materialized_detail_key(apartment_id), pack_model(detail, versions.get(apartment_id)),
+                    ex=CACHE_EXPIRATION["materialized"], nx=True
+                )
+            written += sum(1 for stored in pipeline.execute() if stored)
+        return written
+
+    def warm(self, db: Session, apartment_ids: Sequence[int], batch_size: int = 50,
+             catalog: bool = True) -> Tuple[int, int]:
+        """
+        Прогревает готовые ответы: первые страницы каталога для всех используемых
+        комбинаций и отсутствующую детальную информацию об указанных квартирах.
+
+        Выполняется под той же блокировкой, что и пересборка после изменений,
+        и, в отличие от нее, не сбрасывает кеш более глубоких страниц.
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID квартир (например, самых просматриваемых)
+            batch_size: Размер пачки при построении детальной информации
+            catalog: Строить ли страницы каталога (после изменений их уже
+                пересобирает materialize)
+
+        Returns:
+            Tuple[int, int]: Количество записанных страниц каталога и ответов по квартирам
+        """
+        lock = self.cache_service.redis_client.lock(
+            CACHE_KEYS["materialized_lock"], timeout=LOCK_TIMEOUT, blocking_timeout=LOCK_BLOCKING_TIMEOUT
+        )
+        if not lock.acquire():
+            raise TimeoutError("Timed out waiting for materialization lock")
+
+        try:
+            pages = self.materialize_catalog(db) if catalog else 0
+            details = self.materialize_missing_apartments(db, apartment_ids, batch_size=batch_size)
+        finally:
+            try:
+                lock.release()
+            except Exception as e:
+                logger.warning(f"Error releasing materialization lock: {e}")
+
+        return pages, details
+
+    def discard(self, apartment_ids: Iterable[int]) -> None:
+        """
+        Удаляет готовые ответы, которые не удалось пересобрать (они заполнятся при чтении).
+
+        Args:
+            apartment_ids: ID измененных квартир
+        """
+        keys = [get_materialized_detail_key(apartment_id) for apartment_id in apartment_ids]
+        for page_size, sort, order in self.get_catalog_variants():
+            keys.extend(
+                get_materialized_list_key(page, page_size, sort, order)
+                for page in range(1, self.pages + 1)
+            )
+
+        try:
+            if keys:
+                self.cache_service.redis_client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Error discarding materialized responses: {e}")
+        self.cache_service.broadcast_invalidation(keys=keys)
+
+    def materialize(self, db: Session, apartment_ids: Iterable[int]) -> int:
+        """
+        Пересобирает материализованные ответы после изменения квартир.
+
+        Задачи выполняются последовательно под блокировкой: каждая читает
+        данные уже после своего commit, поэтому последней записью всегда
+        оказывается самое свежее состояние.
+
+        Args:
+            db: Сессия базы данных
+            apartment_ids: ID измененных квартир
+
+        Returns:
+            int: Количество записанных страниц каталога
+        """
+        apartment_ids = set(apartment_ids)
+        lock = self.cache_service.redis_client.lock(
+            CACHE_KEYS["materialized_lock"], timeout=LOCK_TIMEOUT, blocking_timeout=LOCK_BLOCKING_TIMEOUT
+        )
+        if not lock.acquire():
+            raise TimeoutError("Timed out waiting for materialization lock")
+
+        try:
+            self.materialize_apartments(db, apartment_ids)
+            written = self.materialize_catalog(db)
+        finally:
+            try:
+                lock.release()
+            except Exception as e:
+                logger.warning(f"Error releasing materialization lock: {e}")
+
+        # Более глубокие страницы кешируются при чтении, их просто сбрасываем
+        self.cache_service.invalidate_apartments_cache()
+
+        logger.info(f"Materialized {len(apartment_ids)} apartments and {written} catalog pages")
+        return written
+
+
+materialization_service = MaterializationService(pages=settings.MATERIALIZED_CATALOG_PAGES)
@@ -7,22 +7,108 @@
 - Таймауты для операций
 """
 
+import os
 import uuid
+import hashlib
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from minio import Minio
+from minio.commonconfig import ENABLED, Filter
+from minio.lifecycleconfig import Expiration, LifecycleConfig, Rule
+from PIL import Image
 from minio.error import S3Error
 import tenacity
 from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
 
+from src.config.redis_settings import CACHE_KEYS
 from src.config.settings import settings
+from src.db.redis_pool import get_redis
 from src.services.image_service import ImageService, ImageSize, ImageFormat
+from src.services.photo_manifest_service import build_variant_entry
 
 logger = logging.getLogger(__name__)
 
+# Размер блока при чтении исходника загрузки из бакета временного хранения
+STAGING_CHUNK_SIZE = 256 * 1024
+
+# Правило жизненного цикла, удаляющее необработанные исходники загрузок
+STAGING_RULE_ID = "expire-staged-uploads"
+
+# Бакет временного хранения проверен в этом процессе
+_staging_bucket_ready = False
+
+
+def _create_upload_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.MINIO_UPLOAD_WORKERS, thread_name_prefix="minio-upload")
+
+
+# Параллельная загрузка вариантов изображения (потоки создаются при первой загрузке)
+_upload_executor = _create_upload_executor()
+
+
+def _reset_upload_executor() -> None:
+    # Потоки не переживают fork (процессы prefork Celery): пул дочернего процесса создается заново
+    global _upload_executor
+    _upload_executor = _create_upload_executor()
+
+
+os.register_at_fork(after_in_child=_reset_upload_executor)
+
+
+def _record_upload_stats(process_time: float, upload_time: float, files: int, failed: bool = False) -> None:
+    """
+    Учитывает загрузку изображения в общей статистике (Redis, для всех воркеров).
+
+    Args:
+        process_time: Время обработки (в секундах)
+        upload_time: Время загрузки вариантов (в секундах)
+        files: Число загружаемых файлов
+        failed: Загрузка не удалась (загруженные файлы удалены)
+    """
+    try:
+        key = CACHE_KEYS["image_upload_stats"]
+        pipe = get_redis(decode_responses=True).pipeline(transaction=False)
+        pipe.hincrby(key, "failed" if failed else "images", 1)
+        if not failed:
+            pipe.hincrby(key, "files", files)
+            pipe.hincrby(key, "process_ms", round(process_time * 1000))
+            pipe.hincrby(key, "upload_ms", round(upload_time * 1000))
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Error recording image upload stats: {e}")
+
+
+def image_upload_stats() -> Dict:
+    """
+    Статистика загрузки изображений воркерами.
+
+    Returns:
+        Dict: Загруженные и неудачные изображения, файлы и среднее время
+        обработки и загрузки вариантов одного изображения (в миллисекундах)
+    """
+    try:
+        stats = {
+            field: int(value)
+            for field, value in get_redis(decode_responses=True).hgetall(CACHE_KEYS["image_upload_stats"]).items()
+        }
+    except Exception as e:
+        logger.error(f"Error reading image upload stats: {e}")
+        return {"error": str(e)}
+
+    images = stats.get("images", 0)
+    return {
+        "images": images,
+        "failed": stats.get("failed", 0),
+        "files": stats.get("files", 0),
+        "avg_process_ms": round(stats.get("process_ms", 0) / images) if images else None,
+        "avg_upload_ms": round(stats.get("upload_ms", 0) / images) if images else None,
+        "upload_workers": settings.MINIO_UPLOAD_WORKERS
+    }
+
 
 class MinioService:
     """Сервис для работы с MinIO/S3 хранилищем."""
@@ -76,11 +162,6 @@ class MinioService:
             logger.error(f"Error checking/creating bucket: {err}")
             raise
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True
-    )
     def upload_image(self, file_content: bytes, apartment_id: int) -> Dict[str, str]:
         """
         Загружает изображение и его варианты в хранилище.
@@ -92,6 +173,24 @@ class MinioService:
         Returns:
             Dict[str, str]: Словарь с URLs вариантов изображения {size_format: url}
         """
+        manifest = self.upload_image_with_manifest(file_content, apartment_id)
+        return {variant: entry["url"] for variant, entry in manifest["variants"].items()}
+
+    def upload_image_with_manifest(self, file_content: bytes, apartment_id: int) -> Dict:
+        """
+        Загружает изображение и его варианты в хранилище и возвращает манифест вариантов.
+
+        Повторных попыток целиком нет: файлы загружаются с повторными попытками
+        (_upload_file_with_retry), а неудачную обработку повторяет задача Celery.
+
+        Args:
+            file_content: Бинарное содержимое файла
+            apartment_id: ID квартиры
+
+        Returns:
+            Dict: Манифест {"image_id": str, "variants": {size_format: {url, width, height, bytes}},
+            "timings": {process_ms, upload_ms, total_ms}}
+        """
         start_time = time.time()
         try:
             # Проверка размера файла
@@ -102,14 +201,11 @@ class MinioService:
 
             logger.info(f"Processing image of size {file_size_mb:.2f} MB for apartment_id={apartment_id}")
 
-            # Получаем информацию об изображении
-            image_info = ImageService.get_image_info(file_content)
-            logger.debug(f"Image info: {image_info}")
-
-            # Обрабатываем изображение, получаем различные варианты
-            # Распараллеливаем обработку наиболее важных форматов
+            # Декодируем изображение один раз (с поворотом по EXIF), все варианты
+            # получаем каскадом уменьшений от него
             start_process = time.time()
-            processed_images = {}
+            img, image_info = ImageService.decode_image(file_content)
+            logger.debug(f"Image info: {image_info['width']}x{image_info['height']} {image_info['format']}")
 
             # Основные варианты изображений (оптимизировано)
             # Мы обрабатываем только самые необходимые варианты: thumbnail, small, medium
@@ -122,42 +218,35 @@ class MinioService:
                 (ImageSize.ORIGINAL, ImageFormat.JPEG)
             ]
 
+            resized = ImageService.resize_cascade(img, {size for size, _ in variants_to_process})
+            # Полное разрешение больше не нужно - освобождаем память до кодирования
+            del img
+
+            # Кодируем варианты параллельно; не закодированные варианты пропускаются
+            encoded = ImageService.encode_variants(resized, variants_to_process, skip_errors=True)
+
+            # {size_format: (содержимое, ширина, высота)}
+            processed_images = {}
             for size, fmt in variants_to_process:
-                try:
-                    variant_start = time.time()
-                    variant_key = f"{size.value}_{fmt.value}"
-
-                    # Создаем вариант изображения
-                    if size == ImageSize.ORIGINAL and fmt == ImageFormat.JPEG:
-                        # Для оригинального размера просто используем исходное изображение
-                        # с оптимизацией качества
-                        img = ImageService.optimize_original_image(file_content)
-                        buffer = BytesIO()
-                        img.save(buffer, format="JPEG", quality=settings.JPEG_QUALITY, optimize=True)
-                        buffer.seek(0)
-                        processed_images[variant_key] = buffer.getvalue()
-                    else:
-                        # Для остальных вариантов используем специализированные методы
-                        processed_images[variant_key] = ImageService.create_image_variant(
-                            file_content, size, fmt
-                        )
+                variant_key = f"{size.value}_{fmt.value}"
+                if variant_key in encoded:
+                    processed_images[variant_key] = (encoded[variant_key], resized[size].width, resized[size].height)
 
-                    logger.debug(f"Processed variant {variant_key} in {time.time() - variant_start:.2f}s")
-                except Exception as e:
-                    logger.error(f"Error processing variant {size.value}_{fmt.value}: {e}")
-                    # Продолжаем обработку других вариантов
+            process_time = time.time() - start_process
+            logger.info(f"Image processing completed in {process_time:.2f}s")
 
-            logger.info(f"Image processing completed in {time.time() - start_process:.2f}s")
+            # Проверяем, что хотя бы один вариант был успешно обработан
+            if not processed_images:
+                raise Exception("Failed to process any image variants")
 
             # Загружаем все варианты в MinIO
-            result_urls = {}
-            upload_start = time.time()
+            manifest_variants = {}
+            uploads = []
 
             # Генерируем уникальный идентификатор для изображения
             image_id = str(uuid.uuid4())
 
-            # Загружаем все обработанные варианты
-            for variant, variant_content in processed_images.items():
+            for variant, (variant_content, width, height) in processed_images.items():
                 # Определяем имя файла и путь
                 file_path = f"apartments/{apartment_id}/{image_id}_{variant}.{'webp' if 'webp' in variant else 'jpg'}"
 
@@ -173,34 +262,44 @@ class MinioService:
                     "image-id": image_id
                 }
 
-                # Загружаем файл в MinIO с обработкой ошибок и повторными попытками
-                try:
-                    self._upload_file_with_retry(
-                        file_path=file_path,
-                        file_content=variant_content,
-                        content_type=content_type,
-                        metadata=metadata
-                    )
+                uploads.append({
+                    "file_path": file_path,
+                    "file_content": variant_content,
+                    "content_type": content_type,
+                    "metadata": metadata
+                })
 
-                    # Формируем URL для доступа к изображению
-                    file_url = f"{settings.PHOTOS_BASE_URL}/{file_path}"
-                    result_urls[variant] = file_url
-                except Exception as e:
-                    logger.error(f"Error uploading variant {variant}: {e}")
-                    # Продолжаем с другими вариантами
+                # Формируем URL для доступа к изображению
+                file_url = f"{settings.PHOTOS_BASE_URL}/{file_path}"
+                manifest_variants[variant] = build_variant_entry(
+                    file_url, width, height, len(variant_content)
+                )
+
+            # Загружаем варианты параллельно: либо все, либо ни одного
+            upload_start = time.time()
+            try:
+                self._upload_files(uploads)
+            except Exception:
+                _record_upload_stats(process_time, time.time() - upload_start, len(uploads), failed=True)
+                raise
 
             upload_time = time.time() - upload_start
             logger.info(
-                f"Uploaded {len(result_urls)} image variants in {upload_time:.2f}s for apartment_id={apartment_id}")
-
-            # Проверяем, что хотя бы один вариант был успешно загружен
-            if not result_urls:
-                raise Exception("Failed to upload any image variants")
+                f"Uploaded {len(manifest_variants)} image variants in {upload_time:.2f}s for apartment_id={apartment_id}")
 
             total_time = time.time() - start_time
             logger.info(f"Total image processing and upload time: {total_time:.2f}s")
-
-            return result_urls
+            _record_upload_stats(process_time, upload_time, len(uploads))
+
+            return {
+                "image_id": image_id,
+                "variants": manifest_variants,
+                "timings": {
+                    "process_ms": round(process_time * 1000),
+                    "upload_ms": round(upload_time * 1000),
+                    "total_ms": round(total_time * 1000)
+                }
+            }
 
         except S3Error as err:
             logger.error(f"Error uploading image to MinIO: {err}")
@@ -209,6 +308,60 @@ class MinioService:
             logger.error(f"Error processing image: {e}")
             raise
 
+    @staticmethod
+    def _get_image_dimensions(content: bytes):
+        """
+        Определяет размеры изображения по заголовку файла (без полного декодирования).
+
+        Args:
+            content: Содержимое файла
+
+        Returns:
+            tuple: (width, height) или (None, None)
+        """
+        try:
+            with Image.open(BytesIO(content)) as img:
+                return img.size
+        except Exception:
+            return None, None
+
+    def _upload_files(self, uploads: List[Dict]) -> None:
+        """
+        Загружает файлы параллельно (MINIO_UPLOAD_WORKERS) по принципу "все или ничего".
+
+        Каждый файл загружается с повторными попытками (_upload_file_with_retry).
+        Если хотя бы один файл не загрузился, уже загруженные удаляются.
+
+        Args:
+            uploads: Аргументы _upload_file_with_retry для каждого файла
+
+        Raises:
+            Exception: Ошибка первого не загруженного файла
+        """
+        futures = [
+            (upload["file_path"], _upload_executor.submit(self._upload_file_with_retry, **upload))
+            for upload in uploads
+        ]
+
+        # Дожидаемся всех загрузок, чтобы откат не разминулся с незавершенными
+        uploaded, errors = [], []
+        for file_path, future in futures:
+            try:
+                future.result()
+                uploaded.append(file_path)
+            except Exception as e:
+                logger.error(f"Error uploading file {file_path}: {e}")
+                errors.append(e)
+
+        if errors:
+            logger.warning(f"Rolling back {len(uploaded)} uploaded files after {len(errors)} failed uploads")
+            for file_path in uploaded:
+                try:
+                    self.client.remove_object(bucket_name=self.bucket_name, object_name=file_path)
+                except Exception as e:
+                    logger.error(f"Error removing file {file_path} during rollback: {e}")
+            raise errors[0]
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -237,6 +390,149 @@ class MinioService:
             logger.error(f"Error uploading file {file_path} to MinIO: {err}")
             raise
 
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        reraise=True
+    )
+    def _ensure_staging_bucket_exists(self):
+        """
+        Проверяет бакет временного хранения загрузок и создает его при необходимости.
+
+        Бакет закрыт (без публичной политики), необработанные исходники удаляются
+        правилом жизненного цикла через MINIO_STAGING_EXPIRATION_DAYS. Правило
+        добавляется и в уже существующий бакет (созданный вручную или раньше).
+        """
+        global _staging_bucket_ready
+        if _staging_bucket_ready:
+            return
+
+        bucket_name = settings.MINIO_STAGING_BUCKET
+        try:
+            if not self.client.bucket_exists(bucket_name):
+                self.client.make_bucket(bucket_name)
+                logger.info(f"Staging bucket '{bucket_name}' created successfully")
+
+            # Правило проверяется и для существующего бакета; остальные правила сохраняются
+            expiration_days = settings.MINIO_STAGING_EXPIRATION_DAYS
+            lifecycle = self.client.get_bucket_lifecycle(bucket_name)
+            rules = lifecycle.rules if lifecycle else []
+            current_rule = next((rule for rule in rules if rule.rule_id == STAGING_RULE_ID), None)
+            if current_rule is None or current_rule.expiration is None \
+                    or current_rule.expiration.days != expiration_days:
+                rules = [rule for rule in rules if rule.rule_id != STAGING_RULE_ID]
+                rules.append(Rule(
+                    ENABLED,
+                    rule_filter=Filter(prefix=""),
+                    rule_id=STAGING_RULE_ID,
+                    expiration=Expiration(days=expiration_days)
+                ))
+                self.client.set_bucket_lifecycle(bucket_name, LifecycleConfig(rules))
+                logger.info(f"Expiration rule set for staging bucket '{bucket_name}'")
+            _staging_bucket_ready = True
+        except S3Error as err:
+            logger.error(f"Error checking/creating staging bucket: {err}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        reraise=True
+    )
+    def stage_upload(self, file_content: bytes, apartment_id: int) -> Tuple[str, str]:
+        """
+        Сохраняет исходник загрузки в бакет временного хранения.
+
+        Задаче Celery передаются только ключ и контрольная сумма: размер сообщения
+        в брокере и время постановки в очередь не зависят от размера фотографии.
+
+        Args:
+            file_content: Бинарное содержимое файла
+            apartment_id: ID квартиры
+
+        Returns:
+            Tuple[str, str]: (ключ объекта, SHA-256 содержимого)
+        """
+        self._ensure_staging_bucket_exists()
+
+        staging_key = f"{apartment_id}/{uuid.uuid4()}"
+        checksum = hashlib.sha256(file_content).hexdigest()
+        try:
+            self.client.put_object(
+                bucket_name=settings.MINIO_STAGING_BUCKET,
+                object_name=staging_key,
+                data=BytesIO(file_content),
+                length=len(file_content),
+                content_type="application/octet-stream"
+            )
+        except S3Error as err:
+            logger.error(f"Error staging upload {staging_key}: {err}")
+            raise
+
+        logger.info(f"Staged upload {staging_key} ({len(file_content) / (1024 * 1024):.2f} MB)")
+        return staging_key, checksum
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=tenacity.retry_if_not_exception_type(ValueError),
+        reraise=True
+    )
+    def read_staged_upload(self, staging_key: str, checksum: str) -> bytes:
+        """
+        Читает исходник загрузки из бакета временного хранения блоками
+        и сверяет его контрольную сумму.
+
+        Args:
+            staging_key: Ключ объекта (из stage_upload)
+            checksum: SHA-256 содержимого (из stage_upload)
+
+        Returns:
+            bytes: Содержимое файла
+
+        Raises:
+            ValueError: Объекта нет, он больше MAX_IMAGE_SIZE_MB или контрольная сумма не совпала
+        """
+        max_size = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+        digest = hashlib.sha256()
+        output = BytesIO()
+        response = None
+        try:
+            response = self.client.get_object(settings.MINIO_STAGING_BUCKET, staging_key)
+            for chunk in response.stream(STAGING_CHUNK_SIZE):
+                if output.tell() + len(chunk) > max_size:
+                    raise ValueError(
+                        f"Staged upload {staging_key} exceeds {settings.MAX_IMAGE_SIZE_MB} MB")
+                digest.update(chunk)
+                output.write(chunk)
+        except S3Error as err:
+            if err.code == "NoSuchKey":
+                raise ValueError(f"Staged upload not found: {staging_key}") from err
+            logger.error(f"Error reading staged upload {staging_key}: {err}")
+            raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+        if digest.hexdigest() != checksum:
+            raise ValueError(f"Checksum mismatch for staged upload {staging_key}")
+        return output.getvalue()
+
+    def delete_staged_upload(self, staging_key: str) -> None:
+        """
+        Удаляет исходник загрузки из бакета временного хранения.
+
+        Ошибка не пробрасывается: объект удалит правило жизненного цикла бакета.
+
+        Args:
+            staging_key: Ключ объекта
+        """
+        try:
+            self.client.remove_object(bucket_name=settings.MINIO_STAGING_BUCKET, object_name=staging_key)
+        except Exception as e:
+            logger.warning(f"Error deleting staged upload {staging_key}: {e}")
+
     def get_apartment_images(self, apartment_id: int) -> Dict[str, Dict[str, str]]:
         """
         Получает все изображения квартиры.
@@ -247,6 +543,26 @@ class MinioService:
         Returns:
             Dict[str, Dict[str, str]]: Словарь {image_id: {variant: url}}
         """
+        return {
+            image_id: {variant: entry["url"] for variant, entry in variants.items()}
+            for image_id, variants in self.list_apartment_image_variants(apartment_id).items()
+        }
+
+    def list_apartment_image_variants(self, apartment_id: int,
+                                      read_dimensions: bool = False) -> Dict[str, Dict[str, Dict]]:
+        """
+        Получает все изображения квартиры одним листингом бакета.
+
+        Используется для заполнения манифестов фотографий, загруженных
+        до их появления.
+
+        Args:
+            apartment_id: ID квартиры
+            read_dimensions: Читать заголовки файлов для определения размеров
+
+        Returns:
+            Dict[str, Dict[str, Dict]]: Словарь {image_id: {variant: {url, width, height, bytes}}}
+        """
         try:
             prefix = f"apartments/{apartment_id}/"
             objects = []
@@ -286,9 +602,15 @@ class MinioService:
                     if image_id not in images:
                         images[image_id] = {}
 
+                    width, height = (
+                        self._read_object_dimensions(object_name) if read_dimensions else (None, None)
+                    )
+
                     # Формируем URL для доступа к изображению
                     file_url = f"{settings.PHOTOS_BASE_URL}/{object_name}"
-                    images[image_id][variant] = file_url
+                    images[image_id][variant] = build_variant_entry(
+                        file_url, width, height, getattr(obj, "size", None)
+                    )
 
             return images
 
@@ -300,6 +622,31 @@ class MinioService:
             logger.error(f"Unexpected error getting apartment images: {e}")
             return {}
 
+    def _read_object_dimensions(self, object_name: str, header_bytes: int = 256 * 1024):
+        """
+        Определяет размеры изображения в хранилище по началу файла.
+
+        Args:
+            object_name: Имя объекта в хранилище
+            header_bytes: Сколько байт читать с начала файла
+
+        Returns:
+            tuple: (width, height) или (None, None)
+        """
+        response = None
+        try:
+            response = self.client.get_object(
+                self.bucket_name, object_name, offset=0, length=header_bytes
+            )
+            return self._get_image_dimensions(response.read())
+        except Exception as e:
+            logger.warning(f"Could not read dimensions of {object_name}: {e}")
+            return None, None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
     def get_image_variants(self, apartment_id: int, image_id: str) -> Dict[str, str]:
         """
         Получает все варианты одного изображения.
@@ -0,0 +1,144 @@
+"""
+Манифест вариантов фотографии.
+
+Манифест хранится в ApartmentPhoto.photo_metadata и описывает все варианты
+изображения (URL, размеры, вес), поэтому чтение фотографий не требует
+листинга бакета MinIO.
+
+Формат photo_metadata:
+    {
+        "image_id": "<uuid>",
+        "variants": {
+            "small_webp": {"url": "...", "width": 400, "height": 300, "bytes": 12345},
+            ...
+        },
+        "timings": {"process_ms": 640, "upload_ms": 120, "total_ms": 770},
+        "processing_status": "completed"
+    }
+"""
+
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def build_variant_entry(url: str, width: Optional[int] = None, height: Optional[int] = None,
+                        size_bytes: Optional[int] = None) -> Dict:
+    """
+    Формирует запись манифеста для одного варианта изображения.
+
+    Args:
+        url: Публичный URL варианта
+        width: Ширина в пикселях
+        height: Высота в пикселях
+        size_bytes: Размер файла в байтах
+
+    Returns:
+        Dict: Запись манифеста
+    """
+    return {
+        "url": url,
+        "width": width,
+        "height": height,
+        "bytes": size_bytes
+    }
+
+
+def get_variant_urls(photo_metadata: Optional[Dict], fallback_url: Optional[str] = None) -> Dict[str, str]:
+    """
+    Возвращает URL вариантов фотографии {size_format: url} из манифеста.
+
+    Поддерживает как записи манифеста, так и старый формат {variant: url}.
+
+    Args:
+        photo_metadata: Метаданные фотографии
+        fallback_url: URL, используемый при отсутствии манифеста
+
+    Returns:
+        Dict[str, str]: Варианты фотографии
+    """
+    variants = (photo_metadata or {}).get("variants")
+    result = {}
+
+    if isinstance(variants, dict):
+        for name, entry in variants.items():
+            if isinstance(entry, dict) and entry.get("url"):
+                result[name] = entry["url"]
+            elif isinstance(entry, str):
+                result[name] = entry
+
+    if not result and fallback_url:
+        result["original"] = fallback_url
+
+    return result
+
+
+def has_manifest(photo_metadata: Optional[Dict]) -> bool:
+    """
+    Проверяет, содержит ли метаданные фотографии манифест вариантов.
+
+    Args:
+        photo_metadata: Метаданные фотографии
+
+    Returns:
+        bool: True, если манифест есть
+    """
+    variants = (photo_metadata or {}).get("variants")
+    return isinstance(variants, dict) and bool(variants)
+
+
+def parse_image_id_from_url(url: Optional[str]) -> Optional[str]:
+    """
+    Извлекает image_id из URL вида .../apartments/{apartment_id}/{image_id}_{variant}.{ext}.
+
+    Args:
+        url: URL фотографии
+
+    Returns:
+        Optional[str]: ID изображения или None
+    """
+    if not url:
+        return None
+
+    parts = url.split('/')
+    if len(parts) < 3:
+        return None
+
+    filename = parts[-1]
+    return filename.split('_')[0].split('.')[0] or None
+
+
+def get_image_id(photo_metadata: Optional[Dict], url: Optional[str] = None) -> Optional[str]:
+    """
+    Возвращает ID изображения из манифеста (или из URL для старых записей).
+
+    Args:
+        photo_metadata: Метаданные фотографии
+        url: URL фотографии
+
+    Returns:
+        Optional[str]: ID изображения или None
+    """
+    image_id = (photo_metadata or {}).get("image_id")
+    if image_id:
+        return image_id
+
+    return parse_image_id_from_url(url)
+
+
+def pick_cover_url(variant_urls: Dict[str, str]) -> Optional[str]:
+    """
+    Выбирает URL для обложки (small_webp или ближайший доступный вариант).
+
+    Args:
+        variant_urls: Варианты фотографии {size_format: url}
+
+    Returns:
+        Optional[str]: URL обложки
+    """
+    return (
+        variant_urls.get("small_webp") or
+        variant_urls.get("small_jpeg") or
+        next(iter(variant_urls.values()), None)
+    )
@@ -0,0 +1,191 @@
+"""
+Версии публичных ресурсов для HTTP-кеширования (ETag / Last-Modified).
+
+Версия - время последнего изменения в миллисекундах, строго возрастающее:
+при нескольких изменениях в одну миллисекунду версия увеличивается на 1.
+Поэтому одно значение служит и для ETag, и для Last-Modified, а после потери
+данных Redis версии не повторяются (инициализируются текущим временем).
+
+Хранятся версия каталога (меняется при любом изменении квартир и фотографий)
+и версии отдельных квартир. Обновляются после commit, как и счетчики.
+Методы с префиксом "a" - асинхронные варианты чтения для обработчиков async def.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from src.config.redis_settings import CACHE_KEYS
+from src.db.redis_pool import get_async_redis, get_redis
+from src.services import domain_events
+
+logger = logging.getLogger(__name__)
+
+# KEYS: версия каталога, hash версий квартир; ARGV: текущее время (мс), ID квартир
+_TOUCH_SCRIPT = """
+local now = tonumber(ARGV[1])
+local function bump(current)
+    current = tonumber(current) or 0
+    if now > current then
+        return now
+    end
+    return current + 1
+end
+local catalog_version = bump(redis.call('GET', KEYS[1]))
+redis.call('SET', KEYS[1], catalog_version)
+for i = 2, #ARGV do
+    redis.call('HSET', KEYS[2], ARGV[i], bump(redis.call('HGET', KEYS[2], ARGV[i])))
+end
+return catalog_version
+"""
+
+# KEYS: версия каталога, hash версий квартир; ARGV: текущее время (мс), ID квартир
+_READ_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+local versions = {redis.call('GET', KEYS[1])}
+for i = 2, #ARGV do
+    redis.call('HSETNX', KEYS[2], ARGV[i], ARGV[1])
+    versions[i] = redis.call('HGET', KEYS[2], ARGV[i])
+end
+return versions
+"""
+
+
+def _now_ms() -> int:
+    """Текущее время в миллисекундах."""
+    return int(time.time() * 1000)
+
+
+class ResourceVersionService:
+    """
+    Сервис версий публичных ресурсов.
+    """
+
+    def __init__(self):
+        self.redis_client = get_redis(decode_responses=True)
+        self._touch = self.redis_client.register_script(_TOUCH_SCRIPT)
+        self._read = self.redis_client.register_script(_READ_SCRIPT)
+
+    def _keys(self):
+        """Ключи версий (аргумент KEYS скриптов)."""
+        return [CACHE_KEYS["catalog_version"], CACHE_KEYS["apartment_versions"]]
+
+    def touch(self, apartment_ids: Iterable[int]) -> Optional[int]:
+        """
+        Повышает версию каталога и версии указанных квартир.
+
+        Args:
+            apartment_ids: ID измененных квартир
+
+        Returns:
+            Optional[int]: Новая версия каталога или None, если Redis недоступен
+        """
+        ids = sorted({apartment_id for apartment_id in apartment_ids if apartment_id is not None})
+        try:
+            return int(self._touch(keys=self._keys(), args=[_now_ms(), *ids]))
+        except Exception as e:
+            logger.error(f"Error bumping resource versions: {e}")
+            return None
+
+    def get_catalog_version(self) -> Optional[int]:
+        """
+        Текущая версия каталога.
+
+        Returns:
+            Optional[int]: Версия или None, если Redis недоступен
+        """
+        try:
+            catalog_version, = self._read(keys=self._keys(), args=[_now_ms()])
+            return int(catalog_version)
+        except Exception as e:
+            logger.error(f"Error reading catalog version: {e}")
+            return None
+
+    async def aget_catalog_version(self) -> Optional[int]:
+        """
+        Текущая версия каталога (асинхронно).
+
+        Returns:
+            Optional[int]: Версия или None, если Redis недоступен
+        """
+        try:
+            catalog_version, = await self._aread([])
+            return int(catalog_version)
+        except Exception as e:
+            logger.error(f"Error reading catalog version: {e}")
+            return None
+
+    def get_apartment_version(self, apartment_id: int) -> Optional[int]:
+        """
+        Текущая версия квартиры (ее данных и фотографий).
+
+        Args:
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[int]: Версия или None, если Redis недоступен
+        """
+        return self.get_apartment_versions([apartment_id])[apartment_id]
+
+    def get_apartment_versions(self, apartment_ids: List[int]) -> Dict[int, Optional[int]]:
+        """
+        Текущие версии нескольких квартир (одним обращением к Redis).
+
+        Args:
+            apartment_ids: ID квартир
+
+        Returns:
+            Dict[int, Optional[int]]: Версии по ID квартиры (None, если Redis недоступен)
+        """
+        try:
+            _, *versions = self._read(keys=self._keys(), args=[_now_ms(), *apartment_ids])
+            return {apartment_id: int(version) for apartment_id, version in zip(apartment_ids, versions)}
+        except Exception as e:
+            logger.error(f"Error reading apartment versions: {e}")
+            return {apartment_id: None for apartment_id in apartment_ids}
+
+
+    async def aget_apartment_version(self, apartment_id: int) -> Optional[int]:
+        """
+        Текущая версия квартиры (асинхронно).
+
+        Args:
+            apartment_id: ID квартиры
+
+        Returns:
+            Optional[int]: Версия или None, если Redis недоступен
+        """
+        return (await self.aget_apartment_versions([apartment_id]))[apartment_id]
+
+    async def aget_apartment_versions(self, apartment_ids: List[int]) -> Dict[int, Optional[int]]:
+        """
+        Текущие версии нескольких квартир (одним обращением к Redis, асинхронно).
+
+        Args:
+            apartment_ids: ID квартир
+
+        Returns:
+            Dict[int, Optional[int]]: Версии по ID квартиры (None, если Redis недоступен)
+        """
+        try:
+            _, *versions = await self._aread(apartment_ids)
+            return {apartment_id: int(version) for apartment_id, version in zip(apartment_ids, versions)}
+        except Exception as e:
+            logger.error(f"Error reading apartment versions: {e}")
+            return {apartment_id: None for apartment_id in apartment_ids}
+
+    async def _aread(self, apartment_ids: List[int]) -> List:
+        """Выполняет скрипт чтения версий на асинхронном клиенте текущего цикла событий."""
+        script = get_async_redis(decode_responses=True).register_script(_READ_SCRIPT)
+        return await script(keys=self._keys(), args=[_now_ms(), *apartment_ids])
+
+
+resource_version_service = ResourceVersionService()
+
+
+@domain_events.subscribe_blocking
+def _touch_resource_versions(events: List[domain_events.DomainEvent]) -> None:
+    """Повышает версии измененных квартир и каталога после commit."""
+    apartment_ids = domain_events.affected_apartment_ids(events)
+    if apartment_ids:
+        resource_version_service.touch(apartment_ids)
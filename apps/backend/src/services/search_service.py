@@ -0,0 +1,200 @@
+"""
+Поиск квартир.
+
+Полнотекстовый поиск по title/address/description (tsvector с русской
+морфологией и GIN-индексом) дополняется нечетким поиском по адресу и
+заголовку через триграммы pg_trgm. Результаты для нормализованных запросов
+кешируются в Redis; ключ включает версию каталога, поэтому любое изменение
+квартир делает закешированные результаты неактуальными.
+"""
+
+import hashlib
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.config.redis_settings import CACHE_EXPIRATION, CACHE_KEYS
+from src.models.apartment import Apartment, APARTMENT_SEARCH_VECTOR_SQL
+from src.services.cache_service import CacheService
+from src.services.catalog_index import catalog_index
+
+logger = logging.getLogger(__name__)
+
+cache_service = CacheService()
+
+SEARCH_CONFIG = "russian"
+
+# Порог похожести слова запроса на часть адреса/заголовка (pg_trgm word_similarity)
+TRIGRAM_WORD_SIMILARITY_THRESHOLD = 0.5
+
+# Максимальное количество результатов поиска
+MAX_SEARCH_RESULTS = 1000
+
+
+class SearchService:
+    """
+    Сервис полнотекстового и нечеткого поиска квартир.
+    """
+
+    # Доступно ли расширение pg_trgm (определяется при старте)
+    trigram_enabled = False
+
+    @staticmethod
+    def ensure_search_schema(engine: Engine) -> None:
+        """
+        Создает поисковую колонку и индексы, если их еще нет.
+
+        Колонка search_vector создается и через create_all для новых баз,
+        здесь она добавляется в уже существующие таблицы.
+
+        Args:
+            engine: Движок базы данных
+        """
+        with engine.begin() as connection:
+            connection.execute(text(
+                "ALTER TABLE apartment ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({APARTMENT_SEARCH_VECTOR_SQL}) STORED"
+            ))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_apartment_search ON apartment USING GIN (search_vector)"
+            ))
+
+        try:
+            with engine.begin() as connection:
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                connection.execute(text(
+                    "CREATE INDEX IF NOT EXISTS idx_apartment_address_trgm "
+                    "ON apartment USING GIN (address gin_trgm_ops)"
+                ))
+                connection.execute(text(
+                    "CREATE INDEX IF NOT EXISTS idx_apartment_title_trgm "
+                    "ON apartment USING GIN (title gin_trgm_ops)"
+                ))
+            SearchService.trigram_enabled = True
+        except Exception as e:
+            SearchService.trigram_enabled = False
+            logger.warning(f"pg_trgm is not available, fuzzy search disabled: {e}")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Нормализует поисковый запрос (регистр, ё, пунктуация, пробелы).
+
+        Args:
+            query: Поисковый запрос
+
+        Returns:
+            str: Нормализованный запрос
+        """
+        normalized = query.lower().replace("ё", "е")
+        normalized = re.sub(r"[^\w\s\-\"]", " ", normalized)
+        return " ".join(normalized.split())
+
+    @staticmethod
+    def build_condition(query: str, substring: Optional[str] = None):
+        """
+        Условие поиска для фильтрации квартир (использует GIN-индексы).
+
+        Args:
+            query: Нормализованный поисковый запрос
+            substring: Исходный запрос для дополнительного поиска подстроки
+                в заголовке и адресе (с пунктуацией, как она хранится в адресе)
+
+        Returns:
+            Условие SQLAlchemy
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        conditions = [Apartment.search_vector.op("@@")(ts_query)]
+
+        if SearchService.trigram_enabled:
+            # "запрос <% колонка" - похожесть запроса на слово/фрагмент колонки
+            conditions.append(literal(query).op("<%")(Apartment.address))
+            conditions.append(literal(query).op("<%")(Apartment.title))
+
+        substring = substring.strip() if substring else None
+        if substring:
+            # С pg_trgm ILIKE тоже обслуживается триграммными индексами;
+            # % и _ в запросе ищутся как обычные символы
+            search_term = "%" + re.sub(r"([\\%_])", r"\\\1", substring) + "%"
+            conditions.append(Apartment.title.ilike(search_term, escape="\\"))
+            conditions.append(Apartment.address.ilike(search_term, escape="\\"))
+
+        return or_(*conditions)
+
+    @staticmethod
+    def _build_rank(query: str):
+        """Выражение релевантности: ранг полнотекстового поиска плюс похожесть по триграммам."""
+        rank = func.ts_rank_cd(Apartment.search_vector, func.websearch_to_tsquery(SEARCH_CONFIG, query))
+
+        if SearchService.trigram_enabled:
+            rank = rank + func.greatest(
+                func.word_similarity(query, Apartment.address),
+                func.word_similarity(query, Apartment.title)
+            )
+
+        return rank
+
+    @staticmethod
+    def search_ids(db: Session, query: str, active_only: bool = True,
+                   limit: int = MAX_SEARCH_RESULTS) -> List[int]:
+        """
+        Возвращает ID квартир, подходящих под запрос, по убыванию релевантности.
+
+        Args:
+            db: Сессия базы данных
+            query: Поисковый запрос
+            active_only: Только активные квартиры
+            limit: Максимальное количество результатов
+
+        Returns:
+            List[int]: ID квартир
+        """
+        normalized = SearchService.normalize_query(query)
+        if not normalized:
+            return []
+
+        cache_key = SearchService._get_cache_key(normalized, active_only)
+        if cache_key:
+            cached_ids = cache_service.get(cache_key)
+            if cached_ids is not None:
+                return cached_ids
+
+        try:
+            if SearchService.trigram_enabled:
+                db.execute(text(
+                    f"SET LOCAL pg_trgm.word_similarity_threshold = {TRIGRAM_WORD_SIMILARITY_THRESHOLD}"
+                ))
+
+            search_query = db.query(Apartment.id).filter(SearchService.build_condition(normalized))
+            if active_only:
+                search_query = search_query.filter(Apartment.active.is_(True))
+
+            apartment_ids = [row[0] for row in search_query.order_by(
+                SearchService._build_rank(normalized).desc(),
+                Apartment.id
+            ).limit(limit).all()]
+        except Exception as e:
+            logger.error(f"Error searching apartments: {e}")
+            raise
+
+        if cache_key:
+            cache_service.set(cache_key, apartment_ids, expire=CACHE_EXPIRATION["apartments_search"])
+
+        return apartment_ids
+
+    @staticmethod
+    def _get_cache_key(normalized_query: str, active_only: bool) -> Optional[str]:
+        """Ключ кеша результатов поиска (None, если версия каталога недоступна)."""
+        version = catalog_index.remote_version()
+        if version is None:
+            return None
+
+        return CACHE_KEYS["apartments_search"].format(
+            version=version,
+            active_only=int(active_only),
+            query_hash=hashlib.sha1(normalized_query.encode("utf-8")).hexdigest()
+        )
@@ -0,0 +1,232 @@
+"""
+Кодек значений кеша: сериализация, необязательное сжатие и версия схемы.
+
+Вместо pickle значения сериализуются в переносимый формат (orjson для
+JSON-подобных данных, msgpack для внутренних структур), а большие значения
+сжимаются (zstd или lz4). pydantic-модели сохраняются как данные
+(model_dump), а не как объекты: изменение класса не ломает чтение.
+
+Формат значения: маркер + id сериализатора (1 байт) + id сжатия (1 байт) +
+версия схемы (2 байта) + данные. Сериализатор и сжатие читаются из заголовка,
+поэтому смена настроек кодека не делает старые значения нечитаемыми.
+Значения в другом формате (например, pickle прежних версий) и другой версии
+схемы считаются промахом: после изменения кешируемых структур достаточно
+повысить CACHE_SCHEMA_VERSION, и старые записи перестроятся по мере чтения.
+"""
+
+import datetime
+import decimal
+import struct
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import lz4.frame
+import msgpack
+import orjson
+import zstandard
+from pydantic import BaseModel
+
+from src.config.settings import settings
+
+# Маркер формата (не пересекается с маркерами src.utils.cached_response и get_or_compute)
+CODEC_MARKER = b"c"
+
+_HEADER = struct.Struct(">ccH")  # сериализатор, сжатие, версия схемы
+HEADER_SIZE = len(CODEC_MARKER) + _HEADER.size
+
+# Сериализаторы
+SERIALIZER_ORJSON = "orjson"
+SERIALIZER_MSGPACK = "msgpack"
+
+# Сжатие
+COMPRESSION_NONE = "none"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_LZ4 = "lz4"
+
+ZSTD_LEVEL = 3
+LZ4_LEVEL = 0
+
+
+class CacheCodecError(ValueError):
+    """Значение в другом формате или другой версии схемы."""
+
+
+def _to_primitive(value: Any) -> Any:
+    """Приводит значения, которые сериализаторы не поддерживают, к простым типам."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Type is not serializable for cache: {type(value).__name__}")
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    # Нестроковые ключи (например, ID) сохраняются строками
+    return orjson.dumps(value, default=_to_primitive, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_to_primitive, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+# Имя -> (id в заголовке, сериализация, десериализация)
+_SERIALIZERS: Dict[str, Tuple[bytes, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    SERIALIZER_ORJSON: (b"o", _orjson_dumps, orjson.loads),
+    SERIALIZER_MSGPACK: (b"m", _msgpack_dumps, _msgpack_loads),
+}
+
+# Контексты zstd не потокобезопасны - свои в каждом потоке
+_zstd = threading.local()
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    decompressor = getattr(_zstd, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(data)
+
+
+def _lz4_compress(data: bytes) -> bytes:
+    return lz4.frame.compress(data, compression_level=LZ4_LEVEL)
+
+
+# Имя -> (id в заголовке, сжатие, распаковка)
+_COMPRESSIONS: Dict[str, Tuple[bytes, Optional[Callable[[bytes], bytes]], Optional[Callable[[bytes], bytes]]]] = {
+    COMPRESSION_NONE: (b"n", None, None),
+    COMPRESSION_ZSTD: (b"z", _zstd_compress, _zstd_decompress),
+    COMPRESSION_LZ4: (b"l", _lz4_compress, lz4.frame.decompress),
+}
+
+_SERIALIZERS_BY_ID = {serializer_id: loads for serializer_id, _, loads in _SERIALIZERS.values()}
+_DECOMPRESSORS_BY_ID = {compression_id: decompress for compression_id, _, decompress in _COMPRESSIONS.values()}
+
+
+def is_encoded(value: Optional[bytes]) -> bool:
+    """
+    Закодировано ли значение кодеком кеша.
+
+    Args:
+        value: Значение из кеша
+
+    Returns:
+        bool: True, если значение в формате кодека
+    """
+    return bool(value) and len(value) >= HEADER_SIZE and value[:1] == CODEC_MARKER
+
+
+class CacheCodec:
+    """
+    Кодек значений кеша с выбранным сериализатором и сжатием.
+    """
+
+    def __init__(self, serializer: str = SERIALIZER_MSGPACK, compression: str = COMPRESSION_NONE,
+                 compress_min_size: int = 1024, schema_version: int = 1):
+        """
+        Args:
+            serializer: Сериализатор (orjson или msgpack)
+            compression: Сжатие значений от compress_min_size байт (none, zstd или lz4)
+            compress_min_size: Минимальный размер сериализованного значения для сжатия
+            schema_version: Версия схемы кешируемых структур
+        """
+        if serializer not in _SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_size = compress_min_size
+        self.schema_version = schema_version
+
+        self._serializer_id, self._dumps, _ = _SERIALIZERS[serializer]
+        self._compression_id, self._compress, _ = _COMPRESSIONS[compression]
+        self._no_compression_id = _COMPRESSIONS[COMPRESSION_NONE][0]
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Кодирует значение для записи в кеш.
+
+        Args:
+            value: Значение (данные, pydantic-модели сохраняются как данные)
+
+        Returns:
+            bytes: Закодированное значение
+        """
+        payload = self._dumps(value)
+
+        compression_id = self._no_compression_id
+        if self._compress is not None and len(payload) >= self.compress_min_size:
+            compressed = self._compress(payload)
+            # Несжимаемые данные сохраняются как есть
+            if len(compressed) < len(payload):
+                payload, compression_id = compressed, self._compression_id
+
+        return CODEC_MARKER + _HEADER.pack(self._serializer_id, compression_id, self.schema_version) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Декодирует значение из кеша.
+
+        Args:
+            data: Закодированное значение
+
+        Returns:
+            Any: Значение
+
+        Raises:
+            CacheCodecError: Если значение в другом формате или другой версии схемы
+        """
+        if not is_encoded(data):
+            raise CacheCodecError("Value is not encoded with cache codec")
+
+        serializer_id, compression_id, schema_version = _HEADER.unpack_from(data, len(CODEC_MARKER))
+        if schema_version != self.schema_version:
+            raise CacheCodecError(f"Cache schema version {schema_version} != {self.schema_version}")
+
+        loads = _SERIALIZERS_BY_ID.get(serializer_id)
+        if loads is None or compression_id not in _DECOMPRESSORS_BY_ID:
+            raise CacheCodecError("Unknown cache serializer or compression")
+
+        payload = memoryview(data)[HEADER_SIZE:]
+        decompress = _DECOMPRESSORS_BY_ID[compression_id]
+        if decompress is not None:
+            payload = decompress(payload)
+        return loads(payload)
+
+
+def codec_from_settings(serializer: str) -> CacheCodec:
+    """
+    Кодек с заданным сериализатором и сжатием/версией схемы из настроек.
+
+    Args:
+        serializer: Сериализатор
+
+    Returns:
+        CacheCodec: Кодек
+    """
+    return CacheCodec(
+        serializer=serializer,
+        compression=settings.CACHE_CODEC_COMPRESSION,
+        compress_min_size=settings.CACHE_CODEC_COMPRESS_MIN_SIZE,
+        schema_version=settings.CACHE_SCHEMA_VERSION
+    )
+
+
+# Кодек CacheService по умолчанию (msgpack)
+default_codec = codec_from_settings(SERIALIZER_MSGPACK)
@@ -0,0 +1,134 @@
+"""
+Готовые JSON-ответы для кеша.
+
+Ответ сериализуется и сжимается один раз при записи в кеш, а при попадании
+отдается как есть: без десериализации, без построения pydantic-модели,
+без повторной валидации по response_model и без повторного сжатия
+в GZipMiddleware (он пропускает ответы с уже заданным Content-Encoding).
+
+Формат хранимого значения: один байт кодировки + 8 байт версии ресурса,
+с которой был построен ответ (0 - неизвестна, см. src.utils.http_cache) +
+тело ответа.
+"""
+
+import gzip
+import struct
+from typing import Dict, Optional
+
+from fastapi import Response
+from pydantic import BaseModel
+
+# Ответы меньше этого размера не сжимаются (как и в GZipMiddleware в main)
+GZIP_MIN_SIZE = 1000
+GZIP_COMPRESS_LEVEL = 9
+
+ENCODING_IDENTITY = b"j"
+ENCODING_GZIP = b"z"
+
+_VERSION = struct.Struct(">Q")
+_HEADER_SIZE = 1 + _VERSION.size
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def pack_json(body: bytes, version: Optional[int] = None) -> bytes:
+    """
+    Упаковывает JSON-байты для хранения в кеше (со сжатием больших ответов).
+
+    Args:
+        body: JSON-байты ответа
+        version: Версия ресурса, с которой построен ответ
+
+    Returns:
+        bytes: Значение для кеша
+    """
+    header = _VERSION.pack(version or 0)
+    if len(body) >= GZIP_MIN_SIZE:
+        # mtime=0 - одинаковое содержимое дает одинаковые байты
+        return ENCODING_GZIP + header + gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+    return ENCODING_IDENTITY + header + body
+
+
+def pack_model(model: BaseModel, version: Optional[int] = None) -> bytes:
+    """
+    Сериализует модель ответа и упаковывает ее для хранения в кеше.
+
+    Args:
+        model: Модель ответа
+        version: Версия ресурса, с которой построен ответ
+
+    Returns:
+        bytes: Значение для кеша
+    """
+    return pack_json(model.model_dump_json().encode("utf-8"), version)
+
+
+def is_packed(value: Optional[bytes]) -> bool:
+    """
+    Является ли значение кеша упакованным ответом (а не, например, записью
+    в старом формате, оставшейся до обновления).
+
+    Args:
+        value: Значение из кеша
+
+    Returns:
+        bool: Можно ли отдать значение через json_response
+    """
+    return bool(value) and len(value) >= _HEADER_SIZE and value[:1] in (ENCODING_IDENTITY, ENCODING_GZIP)
+
+
+def packed_version(packed: bytes) -> Optional[int]:
+    """
+    Версия ресурса, с которой был построен ответ.
+
+    Args:
+        packed: Значение из кеша
+
+    Returns:
+        Optional[int]: Версия или None, если неизвестна
+    """
+    version, = _VERSION.unpack_from(packed, 1)
+    return version or None
+
+
+def unpack_json(packed: bytes) -> bytes:
+    """
+    Возвращает несжатые JSON-байты из значения кеша.
+
+    Args:
+        packed: Значение из кеша
+
+    Returns:
+        bytes: JSON-байты ответа
+    """
+    encoding, body = packed[:1], packed[_HEADER_SIZE:]
+    if encoding == ENCODING_GZIP:
+        return gzip.decompress(body)
+    return body
+
+
+def json_response(packed: bytes, accept_encoding: Optional[str] = None, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Ответ из значения кеша (сжатое тело отдается как есть, если клиент принимает gzip).
+
+    Args:
+        packed: Значение из кеша
+        accept_encoding: Заголовок Accept-Encoding запроса
+        status_code: HTTP-статус
+        headers: Дополнительные заголовки
+
+    Returns:
+        Response: Готовый ответ
+    """
+    encoding, body = packed[:1], packed[_HEADER_SIZE:]
+    headers = dict(headers or {})
+
+    if encoding == ENCODING_GZIP:
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in (accept_encoding or ""):
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body = gzip.decompress(body)
+
+    return Response(content=body, status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
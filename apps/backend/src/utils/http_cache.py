@@ -0,0 +1,165 @@
+"""
+HTTP-кеширование публичных ответов: ETag, Last-Modified, 304 и Cache-Control.
+
+Валидаторы строятся по версии ресурса (время последнего изменения в мс,
+см. src.services.resource_version_service) или по updated_at записи.
+ETag слабый (W/), так как одно и то же содержимое отдается и сжатым,
+и несжатым.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from src.config.settings import settings
+from src.utils.cached_response import json_response, packed_version
+
+
+def version_etag(prefix: str, version: int) -> str:
+    """
+    ETag по версии ресурса.
+
+    Args:
+        prefix: Тип ресурса (например, "catalog" или "apartment-5")
+        version: Версия ресурса
+
+    Returns:
+        str: Значение заголовка ETag
+    """
+    return f'W/"{prefix}-{version}"'
+
+
+def version_last_modified(version: int) -> datetime:
+    """
+    Время последнего изменения по версии ресурса.
+
+    Args:
+        version: Версия ресурса (время в мс)
+
+    Returns:
+        datetime: Время последнего изменения (UTC)
+    """
+    return datetime.fromtimestamp(version / 1000, tz=timezone.utc)
+
+
+def cache_headers(
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+        max_age: Optional[int] = None,
+        stale_while_revalidate: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Заголовки кеширования публичного ответа.
+
+    Args:
+        etag: Значение ETag
+        last_modified: Время последнего изменения
+        max_age: Сколько секунд ответ свежий (по умолчанию из настроек)
+        stale_while_revalidate: Сколько секунд можно отдавать устаревший ответ,
+            обновляя его в фоне (по умолчанию из настроек)
+
+    Returns:
+        Dict[str, str]: Заголовки
+    """
+    if max_age is None:
+        max_age = settings.HTTP_CACHE_MAX_AGE
+    if stale_while_revalidate is None:
+        stale_while_revalidate = settings.HTTP_CACHE_STALE_WHILE_REVALIDATE
+
+    headers = {
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+    }
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Слабое сравнение ETag со списком из If-None-Match."""
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque_tag:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: Optional[str] = None,
+                    last_modified: Optional[datetime] = None) -> bool:
+    """
+    Не изменился ли ресурс с момента, известного клиенту.
+
+    If-None-Match имеет приоритет; If-Modified-Since учитывается, только если
+    If-None-Match не передан (RFC 9110, 13.2.2).
+
+    Args:
+        request: Запрос
+        etag: Текущий ETag ресурса
+        last_modified: Текущее время последнего изменения ресурса
+
+    Returns:
+        bool: Можно ли ответить 304
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return bool(etag) and _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Точность заголовка - секунда
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """
+    Ответ 304 с заголовками кеширования.
+
+    Args:
+        headers: Заголовки кеширования (ETag, Last-Modified, Cache-Control)
+
+    Returns:
+        Response: Ответ 304 без тела
+    """
+    return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+
+
+def versioned_response(request: Request, packed: bytes, etag_prefix: str) -> Response:
+    """
+    Ответ из значения кеша с валидаторами по версии, с которой он был построен
+    (или 304, если у клиента та же версия).
+
+    Args:
+        request: Запрос
+        packed: Значение из кеша (см. src.utils.cached_response)
+        etag_prefix: Тип ресурса для ETag
+
+    Returns:
+        Response: Ответ 200 или 304
+    """
+    version = packed_version(packed)
+    if version is None:
+        return json_response(packed, request.headers.get("accept-encoding"), headers=cache_headers())
+
+    etag, last_modified = version_etag(etag_prefix, version), version_last_modified(version)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    return json_response(packed, request.headers.get("accept-encoding"), headers=headers)
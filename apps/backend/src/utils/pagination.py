@@ -0,0 +1,95 @@
+"""
+Курсоры для keyset-пагинации.
+
+Курсор - непрозрачная для клиента строка (base64 от JSON), содержащая значение
+поля сортировки и id граничной записи, а также направление перехода.
+Курсор привязан к полю и порядку сортировки, с которыми он был выдан.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+
+class InvalidCursorError(ValueError):
+    """Некорректный или не подходящий к запросу курсор."""
+
+
+def _serialize_value(value: Any) -> Any:
+    """Приводит значение поля сортировки к JSON-совместимому виду."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(sort: str, order: str, value: Any, item_id: int, direction: str = CURSOR_NEXT) -> str:
+    """
+    Формирует курсор для граничной записи страницы.
+
+    Args:
+        sort: Поле сортировки
+        order: Порядок сортировки (asc/desc)
+        value: Значение поля сортировки у граничной записи
+        item_id: ID граничной записи (для стабильного порядка)
+        direction: Направление перехода (next/prev)
+
+    Returns:
+        str: Курсор
+    """
+    payload = {
+        "s": sort,
+        "o": order,
+        "v": _serialize_value(value),
+        "id": item_id,
+        "d": direction
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Dict[str, Any]:
+    """
+    Разбирает курсор и проверяет, что он выдан для той же сортировки.
+
+    Args:
+        cursor: Курсор
+        sort: Ожидаемое поле сортировки
+        order: Ожидаемый порядок сортировки
+
+    Returns:
+        Dict[str, Any]: {"value": значение поля, "id": id записи, "direction": next/prev}
+
+    Raises:
+        InvalidCursorError: Если курсор поврежден или выдан для другой сортировки
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursorError("Некорректный курсор") from e
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("id"), int):
+        raise InvalidCursorError("Некорректный курсор")
+
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise InvalidCursorError("Курсор выдан для другой сортировки")
+
+    direction = payload.get("d", CURSOR_NEXT)
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        raise InvalidCursorError("Некорректное направление курсора")
+
+    value: Optional[Any] = payload.get("v")
+    if sort == "created_at":
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Некорректный курсор") from e
+    elif not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise InvalidCursorError("Некорректный курсор")
+
+    return {"value": value, "id": payload["id"], "direction": direction}
@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+
+def test_list_search_matches_punctuated_substring(client: TestClient, owner_headers: dict):
+    """Тест поиска подстроки адреса с пунктуацией (полнотекстовый поиск ее не находит)."""
+    response = client.get("/admin/api/v1/apartments", params={"search": " стовая, 2 "}, headers=owner_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    # Адрес квартиры 2 - "ул. Тестовая, 2"
+    assert [item["title"] for item in data["items"]] == ["Тестовая квартира 2"]
+    assert data["total"] == 1
+
+
+def test_list_search_treats_wildcards_literally(client: TestClient, owner_headers: dict):
+    """Тест поиска подстроки с символами шаблона ILIKE."""
+    # Без экранирования "_" совпал бы с запятой в "ул. Тестовая, 1"
+    response = client.get("/admin/api/v1/apartments", params={"search": "стовая_%"}, headers=owner_headers)
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
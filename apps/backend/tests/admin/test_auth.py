@@ -0,0 +1,77 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.models.auth import User
+from src.models.event_log import EventLog, EventType
+from src.services.auth import create_tokens_for_user
+
+
+def test_login(client: TestClient, db: Session, owner: User, owner_credentials: dict):
+    """Тест входа администратора."""
+    response = client.post("/admin/api/v1/auth/login", json=owner_credentials)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    assert data["access_token"]
+    assert data["refresh_token"]
+
+    # Время входа и событие входа сохранены асинхронной сессией
+    db.expire_all()
+    assert db.get(User, owner.id).last_login is not None
+    assert db.query(EventLog).filter_by(event_type=EventType.USER_LOGIN, user_id=owner.id).count() == 1
+
+
+def test_login_wrong_password(client: TestClient, owner: User, owner_credentials: dict):
+    """Тест входа с неверным паролем."""
+    response = client.post(
+        "/admin/api/v1/auth/login", json={**owner_credentials, "password": "wrong-password"}
+    )
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Неверный email или пароль"
+
+
+def test_login_inactive_user(client: TestClient, db: Session, owner: User, owner_credentials: dict):
+    """Тест входа отключенного пользователя."""
+    owner.is_active = False
+    db.commit()
+
+    response = client.post("/admin/api/v1/auth/login", json=owner_credentials)
+
+    assert response.status_code == 403
+
+
+def test_current_user_from_token(client: TestClient, owner_headers: dict):
+    """Тест доступа к защищенному эндпоинту по токену (get_current_user)."""
+    response = client.get("/admin/api/v1/bookings", headers=owner_headers)
+
+    assert response.status_code == 200
+
+
+def test_current_user_requires_token(client: TestClient):
+    """Тест доступа к защищенному эндпоинту без токена."""
+    response = client.get("/admin/api/v1/bookings")
+
+    assert response.status_code == 401
+
+
+def test_current_user_not_found(client: TestClient):
+    """Тест токена несуществующего пользователя."""
+    access_token, _ = create_tokens_for_user(user_id=999999, email="ghost@example.com", role="owner")
+
+    response = client.get("/admin/api/v1/bookings", headers={"Authorization": f"Bearer {access_token}"})
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Пользователь не найден"
+
+
+def test_current_user_inactive(client: TestClient, db: Session, owner: User, owner_headers: dict):
+    """Тест токена отключенного пользователя."""
+    owner.is_active = False
+    db.commit()
+
+    response = client.get("/admin/api/v1/bookings", headers=owner_headers)
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Аккаунт отключен"
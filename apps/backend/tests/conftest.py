@@ -4,15 +4,18 @@ import pytest
 from typing import Generator, Any
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 # Добавляем путь к корневой директории проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.db.database import Base, get_db
+from src.db.database import Base, get_async_db, get_db
 from src.main import app
 from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.auth import User
+from src.services.auth import hash_password
 
 # Создаем базу данных в памяти для тестирования
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -23,6 +26,11 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронные эндпоинты работают с той же тестовой БД через aiosqlite
+# (без пула: у каждого TestClient свой цикл событий)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Тестовые данные для квартир
 test_apartments = [
     {
@@ -85,6 +93,8 @@ def db():
 
         # Добавляем тестовые данные
         for apartment_data in test_apartments:
+            # Копия: данные нужны каждому тесту
+            apartment_data = dict(apartment_data)
             photos_data = apartment_data.pop("photos")
             apartment = Apartment(**apartment_data)
 
@@ -123,7 +133,12 @@ def client(db: Any) -> Generator:
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     with TestClient(app) as c:
         yield c
@@ -132,6 +147,38 @@ def client(db: Any) -> Generator:
     app.dependency_overrides = {}
 
 
+@pytest.fixture
+def owner_credentials() -> dict:
+    """
+    Учетные данные тестового владельца.
+    """
+    return {"email": "owner@example.com", "password": "owner-password"}
+
+
+@pytest.fixture
+def owner(db: Any, owner_credentials: dict) -> User:
+    """
+    Создает активного пользователя с ролью владельца.
+    """
+    user = User(
+        email=owner_credentials["email"],
+        password_hash=hash_password(owner_credentials["password"]),
+        role="owner"
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def owner_headers(client: TestClient, owner: User, owner_credentials: dict) -> dict:
+    """
+    Заголовки авторизации владельца (токен получается через вход).
+    """
+    response = client.post("/admin/api/v1/auth/login", json=owner_credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
 @pytest.fixture
 def minio_mock(monkeypatch):
     """
@@ -1,7 +1,13 @@
+import asyncio
+
 import pytest
+from unittest.mock import AsyncMock
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from src.models.apartment import Apartment
+from src.services.materialization_service import materialization_service
+
 
 def test_get_apartments(client: TestClient):
     """Тест получения списка квартир."""
@@ -138,6 +144,54 @@ def test_get_apartment_detail(client: TestClient, db: Session):
     assert data["active"] == apartment.active
 
 
+def test_get_apartment_detail_cache_miss(client: TestClient, db: Session, monkeypatch):
+    """Тест детальной информации о квартире при отсутствии готового ответа."""
+    monkeypatch.setattr(materialization_service, "get_apartment_detail", AsyncMock(return_value=None))
+    apartment = db.query(Apartment).filter_by(title="Тестовая квартира 1").first()
+
+    response = client.get(f"/apartments/{apartment.id}")
+
+    # Ответ строится асинхронной сессией (квартира и фотографии по порядку)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == apartment.id
+    assert data["title"] == apartment.title
+    assert data["photos"] == ["https://example.com/test1_1.jpg", "https://example.com/test1_2.jpg"]
+    assert response.headers["etag"]
+
+
+def test_get_apartment_detail_cache_miss_not_found(client: TestClient, monkeypatch):
+    """Тест промаха детальной информации о несуществующей квартире."""
+    monkeypatch.setattr(materialization_service, "get_apartment_detail", AsyncMock(return_value=None))
+
+    response = client.get("/apartments/999999")
+
+    assert response.status_code == 404
+
+
+def test_get_apartments_batch_cache_miss(client: TestClient, db: Session, monkeypatch):
+    """Тест получения нескольких квартир при отсутствии готовых ответов."""
+    monkeypatch.setattr(
+        materialization_service, "get_apartment_details", AsyncMock(side_effect=lambda ids: [None] * len(ids))
+    )
+    active = db.query(Apartment).filter_by(active=True).order_by(Apartment.id).all()
+    inactive = db.query(Apartment).filter_by(active=False).first()
+    ids = [active[1].id, 999999, inactive.id, active[0].id]
+
+    response = client.get(f"/apartments/batch?ids={','.join(map(str, ids))}")
+
+    # Отсутствующие и неактивные квартиры пропускаются, порядок - как в запросе
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [active[1].id, active[0].id]
+
+
+def test_get_apartments_batch_invalid_ids(client: TestClient):
+    """Тест получения нескольких квартир с некорректным списком ID."""
+    response = client.get("/apartments/batch?ids=1,abc")
+
+    assert response.status_code == 400
+
+
 def test_get_apartment_not_found(client: TestClient):
     """Тест получения несуществующей квартиры."""
     # Выполняем GET-запрос с несуществующим ID
@@ -163,3 +217,47 @@ def test_get_inactive_apartment(client: TestClient, db: Session):
 
     # Проверяем статус-код (должен быть 404, т.к. неактивные квартиры не должны быть доступны)
     assert response.status_code == 404
+
+
+@pytest.mark.parametrize("url", ["/apartments?rooms=1", "/apartments/facets"])
+def test_catalog_index_not_modified_until_catalog_changes(client: TestClient, monkeypatch, url):
+    """Тест условных запросов к индексу каталога после изменения каталога другим процессом."""
+    from src.services.catalog_index import catalog_index
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    # Без изменений каталога - 304
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Другой процесс повысил версию каталога в Redis: процесс, получающий
+    # только условные запросы, должен заметить это и отдать новые данные
+    remote_version = (catalog_index.version or 0) + 1
+    monkeypatch.setattr(catalog_index, "version_check_interval", 0)
+    monkeypatch.setattr(catalog_index, "remote_version", lambda: remote_version)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("url", ["/apartments?rooms=1", "/apartments/facets"])
+def test_catalog_index_snapshot_is_checked_off_the_event_loop(client: TestClient, monkeypatch, url):
+    """Тест: проверка и пересборка снимка индекса каталога не блокируют цикл событий."""
+    from src.services.catalog_index import catalog_index
+
+    snapshot = catalog_index.snapshot
+    loops = []
+
+    def checked_snapshot(db):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return snapshot(db)
+
+    monkeypatch.setattr(catalog_index, "snapshot", checked_snapshot)
+
+    assert client.get(url).status_code == 200
+    assert loops == [None]
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.api.bookings import router as bookings_router
+from src.models import Apartment, Booking, SystemSettings
+
+
+@pytest.fixture
+def booking_client(client: TestClient):
+    """
+    Клиент публичного роутера бронирований.
+
+    Префикс роутера уже содержит /api, а приложение отрезает root_path=/api
+    до сопоставления маршрутов, поэтому роутер подключается к отдельному
+    приложению с теми же переопределенными зависимостями.
+    """
+    booking_app = FastAPI()
+    booking_app.include_router(bookings_router)
+    booking_app.dependency_overrides = client.app.dependency_overrides
+
+    with TestClient(booking_app) as c:
+        yield c
+
+
+@pytest.fixture
+def booking_enabled(db: Session):
+    """
+    Включает бронирование глобально.
+    """
+    db.add(SystemSettings(booking_globally_enabled=True))
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def notification_mock(monkeypatch):
+    """
+    Мок уведомления администратора о новом бронировании.
+    """
+    notification = AsyncMock()
+    monkeypatch.setattr("src.api.bookings.send_booking_created_notification", notification)
+    return notification
+
+
+def booking_payload(apartment_id: int, days_from_now: int = 10, nights: int = 3) -> dict:
+    check_in = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=days_from_now)
+    return {
+        "apartment_id": apartment_id,
+        "client_name": "Иван Петров",
+        "client_phone": "+79990000000",
+        "client_email": "ivan@example.com",
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=nights)).isoformat(),
+        "guests_count": 2
+    }
+
+
+def test_create_booking(booking_client: TestClient, db: Session, booking_enabled, notification_mock):
+    """Тест создания бронирования."""
+    apartment = db.query(Apartment).filter_by(active=True).first()
+
+    response = booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id))
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["apartment_id"] == apartment.id
+    assert data["status"] == "pending"
+    assert db.query(Booking).filter_by(id=data["id"]).count() == 1
+    notification_mock.assert_awaited_once()
+
+
+def test_create_booking_overlapping_dates(booking_client: TestClient, db: Session, booking_enabled):
+    """Тест создания бронирования на занятые даты."""
+    apartment = db.query(Apartment).filter_by(active=True).first()
+
+    assert booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id)).status_code == 201
+    response = booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id, days_from_now=11))
+
+    assert response.status_code == 400
+
+
+def test_create_booking_inactive_apartment(booking_client: TestClient, db: Session, booking_enabled):
+    """Тест бронирования неактивной квартиры."""
+    apartment = db.query(Apartment).filter_by(active=False).first()
+
+    response = booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id))
+
+    assert response.status_code == 404
+
+
+def test_create_booking_globally_disabled(booking_client: TestClient, db: Session):
+    """Тест бронирования при глобально отключенном бронировании."""
+    apartment = db.query(Apartment).filter_by(active=True).first()
+
+    response = booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id))
+
+    assert response.status_code == 403
+
+
+def test_list_bookings(client: TestClient, booking_client: TestClient, db: Session, booking_enabled,
+                       owner_headers: dict):
+    """Тест получения списка бронирований в админ-панели."""
+    apartment = db.query(Apartment).filter_by(active=True).first()
+    created = booking_client.post("/api/v1/bookings", json=booking_payload(apartment.id)).json()
+
+    response = client.get("/admin/api/v1/bookings", headers=owner_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert [item["id"] for item in data["items"]] == [created["id"]]
+
+    # Фильтр по квартире считается запросом к БД
+    response = client.get(f"/admin/api/v1/bookings?apartment_id={apartment.id + 1000}", headers=owner_headers)
+    assert response.json() == {"total": 0, "items": []}
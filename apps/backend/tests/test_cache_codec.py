@@ -0,0 +1,64 @@
+import pickle
+from datetime import datetime
+
+import pytest
+
+from src.schemas.apartment import ApartmentInList
+from src.utils.cache_codec import (
+    COMPRESSION_LZ4, COMPRESSION_NONE, COMPRESSION_ZSTD, HEADER_SIZE, SERIALIZER_MSGPACK, SERIALIZER_ORJSON,
+    CacheCodec, CacheCodecError, is_encoded
+)
+
+
+@pytest.mark.parametrize("serializer", [SERIALIZER_ORJSON, SERIALIZER_MSGPACK])
+@pytest.mark.parametrize("compression", [COMPRESSION_NONE, COMPRESSION_ZSTD, COMPRESSION_LZ4])
+def test_roundtrip(serializer, compression):
+    codec = CacheCodec(serializer, compression, compress_min_size=0)
+    value = {"ids": list(range(200)), "title": "Квартира", "price": 2500.5, "active": True, "cover": None}
+
+    encoded = codec.encode(value)
+
+    assert is_encoded(encoded)
+    assert codec.decode(encoded) == value
+
+
+def test_models_and_dates_are_stored_as_data():
+    codec = CacheCodec(SERIALIZER_MSGPACK)
+    item = ApartmentInList(id=1, title="Квартира", price_rub=2500, rooms=2, floor=3, area_m2=40.0)
+
+    decoded = codec.decode(codec.encode({"item": item, "at": datetime(2024, 3, 1, 12, 0)}))
+
+    assert decoded["item"] == item.model_dump(mode="json")
+    assert decoded["at"] == "2024-03-01T12:00:00"
+
+
+def test_compression_only_above_threshold():
+    codec = CacheCodec(SERIALIZER_ORJSON, COMPRESSION_ZSTD, compress_min_size=100)
+    small, large = codec.encode([1, 2, 3]), codec.encode(list(range(1000)))
+
+    assert small[2:3] == b"n"
+    assert large[2:3] == b"z"
+    assert len(large) < len(CacheCodec(SERIALIZER_ORJSON).encode(list(range(1000))))
+
+
+def test_decode_uses_format_from_header():
+    # Смена настроек кодека не делает прежние значения нечитаемыми
+    encoded = CacheCodec(SERIALIZER_ORJSON, COMPRESSION_LZ4, compress_min_size=0).encode(list(range(500)))
+    assert CacheCodec(SERIALIZER_MSGPACK).decode(encoded) == list(range(500))
+
+
+def test_other_schema_version_and_legacy_pickle_are_rejected():
+    encoded = CacheCodec(schema_version=1).encode([1, 2])
+
+    with pytest.raises(CacheCodecError):
+        CacheCodec(schema_version=2).decode(encoded)
+    with pytest.raises(CacheCodecError):
+        CacheCodec().decode(pickle.dumps([1, 2]))
+    assert len(encoded) > HEADER_SIZE
+
+
+def test_unknown_codec_options():
+    with pytest.raises(ValueError):
+        CacheCodec(serializer="pickle")
+    with pytest.raises(ValueError):
+        CacheCodec(compression="brotli")
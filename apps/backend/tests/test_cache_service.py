@@ -0,0 +1,311 @@
+import asyncio
+import pickle
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.config.redis_settings import CACHE_KEYS
+from src.services import cache_service as cache_module
+from src.services.cache_service import CacheService, _unwrap_fresh, _wrap_fresh
+from src.services.local_cache import LocalCache
+
+
+@pytest.fixture
+def service():
+    service = CacheService()
+    service.redis_client = MagicMock()
+    service.redis_client.lock.return_value.acquire.return_value = True
+    with patch.object(cache_module, "invalidation_listener", MagicMock(connected=False)), \
+            patch.object(cache_module.settings, "L1_CACHE_ENABLED", False):
+        yield service
+
+
+def test_fresh_envelope():
+    assert _unwrap_fresh(_wrap_fresh(b"value", 123)) == (b"value", 123)
+    # Значения в другом формате считаются промахом
+    assert _unwrap_fresh(b"jvalue") is None
+    assert _unwrap_fresh(None) is None
+
+
+def test_fresh_value_is_returned_without_compute(service):
+    service.redis_client.get.return_value = _wrap_fresh(b"cached", cache_module._now_ms() + 60000)
+    compute = MagicMock()
+
+    assert service.get_or_compute("key", compute, db=None, ttl=60) == b"cached"
+    compute.assert_not_called()
+
+
+def test_stale_value_is_served_while_refreshing(service):
+    service.redis_client.get.return_value = _wrap_fresh(b"stale", cache_module._now_ms() - 1)
+    compute = MagicMock(return_value=b"fresh")
+
+    with patch.object(cache_module, "_refresh_executor") as executor:
+        assert service.get_or_compute("key", compute, db=None, ttl=60, stale_ttl=30) == b"stale"
+
+    executor.submit.assert_called_once()
+    compute.assert_not_called()
+
+
+def test_miss_is_computed_under_lock_and_stored(service):
+    service.redis_client.get.return_value = None
+    compute = MagicMock(return_value=b"value")
+
+    assert service.get_or_compute("key", compute, db="db", ttl=60, stale_ttl=30) == b"value"
+
+    compute.assert_called_once_with("db")
+    key, stored = service.redis_client.set.call_args.args
+    assert key == "key"
+    assert _unwrap_fresh(stored)[0] == b"value"
+    assert service.redis_client.set.call_args.kwargs["ex"] == 90
+    service.redis_client.lock.return_value.release.assert_called_once()
+    service.redis_client.publish.assert_called_once()
+
+
+class _FakeRedis:
+    """Redis на словаре: команды, которые нужны записи с проверкой поколения."""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = MagicMock()
+        self.lock.return_value.acquire.return_value = True
+        self.publish = MagicMock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        redis, ops = self, []
+        pipeline = MagicMock()
+        pipeline.incr.side_effect = lambda key: ops.append(lambda: redis.incr(key))
+        pipeline.delete.side_effect = lambda key: ops.append(lambda: redis.delete(key))
+        pipeline.execute.side_effect = lambda: [op() for op in ops]
+        return pipeline
+
+    def register_script(self, script):
+        assert script == cache_module._SET_IF_GENERATION_SCRIPT
+
+        def run(keys, args):
+            if int(self.data.get(keys[1], 0)) != int(args[2]):
+                return 0
+            self.data[keys[0]] = args[0]
+            return 1
+        return run
+
+
+def test_value_computed_before_invalidation_is_not_stored(service):
+    service.redis_client = _FakeRedis()
+    values = iter([b"old", b"new"])
+
+    def compute(db):
+        # Настройки изменены и кеш инвалидирован, пока значение строилось по старым данным
+        value = next(values)
+        if value == b"old":
+            service.invalidate_keys("public_settings", ["settings"])
+        return value
+
+    assert service.get_or_compute("settings", compute, db=None, ttl=60, namespace="public_settings") == b"old"
+    assert "settings" not in service.redis_client.data
+
+    # Следующий промах строит и сохраняет актуальное значение
+    assert service.get_or_compute("settings", compute, db=None, ttl=60, namespace="public_settings") == b"new"
+    assert _unwrap_fresh(service.redis_client.data["settings"])[0] == b"new"
+
+
+def test_background_refresh_started_before_invalidation_is_not_stored(service):
+    service.redis_client = _FakeRedis()
+    service.redis_client.data["settings"] = _wrap_fresh(b"stale", cache_module._now_ms() - 1)
+
+    def compute(db):
+        service.invalidate_keys("public_settings", ["settings"])
+        return b"old"
+
+    with patch.object(cache_module, "SessionLocal"):
+        service._refresh("settings", compute, 60, 30, MagicMock(), namespace="public_settings")
+
+    assert "settings" not in service.redis_client.data
+    # Инвалидация рассылается, а неудачная запись - нет
+    channels = [c.args[0] for c in service.redis_client.publish.call_args_list]
+    assert channels.count(CACHE_KEYS["l1_invalidation_channel"]) == 1
+
+
+def test_invalidate_keys_bumps_generation_and_deletes_atomically(service):
+    pipeline = service.redis_client.pipeline.return_value
+
+    service.invalidate_keys("public_settings", ["settings"])
+
+    service.redis_client.pipeline.assert_called_once_with(transaction=True)
+    pipeline.incr.assert_called_once_with("cache:generation:public_settings")
+    pipeline.delete.assert_called_once_with("settings")
+    pipeline.execute.assert_called_once()
+    service.redis_client.publish.assert_called_once()
+
+
+def _async_redis(acquired=True):
+    client = MagicMock()
+    lock = client.lock.return_value
+    lock.acquire = AsyncMock(return_value=acquired)
+    lock.release = AsyncMock()
+    client.publish = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_misses_are_computed_once(service):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"value"
+
+    client = _async_redis()
+    with patch.object(cache_module, "get_async_redis", return_value=client):
+        results = await asyncio.gather(*(service.acompute_once("key", compute) for _ in range(5)))
+
+    assert results == [b"value"] * 5
+    assert calls == [1]
+    client.lock.return_value.release.assert_awaited_once()
+    client.publish.assert_awaited_once_with(CACHE_KEYS["cache_computed_channel"], "key")
+
+
+@pytest.mark.asyncio
+async def test_async_miss_waits_for_other_process(service):
+    compute = AsyncMock(return_value=b"own")
+    cache_module.invalidation_listener.register_waiter.return_value = threading.Event()
+
+    # Блокировку держит другой процесс: значение появляется в кеше
+    with patch.object(cache_module, "get_async_redis", return_value=_async_redis(acquired=False)), \
+            patch.object(cache_module, "WAIT_POLL_INTERVAL", 0.001), \
+            patch.object(service, "aget_raw", AsyncMock(side_effect=[None, b"legacy", b"value"])):
+        assert await service.acompute_once("key", compute, accept=lambda value: value == b"value") == b"value"
+
+    compute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_async_miss_is_computed_when_other_process_fails(service):
+    compute = AsyncMock(return_value=b"own")
+    waiter = threading.Event()
+    waiter.set()
+    cache_module.invalidation_listener.register_waiter.return_value = waiter
+
+    # Уведомление пришло, а значения нет: вычисляем сами
+    with patch.object(cache_module, "get_async_redis", return_value=_async_redis(acquired=False)), \
+            patch.object(service, "aget_raw", AsyncMock(return_value=None)):
+        assert await service.acompute_once("key", compute) == b"own"
+
+    compute.assert_awaited_once()
+
+
+def test_list_keys_embed_namespace_generation(service):
+    service.redis_client.get.return_value = b"7"
+    assert service.get_apartments_cache_key(2, 12, "price_rub", "asc") == "apartments:list:g7:2:12:price_rub:asc"
+    assert service.get_apartments_cursor_cache_key(12, "price_rub", "asc") == \
+        "apartments:list:g7:cursor:12:price_rub:asc:0:first"
+
+    # Поколения еще нет - оно создается со значением 0
+    service.redis_client.get.return_value = None
+    assert service.get_generation("apartments_list") == 0
+    service.redis_client.set.assert_called_once_with("cache:generation:apartments_list", 0, nx=True)
+
+
+def test_invalidation_bursts_are_coalesced(service):
+    invalidator = cache_module._CoalescingInvalidator(window=60)
+    calls = []
+
+    with patch("src.services.cache_service.threading.Timer") as timer:
+        for _ in range(5):
+            invalidator.submit("apartments_list", lambda: calls.append(1))
+        # Первая инвалидация выполняется сразу, остальные - одна при закрытии окна
+        assert len(calls) == 1
+        timer.assert_called_once()
+
+        invalidator._close_window("apartments_list")
+        assert len(calls) == 2
+
+    with patch("src.services.cache_service.threading.Timer"):
+        invalidator.submit("apartments_list", lambda: calls.append(1))
+    assert len(calls) == 3
+
+
+def test_pending_invalidations_are_flushed_before_exit(service):
+    invalidator = cache_module._CoalescingInvalidator(window=60)
+    calls = []
+
+    with patch("src.services.cache_service.threading.Timer"):
+        invalidator.submit("apartments_list", lambda: calls.append("list"))
+        invalidator.submit("apartments_list", lambda: calls.append("list"))
+        invalidator.submit("settings", lambda: calls.append("settings"))
+
+    # Отложена только повторная инвалидация списка
+    invalidator.flush()
+    assert calls == ["list", "settings", "list"]
+
+    # Окна закрыты: таймер ничего не повторяет, следующая инвалидация - сразу
+    invalidator._close_window("apartments_list")
+    assert len(calls) == 3
+    with patch("src.services.cache_service.threading.Timer"):
+        invalidator.submit("apartments_list", lambda: calls.append("list"))
+    assert len(calls) == 4
+
+
+def test_invalidate_apartments_cache_does_not_scan_keys(service):
+    with patch.object(cache_module, "_invalidator", cache_module._CoalescingInvalidator(window=0)):
+        service.invalidate_apartments_cache()
+
+    service.redis_client.incr.assert_called_once_with("cache:generation:apartments_list")
+    service.redis_client.keys.assert_not_called()
+    service.redis_client.scan_iter.assert_not_called()
+
+
+def test_delete_many_uses_one_pipeline_and_one_broadcast(service):
+    pipeline = service.redis_client.pipeline.return_value
+    pipeline.execute.return_value = [1, 0, 1]
+
+    assert service.delete_many(["a", "b", "c"]) == 2
+    assert [c.args for c in pipeline.delete.call_args_list] == [("a",), ("b",), ("c",)]
+    service.redis_client.delete.assert_not_called()
+    service.redis_client.publish.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_async_mget_reads_only_l1_misses(service):
+    async_client = MagicMock()
+    async_client.mget = AsyncMock(return_value=[b"2", None])
+
+    with patch.object(cache_module, "get_async_redis", return_value=async_client), \
+            patch.object(service, "_l1_available", return_value=True), \
+            patch.object(cache_module, "local_cache", LocalCache(max_bytes=1000, ttl=60)) as l1:
+        l1.put("a", b"1", l1.generation)
+        assert await service.amget_raw(["a", "b", "c"]) == [b"1", b"2", None]
+        async_client.mget.assert_awaited_once_with(["b", "c"])
+        # Прочитанное из Redis сохраняется в L1
+        assert l1.get("b") == b"2"
+
+
+def test_values_use_codec_and_legacy_entries_are_misses(service):
+    service.redis_client.set.return_value = True
+    assert service.set("search", [3, 1, 2], expire=60)
+    stored = service.redis_client.set.call_args.args[1]
+    assert stored.startswith(b"c")
+
+    service.redis_client.get.return_value = stored
+    assert service.get("search") == [3, 1, 2]
+
+    # Значения прежнего формата (pickle) не читаются и считаются промахом
+    service.redis_client.get.return_value = pickle.dumps([3, 1, 2])
+    assert service.get("search") is None
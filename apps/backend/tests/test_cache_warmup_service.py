@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock, patch
+
+from src.services.cache_warmup_service import CacheWarmupService
+
+
+def test_warm_registers_default_variants_and_warms_top_viewed():
+    service = CacheWarmupService()
+    service.redis_client = MagicMock()
+    service.redis_client.zrevrange.return_value = [b"5", b"2"]
+
+    with patch("src.services.cache_warmup_service.materialization_service") as materialization, \
+            patch("src.services.cache_warmup_service.settings") as settings:
+        settings.CACHE_WARMUP_PAGE_SIZES = [12]
+        settings.CACHE_WARMUP_TOP_APARTMENTS = 2
+        settings.CACHE_WARMUP_BATCH_SIZE = 50
+        materialization.warm.return_value = (4, 2)
+
+        assert service.warm(MagicMock()) == (4, 2)
+
+    variants = set(materialization.register_catalog_variants.call_args.args[0])
+    assert variants == {
+        (12, "created_at", "asc"), (12, "created_at", "desc"), (12, "price_rub", "asc"), (12, "price_rub", "desc")
+    }
+    assert materialization.warm.call_args.args[1] == [5, 2]
+    service.redis_client.zrevrange.assert_called_once_with("stats:apartment-views", 0, 1)
+
+
+def test_warmup_is_scheduled_once():
+    service = CacheWarmupService()
+    service.redis_client = MagicMock()
+    service.redis_client.set.side_effect = [True, None]
+
+    assert service.try_schedule(delay=10)
+    assert not service.try_schedule(delay=10)
+    assert service.redis_client.set.call_args.kwargs == {"nx": True, "ex": 70}
+
+
+def test_warm_after_catalog_change_skips_catalog_pages():
+    service = CacheWarmupService()
+    service.redis_client = MagicMock()
+    service.redis_client.zrevrange.return_value = [b"5"]
+
+    with patch("src.services.cache_warmup_service.materialization_service") as materialization:
+        materialization.warm.return_value = (0, 1)
+
+        assert service.warm(MagicMock(), catalog=False) == (0, 1)
+
+    assert materialization.warm.call_args.kwargs["catalog"] is False
+
+
+def test_view_counter_is_trimmed_to_top_apartments():
+    service = CacheWarmupService()
+    service.redis_client = MagicMock()
+    service.redis_client.zremrangebyrank.return_value = 3
+
+    assert service.trim_views(1000) == 3
+    service.redis_client.zremrangebyrank.assert_called_once_with("stats:apartment-views", 0, -1001)
+
+
+def test_deleted_apartments_are_removed_from_view_counter():
+    service = CacheWarmupService()
+    service.redis_client = MagicMock()
+
+    service.forget([])
+    service.redis_client.zrem.assert_not_called()
+
+    service.forget([7, 9])
+    service.redis_client.zrem.assert_called_once_with("stats:apartment-views", 7, 9)
@@ -0,0 +1,61 @@
+import gzip
+import json
+import pickle
+
+from src.schemas.apartment import PaginatedApartments, ApartmentInList
+from src.utils.cached_response import (
+    GZIP_MIN_SIZE, is_packed, json_response, pack_json, pack_model, packed_version, unpack_json
+)
+
+
+def make_page(items_count):
+    return PaginatedApartments(
+        page=1,
+        page_size=items_count,
+        total=items_count,
+        items=[
+            ApartmentInList(id=i, title=f"Квартира {i}", price_rub=1000, rooms=1, floor=1, area_m2=30.0)
+            for i in range(items_count)
+        ]
+    )
+
+
+def test_small_body_is_stored_uncompressed():
+    packed = pack_json(b'{"a":1}')
+    assert unpack_json(packed) == b'{"a":1}'
+
+    response = json_response(packed, "gzip")
+    assert response.body == b'{"a":1}'
+    assert "content-encoding" not in response.headers
+
+
+def test_large_body_is_served_precompressed():
+    page = make_page(30)
+    packed = pack_model(page)
+    body = page.model_dump_json().encode("utf-8")
+    assert len(body) >= GZIP_MIN_SIZE
+    assert unpack_json(packed) == body
+
+    response = json_response(packed, "gzip, br")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(gzip.decompress(response.body))["total"] == 30
+
+    # Клиенту без поддержки gzip отдается несжатое тело
+    response = json_response(packed, None)
+    assert response.body == body
+    assert "content-encoding" not in response.headers
+
+
+def test_is_packed_rejects_legacy_values():
+    assert is_packed(pack_json(b"{}"))
+    assert not is_packed(pickle.dumps({"a": 1}))
+    assert not is_packed(None)
+    assert not is_packed(b"j")
+
+
+def test_packed_version():
+    assert packed_version(pack_json(b"{}")) is None
+    assert packed_version(pack_json(b"{}", 1700000000123)) == 1700000000123
+    assert packed_version(pack_model(make_page(30), 42)) == 42
@@ -0,0 +1,133 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from src.services.catalog_index import CatalogIndex, CatalogFilters, _Snapshot
+
+
+def make_row(apartment_id, price, rooms, floor=1, area=40.0, booking_enabled=True, hours=0):
+    return SimpleNamespace(
+        apartment_id=apartment_id,
+        title=f"Квартира {apartment_id}",
+        price_rub=price,
+        rooms=rooms,
+        floor=floor,
+        area_m2=area,
+        booking_enabled=booking_enabled,
+        cover_variants={},
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(hours=hours)
+    )
+
+
+@pytest.fixture
+def snapshot():
+    return _Snapshot([
+        make_row(1, 1500, 1, floor=2, area=30.0, hours=0),
+        make_row(2, 2500, 2, floor=5, area=55.0, hours=1, booking_enabled=False),
+        make_row(3, 1500, 1, floor=3, area=32.0, hours=1),
+        make_row(4, 4000, 3, floor=9, area=80.0, hours=2),
+        make_row(5, 2000, 2, floor=1, area=50.0, hours=3),
+    ])
+
+
+def ids(rows):
+    return [row.apartment_id for row in rows]
+
+
+def test_query_sorts_with_id_tiebreak(snapshot):
+    rows, total = CatalogIndex.query_snapshot(snapshot, CatalogFilters(), "price_rub", "asc", 0, 10)
+    assert ids(rows) == [1, 3, 5, 2, 4]
+    assert total == 5
+
+    rows, _ = CatalogIndex.query_snapshot(snapshot, CatalogFilters(), "created_at", "desc", 0, 10)
+    assert ids(rows) == [5, 4, 3, 2, 1]
+
+
+def test_query_filters_and_pages(snapshot):
+    filters = CatalogFilters(rooms=[1, 2], price_max=2500, booking_enabled=True)
+
+    rows, total = CatalogIndex.query_snapshot(snapshot, filters, "price_rub", "desc", 0, 2)
+    assert ids(rows) == [5, 3]
+    assert total == 3
+
+    rows, _ = CatalogIndex.query_snapshot(snapshot, filters, "price_rub", "desc", 2, 2)
+    assert ids(rows) == [1]
+
+
+def test_query_range_filters(snapshot):
+    filters = CatalogFilters(area_min=31, area_max=60, floor_min=2)
+    rows, total = CatalogIndex.query_snapshot(snapshot, filters, "created_at", "asc", 0, 10)
+    assert ids(rows) == [2, 3]
+    assert total == 2
+
+
+def test_facets_exclude_own_filter(snapshot):
+    facets = CatalogIndex.facets_snapshot(snapshot, CatalogFilters(rooms=[1]), price_bins=2)
+
+    assert facets["total"] == 2
+    # Фасет по комнатам не учитывает фильтр по комнатам
+    assert facets["rooms"] == {1: 2, 2: 2, 3: 1}
+    assert facets["booking_enabled"] == {"true": 2, "false": 0}
+    assert sum(facets["price_histogram"]["counts"]) == 2
+    assert facets["price_min"] == 1500
+    assert facets["area_min"] == 30.0
+
+
+def test_load_replaces_snapshot():
+    index = CatalogIndex()
+    index.load([make_row(1, 1000, 1), make_row(2, 2000, 2)], version=3)
+
+    rows, total = CatalogIndex.query_snapshot(index._snapshot, CatalogFilters(rooms=[2]), "price_rub", "asc", 0, 10)
+    assert ids(rows) == [2]
+    assert total == 1
+    assert index._version == 3
+
+
+def test_snapshot_picks_up_remote_version():
+    index = CatalogIndex(version_check_interval=0)
+    index.redis_client = MagicMock()
+    index.load([make_row(1, 1000, 1)], version=3)
+
+    # Другой процесс изменил каталог
+    index.redis_client.get.return_value = "4"
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [make_row(1, 1200, 1)]
+
+    snapshot = index.snapshot(db)
+    assert snapshot.version == 4
+    assert snapshot.rows[0].price_rub == 1200
+
+
+def test_snapshot_version_follows_local_patch():
+    index = CatalogIndex(version_check_interval=60)
+    index.redis_client = MagicMock()
+    index.load([make_row(1, 1000, 1), make_row(2, 2000, 2)], version=3)
+
+    index.redis_client.incr.return_value = 4
+    index.notify_changed([2])
+    # Версия процесса уже новая, а снимок - еще нет
+    assert index.version == 4
+    assert index._snapshot.version == 3
+
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [make_row(2, 2100, 2)]
+    snapshot = index.snapshot(db)
+    assert snapshot.version == 4
+    assert {row.apartment_id: row.price_rub for row in snapshot.rows} == {1: 1000, 2: 2100}
+
+
+def test_search_ids_filter_and_relevance_sort(snapshot):
+    # ID 9 отсутствует в снимке и пропускается
+    filters = CatalogFilters(apartment_ids=[4, 9, 1, 5], price_max=3000)
+
+    rows, total = CatalogIndex.query_snapshot(snapshot, filters, "relevance", "desc", 0, 10)
+    assert ids(rows) == [1, 5]
+    assert total == 2
+
+    rows, _ = CatalogIndex.query_snapshot(snapshot, filters, "relevance", "asc", 0, 10)
+    assert ids(rows) == [5, 1]
+
+    rows, _ = CatalogIndex.query_snapshot(snapshot, filters, "price_rub", "asc", 0, 10)
+    assert ids(rows) == [1, 5]
+
+    assert CatalogIndex.facets_snapshot(snapshot, filters)["total"] == 2
@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+
+from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.catalog import ApartmentCatalogCard
+
+
+def _card(db: Session, apartment_id: int) -> ApartmentCatalogCard:
+    db.expire_all()
+    return db.get(ApartmentCatalogCard, apartment_id)
+
+
+def test_cards_of_both_apartments_refresh_when_photo_moves(db: Session):
+    """Тест: перенос фотографии обновляет карточки прежней и новой квартиры."""
+    source = db.query(Apartment).filter_by(title="Тестовая квартира 1").one()
+    target = db.query(Apartment).filter_by(title="Тестовая квартира 2").one()
+    source_photos = _card(db, source.id).photos_count
+    target_photos = _card(db, target.id).photos_count
+
+    photo = db.query(ApartmentPhoto).filter_by(apartment_id=source.id).order_by(ApartmentPhoto.sort_order).first()
+    moved_url = photo.url
+    photo.apartment_id = target.id
+    photo.sort_order = 100
+    db.commit()
+
+    # Перенесена обложка прежней квартиры: обложкой становится следующая фотография
+    source_card = _card(db, source.id)
+    assert source_card.photos_count == source_photos - 1
+    assert moved_url not in source_card.cover_variants.values()
+    assert _card(db, target.id).photos_count == target_photos + 1
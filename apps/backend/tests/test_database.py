@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from src.db import database
+from src.db.database import LazySession
+from src.db.pool import InstrumentedQueuePool
+
+
+def test_lazy_session_created_on_first_use():
+    factory = MagicMock()
+    db = LazySession(factory)
+    assert not db.created
+    db.close()  # Несозданная сессия не создается ради закрытия
+    factory.assert_not_called()
+
+    db.query("apartments")
+    db.commit()
+    assert db.created
+    factory.assert_called_once_with()
+    factory.return_value.query.assert_called_once_with("apartments")
+
+    db.close()
+    factory.return_value.close.assert_called_once_with()
+
+
+def test_get_db_closes_only_used_sessions(monkeypatch):
+    factory = MagicMock()
+    monkeypatch.setattr(database, "SessionLocal", factory)
+
+    async def run(use_session: bool):
+        generator = database.get_db()
+        db = await generator.__anext__()
+        if use_session:
+            db.execute("SELECT 1")
+        await generator.aclose()
+
+    asyncio.run(run(False))
+    factory.assert_not_called()
+
+    asyncio.run(run(True))
+    factory.assert_called_once_with()
+    factory.return_value.close.assert_called_once_with()
+
+
+def test_statement_timeout_for_path_uses_longest_prefix(monkeypatch):
+    monkeypatch.setattr(
+        database.settings, "DB_STATEMENT_TIMEOUTS", {"/admin": 15000, "/admin/api/v1/events": 3000}
+    )
+
+    assert database.statement_timeout_for_path("/admin/api/v1/events/1") == 3000
+    assert database.statement_timeout_for_path("/admin/api/v1/bookings") == 15000
+    assert database.statement_timeout_for_path("/apartments") is None
+
+
+def test_route_statement_timeout_skips_connect_default(monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_STATEMENT_TIMEOUT_MS", 30000)
+    connection = MagicMock()
+    connection.dialect.name = "postgresql"
+
+    database.set_statement_timeout(30000)
+    database._set_route_statement_timeout(None, None, connection)
+    connection.exec_driver_sql.assert_not_called()
+
+    database.set_statement_timeout(5000)
+    database._set_route_statement_timeout(None, None, connection)
+    connection.exec_driver_sql.assert_called_once_with("SET LOCAL statement_timeout = 5000")
+    database.set_statement_timeout(None)
+
+
+def test_instrumented_pool_counts_overflow_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+
+    first = engine.connect()
+    second = engine.connect()  # Сверх pool_size
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = engine.pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["overflow_connections"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 2
+    assert stats["max_connections"] == 2
+
+    second.close()
+    first.close()
+    with engine.connect():
+        pass
+    stats = engine.pool.stats()
+    assert stats["checkouts"] == 3
+    assert stats["overflow_connections"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_instrumented_pool_measures_waits(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5
+    )
+
+    # Новое соединение открывается без ожидания пула
+    held = engine.connect()
+    assert engine.pool.stats()["waits"] == 0
+
+    def release():
+        time.sleep(0.1)
+        held.close()
+
+    thread = threading.Thread(target=release)
+    thread.start()
+    with engine.connect():  # Ждет, пока соединение вернется в пул
+        pass
+    thread.join()
+
+    stats = engine.pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["waits"] == 1
+    assert stats["avg_wait_ms"] >= 50
+    assert stats["overflow_connections"] == 0
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.models.apartment import Apartment, ApartmentPhoto
+from src.models.settings import SystemSettings
+from src.services import domain_events
+from src.services.domain_events import (
+    ACTION_CREATED, ACTION_DELETED, ACTION_UPDATED, ENTITY_APARTMENT, ENTITY_PHOTO, ENTITY_SETTINGS,
+    DomainEvent
+)
+
+
+def _session(new=(), dirty=(), deleted=(), modified=True):
+    session = MagicMock()
+    session.new, session.dirty, session.deleted = list(new), list(dirty), list(deleted)
+    session.is_modified.return_value = modified
+    return session
+
+
+def test_collect_events():
+    session = _session(
+        new=[ApartmentPhoto(id=10, apartment_id=1)],
+        dirty=[Apartment(id=2)],
+        deleted=[SystemSettings(id=1)]
+    )
+
+    assert domain_events.collect_events(session) == [
+        DomainEvent(ENTITY_PHOTO, 10, ACTION_CREATED, 1),
+        DomainEvent(ENTITY_APARTMENT, 2, ACTION_UPDATED, 2),
+        DomainEvent(ENTITY_SETTINGS, 1, ACTION_DELETED),
+    ]
+
+
+def test_collect_events_skips_unmodified_objects():
+    session = _session(dirty=[Apartment(id=2)], modified=False)
+    assert domain_events.collect_events(session) == []
+
+
+def test_affected_apartment_ids_and_entities():
+    events = [
+        DomainEvent(ENTITY_PHOTO, 10, ACTION_CREATED, 1),
+        DomainEvent(ENTITY_APARTMENT, 2, ACTION_UPDATED, 2),
+        DomainEvent(ENTITY_SETTINGS, 1, ACTION_UPDATED),
+    ]
+    assert domain_events.affected_apartment_ids(events) == {1, 2}
+    assert domain_events.has_entity(events, ENTITY_SETTINGS)
+    assert not domain_events.has_entity(events[:2], ENTITY_SETTINGS)
+
+
+def test_deleted_ids():
+    events = [
+        DomainEvent(ENTITY_APARTMENT, 2, ACTION_DELETED, 2),
+        DomainEvent(ENTITY_APARTMENT, 3, ACTION_UPDATED, 3),
+        DomainEvent(ENTITY_PHOTO, 10, ACTION_DELETED, 3),
+    ]
+    assert domain_events.deleted_ids(events, ENTITY_APARTMENT) == {2}
+
+
+def test_publish_isolates_handler_errors_and_dedupes():
+    received = []
+    failing = MagicMock(side_effect=RuntimeError("boom"))
+    event = DomainEvent(ENTITY_APARTMENT, 1, ACTION_UPDATED, 1)
+
+    with patch.object(domain_events, "_handlers", [failing, received.append]):
+        domain_events.publish([event, event])
+        domain_events.publish([])
+
+    failing.assert_called_once_with([event])
+    assert received == [[event]]
+
+
+@pytest.mark.asyncio
+async def test_blocking_handler_runs_off_the_event_loop():
+    event = DomainEvent(ENTITY_SETTINGS, 1, ACTION_UPDATED)
+    done = threading.Event()
+    threads = []
+
+    def handler(events):
+        threads.append(threading.get_ident())
+        done.set()
+
+    with patch.object(domain_events, "_handlers", []):
+        assert domain_events.subscribe_blocking(handler) is handler
+        # Commit асинхронной сессии: обработчик уходит в пул потоков
+        domain_events.publish([event])
+        assert await asyncio.get_running_loop().run_in_executor(None, done.wait, 5)
+
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_blocking_handler_runs_synchronously_outside_event_loop():
+    received = []
+
+    with patch.object(domain_events, "_handlers", []):
+        domain_events.subscribe_blocking(received.append)
+        domain_events.publish([DomainEvent(ENTITY_SETTINGS, 1, ACTION_UPDATED)])
+
+    assert received == [[DomainEvent(ENTITY_SETTINGS, 1, ACTION_UPDATED)]]
+
+
+def test_commit_subscribers_are_registered_off_the_event_loop():
+    from src.services.catalog_index import _notify_catalog_index
+    from src.services.resource_version_service import _touch_resource_versions
+
+    blocking = {getattr(handler, "__wrapped__", None) for handler in domain_events._handlers}
+    assert {_notify_catalog_index, _touch_resource_versions} <= blocking
+    assert not {_notify_catalog_index, _touch_resource_versions} & set(domain_events._handlers)
+
+
+@pytest.mark.asyncio
+async def test_counter_deltas_are_applied_off_the_event_loop():
+    from src.services import counter_service as counter_module
+
+    done = threading.Event()
+    threads = []
+
+    def apply(deltas, removed_fields):
+        threads.append(threading.get_ident())
+        done.set()
+
+    session = MagicMock(info={counter_module._SESSION_DELTAS_KEY: {("key", None): 1}})
+    with patch.object(counter_module.counter_service, "apply", apply):
+        counter_module._apply_counter_deltas(session)
+        assert await asyncio.get_running_loop().run_in_executor(None, done.wait, 5)
+
+    assert threads and threads[0] != threading.get_ident()
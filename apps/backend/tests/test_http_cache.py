@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from src.utils.cached_response import pack_json
+from src.utils.http_cache import (
+    cache_headers, is_not_modified, version_etag, version_last_modified, versioned_response
+)
+
+VERSION = 1700000000123
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/apartments",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    })
+
+
+def test_version_validators():
+    assert version_etag("catalog", VERSION) == f'W/"catalog-{VERSION}"'
+    assert version_last_modified(VERSION) == datetime.fromtimestamp(1700000000.123, tz=timezone.utc)
+
+    headers = cache_headers(version_etag("catalog", VERSION), version_last_modified(VERSION), 10, 60)
+    assert headers["Cache-Control"] == "public, max-age=10, stale-while-revalidate=60"
+    assert headers["Last-Modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+
+
+def test_if_none_match():
+    etag = version_etag("catalog", VERSION)
+    assert is_not_modified(make_request({"If-None-Match": etag}), etag)
+    # Слабое сравнение и список значений
+    assert is_not_modified(make_request({"If-None-Match": f'"other", "catalog-{VERSION}"'}), etag)
+    assert is_not_modified(make_request({"If-None-Match": "*"}), etag)
+    assert not is_not_modified(make_request({"If-None-Match": 'W/"catalog-1"'}), etag)
+    assert not is_not_modified(make_request(), etag)
+
+
+def test_if_modified_since():
+    last_modified = version_last_modified(VERSION)
+    assert is_not_modified(make_request({"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}), None, last_modified)
+    assert not is_not_modified(make_request({"If-Modified-Since": "Tue, 14 Nov 2023 22:13:19 GMT"}), None, last_modified)
+    assert not is_not_modified(make_request({"If-Modified-Since": "not a date"}), None, last_modified)
+
+    # If-None-Match имеет приоритет
+    request = make_request({"If-None-Match": 'W/"catalog-1"', "If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"})
+    assert not is_not_modified(request, version_etag("catalog", VERSION), last_modified)
+
+
+def test_versioned_response():
+    packed = pack_json(b'{"a":1}', VERSION)
+
+    response = versioned_response(make_request(), packed, "catalog")
+    assert response.status_code == 200
+    assert response.body == b'{"a":1}'
+    assert response.headers["etag"] == f'W/"catalog-{VERSION}"'
+
+    response = versioned_response(make_request({"If-None-Match": response.headers["etag"]}), packed, "catalog")
+    assert response.status_code == 304
+    assert response.body == b""
+
+    # Без версии валидаторов нет
+    response = versioned_response(make_request({"If-None-Match": "*"}), pack_json(b"{}"), "catalog")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
@@ -5,6 +5,12 @@ import os
 from src.services.image_service import ImageService, ImageSize, ImageFormat
 
 
+def _jpeg_bytes(width, height):
+    img_bytes = io.BytesIO()
+    Image.new('RGB', (width, height), color='red').save(img_bytes, format='JPEG')
+    return img_bytes.getvalue()
+
+
 # Создаем тестовое изображение в памяти
 @pytest.fixture
 def test_image():
@@ -119,4 +125,93 @@ def test_generate_image_filename():
     # Генерируем имя файла с вариантом WebP
     filename = ImageService.generate_image_filename(123, "medium_webp")
     assert filename.startswith("apartments/123/")
-    assert filename.endswith("_medium_webp.webp")
\ No newline at end of file
+    assert filename.endswith("_medium_webp.webp")
+
+def test_decode_image_applies_exif_orientation():
+    """Тест однократного декодирования: поворот по EXIF и приведение к RGB."""
+    img = Image.new('RGBA', (400, 200), color=(0, 0, 255, 0))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Повернуть на 90°
+    img_bytes = io.BytesIO()
+    img.convert('RGB').save(img_bytes, format='JPEG', exif=exif.tobytes())
+
+    decoded, info = ImageService.decode_image(img_bytes.getvalue())
+
+    assert decoded.size == (200, 400)
+    assert decoded.mode == 'RGB'
+    assert info["width"] == 400 and info["height"] == 200
+    assert 0x0112 not in decoded.getexif()
+
+
+def test_resize_cascade_matches_size_limits(test_image):
+    """Тест каскадного построения размеров от одного декодированного изображения."""
+    img, _ = ImageService.decode_image(test_image)
+
+    resized = ImageService.resize_cascade(img, set(ImageSize))
+
+    assert resized[ImageSize.ORIGINAL].size == (1920, 1440)
+    assert resized[ImageSize.LARGE].width == 1200
+    assert resized[ImageSize.MEDIUM].width == 800
+    assert resized[ImageSize.SMALL].width == 400
+    assert resized[ImageSize.THUMBNAIL].size == (150, 150)
+
+    # Строятся только запрошенные размеры
+    assert set(ImageService.resize_cascade(img, {ImageSize.SMALL})) == {ImageSize.SMALL}
+
+
+def test_decode_image_reduces_large_sources_near_target():
+    """Тест уменьшенного декодирования: JPEG декодируется не в полном разрешении."""
+    img_bytes = io.BytesIO()
+    Image.new('RGB', (8000, 6000), color='green').save(img_bytes, format='JPEG')
+
+    decoded, info = ImageService.decode_image(img_bytes.getvalue(), max_dimension=1920)
+
+    assert (info["width"], info["height"]) == (8000, 6000)
+    assert decoded.size == (2000, 1500)  # 1/4 разрешения, не меньше 1920 по большей стороне
+
+
+def test_decode_image_rejects_sources_over_budget(monkeypatch):
+    """Тест бюджета декодирования: изображения сверх лимита памяти отклоняются."""
+    from src.config.settings import settings
+    monkeypatch.setattr(settings, "IMAGE_DECODE_MEMORY_MB", 1)
+
+    img_bytes = io.BytesIO()
+    Image.new('RGB', (1000, 1000), color='green').save(img_bytes, format='PNG')
+
+    with pytest.raises(ValueError):
+        ImageService.decode_image(img_bytes.getvalue())
+
+
+def test_validate_image_content_applies_decode_budget(monkeypatch):
+    """Тест валидации загрузки: бюджет памяти воркера (JPEG - с уменьшенным декодированием)."""
+    from src.config.settings import settings
+    from src.services.image_format_service import ImageFormatService
+    monkeypatch.setattr(settings, "IMAGE_DECODE_MEMORY_MB", 5)
+    monkeypatch.setattr(settings, "MAX_IMAGE_DIMENSION", 500)
+
+    png_bytes = io.BytesIO()
+    Image.new('RGB', (2000, 1500), color='green').save(png_bytes, format='PNG')
+
+    # PNG декодируется в полном разрешении (~11 МБ), JPEG - в 1/4 (~0.7 МБ)
+    assert not ImageFormatService.validate_image_content(png_bytes.getvalue())
+    assert ImageFormatService.validate_image_content(_jpeg_bytes(2000, 1500))
+
+
+def test_encode_variants_encodes_every_variant():
+    """Тест параллельного кодирования: все варианты, в том числе совпадающих размеров."""
+    # Небольшое изображение: original, large, medium и small - один объект
+    img, _ = ImageService.decode_image(_jpeg_bytes(300, 200))
+    variants = [
+        (ImageSize.THUMBNAIL, ImageFormat.WEBP),
+        (ImageSize.SMALL, ImageFormat.WEBP),
+        (ImageSize.SMALL, ImageFormat.JPEG),
+        (ImageSize.MEDIUM, ImageFormat.JPEG),
+        (ImageSize.ORIGINAL, ImageFormat.JPEG)
+    ]
+    resized = ImageService.resize_cascade(img, {size for size, _ in variants})
+
+    result = ImageService.encode_variants(resized, variants)
+
+    assert list(result) == ["thumbnail_webp", "small_webp", "small_jpeg", "medium_jpeg", "original_jpeg"]
+    assert Image.open(io.BytesIO(result["small_webp"])).format == "WEBP"
+    assert Image.open(io.BytesIO(result["medium_jpeg"])).format == "JPEG"
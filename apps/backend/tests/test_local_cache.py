@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services import local_cache as local_cache_module
+from src.services.local_cache import InvalidationListener, LocalCache, encode_invalidation
+
+
+def test_lru_eviction_by_size():
+    cache = LocalCache(max_bytes=25, ttl=60)
+    generation = cache.generation
+    assert cache.put("a", b"1" * 9, generation)
+    assert cache.put("b", b"2" * 9, generation)
+    assert cache.get("a") == b"1" * 9  # "a" становится самым свежим
+    assert cache.put("c", b"3" * 9, generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 25
+
+    # Значение больше лимита не сохраняется
+    assert not cache.put("d", b"4" * 40, cache.generation)
+
+
+def test_ttl():
+    cache = LocalCache(max_bytes=1000, ttl=5)
+    with patch("src.services.local_cache.time.monotonic", return_value=100.0):
+        cache.put("a", b"1", cache.generation)
+    with patch("src.services.local_cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == b"1"
+    with patch("src.services.local_cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_value_read_before_invalidation_is_not_stored():
+    cache = LocalCache(max_bytes=1000, ttl=60)
+    generation = cache.generation
+    cache.invalidate(keys=["a"])
+    assert not cache.put("a", b"old", generation)
+    assert cache.get("a") is None
+
+
+def test_invalidation_message():
+    cache = LocalCache(max_bytes=1000, ttl=60)
+    for key in ("apartments:list:1", "apartments:list:2", "apartments:detail:1", "apartments:detail:2"):
+        cache.put(key, b"x", cache.generation)
+
+    listener = InvalidationListener(cache, "channel", "computed")
+    listener._apply(encode_invalidation(keys=["apartments:detail:1"], patterns=["apartments:list:*"]).encode())
+
+    assert [key for key in ("apartments:list:1", "apartments:list:2", "apartments:detail:1", "apartments:detail:2")
+            if cache.get(key)] == ["apartments:detail:2"]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_computed_notification_wakes_waiters():
+    listener = InvalidationListener(LocalCache(max_bytes=1000, ttl=60), "channel", "computed")
+    waiter = listener.register_waiter("key")
+    other = listener.register_waiter("other")
+
+    listener.notify("key")
+    assert waiter.is_set()
+    assert not other.is_set()
+
+    listener.unregister_waiter("key", waiter)
+    listener.unregister_waiter("other", other)
+    assert listener._waiters == {}
+
+
+class _SilentPubSub:
+    """Подписка, которая после подтверждения подписки больше ничего не получает."""
+
+    def __init__(self):
+        self.messages = [{"type": "subscribe", "channel": b"channel", "data": 1},
+                         {"type": "subscribe", "channel": b"computed", "data": 2}]
+        self.ping = MagicMock()
+
+    def get_message(self, timeout):
+        return self.messages.pop(0) if self.messages else None
+
+
+def test_listener_detects_silent_connection_loss():
+    cache = LocalCache(max_bytes=1000, ttl=60)
+    listener = InvalidationListener(cache, "channel", "computed")
+    pubsub = _SilentPubSub()
+    clock = iter(range(100))
+
+    with patch.object(local_cache_module.settings, "L1_INVALIDATION_HEALTH_CHECK_INTERVAL", 1.0), \
+            patch.object(local_cache_module.time, "monotonic", lambda: float(next(clock))), \
+            pytest.raises(ConnectionError):
+        listener._listen(pubsub)
+
+    # Подписка была активна, PING отправлялся, пока Redis не перестал отвечать
+    assert listener.connected
+    assert pubsub.ping.call_count >= 2
+
+
+def test_listener_bypasses_l1_while_reconnecting():
+    cache = LocalCache(max_bytes=1000, ttl=60)
+    cache.put("a", b"1", cache.generation)
+    listener = InvalidationListener(cache, "channel", "computed")
+    listener.connected = True
+    client = MagicMock()
+    client.pubsub.return_value.subscribe.side_effect = ConnectionError("down")
+
+    with patch.object(local_cache_module, "create_pubsub_redis", return_value=client), \
+            patch.object(local_cache_module.time, "sleep", side_effect=StopIteration), \
+            pytest.raises(StopIteration):
+        listener._run()
+
+    assert not listener.connected
+    assert cache.get("a") is None
+    client.pubsub.return_value.close.assert_called_once()
@@ -0,0 +1,128 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+
+from src.services.materialization_service import MaterializationService
+from src.utils.cached_response import unpack_json
+
+
+def make_card(apartment_id):
+    return SimpleNamespace(
+        apartment_id=apartment_id,
+        title=f"Квартира {apartment_id}",
+        price_rub=1000 * apartment_id,
+        rooms=1,
+        floor=1,
+        area_m2=30.0,
+        cover_variants={"small_webp": f"/img/{apartment_id}.webp"},
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    )
+
+
+def test_materialize_catalog_slices_pages_for_every_variant():
+    service = MaterializationService(pages=3)
+    redis_client = MagicMock()
+    redis_client.smembers.return_value = {b"2:price_rub:asc", b"4:price_rub:asc"}
+    service.cache_service.redis_client = redis_client
+    pipeline = redis_client.pipeline.return_value
+
+    cards = [make_card(apartment_id) for apartment_id in range(1, 6)]
+    with patch("src.services.materialization_service.ApartmentService.get_apartments",
+               return_value=(cards, 5)) as get_apartments:
+        written = service.materialize_catalog(db=MagicMock())
+
+    # Карточки читаются одним запросом на пару (sort, order)
+    get_apartments.assert_called_once()
+    assert get_apartments.call_args.kwargs["page_size"] == 12
+
+    stored = {call.args[0]: json.loads(unpack_json(call.args[1])) for call in pipeline.set.call_args_list}
+    deleted = [call.args[0] for call in pipeline.delete.call_args_list]
+
+    assert written == 5
+    assert [item["id"] for item in stored["apartments:materialized:list:2:price_rub:asc:3"]["items"]] == [5]
+    assert [item["id"] for item in stored["apartments:materialized:list:4:price_rub:asc:2"]["items"]] == [5]
+    assert stored["apartments:materialized:list:4:price_rub:asc:1"]["total"] == 5
+    assert deleted == ["apartments:materialized:list:4:price_rub:asc:3"]
+    pipeline.execute.assert_called_once()
+
+
+def make_apartment(apartment_id):
+    return SimpleNamespace(
+        id=apartment_id,
+        title=f"Квартира {apartment_id}",
+        price_rub=1000,
+        rooms=1,
+        floor=1,
+        area_m2=30.0,
+        address="ул. Ленина, 1",
+        description=None,
+        active=True,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        booking_enabled=True,
+        updated_at=datetime(2025, 1, 2, tzinfo=timezone.utc)
+    )
+
+
+def test_build_apartment_details_batches_queries():
+    photos = {
+        1: [{"variants": {"medium_webp": "/img/1-medium.webp", "original": "/img/1.jpg"}}],
+        3: []
+    }
+    with patch("src.services.materialization_service.ApartmentService.get_apartments_by_ids",
+               return_value=[make_apartment(3), make_apartment(1)]) as get_apartments, \
+            patch("src.services.materialization_service.ApartmentService.get_photos_with_variants_by_apartment_ids",
+                  return_value=photos) as get_photos:
+        details = MaterializationService.build_apartment_details(db=MagicMock(), apartment_ids=[1, 2, 3])
+
+    get_apartments.assert_called_once()
+    get_photos.assert_called_once()
+    assert sorted(details) == [1, 3]
+    assert details[1].photos == ["/img/1-medium.webp"]
+    assert details[3].photos == []
+
+
+@pytest.mark.asyncio
+async def test_fill_apartment_details_does_not_overwrite_fresh_values():
+    service = MaterializationService()
+    service.cache_service.redis_client = MagicMock()
+    pipeline = MagicMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipeline)
+    pipeline.__aexit__ = AsyncMock(return_value=False)
+    pipeline.execute = AsyncMock(return_value=[True])
+    service.cache_service.apipeline = MagicMock(return_value=pipeline)
+
+    with patch("src.services.materialization_service.ApartmentService.get_apartments_by_ids",
+               return_value=[make_apartment(1)]), \
+            patch("src.services.materialization_service.ApartmentService.get_photos_with_variants_by_apartment_ids",
+                  return_value={1: []}):
+        details = MaterializationService.build_apartment_details(db=MagicMock(), apartment_ids=[1])
+
+    bodies = await service.fill_apartment_details(details, {1: 42})
+
+    assert json.loads(unpack_json(bodies[1]))["id"] == 1
+    assert pipeline.set.call_args.args[0] == "apartments:materialized:detail:1"
+    assert pipeline.set.call_args.kwargs["nx"] is True
+    pipeline.execute.assert_awaited_once()
+    service.cache_service.redis_client.pipeline.assert_not_called()
+
+
+def test_materialize_missing_apartments_skips_cached_details():
+    service = MaterializationService()
+    service.cache_service.redis_client = MagicMock()
+    service.cache_service.redis_client.mget.return_value = [b"cached", None, None]
+    pipeline = service.cache_service.redis_client.pipeline.return_value
+    pipeline.execute.return_value = [True]
+
+    with patch("src.services.materialization_service.resource_version_service") as versions, \
+            patch.object(MaterializationService, "build_apartment_details",
+                         return_value={2: MaterializationService.to_apartment_detail(make_apartment(2), [])}) as build:
+        versions.get_apartment_versions.return_value = {2: 7}
+        written = service.materialize_missing_apartments(MagicMock(), [1, 2, 3])
+
+    assert written == 1
+    assert build.call_args.args[1] == [2, 3]
+    assert pipeline.set.call_args.args[0] == "apartments:materialized:detail:2"
+    assert pipeline.set.call_args.kwargs["nx"] is True
@@ -1,9 +1,11 @@
 import pytest
 import io
+import tenacity
 from unittest.mock import patch, MagicMock
 from PIL import Image
 from minio.error import S3Error
 
+from src.config.settings import settings
 from src.services.minio_service import MinioService
 from src.services.image_service import ImageService
 
@@ -159,4 +161,108 @@ def test_error_handling(minio_client_mock):
     # Проверяем, что исключение прокидывается
     service = MinioService()
     with pytest.raises(S3Error):
-        service._ensure_bucket_exists()
\ No newline at end of file
+        service._ensure_bucket_exists()
+
+# Тест отката параллельной загрузки: при ошибке одного файла удаляются загруженные
+def test_upload_files_rolls_back_on_failure(minio_client_mock, monkeypatch):
+    monkeypatch.setattr(MinioService._upload_file_with_retry.retry, "wait", tenacity.wait_none())
+
+    def put_object(**kwargs):
+        if kwargs["object_name"].endswith("_small_jpeg.jpg"):
+            raise S3Error("PutFailed", "Test error", "resource", "request_id", "host_id", None)
+
+    minio_client_mock.put_object.side_effect = put_object
+    uploads = [
+        {"file_path": f"apartments/1/abc123_{variant}", "file_content": b"data",
+         "content_type": "image/jpeg", "metadata": {}}
+        for variant in ("small_webp.webp", "small_jpeg.jpg", "original_jpeg.jpg")
+    ]
+
+    service = MinioService()
+    with pytest.raises(S3Error):
+        service._upload_files(uploads)
+
+    # Неудачный файл загружается с повторными попытками
+    assert minio_client_mock.put_object.call_count == 2 + 3
+    removed = {call.kwargs["object_name"] for call in minio_client_mock.remove_object.call_args_list}
+    assert removed == {"apartments/1/abc123_small_webp.webp", "apartments/1/abc123_original_jpeg.jpg"}
+
+
+# Тест временного хранения исходника: задача получает ключ и контрольную сумму
+def test_stage_and_read_staged_upload(minio_client_mock, test_image, monkeypatch):
+    monkeypatch.setattr("src.services.minio_service._staging_bucket_ready", False)
+    minio_client_mock.bucket_exists.return_value = False
+    minio_client_mock.get_bucket_lifecycle.return_value = None
+    stored = {}
+
+    def put_object(**kwargs):
+        stored[kwargs["object_name"]] = kwargs["data"].read()
+
+    def get_object(bucket_name, object_name):
+        response = MagicMock()
+        content = stored[object_name]
+        response.stream.side_effect = lambda amt: (content[i:i + amt] for i in range(0, len(content), amt))
+        return response
+
+    minio_client_mock.put_object.side_effect = put_object
+    minio_client_mock.get_object.side_effect = get_object
+
+    service = MinioService()
+    staging_key, checksum = service.stage_upload(test_image, 1)
+
+    # Бакет временного хранения создается закрытым, с правилом удаления исходников
+    minio_client_mock.make_bucket.assert_called_with(settings.MINIO_STAGING_BUCKET)
+    minio_client_mock.set_bucket_lifecycle.assert_called_once()
+    assert staging_key.startswith("1/")
+    assert service.read_staged_upload(staging_key, checksum) == test_image
+
+    # Поврежденный исходник не обрабатывается (ошибка валидации, без повторных попыток)
+    with pytest.raises(ValueError):
+        service.read_staged_upload(staging_key, "0" * 64)
+    assert minio_client_mock.get_object.call_count == 2
+
+
+# Тест: неудачная загрузка не повторяет обработку целиком и учитывается один раз
+def test_upload_image_with_manifest_is_not_retried(minio_client_mock, test_image, monkeypatch):
+    monkeypatch.setattr(MinioService._upload_file_with_retry.retry, "wait", tenacity.wait_none())
+    minio_client_mock.put_object.side_effect = S3Error(
+        "PutFailed", "Test error", "resource", "request_id", "host_id", None
+    )
+
+    service = MinioService()
+    with patch("src.services.minio_service._record_upload_stats") as record_stats, \
+            patch.object(ImageService, "decode_image", wraps=ImageService.decode_image) as decode:
+        with pytest.raises(S3Error):
+            service.upload_image_with_manifest(test_image, 1)
+
+    decode.assert_called_once()
+    record_stats.assert_called_once()
+    assert record_stats.call_args.kwargs["failed"] is True
+    # Каждый из 5 вариантов - три попытки загрузки файла
+    assert minio_client_mock.put_object.call_count == 5 * 3
+
+
+# Тест: правило удаления исходников добавляется и в уже существующий бакет
+def test_staging_bucket_lifecycle_applied_to_existing_bucket(minio_client_mock, monkeypatch):
+    from minio.commonconfig import ENABLED, Filter
+    from minio.lifecycleconfig import Expiration, LifecycleConfig, Rule
+    from src.services.minio_service import STAGING_RULE_ID
+
+    monkeypatch.setattr("src.services.minio_service._staging_bucket_ready", False)
+    other_rule = Rule(ENABLED, rule_filter=Filter(prefix="tmp/"), rule_id="ops-rule", expiration=Expiration(days=7))
+    minio_client_mock.get_bucket_lifecycle.return_value = LifecycleConfig([other_rule])
+
+    service = MinioService()
+    service._ensure_staging_bucket_exists()
+
+    minio_client_mock.make_bucket.assert_not_called()
+    bucket_name, config = minio_client_mock.set_bucket_lifecycle.call_args.args
+    assert bucket_name == settings.MINIO_STAGING_BUCKET
+    assert [rule.rule_id for rule in config.rules] == ["ops-rule", STAGING_RULE_ID]
+
+    # Правило с актуальным сроком не перезаписывается
+    monkeypatch.setattr("src.services.minio_service._staging_bucket_ready", False)
+    minio_client_mock.set_bucket_lifecycle.reset_mock()
+    minio_client_mock.get_bucket_lifecycle.return_value = config
+    service._ensure_staging_bucket_exists()
+    minio_client_mock.set_bucket_lifecycle.assert_not_called()
@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime, timezone
+from src.utils.pagination import (
+    CURSOR_NEXT, CURSOR_PREV, InvalidCursorError, decode_cursor, encode_cursor
+)
+
+
+@pytest.mark.parametrize("sort,value", [
+    ("created_at", datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc)),
+    ("price_rub", 1500),
+])
+@pytest.mark.parametrize("direction", [CURSOR_NEXT, CURSOR_PREV])
+def test_cursor_roundtrip(sort, value, direction):
+    cursor = encode_cursor(sort, "desc", value, 42, direction)
+
+    position = decode_cursor(cursor, sort, "desc")
+
+    assert position == {"value": value, "id": 42, "direction": direction}
+
+
+def test_cursor_is_bound_to_sort():
+    cursor = encode_cursor("price_rub", "asc", 1500, 1)
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "price_rub", "desc")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "created_at", "asc")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "eyJ4IjoxfQ", "W10"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "price_rub", "asc")
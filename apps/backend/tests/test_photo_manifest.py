@@ -0,0 +1,52 @@
+import io
+from PIL import Image
+from src.services.minio_service import MinioService
+from src.services.photo_manifest_service import (
+    build_variant_entry, get_variant_urls, get_image_id, has_manifest, pick_cover_url
+)
+
+
+def test_get_variant_urls_from_manifest():
+    photo_metadata = {
+        "image_id": "abc123",
+        "variants": {
+            "small_webp": build_variant_entry("http://test/abc123_small_webp.webp", 400, 300, 1000),
+            "thumbnail_webp": build_variant_entry("http://test/abc123_thumbnail_webp.webp", 150, 113, 200),
+        }
+    }
+
+    variants = get_variant_urls(photo_metadata, fallback_url="http://test/fallback.jpg")
+
+    assert variants == {
+        "small_webp": "http://test/abc123_small_webp.webp",
+        "thumbnail_webp": "http://test/abc123_thumbnail_webp.webp",
+    }
+    assert has_manifest(photo_metadata)
+    assert pick_cover_url(variants) == "http://test/abc123_small_webp.webp"
+
+
+def test_get_variant_urls_legacy_formats():
+    # Старый формат {variant: url}
+    assert get_variant_urls({"variants": {"small_jpeg": "http://test/a.jpg"}}) == {"small_jpeg": "http://test/a.jpg"}
+
+    # Без манифеста используется основной URL
+    assert get_variant_urls({"processing_status": "pending"}, fallback_url="http://test/a.jpg") == {
+        "original": "http://test/a.jpg"
+    }
+    assert get_variant_urls(None) == {}
+    assert not has_manifest(None)
+
+
+def test_get_image_id():
+    assert get_image_id({"image_id": "abc123"}, "http://test/apartments/1/other_small_webp.webp") == "abc123"
+    assert get_image_id(None, "http://test/apartments/1/abc123_small_webp.webp") == "abc123"
+    assert get_image_id(None, None) is None
+
+
+def test_get_image_dimensions():
+    img = Image.new('RGB', (640, 480), color='red')
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='WEBP')
+
+    assert MinioService._get_image_dimensions(img_bytes.getvalue()) == (640, 480)
+    assert MinioService._get_image_dimensions(b"not an image") == (None, None)
@@ -0,0 +1,36 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.services import resource_version_service as versions_module
+from src.services.resource_version_service import ResourceVersionService
+
+
+@pytest.fixture
+def service():
+    with patch.object(versions_module, "get_redis"):
+        yield ResourceVersionService()
+
+
+@pytest.mark.asyncio
+async def test_async_reads_use_async_client(service):
+    async_client = MagicMock()
+    script = async_client.register_script.return_value = AsyncMock(return_value=["100", "7", "9"])
+
+    with patch.object(versions_module, "get_async_redis", return_value=async_client) as get_async_redis:
+        assert await service.aget_apartment_versions([1, 2]) == {1: 7, 2: 9}
+
+    get_async_redis.assert_called_once_with(decode_responses=True)
+    assert script.await_args.kwargs["args"][1:] == [1, 2]
+    # Синхронный клиент в цикле событий не используется
+    service.redis_client.register_script.return_value.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_reads_survive_redis_errors(service):
+    async_client = MagicMock()
+    async_client.register_script.return_value = AsyncMock(side_effect=ConnectionError("down"))
+
+    with patch.object(versions_module, "get_async_redis", return_value=async_client):
+        assert await service.aget_catalog_version() is None
+        assert await service.aget_apartment_version(1) is None
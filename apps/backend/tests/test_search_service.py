@@ -0,0 +1,126 @@
+import re
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.services import search_service
+from src.services.search_service import SearchService
+
+
+def compile_sql(condition):
+    compiled = condition.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+def test_normalize_query():
+    assert SearchService.normalize_query("  Ёлки,  ул. ЛЕНИНА!! ") == "елки ул ленина"
+    assert SearchService.normalize_query('"новый ремонт" -студия') == '"новый ремонт" -студия'
+    assert SearchService.normalize_query("?!") == ""
+
+
+def test_build_condition_full_text_only(monkeypatch):
+    monkeypatch.setattr(SearchService, "trigram_enabled", False)
+
+    sql, params = compile_sql(SearchService.build_condition("ленина"))
+    assert "apartment.search_vector @@ websearch_to_tsquery(" in sql
+    assert set(params.values()) == {"russian", "ленина"}
+    assert "<%" not in sql
+    assert "ILIKE" not in sql.upper()
+
+
+def test_build_condition_with_trigrams_and_substring(monkeypatch):
+    monkeypatch.setattr(SearchService, "trigram_enabled", True)
+
+    sql, params = compile_sql(SearchService.build_condition("ленина", substring=" Ленина "))
+    assert "@@ websearch_to_tsquery(" in sql
+    # "запрос <% колонка" (в pyformat знак % экранируется)
+    assert re.search(r"<%+ apartment\.address", sql)
+    assert re.search(r"<%+ apartment\.title", sql)
+    assert "apartment.title ILIKE" in sql
+    assert "apartment.address ILIKE" in sql
+    assert "%Ленина%" in params.values()
+
+
+def test_build_condition_substring_keeps_punctuation_and_escapes_wildcards(monkeypatch):
+    monkeypatch.setattr(SearchService, "trigram_enabled", False)
+
+    # Полнотекстовый поиск - по нормализованному запросу, подстрока - по исходному
+    sql, params = compile_sql(SearchService.build_condition("ул ленина 5", substring="ул. Ленина, 5"))
+    assert "%ул. Ленина, 5%" in params.values()
+    assert "ул ленина 5" in params.values()
+    assert "ESCAPE" in sql.upper()
+
+    _, params = compile_sql(SearchService.build_condition("50", substring="50%_\\"))
+    assert "%50\\%\\_\\\\%" in params.values()
+
+
+class FakeCache:
+    """Кеш в памяти вместо Redis."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, expire=None):
+        self.values[key] = value
+
+
+@pytest.fixture
+def search_env(monkeypatch):
+    monkeypatch.setattr(SearchService, "trigram_enabled", False)
+    cache = FakeCache()
+    version = {"value": 1}
+    db = MagicMock()
+    db.query.return_value.filter.return_value.filter.return_value.order_by.return_value \
+        .limit.return_value.all.return_value = [(3,), (1,)]
+
+    with patch.object(search_service, "cache_service", cache), \
+            patch.object(search_service.catalog_index, "remote_version", lambda: version["value"]):
+        yield cache, version, db
+
+
+def test_search_ids_miss_queries_db_and_caches(search_env):
+    cache, _, db = search_env
+
+    assert SearchService.search_ids(db, "  Ленина ") == [3, 1]
+    db.query.assert_called_once()
+    assert list(cache.values.values()) == [[3, 1]]
+    key = next(iter(cache.values))
+    assert key.startswith("apartments:search:1:1:")
+
+
+def test_search_ids_hit_skips_db(search_env):
+    cache, _, db = search_env
+
+    SearchService.search_ids(db, "ленина")
+    db.query.reset_mock()
+
+    # Тот же нормализованный запрос - из кеша
+    assert SearchService.search_ids(db, "ЛЕНИНА!") == [3, 1]
+    db.query.assert_not_called()
+
+
+def test_search_ids_invalidated_by_catalog_version(search_env):
+    cache, version, db = search_env
+
+    SearchService.search_ids(db, "ленина")
+    db.query.reset_mock()
+
+    # Изменение каталога повышает версию - закешированный результат не используется
+    version["value"] = 2
+    SearchService.search_ids(db, "ленина")
+    db.query.assert_called_once()
+    assert sorted(key.split(":")[2] for key in cache.values) == ["1", "2"]
+
+
+def test_search_ids_without_catalog_version_is_not_cached(search_env):
+    cache, version, db = search_env
+    version["value"] = None
+
+    assert SearchService.search_ids(db, "ленина") == [3, 1]
+    assert SearchService.search_ids(db, "ленина") == [3, 1]
+    assert db.query.call_count == 2
+    assert cache.values == {}
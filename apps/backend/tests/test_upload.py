@@ -19,8 +19,10 @@ def test_upload_photo_success(client: TestClient, db: Session, minio_mock):
     files = {"file": ("test.jpg", test_image, "image/jpeg")}
     data = {"apartment_id": str(apartment_id)}
 
-    # Мокаем вызов Celery task
-    with patch("src.api.apartments.process_image") as mock_process_image:
+    # Мокаем временное хранилище исходника и вызов Celery task
+    with patch("src.api.apartments.minio_service.stage_upload",
+               return_value=(f"{apartment_id}/staged", "checksum")), \
+            patch("src.api.apartments.process_image") as mock_process_image:
         # Настраиваем мок для возврата URL
         mock_task = mock_process_image.delay.return_value
         mock_task.get.return_value = "https://example.com/test_uploaded.jpg"
@@ -42,8 +44,8 @@ def test_upload_photo_success(client: TestClient, db: Session, minio_mock):
         assert result["url"] == "https://example.com/test_uploaded.jpg"
         assert result["apartment_id"] == apartment_id
 
-        # Проверяем, что Celery task был вызван
-        mock_process_image.delay.assert_called_once()
+        # Проверяем, что Celery task получил ключ исходника, а не его содержимое
+        mock_process_image.delay.assert_called_once_with(f"{apartment_id}/staged", "checksum", apartment_id)
 
 
 def test_upload_photo_invalid_format(client: TestClient, db: Session):